@@ -1,9 +1,133 @@
-from openai import OpenAI
+from openai import OpenAI, BadRequestError
+from concurrent.futures import ThreadPoolExecutor
 import os
 import re
+import sys
 import json
+import time
 
-def validate_code_complexity(src, expected_complexity, api_key=None, base_url=None):
+# 复用auto目录下的公共模块（分层顺序、序贯评估等）
+AUTO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'auto')
+if AUTO_DIR not in sys.path:
+    sys.path.insert(0, AUTO_DIR)
+
+from sequential_eval import SequentialEvaluator, stratified_order, load_baseline_accuracy
+from sampling import sample_jsonl
+from dedup import load_clusters, group_by_cluster, dedup_summary
+from progress import ProgressReporter, JsonlLogSink
+from retrieval_index import RetrievalIndex
+from adaptive_concurrency import AIMDController, fixed_controller, run_with_controller, is_throttled_record
+from token_estimator import estimate_message_tokens
+from telemetry import (TELEMETRY_FIELDS, empty_telemetry, provider_name, usage_tokens, summarize_telemetry,
+                       export_telemetry)
+from self_consistency import Election, summarize_votes
+from complexity_labels import canonical_label, labels_match
+from constrained_decoding import (CLASSIFICATION_INSTRUCTION, classification_request_options, drop_rejected_option,
+                                  parse_label_output, label_probabilities, summarize_decoding)
+
+# 验证使用的默认模型、API密钥和API基础URL
+DEFAULT_MODEL = "gpt-5.1"
+DEFAULT_API_KEY = "sk-3sNQAO5ydpVp29WWoCqvM7Ajqzd1I5WKOpe29cpoT3DoMrZe"
+DEFAULT_BASE_URL = "https://yunwu.ai/v1"
+
+# 定义提示词，要求模型分析代码复杂度
+SYSTEM_PROMPT = """你是一位算法分析专家，精通时间复杂度分析。
+    你的任务是：
+    1. 分析给定代码的时间复杂度
+    2. 仅返回复杂度的标准术语，如：constant、linear、logn、nlogn、quadratic、cubic、np。
+    3. 不要输出任何解释或额外信息，只输出复杂度术语本身"""
+
+
+def format_user_prompt(src):
+    """
+    生成要求模型分析一段代码的用户提示词
+
+    参数:
+    src (str): 源代码
+
+    返回:
+    str: 用户提示词
+    """
+    return f"""请分析以下代码的时间复杂度，并仅返回标准的复杂度术语：
+    ```
+    {src}
+    ```
+    
+    请严格按照要求，只输出复杂度术语，不要添加任何其他内容！"""
+
+
+def few_shot_messages(examples, constrained=False):
+    """
+    把有标签的示例转换为成对的用户/助手消息
+
+    参数:
+    examples (list): 包含src和complexity的示例字典列表
+    constrained (bool): 助手回答是否使用分类模式的JSON格式
+
+    返回:
+    list: 消息列表
+    """
+    messages = []
+    for example in examples:
+        answer = json.dumps({"label": example['complexity']}) if constrained else example['complexity']
+        messages.append({"role": "user", "content": format_user_prompt(example['src'])})
+        messages.append({"role": "assistant", "content": answer})
+    return messages
+
+
+def build_messages(src, examples=None, constrained=False):
+    """
+    构造验证一段代码时发送给模型的完整消息：系统提示词、少样本示例消息对和待分析代码
+
+    参数:
+    src (str): 源代码
+    examples (list, optional): 少样本示例（包含src和complexity的字典）
+    constrained (bool): 是否为分类模式，系统提示词追加JSON输出格式要求
+
+    返回:
+    list: 消息列表
+    """
+    system_prompt = SYSTEM_PROMPT + CLASSIFICATION_INSTRUCTION if constrained else SYSTEM_PROMPT
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(few_shot_messages(examples or [], constrained))
+    messages.append({"role": "user", "content": format_user_prompt(src)})
+    return messages
+
+
+def select_few_shot_examples(index, src, problem=None, k=3, token_budget=1500, candidates=None):
+    """
+    从检索索引中选出与代码最相似的有标签示例，示例消息的估算token总数不超过预算
+
+    参数:
+    index (RetrievalIndex): 以内存映射方式打开的检索索引
+    src (str): 待分析的源代码
+    problem (str): 待分析代码所属的问题，该问题下的样本不会作为示例，避免泄漏答案；
+        为空时不按问题排除（数据集记录缺少problem字段时，空字符串会排除所有同样缺少该字段的样本）
+    k (int): 最多选出的示例数
+    token_budget (int): 示例消息的token预算；超出预算的示例被跳过，继续尝试排名靠后的较短示例
+    candidates (int): 检索的候选数，默认为3*k
+
+    返回:
+    list: 按相似度降序排列的示例字典（src、complexity、problem、score）
+    """
+    selected = []
+    remaining = token_budget
+    for example in index.neighbors(src, k=candidates or 3 * k, exclude_problem=problem or None):
+        if example['src'] == src:
+            # 数据集记录没有problem字段时，至少不把待分析代码本身作为示例
+            continue
+        cost = sum(estimate_message_tokens(message) for message in few_shot_messages([example]))
+        if cost > remaining:
+            continue
+        selected.append(example)
+        remaining -= cost
+        if len(selected) >= k:
+            break
+    return selected
+
+def validate_code_complexity(src, expected_complexity, api_key=None, base_url=None, verbose=True, examples=None,
+                             model=None, messages=None, client=None, temperature=0.0, constrained=False,
+                             logprobs=True):
     """
     验证代码的时间复杂度是否与期望复杂度一致，并返回详细记录
     
@@ -12,6 +136,16 @@ def validate_code_complexity(src, expected_complexity, api_key=None, base_url=No
     expected_complexity (str): 期望的时间复杂度，如 'linear', 'quadratic', 'constant', 'nlogn', 'logn' 等
     api_key (str, optional): OpenAI API密钥，如果不提供则使用默认密钥
     base_url (str, optional): API基础URL，如果不提供则使用默认URL
+    verbose (bool, optional): 是否打印期望复杂度、模型输出和匹配结果，批量验证时关闭
+    examples (list, optional): 少样本示例（包含src和complexity的字典），以用户/助手消息对的形式放在待分析代码之前
+    model (str, optional): 模型名称，默认DEFAULT_MODEL
+    messages (list, optional): 预先由build_messages()构造的消息，指定时忽略src和examples，
+        多个模型验证同一样本时共享同一份消息
+    client (OpenAI, optional): 复用的客户端（线程安全，可在并发请求间共享），指定时忽略api_key和base_url
+    temperature (float, optional): 采样温度，自一致性投票时使用非零温度
+    constrained (bool, optional): 分类模式：以枚举约束的JSON输出一个标签，限制max_completion_tokens并设置停止序列；
+        服务端以400拒绝时逐个去掉不支持的参数（logprobs、stop、response_format、max_completion_tokens）重试
+    logprobs (bool, optional): 分类模式下是否读取标签位置的top_logprobs作为置信度
     
     返回:
     dict: 包含验证结果的详细记录
@@ -20,29 +154,32 @@ def validate_code_complexity(src, expected_complexity, api_key=None, base_url=No
         - model_raw_output (str): 模型原始输出
         - model_analyzed_complexity (str): 分析后的模型复杂度
         - error (str): 错误信息（如有）
+        - status_code (int): 请求失败时的HTTP状态码（如有），429/503表示被限流
+        - model、provider (str): 模型名称和服务商（API主机名）
+        - prompt_tokens、completion_tokens (int): token用量，服务端未返回usage时为本地估算值
+        - tokens_estimated (bool): token用量是否为估算值
+        - latency_ms (float): 请求总耗时（含客户端重试）
+        - ttfb_ms (float): 发出请求到收到响应头的耗时，请求失败时为None
+        - retries (int): 客户端重试次数，请求失败时为None
+        - off_format (bool): 仅分类模式，回复不是合法的JSON标签
+        - label_probabilities (dict): 仅分类模式，各标签的概率，服务端不支持logprobs时为None
+        - label_confidence (float): 仅分类模式，所选标签的概率
     """
     # 设置默认API参数
     if api_key is None:
-        api_key = "sk-3sNQAO5ydpVp29WWoCqvM7Ajqzd1I5WKOpe29cpoT3DoMrZe"
+        api_key = DEFAULT_API_KEY
     if base_url is None:
-        base_url = "https://yunwu.ai/v1"
+        base_url = DEFAULT_BASE_URL
     
-    # 创建OpenAI客户端
-    client = OpenAI(api_key=api_key, base_url=base_url)
-    
-    # 定义提示词，要求模型分析代码复杂度
-    system_prompt = """你是一位算法分析专家，精通时间复杂度分析。
-    你的任务是：
-    1. 分析给定代码的时间复杂度
-    2. 仅返回复杂度的标准术语，如：constant、linear、logn、nlogn、quadratic、cubic、np。
-    3. 不要输出任何解释或额外信息，只输出复杂度术语本身"""
+    if model is None:
+        model = DEFAULT_MODEL
     
-    user_prompt = f"""请分析以下代码的时间复杂度，并仅返回标准的复杂度术语：
-    ```
-    {src}
-    ```
+    # 创建OpenAI客户端
+    if client is None:
+        client = OpenAI(api_key=api_key, base_url=base_url)
     
-    请严格按照要求，只输出复杂度术语，不要添加任何其他内容！"""
+    if messages is None:
+        messages = build_messages(src, examples, constrained)
     
     # 初始化记录字典
     record = {
@@ -50,23 +187,54 @@ def validate_code_complexity(src, expected_complexity, api_key=None, base_url=No
         'expected_complexity': expected_complexity.lower().strip(),
         'model_raw_output': None,
         'model_analyzed_complexity': None,
-        'error': None
+        'error': None,
+        'status_code': None
     }
+    record.update(empty_telemetry(), model=model, provider=provider_name(str(client.base_url)))
+    options = {}
+    if constrained:
+        options = classification_request_options(logprobs)
+        record.update(off_format=None, label_probabilities=None, label_confidence=None)
     
+    def _create():
+        # 调用大模型API；原始响应在收到响应头时返回，用于记录首字节延迟和重试次数
+        with client.chat.completions.with_streaming_response.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            stream=False,
+            **options
+        ) as raw_response:
+            record['ttfb_ms'] = (time.perf_counter() - start) * 1000
+            record['retries'] = raw_response.retries_taken
+            return raw_response.parse()
+    
+    start = time.perf_counter()
     try:
-        # 调用大模型API
-        response = client.chat.completions.create(
-            model="gpt-5.1",
-            temperature=0.0,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            stream=False
-        )
+        while True:
+            try:
+                response = _create()
+                break
+            except BadRequestError as e:
+                # 服务端不支持某个分类模式参数时逐个去掉重试，没有可去掉的参数时照常报错
+                options = drop_rejected_option(options, e)
+                if options is None:
+                    raise
+        record['latency_ms'] = (time.perf_counter() - start) * 1000
         
         # 提取模型原始回复
-        model_raw_output = response.choices[0].message.content.strip().lower()
+        content = response.choices[0].message.content or ''
+        model_raw_output = content.strip().lower()
+        record['prompt_tokens'], record['completion_tokens'], record['tokens_estimated'] = usage_tokens(
+            response, messages, content)
+        if constrained:
+            label = parse_label_output(content)
+            probabilities = label_probabilities(response.choices[0].logprobs, content, label)
+            record['off_format'] = label is None
+            record['label_probabilities'] = probabilities
+            record['label_confidence'] = probabilities.get(label) if probabilities else None
+            if label is not None:
+                model_raw_output = label
         record['model_raw_output'] = model_raw_output
         
         # 清理模型输出，提取关键复杂度术语
@@ -76,43 +244,155 @@ def validate_code_complexity(src, expected_complexity, api_key=None, base_url=No
         record['is_match'] = is_match
         
         # 记录日志
-        print(f"期望复杂度: {record['expected_complexity']}")
-        print(f"模型原始输出: {record['model_raw_output']}")
-        # print(f"模型分析复杂度: {record['model_analyzed_complexity']}")
-        print(f"匹配结果: {record['is_match']}")
+        if verbose:
+            print(f"期望复杂度: {record['expected_complexity']}")
+            print(f"模型原始输出: {record['model_raw_output']}")
+            # print(f"模型分析复杂度: {record['model_analyzed_complexity']}")
+            print(f"匹配结果: {record['is_match']}")
         
         return record
         
     except Exception as e:
         error_msg = str(e)
+        if record['latency_ms'] is None:
+            record['latency_ms'] = (time.perf_counter() - start) * 1000
         record['error'] = error_msg
-        print(f"分析代码复杂度时出错: {error_msg}")
+        record['status_code'] = getattr(e, 'status_code', None)
+        if verbose:
+            print(f"分析代码复杂度时出错: {error_msg}")
         return record
 
 
+def complexity_label(output):
+    """
+    把模型输出归一为utils.COMPLEXITY_TYPES中的标签，用于投票计数
+
+    参数:
+    output (str): 模型输出（已去除首尾空白并转为小写）
+
+    返回:
+    str: 标签，无法识别时返回输出本身，输出为空时返回None
+    """
+    if not output:
+        return None
+    return canonical_label(output) or output
+
+
+def vote_code_complexity(src, expected_complexity, k=5, temperature=0.7, api_key=None, base_url=None,
+                         examples=None, model=None, messages=None, client=None, constrained=False, controller=None):
+    """
+    自一致性投票：以非零温度对同一段代码最多采样k次，某个标签获得不可翻盘的多数时停止采样
+
+    每一轮并行发出self_consistency.Election.next_wave()给出的请求数，失败的请求消耗名额但不计票。
+
+    参数:
+    src (str): 源代码
+    expected_complexity (str): 期望的时间复杂度
+    k (int): 最大采样数
+    temperature (float): 采样温度
+    api_key、base_url、examples、model、messages、client、constrained: 同validate_code_complexity()
+    controller (AIMDController, optional): 共享的并发控制器，指定时每个采样请求各占用一个并发名额，
+        请求的延迟和限流信号逐个反馈给控制器；调用方不能在占用同一控制器名额时调用，否则可能死锁
+
+    返回:
+    dict: 与validate_code_complexity()相同的字段，model_raw_output为获胜标签，遥测字段为全部请求的合计
+        （latency_ms为整个投票过程的耗时，ttfb_ms为第一轮最快的首字节延迟），另有：
+        - votes (dict): 标签到票数
+        - vote_confidence (float): 获胜标签占有效票的比例
+        - vote_calls (int): 实际发出的请求数
+        - vote_k (int): 最大采样数
+        - vote_failed (int): 失败的请求数
+    """
+    if client is None:
+        client = OpenAI(api_key=api_key or DEFAULT_API_KEY, base_url=base_url or DEFAULT_BASE_URL)
+    if messages is None:
+        messages = build_messages(src, examples, constrained)
+    
+    def _sample(_):
+        started_at = controller.acquire() if controller is not None else None
+        throttled = False
+        try:
+            result = validate_code_complexity(None, expected_complexity, verbose=False, model=model,
+                                              messages=messages, client=client, temperature=temperature,
+                                              constrained=constrained, logprobs=False)
+            throttled = is_throttled_record(result)
+            return result
+        finally:
+            if controller is not None:
+                controller.release(started_at, throttled=throttled)
+    
+    election = Election(k)
+    calls = []
+    start = time.perf_counter()
+    while True:
+        wave = election.next_wave()
+        if not wave:
+            break
+        if wave == 1:
+            results = [_sample(0)]
+        else:
+            with ThreadPoolExecutor(max_workers=wave) as executor:
+                results = list(executor.map(_sample, range(wave)))
+        for result in results:
+            election.add(None if result['error'] else complexity_label(result['model_raw_output']))
+        calls.extend(results)
+    
+    record = dict(calls[-1])
+    winner = election.winner
+    first_wave = [call['ttfb_ms'] for call in calls[:max(1, k // 2 + 1)] if call['ttfb_ms'] is not None]
+    record.update(
+        model_raw_output=winner,
+        is_match=winner is not None and compare_complexity(winner, record['expected_complexity']),
+        error=None if winner is not None else record['error'],
+        status_code=None if winner is not None else record['status_code'],
+        prompt_tokens=sum(call['prompt_tokens'] or 0 for call in calls),
+        completion_tokens=sum(call['completion_tokens'] or 0 for call in calls),
+        tokens_estimated=any(call['tokens_estimated'] for call in calls),
+        latency_ms=(time.perf_counter() - start) * 1000,
+        ttfb_ms=min(first_wave) if first_wave else None,
+        retries=sum(call['retries'] or 0 for call in calls),
+        votes=dict(election.counts),
+        vote_confidence=election.confidence,
+        vote_calls=election.issued,
+        vote_k=k,
+        vote_failed=election.failed
+    )
+    return record
+
+
 def compare_complexity(actual, expected):
     """
-    比较两个复杂度是否匹配，考虑可能的同义词和近似表达
+    比较两个复杂度是否匹配，同义写法（O(n log n)、Θ(n²)、代码块、句末标点等）由complexity_labels归一后比较
     """
-    # 定义复杂度等价映射
-    equivalence = {
-        'constant': {'constant', 'o(1)', '1'},
-        'linear': {'linear', 'o(n)', 'n'},
-        'logn': {'logn', 'log n', 'o(log n)', 'o(logn)'},
-        'nlogn': {'nlogn', 'n log n', 'o(n log n)', 'o(n logn)'},
-        'quadratic': {'quadratic', 'o(n^2)', 'n^2'},
-        'cubic': {'cubic', 'o(n^3)', 'n^3'},
-        'np': {'np', 'o(n^p)', 'n^p'}
-    }
+    return labels_match(actual, expected)
+
+def _count_lines(file_path, max_lines=None):
+    """
+    快速统计文件中的非空行数（用于进度显示的总数）
     
-    # 检查是否在等价集合中
-    if expected in equivalence:
-        return actual in equivalence[expected] or actual == expected
+    参数:
+    file_path (str): 文件路径
+    max_lines (int): 只统计前max_lines行
     
-    # 直接比较
-    return actual == expected
+    返回:
+    int: 非空行数
+    """
+    count = 0
+    with open(file_path, 'rb') as f:
+        for i, line in enumerate(f):
+            if max_lines is not None and i >= max_lines:
+                break
+            if line.strip():
+                count += 1
+    return count
 
-def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True, output_file=None):
+def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True, output_file=None,
+                              concurrency=1, adaptive_concurrency=False, max_concurrency=32,
+                              early_stop=False, ci_width=0.05, confidence=0.95, baseline_file=None, seed=None,
+                              sample_size=None, stratify_by=None, progress=True, sample_log=None,
+                              dedup_file=None, few_shot_index=None, few_shot_k=3, few_shot_token_budget=1500,
+                              pricing=None, telemetry_dir=None, votes=None, vote_temperature=0.7,
+                              constrained=False, api_key=None, base_url=None, model=None):
     """
     从JSONL文件批量验证代码复杂度并记录详细实验过程
     
@@ -121,6 +401,36 @@ def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True
     max_items (int): 最大处理项目数，如果为None则处理所有项目
     save_results (bool): 是否保存结果到文件
     output_file (str): 输出文件路径，如果为None则自动生成
+    concurrency (int): 并发请求数，默认为1（串行）；启用自适应并发时作为初始窗口
+    adaptive_concurrency (bool): 是否启用AIMD自适应并发，延迟平稳时加性增加并发，
+        遇到429/503（含客户端内部重试过的请求）或延迟突增时乘性收缩
+    max_concurrency (int): 自适应并发的窗口上限
+    early_stop (bool): 是否启用提前停止评估，按复杂度分层随机顺序处理样本并维护准确率置信区间
+    ci_width (float): 提前停止的置信区间目标宽度
+    confidence (float): 置信区间的置信度
+    baseline_file (str): 基线结果文件路径，准确率与其比较已有定论时停止
+    seed (int): 分层随机顺序和抽样的随机种子
+    sample_size (int): 抽样规模，指定时单次流式遍历文件抽取样本子集（在前max_items行中抽样）
+    stratify_by (list): 抽样分层字段，如['complexity']或['complexity', 'from']，为空时均匀蓄水池抽样
+    progress (bool): 是否显示限频刷新的进度行（完成数、吞吐量、剩余时间、准确率、错误数）
+    sample_log (str): 逐样本明细JSONL日志路径，由后台线程写入，替代逐样本的控制台输出
+    dedup_file (str): auto/dedup.py生成的簇ID旁路文件，指定时每簇只请求一次模型，
+        模型输出传播给簇内其他样本并按各自的期望复杂度判断是否匹配
+    few_shot_index (str 或 RetrievalIndex): auto/retrieval_index.py建立的检索索引目录或已打开的索引，
+        指定时为每个样本检索相似的有标签示例（排除同一problem）作为少样本提示
+    few_shot_k (int): 每个样本最多使用的示例数
+    few_shot_token_budget (int): 每个样本示例消息的估算token预算
+    pricing (dict): 模型单价（美元/百万token），用于费用估算，默认telemetry.DEFAULT_PRICING
+    telemetry_dir (str): 遥测导出目录，指定时把逐请求明细追加到requests.csv、运行摘要追加到runs.jsonl，
+        供跨运行绘图比较
+    votes (int): 自一致性投票的最大采样数，指定时每个样本以vote_temperature最多采样votes次，
+        某个标签获得不可翻盘的多数时停止，投票分布作为置信度；并发窗口限制的是在途的采样请求数而不是样本数
+    vote_temperature (float): 投票采样温度
+    constrained (bool): 分类模式，以枚举约束的JSON输出一个标签并读取logprobs置信度，
+        见validate_code_complexity()
+    api_key (str): API密钥，默认DEFAULT_API_KEY
+    base_url (str): API基础URL，默认DEFAULT_BASE_URL
+    model (str): 模型名称，默认DEFAULT_MODEL
     
     返回:
     tuple: (统计结果字典, 详细记录列表)
@@ -132,94 +442,247 @@ def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True
     
     # 确保结果目录存在
     results_dir = "D:/MyResearch/codeComplex/results/LLM"
-    if not os.path.exists(results_dir):
+    if save_results and not os.path.exists(results_dir):
         os.makedirs(results_dir)
     
     # 如果未指定输出文件，自动生成
     if save_results and output_file is None:
-        import datetime
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = os.path.join(results_dir, f"complexity_validation_results_{timestamp}.json")
     elif save_results and output_file and not os.path.isabs(output_file):
         # 如果指定了相对路径，转换为绝对路径到results目录
         output_file = os.path.join(results_dir, output_file)
     
+    # 整个批次共享一个客户端（线程安全），复用连接池
+    client = OpenAI(api_key=api_key or DEFAULT_API_KEY, base_url=base_url or DEFAULT_BASE_URL)
+    
+    # 并发控制器：固定并发时窗口上下限相同
+    if adaptive_concurrency:
+        controller = AIMDController(initial_window=concurrency, max_window=max_concurrency)
+    else:
+        controller = fixed_controller(concurrency)
+    
+    evaluator = None
+    if early_stop:
+        baseline = load_baseline_accuracy(baseline_file) if baseline_file else None
+        evaluator = SequentialEvaluator(target_width=ci_width, confidence=confidence, baseline=baseline)
+    available = 0
+    groups = None
+    members_of = {}
+    representatives = 0
+    representative_matches = 0
+    propagated = 0
+    
+    def _error_record(sample_id, error_msg):
+        # 格式错误或处理错误的样本记录
+        return {
+            'sample_id': sample_id,
+            'problem': '',
+            'source': '',
+            'expected_complexity': '',
+            'model_raw_output': None,
+            'model_analyzed_complexity': None,
+            'is_match': False,
+            'error': error_msg,
+            **empty_telemetry()
+        }
+    
+    def _iter_tasks(f):
+        # 在主线程中逐行解析，只把有效样本交给并发执行器
+        nonlocal available, failed
+        for i, line in enumerate(f):
+            if max_items is not None and i >= max_items:
+                break
+            
+            line = line.strip()
+            if not line:
+                continue
+            
+            try:
+                data = json.loads(line)
+                src = data.get('src', '')
+                expected_complexity = data.get('complexity', '')
+                
+                if src and expected_complexity:
+                    available += 1
+                    yield i, data
+            
+            except json.JSONDecodeError:
+                reporter.log(f"第 {i+1} 行格式错误")
+                # 记录格式错误的样本
+                detailed_records.append(_error_record(i + 1, "JSON格式错误"))
+                failed += 1
+            except Exception as e:
+                error_msg = str(e)
+                reporter.log(f"处理第 {i+1} 行时出错: {error_msg}")
+                # 记录处理错误的样本
+                detailed_records.append(_error_record(i + 1, error_msg))
+                failed += 1
+    
+    def _iter_sampled_tasks():
+        # 单次流式抽样，只保留有源代码和复杂度标签的记录
+        nonlocal available
+        sampled = sample_jsonl(jsonl_file_path, sample_size, stratify_by=stratify_by, seed=seed,
+                               max_lines=max_items, skip_invalid=True,
+                               filter_fn=lambda data: bool(data.get('src') and data.get('complexity')))
+        for line_number, data in sampled:
+            available += 1
+            yield line_number - 1, data
+    
+    def _representative_tasks(tasks):
+        # 按簇分组，只保留每簇的代表样本，其余成员在代表完成后获得传播的结果
+        nonlocal groups
+        clusters = load_clusters(dedup_file, key='line')
+        groups = group_by_cluster(tasks, lambda task: clusters.get(task[0] + 1))
+        for (i, _), members in groups:
+            members_of[i] = members
+        return [representative for representative, _ in groups]
+    
+    def _propagated_record(record, member):
+        i, data = member
+        problem = data.get('problem', '')
+        expected_complexity = data['complexity'].lower().strip()
+        output = record['model_raw_output']
+        return dict(record,
+                    sample_id=i + 1,
+                    problem=problem[:100] + '...' if len(problem) > 100 else problem,
+                    source=data.get('from', ''),
+                    expected_complexity=expected_complexity,
+                    is_match=output is not None and compare_complexity(output, expected_complexity),
+                    propagated_from=record['sample_id'],
+                    **empty_telemetry())
+    
+    def _dispatch(tasks):
+        # 提前停止后不再发出新请求，在途请求的结果仍会被统计
+        nonlocal total
+        for task in tasks:
+            if evaluator is not None and evaluator.stopped:
+                break
+            total += 1
+            yield task
+    
+    def _validate_task(task):
+        i, data = task
+        try:
+            problem = data.get('problem', '')
+            # 验证代码复杂度
+            examples = None
+            if index is not None:
+                examples = select_few_shot_examples(index, data['src'], problem, k=few_shot_k,
+                                                    token_budget=few_shot_token_budget)
+            if votes:
+                validation_result = vote_code_complexity(data['src'], data['complexity'], k=votes,
+                                                         temperature=vote_temperature, examples=examples,
+                                                         model=model, client=client, constrained=constrained,
+                                                         controller=controller)
+            else:
+                validation_result = validate_code_complexity(data['src'], data['complexity'], verbose=False,
+                                                             examples=examples, model=model, client=client,
+                                                             constrained=constrained)
+            
+            # 创建详细记录
+            record = {
+                'sample_id': i + 1,
+                'problem': problem[:100] + '...' if len(problem) > 100 else problem,
+                'source': data.get('from', ''),
+                'expected_complexity': validation_result['expected_complexity'],
+                'model_raw_output': validation_result['model_raw_output'],
+                'is_match': validation_result['is_match'],
+                'error': validation_result['error'],
+                'status_code': validation_result['status_code'],
+                **{key: validation_result[key] for key in TELEMETRY_FIELDS}
+            }
+            if examples is not None:
+                record['few_shot_examples'] = len(examples)
+            if constrained and not votes:
+                for key in ('off_format', 'label_probabilities', 'label_confidence'):
+                    record[key] = validation_result[key]
+            if votes:
+                for key in ('votes', 'vote_confidence', 'vote_calls', 'vote_k', 'vote_failed'):
+                    record[key] = validation_result[key]
+            return record
+        except Exception as e:
+            return _error_record(i + 1, str(e))
+    
+    def _on_result(task, record):
+        nonlocal total, correct, failed, representatives, representative_matches, propagated
+        detailed_records.append(record)
+        # 更新统计信息
+        if record['is_match']:
+            correct += 1
+        else:
+            failed += 1
+        reporter.update(is_match=record['is_match'], error=record['error'] is not None)
+        if sink is not None:
+            sink.write(record)
+        representatives += 1
+        representative_matches += record['is_match']
+        for member in members_of.get(task[0], ()):
+            member_record = _propagated_record(record, member)
+            detailed_records.append(member_record)
+            propagated += 1
+            total += 1
+            if member_record['is_match']:
+                correct += 1
+            else:
+                failed += 1
+            if sink is not None:
+                sink.write(member_record)
+        if evaluator is not None:
+            was_stopped = evaluator.stopped
+            if evaluator.update(record['is_match']) and not was_stopped:
+                low, high = evaluator.interval
+                reporter.log(f"提前停止({evaluator.reason})：准确率置信区间=[{low:.4f}, {high:.4f}]")
+    
+    def _on_metrics(_):
+        # 投票时调度样本的是另一个控制器，总是报告实际请求所用的控制器
+        metrics = controller.snapshot()
+        reporter.log(f"[并发控制] 窗口={metrics['window']} 在途={metrics['in_flight']} "
+                     f"吞吐={metrics['throughput']:.2f}/s 限流={metrics['throttle_events']} "
+                     f"延迟突增={metrics['latency_spike_events']}")
+    
+    # 索引按内存映射打开，并发的验证线程共享同一份
+    index = RetrievalIndex(few_shot_index) if isinstance(few_shot_index, str) else few_shot_index
+    reporter = ProgressReporter(0, stream=sys.stdout, enabled=progress)
+    sink = JsonlLogSink(sample_log) if sample_log else None
+    started = time.perf_counter()
     try:
         with open(jsonl_file_path, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f):
-                if max_items is not None and i >= max_items:
-                    break
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                try:
-                    data = json.loads(line)
-                    src = data.get('src', '')
-                    expected_complexity = data.get('complexity', '')
-                    problem = data.get('problem', '')
-                    source = data.get('from', '')
-                    
-                    if src and expected_complexity:
-                        total += 1
-                        print(f"\n--- 处理第 {total} 个代码样本 ---")
-                        # 验证代码复杂度
-                        validation_result = validate_code_complexity(src, expected_complexity)
-                        
-                        # 创建详细记录
-                        record = {
-                            'sample_id': i + 1,
-                            'problem': problem[:100] + '...' if len(problem) > 100 else problem,
-                            'source': source,
-                            'expected_complexity': validation_result['expected_complexity'],
-                            'model_raw_output': validation_result['model_raw_output'],
-                            'is_match': validation_result['is_match'],
-                            'error': validation_result['error']
-                        }
-                        detailed_records.append(record)
-                        
-                        # 更新统计信息
-                        if validation_result['is_match']:
-                            correct += 1
-                        else:
-                            failed += 1
-                
-                except json.JSONDecodeError:
-                    error_msg = "JSON格式错误"
-                    print(f"第 {i+1} 行格式错误")
-                    # 记录格式错误的样本
-                    record = {
-                        'sample_id': i + 1,
-                        'problem': '',
-                        'source': '',
-                        'expected_complexity': '',
-                        'model_raw_output': None,
-                        'model_analyzed_complexity': None,
-                        'is_match': False,
-                        'error': error_msg
-                    }
-                    detailed_records.append(record)
-                    failed += 1
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"处理第 {i+1} 行时出错: {error_msg}")
-                    # 记录处理错误的样本
-                    record = {
-                        'sample_id': i + 1,
-                        'problem': '',
-                        'source': '',
-                        'expected_complexity': '',
-                        'model_raw_output': None,
-                        'model_analyzed_complexity': None,
-                        'is_match': False,
-                        'error': error_msg
-                    }
-                    detailed_records.append(record)
-                    failed += 1
+            if sample_size or evaluator is not None or dedup_file:
+                tasks = list(_iter_sampled_tasks() if sample_size else _iter_tasks(f))
+                if dedup_file:
+                    tasks = _representative_tasks(tasks)
+                    print(f"近重复去重: {available} 个样本归为 {len(tasks)} 个簇，每簇只请求一次模型")
+                reporter.total = len(tasks)
+            else:
+                tasks = _iter_tasks(f)
+                reporter.total = _count_lines(jsonl_file_path, max_items)
+            if evaluator is not None:
+                # 分层随机顺序需要先收集全部样本的标签
+                tasks = stratified_order(tasks, key=lambda task: task[1]['complexity'].lower().strip(),
+                                         seed=seed)
+            # 投票时每个采样请求自己占用控制器的名额，样本只按窗口上限调度，避免嵌套占用名额
+            dispatcher = fixed_controller(controller.max_window) if votes else controller
+            run_with_controller(
+                _dispatch(tasks), _validate_task, dispatcher,
+                is_throttled=None if votes else is_throttled_record,
+                on_result=_on_result,
+                on_metrics=_on_metrics if progress and (adaptive_concurrency or concurrency > 1) else None
+            )
     
     except Exception as e:
         print(f"读取文件时出错: {str(e)}")
+    finally:
+        reporter.close()
+        if sink is not None:
+            sink.close()
+        if index is not None and index is not few_shot_index:
+            index.close()
+    
+    wall_seconds = time.perf_counter() - started
+    
+    # 并发执行时完成顺序不确定，按样本ID恢复文件顺序
+    detailed_records.sort(key=lambda record: record['sample_id'])
     
     # 计算准确率
     accuracy = (correct / total * 100) if total > 0 else 0
@@ -229,8 +692,36 @@ def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True
         'correct': correct,
         'failed': failed,
         'accuracy': accuracy,
-        'timestamp': datetime.datetime.now().isoformat()
+        'timestamp': datetime.datetime.now().isoformat(),
+        'concurrency': dict(controller.snapshot(), adaptive=adaptive_concurrency),
+        'telemetry': summarize_telemetry(detailed_records, wall_seconds=wall_seconds, pricing=pricing)
     }
+    if votes:
+        results['voting'] = dict(summarize_votes(detailed_records), k=votes, temperature=vote_temperature)
+    if constrained and not votes:
+        results['decoding'] = summarize_decoding(detailed_records)
+    if sample_size:
+        results['sampling'] = {'sample_size': sample_size, 'stratify_by': stratify_by, 'seed': seed}
+    if index is not None:
+        results['few_shot'] = {'k': few_shot_k, 'token_budget': few_shot_token_budget, 'index_size': len(index)}
+    if groups is not None:
+        results['dedup'] = dedup_summary(groups, representative_matches, evaluated=representatives,
+                                        propagated=propagated)
+    if evaluator is not None:
+        # 去重时候选样本是各簇的代表
+        if groups is not None:
+            available = len(groups)
+        results['early_stop'] = evaluator.summary(available)
+    
+    if telemetry_dir:
+        try:
+            run_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            csv_path, runs_path = export_telemetry(detailed_records, results['telemetry'], telemetry_dir, run_id,
+                                                   extra={'input_file': jsonl_file_path, 'total': total,
+                                                          'accuracy': accuracy})
+            print(f"遥测数据已追加到: {csv_path}, {runs_path}")
+        except Exception as e:
+            print(f"导出遥测数据时出错: {str(e)}")
     
     # 保存结果到文件
     if save_results and output_file:
@@ -252,6 +743,29 @@ def batch_validate_from_jsonl(jsonl_file_path, max_items=None, save_results=True
     print(f"正确匹配: {correct}")
     print(f"错误匹配: {failed}")
     print(f"准确率: {accuracy:.2f}%")
+    if votes:
+        voting = results['voting']
+        print(f"自一致性投票: 实际请求 {voting['calls']}/{voting['max_calls']} 次，"
+              f"提前结束节省 {voting['calls_saved']} 次，平均置信度 {voting['mean_confidence'] or 0:.3f}")
+    if constrained and not votes:
+        decoding = results['decoding']
+        print(f"分类模式: 格式不符 {decoding['off_format']}/{decoding['responses']} 次，"
+              f"平均置信度 {decoding['mean_confidence'] or 0:.3f}")
+    telemetry = results['telemetry']
+    if telemetry['requests']:
+        latency = telemetry['latency_ms']
+        print(f"请求遥测: {telemetry['requests']} 次请求，{telemetry['total_tokens']} tokens "
+              f"({telemetry['tokens_per_second']:.1f} tokens/s)，延迟 p50/p95/p99 = "
+              f"{latency['p50']:.0f}/{latency['p95']:.0f}/{latency['p99']:.0f} ms，"
+              f"重试 {telemetry['retries']} 次，估算费用 ${telemetry['cost_usd']['total']:.4f}")
+    if evaluator is not None:
+        early_stop_summary = results['early_stop']
+        print(f"提前停止: 已评估 {early_stop_summary['evaluated']}/{available} 个样本，"
+              f"节省 {early_stop_summary['samples_saved']} 个样本")
+    if groups is not None:
+        dedup_stats = results['dedup']
+        print(f"去重评估: {dedup_stats['clusters']} 个簇，传播 {dedup_stats['propagated']} 个样本的结果，"
+              f"每簇计一次的准确率 {dedup_stats['representative_accuracy'] * 100:.2f}%")
     
     return results, detailed_records
 
@@ -279,11 +793,14 @@ if __name__ == "__main__":
     jsonl_path = "d:/MyResearch/codeComplex/data/data.jsonl"
     if os.path.exists(jsonl_path):
         # 处理所有样本
-        batch_results, detailed_records = batch_validate_from_jsonl(jsonl_path, max_items=None, save_results=True)
+        # 启用AIMD自适应并发，根据限流和延迟自动找到接近上限的并发数
+        batch_results, detailed_records = batch_validate_from_jsonl(jsonl_path, max_items=None, save_results=True,
+                                                                    concurrency=4, adaptive_concurrency=True)
         
-        # 显示所有详细记录
-        print(f"\n所有详细记录 ({len(detailed_records)} 条):")
-        for i, record in enumerate(detailed_records):
+        # 只显示出错的记录，完整明细见结果文件
+        error_records = [record for record in detailed_records if record['error']]
+        print(f"\n出错记录 ({len(error_records)} 条):")
+        for i, record in enumerate(error_records):
             print(f"\n记录 {i+1}:")
             print(f"样本ID: {record['sample_id']}")
             print(f"问题: {record['problem']}")
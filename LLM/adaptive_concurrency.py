@@ -0,0 +1,255 @@
+"""
+自适应并发控制模块
+基于AIMD（加性增、乘性减）策略动态调整大模型批量请求的并发窗口：
+延迟平稳时逐步放大窗口，遇到429/503限流或延迟突增时按比例收缩窗口
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 视为限流/过载信号的HTTP状态码
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def is_throttled_record(record):
+    """
+    判断一条验证记录是否遇到限流/过载
+
+    客户端在SDK内部重试429/5xx时最终请求可能成功，只看状态码会漏掉这些信号，
+    因此发生过客户端重试的请求同样视为被限流。
+
+    参数:
+    record (dict): validate_code_complexity()返回的记录，包含status_code和retries
+
+    返回:
+    bool: 是否被限流
+    """
+    return record.get('status_code') in THROTTLE_STATUS_CODES or (record.get('retries') or 0) > 0
+
+
+class AIMDController:
+    """
+    AIMD并发窗口控制器（线程安全）
+
+    每个请求在发出前调用acquire()占用一个并发名额，完成后调用release()归还，
+    并携带本次请求的延迟和是否被限流，控制器据此调整窗口：
+        - 正常完成且延迟未突增：窗口增加 additive_increase / 窗口，即每完成一整个窗口的请求窗口+1
+        - 被限流或延迟超过基线的 latency_spike_factor 倍：窗口乘以 multiplicative_decrease
+    同一拥塞事件中已经在途的请求不会重复触发收缩（只响应收缩之后发出的请求）。
+    """
+
+    def __init__(self, initial_window=4, min_window=1, max_window=32,
+                 additive_increase=1.0, multiplicative_decrease=0.5,
+                 latency_spike_factor=3.0, latency_ewma_alpha=0.1,
+                 warmup_requests=5, throughput_window=30.0):
+        """
+        参数:
+        initial_window (int): 初始并发窗口
+        min_window (int): 窗口下限
+        max_window (int): 窗口上限
+        additive_increase (float): 每轮（完成一个窗口的请求）窗口增加量
+        multiplicative_decrease (float): 收缩系数，取值(0, 1)
+        latency_spike_factor (float): 延迟超过基线的倍数视为突增
+        latency_ewma_alpha (float): 基线延迟指数滑动平均系数
+        warmup_requests (int): 基线建立前不做延迟突增判断的请求数
+        throughput_window (float): 吞吐量统计的滑动时间窗口（秒）
+        """
+        if not 0 < multiplicative_decrease < 1:
+            raise ValueError("multiplicative_decrease必须在(0, 1)之间")
+        if min_window < 1 or max_window < min_window:
+            raise ValueError("并发窗口上下限不合法")
+
+        self.min_window = min_window
+        self.max_window = max_window
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.latency_spike_factor = latency_spike_factor
+        self.latency_ewma_alpha = latency_ewma_alpha
+        self.warmup_requests = warmup_requests
+        self.throughput_window = throughput_window
+
+        self._cond = threading.Condition()
+        self._window = float(min(max(initial_window, min_window), max_window))
+        self._in_flight = 0
+        self._started_at = time.monotonic()
+        self._last_decrease_at = self._started_at
+        self._baseline_latency = None
+        self._completion_times = deque()
+
+        # 统计指标
+        self._completed = 0
+        self._throttle_events = 0
+        self._latency_spike_events = 0
+        self._decreases = 0
+        self._peak_window = self._window
+
+    @property
+    def window(self):
+        """当前可用的并发窗口（整数）"""
+        with self._cond:
+            return int(self._window)
+
+    def acquire(self):
+        """
+        阻塞直到在途请求数小于当前窗口，占用一个并发名额
+
+        返回:
+        float: 请求发出时刻，release()时需原样传回
+        """
+        with self._cond:
+            while self._in_flight >= int(self._window):
+                self._cond.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started_at, throttled=False):
+        """
+        归还并发名额，并根据请求结果调整窗口
+
+        参数:
+        started_at (float): acquire()返回的请求发出时刻
+        throttled (bool): 该请求是否遇到429/503等限流信号
+
+        返回:
+        float: 本次请求的延迟（秒）
+        """
+        now = time.monotonic()
+        latency = now - started_at
+        with self._cond:
+            self._in_flight -= 1
+            self._completed += 1
+            self._completion_times.append(now)
+
+            spike = False
+            if not throttled:
+                baseline = self._baseline_latency
+                if (baseline is not None and self._completed > self.warmup_requests
+                        and latency > baseline * self.latency_spike_factor):
+                    spike = True
+                    self._latency_spike_events += 1
+                else:
+                    # 只用未突增的请求更新基线，避免基线被拥塞拖高
+                    if baseline is None:
+                        self._baseline_latency = latency
+                    else:
+                        alpha = self.latency_ewma_alpha
+                        self._baseline_latency = (1 - alpha) * baseline + alpha * latency
+            else:
+                self._throttle_events += 1
+
+            if throttled or spike:
+                # 收缩之前发出的请求属于同一拥塞事件，不再重复收缩
+                if started_at >= self._last_decrease_at:
+                    self._window = max(float(self.min_window),
+                                       self._window * self.multiplicative_decrease)
+                    self._last_decrease_at = now
+                    self._decreases += 1
+            else:
+                self._window = min(float(self.max_window),
+                                   self._window + self.additive_increase / self._window)
+                self._peak_window = max(self._peak_window, self._window)
+
+            self._cond.notify_all()
+        return latency
+
+    def snapshot(self):
+        """
+        获取实时指标快照
+
+        返回:
+        dict: 包含当前窗口、在途请求数、吞吐量、限流事件等指标
+        """
+        now = time.monotonic()
+        with self._cond:
+            cutoff = now - self.throughput_window
+            while self._completion_times and self._completion_times[0] < cutoff:
+                self._completion_times.popleft()
+            elapsed = now - self._started_at
+            recent_span = min(self.throughput_window, elapsed)
+            return {
+                'window': int(self._window),
+                'window_exact': round(self._window, 3),
+                'peak_window': int(self._peak_window),
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'throughput': len(self._completion_times) / recent_span if recent_span > 0 else 0.0,
+                'overall_throughput': self._completed / elapsed if elapsed > 0 else 0.0,
+                'baseline_latency': self._baseline_latency,
+                'throttle_events': self._throttle_events,
+                'latency_spike_events': self._latency_spike_events,
+                'window_decreases': self._decreases,
+                'elapsed': elapsed
+            }
+
+
+def fixed_controller(concurrency):
+    """
+    创建固定并发的控制器（窗口上下限相同，不做自适应调整）
+
+    参数:
+    concurrency (int): 固定并发数
+
+    返回:
+    AIMDController: 窗口恒为concurrency的控制器
+    """
+    return AIMDController(initial_window=concurrency, min_window=concurrency, max_window=concurrency)
+
+
+def run_with_controller(tasks, worker, controller, is_throttled=None,
+                        on_result=None, on_metrics=None, metrics_interval=5.0):
+    """
+    在控制器的并发窗口约束下执行任务
+
+    参数:
+    tasks (iterable): 任务迭代器，按需惰性消费
+    worker (callable): 处理单个任务的函数，返回处理结果
+    controller (AIMDController): 并发控制器
+    is_throttled (callable, optional): 根据处理结果判断是否被限流的函数
+    on_result (callable, optional): 每个任务完成后在主线程中调用的回调，参数为(task, result)
+    on_metrics (callable, optional): 定期调用的实时指标回调，参数为controller.snapshot()
+    metrics_interval (float): 实时指标回调的最小间隔（秒）
+
+    返回:
+    list: 按完成顺序排列的(task, result)元组列表
+    """
+    completed = []
+    pending = {}
+    last_report = time.monotonic()
+
+    def _run(task, started_at):
+        # 在工作线程内归还名额，使延迟测量不受主线程调度影响
+        throttled = False
+        try:
+            result = worker(task)
+            throttled = bool(is_throttled(result)) if is_throttled else False
+            return result
+        finally:
+            controller.release(started_at, throttled=throttled)
+
+    def _collect(done):
+        nonlocal last_report
+        for future in done:
+            task = pending.pop(future)
+            result = future.result()
+            completed.append((task, result))
+            if on_result:
+                on_result(task, result)
+        if on_metrics and time.monotonic() - last_report >= metrics_interval:
+            last_report = time.monotonic()
+            on_metrics(controller.snapshot())
+
+    with ThreadPoolExecutor(max_workers=controller.max_window) as executor:
+        for task in tasks:
+            started_at = controller.acquire()
+            pending[executor.submit(_run, task, started_at)] = task
+            _collect([future for future in pending if future.done()])
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            _collect(done)
+
+    if on_metrics:
+        on_metrics(controller.snapshot())
+    return completed
@@ -0,0 +1,229 @@
+"""
+批量验证容量规划模块
+在发起batch_validate_from_jsonl之前离线估算一次运行的token用量、墙钟时间和费用：
+流式读取数据文件，为每个样本构造validate_code_complexity实际发送的消息，用本地估算器计数token，
+再结合服务商的速率限制（每分钟请求数、每分钟token数）、目标并发数和平均延迟推算耗时与瓶颈，
+并列出最大的提示词（可能超出上下文窗口）
+"""
+
+import argparse
+import heapq
+import json
+
+from LLM import DEFAULT_MODEL, build_messages, select_few_shot_examples
+from retrieval_index import RetrievalIndex
+from token_estimator import estimate_messages_tokens
+from telemetry import estimate_cost, percentile
+
+# 默认上下文窗口（token），超出的提示词会被服务端拒绝
+DEFAULT_CONTEXT_WINDOW = 128000
+# 每次请求的预计生成token数：模型只输出一个复杂度术语
+DEFAULT_COMPLETION_TOKENS = 8
+# 没有历史遥测数据时假设的单次请求平均延迟（秒）
+DEFAULT_MEAN_LATENCY = 2.0
+
+
+def load_mean_latency(runs_path):
+    """
+    从遥测运行摘要（telemetry.export_telemetry()写出的runs.jsonl）读取最近一次运行的平均延迟
+
+    参数:
+    runs_path (str): runs.jsonl路径
+
+    返回:
+    float: 平均延迟（秒），文件中没有可用的延迟时返回None
+    """
+    latency = None
+    with open(runs_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            mean = json.loads(line).get('latency_ms_mean')
+            if mean is not None:
+                latency = mean / 1000
+    return latency
+
+
+def _rate_limits(concurrency, mean_latency, rpm, tpm, tokens_per_request):
+    # 各约束下的稳态请求速率（次/秒）
+    limits = {'concurrency': concurrency / mean_latency}
+    if rpm:
+        limits['rpm'] = rpm / 60
+    if tpm and tokens_per_request:
+        limits['tpm'] = tpm / 60 / tokens_per_request
+    return limits
+
+
+def plan_capacity(jsonl_file_path, concurrency=1, rpm=None, tpm=None, mean_latency=DEFAULT_MEAN_LATENCY,
+                  completion_tokens=DEFAULT_COMPLETION_TOKENS, context_window=DEFAULT_CONTEXT_WINDOW,
+                  model=DEFAULT_MODEL, pricing=None, max_items=None, top_k=10, few_shot_index=None,
+                  few_shot_k=3, few_shot_token_budget=1500):
+    """
+    估算批量验证一个数据文件所需的token、墙钟时间和费用
+
+    与batch_validate_from_jsonl一样跳过空行、格式错误和缺少src或complexity的记录，
+    消息由LLM.build_messages()构造，指定检索索引时包含与批量验证相同的少样本示例。
+    不保留源代码，只保留每个样本的token数和最大的top_k个提示词的位置。
+
+    参数:
+    jsonl_file_path (str): JSONL数据文件路径
+    concurrency (int): 目标并发数
+    rpm (int): 服务商每分钟请求数上限，None表示不限
+    tpm (int): 服务商每分钟token数上限（提示与生成合计），None表示不限
+    mean_latency (float): 单次请求的平均延迟（秒），可用load_mean_latency()从历史遥测读取
+    completion_tokens (int): 每次请求的预计生成token数
+    context_window (int): 模型上下文窗口，提示与生成token之和超出时计为超限
+    model (str): 用于计价的模型名称
+    pricing (dict): 模型单价，见telemetry.estimate_cost()
+    max_items (int): 最多读取的行数
+    top_k (int): 列出的最大提示词数
+    few_shot_index (str 或 RetrievalIndex): 少样本检索索引目录或已打开的索引
+    few_shot_k (int): 每个样本最多使用的示例数
+    few_shot_token_budget (int): 每个样本示例消息的估算token预算
+
+    返回:
+    dict: 规划结果，包含samples、skipped、prompt_tokens（total、mean、p50、p95、max）、completion_tokens、
+        total_tokens、cost_usd、rate_limits（各约束的请求速率）、bottleneck、wall_seconds、
+        saturating_concurrency（达到速率上限所需的并发数）、over_context（超出上下文窗口的样本数）
+        和largest_prompts（样本ID、problem、token数）
+    """
+    index = RetrievalIndex(few_shot_index) if isinstance(few_shot_index, str) else few_shot_index
+    prompt_counts = []
+    largest = []
+    skipped = 0
+    over_context = 0
+    try:
+        with open(jsonl_file_path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if max_items is not None and i >= max_items:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                src = data.get('src', '')
+                if not (src and data.get('complexity', '')):
+                    skipped += 1
+                    continue
+                examples = None
+                if index is not None:
+                    examples = select_few_shot_examples(index, src, data.get('problem', ''), k=few_shot_k,
+                                                        token_budget=few_shot_token_budget)
+                tokens = estimate_messages_tokens(build_messages(src, examples))
+                prompt_counts.append(tokens)
+                if tokens + completion_tokens > context_window:
+                    over_context += 1
+                entry = (tokens, -i, data.get('problem', ''))
+                if len(largest) < top_k:
+                    heapq.heappush(largest, entry)
+                elif entry > largest[0]:
+                    heapq.heapreplace(largest, entry)
+    finally:
+        if index is not None and index is not few_shot_index:
+            index.close()
+
+    samples = len(prompt_counts)
+    prompt_total = sum(prompt_counts)
+    completion_total = samples * completion_tokens
+    tokens_per_request = (prompt_total + completion_total) / samples if samples else 0
+    limits = _rate_limits(concurrency, mean_latency, rpm, tpm, tokens_per_request)
+    bottleneck = min(limits, key=limits.get)
+    rate = limits[bottleneck]
+    ceiling = min([value for key, value in limits.items() if key != 'concurrency'], default=None)
+    cost = estimate_cost(prompt_total, completion_total, model, pricing)
+    prompt_counts.sort()
+    return {
+        'samples': samples,
+        'skipped': skipped,
+        'model': model,
+        'prompt_tokens': {
+            'total': prompt_total,
+            'mean': prompt_total / samples if samples else None,
+            'p50': percentile(prompt_counts, 0.50),
+            'p95': percentile(prompt_counts, 0.95),
+            'max': prompt_counts[-1] if prompt_counts else None
+        },
+        'completion_tokens': completion_total,
+        'total_tokens': prompt_total + completion_total,
+        'cost_usd': {
+            'total': cost,
+            'per_sample': cost / samples if cost is not None and samples else None
+        },
+        'concurrency': concurrency,
+        'mean_latency': mean_latency,
+        'rate_limits': limits,
+        'bottleneck': bottleneck,
+        'wall_seconds': samples / rate,
+        'saturating_concurrency': ceiling * mean_latency if ceiling is not None else None,
+        'context_window': context_window,
+        'over_context': over_context,
+        'largest_prompts': [{'sample_id': -negative_line + 1, 'problem': problem, 'prompt_tokens': tokens}
+                            for tokens, negative_line, problem in sorted(largest, reverse=True)]
+    }
+
+
+def format_plan(plan):
+    """
+    把规划结果格式化为可读的文本
+
+    参数:
+    plan (dict): plan_capacity()的结果
+
+    返回:
+    str: 多行文本
+    """
+    prompt = plan['prompt_tokens']
+    cost = plan['cost_usd']['total']
+    lines = [
+        f"样本数: {plan['samples']}（跳过 {plan['skipped']} 行）",
+        f"提示token: 共 {prompt['total']}，均值 {prompt['mean'] or 0:.0f}，p50 {prompt['p50'] or 0:.0f}，"
+        f"p95 {prompt['p95'] or 0:.0f}，最大 {prompt['max'] or 0}",
+        f"生成token: {plan['completion_tokens']}，合计 {plan['total_tokens']}",
+        f"估算费用: " + (f"${cost:.4f}（{plan['model']}）" if cost is not None else f"{plan['model']} 没有单价"),
+        f"预计耗时: {plan['wall_seconds'] / 60:.1f} 分钟，瓶颈 {plan['bottleneck']}"
+        f"（并发 {plan['concurrency']}，平均延迟 {plan['mean_latency']:.2f}s）",
+    ]
+    if plan['saturating_concurrency'] is not None:
+        lines.append(f"达到速率上限所需并发: {plan['saturating_concurrency']:.1f}")
+    lines.append(f"超出上下文窗口({plan['context_window']}): {plan['over_context']} 个样本")
+    for entry in plan['largest_prompts']:
+        lines.append(f"  样本 {entry['sample_id']}: {entry['prompt_tokens']} tokens {entry['problem'][:60]}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量验证前离线估算token、耗时和费用')
+    parser.add_argument('input', help='JSONL数据文件')
+    parser.add_argument('--concurrency', type=int, default=1, help='目标并发数')
+    parser.add_argument('--rpm', type=int, help='每分钟请求数上限')
+    parser.add_argument('--tpm', type=int, help='每分钟token数上限')
+    parser.add_argument('--latency', type=float, help='单次请求平均延迟（秒）')
+    parser.add_argument('--telemetry-runs', help='从遥测runs.jsonl读取最近一次运行的平均延迟')
+    parser.add_argument('--completion-tokens', type=int, default=DEFAULT_COMPLETION_TOKENS,
+                        help='每次请求的预计生成token数')
+    parser.add_argument('--context-window', type=int, default=DEFAULT_CONTEXT_WINDOW, help='上下文窗口')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='计价模型')
+    parser.add_argument('--max-items', type=int, help='最多读取的行数')
+    parser.add_argument('--top', type=int, default=10, help='列出的最大提示词数')
+    parser.add_argument('--few-shot-index', help='少样本检索索引目录')
+    parser.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args()
+
+    mean_latency = args.latency
+    if mean_latency is None and args.telemetry_runs:
+        mean_latency = load_mean_latency(args.telemetry_runs)
+    plan = plan_capacity(args.input, concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm,
+                         mean_latency=mean_latency or DEFAULT_MEAN_LATENCY,
+                         completion_tokens=args.completion_tokens, context_window=args.context_window,
+                         model=args.model, max_items=args.max_items, top_k=args.top,
+                         few_shot_index=args.few_shot_index)
+    print(json.dumps(plan, ensure_ascii=False, indent=2) if args.json else format_plan(plan))
+
+
+if __name__ == '__main__':
+    main()
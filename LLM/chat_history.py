@@ -0,0 +1,100 @@
+"""
+对话历史管理模块
+用双端队列保存对话消息并维护token总数的增量计数，
+超出上下文预算时从队头O(1)淘汰最早的消息，系统消息始终保留
+"""
+
+from collections import deque
+from token_estimator import estimate_message_tokens, REPLY_PRIMING_TOKENS
+
+
+class ChatHistory:
+    """
+    按token预算自动裁剪的对话历史
+
+    每条消息的token数只在加入时估算一次，总数随加入和淘汰增量更新，
+    因此追加和裁剪的代价与历史长度无关。
+    """
+
+    def __init__(self, max_context_tokens=8192, reserve_tokens=1024, system_prompt=None,
+                 estimator=estimate_message_tokens):
+        """
+        参数:
+        max_context_tokens (int): 模型上下文窗口大小（tokens）
+        reserve_tokens (int): 为模型回复预留的tokens
+        system_prompt (str, optional): 系统消息，始终保留在历史开头且不会被淘汰
+        estimator (callable): 单条消息的token估算函数
+        """
+        self.budget = max_context_tokens - reserve_tokens - REPLY_PRIMING_TOKENS
+        if self.budget <= 0:
+            raise ValueError("上下文窗口必须大于预留的回复tokens")
+        self._estimator = estimator
+        self._messages = deque()
+        self._total_tokens = 0
+        self._system = None
+        self._system_tokens = 0
+        self.evicted = 0
+        if system_prompt:
+            self.set_system(system_prompt)
+
+    def set_system(self, content):
+        """
+        设置（或替换）固定保留的系统消息
+
+        参数:
+        content (str): 系统消息内容
+        """
+        self._system = {"role": "system", "content": content}
+        self._system_tokens = self._estimator(self._system)
+        self._trim()
+
+    def append(self, role, content):
+        """
+        追加一条消息，必要时淘汰最早的消息
+
+        参数:
+        role (str): 角色，user或assistant
+        content (str): 消息内容
+
+        返回:
+        ChatHistory: 自身，便于链式调用
+        """
+        message = {"role": role, "content": content}
+        tokens = self._estimator(message)
+        self._messages.append((message, tokens))
+        self._total_tokens += tokens
+        self._trim()
+        return self
+
+    def _trim(self):
+        limit = self.budget - self._system_tokens
+        # 至少保留最新一条消息
+        while self._total_tokens > limit and len(self._messages) > 1:
+            self._evict_oldest()
+        # 历史不能以assistant消息开头，与被淘汰的user消息成对移除
+        while len(self._messages) > 1 and self._messages[0][0]["role"] == "assistant":
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        _, tokens = self._messages.popleft()
+        self._total_tokens -= tokens
+        self.evicted += 1
+
+    @property
+    def total_tokens(self):
+        """当前历史（含系统消息）的估算token数"""
+        return self._total_tokens + self._system_tokens
+
+    def messages(self):
+        """
+        获取发送给模型的消息列表
+
+        返回:
+        list: 系统消息（如有）在前，其余按时间顺序排列
+        """
+        messages = [self._system] if self._system else []
+        messages.extend(message for message, _ in self._messages)
+        return messages
+
+    def __len__(self):
+        return len(self._messages) + (1 if self._system else 0)
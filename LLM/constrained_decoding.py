@@ -0,0 +1,187 @@
+"""
+受约束的标签解码模块
+分类模式下要求模型以枚举约束的JSON输出utils.COMPLEXITY_TYPES中的一个标签，并限制max_completion_tokens和停止序列，
+使回复只有几个token；服务端支持时读取标签位置的top_logprobs，在一次请求内得到各标签的概率作为置信度
+"""
+
+import json
+import math
+import re
+
+from utils import COMPLEXITY_TYPES
+
+# 允许输出的标签
+CLASSIFICATION_LABELS = list(COMPLEXITY_TYPES)
+
+# 分类模式追加到系统提示词后的输出格式要求
+CLASSIFICATION_INSTRUCTION = ('\n    4. 以JSON格式输出：{"label": "<复杂度术语>"}，label只能取以下之一：'
+                              + '、'.join(CLASSIFICATION_LABELS))
+
+# 枚举约束的结构化输出格式
+CLASSIFICATION_RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {
+        'name': 'complexity_label',
+        'strict': True,
+        'schema': {
+            'type': 'object',
+            'properties': {'label': {'type': 'string', 'enum': CLASSIFICATION_LABELS}},
+            'required': ['label'],
+            'additionalProperties': False
+        }
+    }
+}
+
+# {"label": "quadratic"}约8个token，留出少量余量
+CLASSIFICATION_MAX_TOKENS = 16
+# 标签的闭合引号之后不再需要任何输出
+CLASSIFICATION_STOP = ['}']
+# 读取的候选token数
+CLASSIFICATION_TOP_LOGPROBS = 10
+# 服务端拒绝时依次去掉的参数组，logprobs最常不被支持，其次是推理模型不接受的stop
+CLASSIFICATION_OPTIONAL_PARAMETERS = (
+    ('logprobs', 'top_logprobs'),
+    ('stop',),
+    ('response_format',),
+    ('max_completion_tokens',)
+)
+
+_LABEL_PATTERN = re.compile(r'"label"\s*:\s*"(?P<label>[^"]*)"?')
+
+
+def classification_request_options(logprobs=True):
+    """
+    分类模式的额外请求参数
+
+    参数:
+    logprobs (bool): 是否请求top_logprobs
+
+    返回:
+    dict: 传给chat.completions.create()的关键字参数
+    """
+    options = {
+        'response_format': CLASSIFICATION_RESPONSE_FORMAT,
+        'max_completion_tokens': CLASSIFICATION_MAX_TOKENS,
+        'stop': CLASSIFICATION_STOP
+    }
+    if logprobs:
+        options.update(logprobs=True, top_logprobs=CLASSIFICATION_TOP_LOGPROBS)
+    return options
+
+
+def drop_rejected_option(options, error):
+    """
+    服务端以400拒绝请求后，去掉被拒绝的分类模式参数
+
+    错误指明了参数（error.param或错误信息中的参数名）时去掉它所在的参数组，
+    否则按CLASSIFICATION_OPTIONAL_PARAMETERS的顺序去掉第一个仍在请求中的参数组。
+
+    参数:
+    options (dict): 上一次请求的额外参数，见classification_request_options()
+    error (Exception): 服务端返回的BadRequestError
+
+    返回:
+    dict: 去掉一组参数后的新参数，已没有可去掉的参数时返回None
+    """
+    present = [group for group in CLASSIFICATION_OPTIONAL_PARAMETERS if any(name in options for name in group)]
+    if not present:
+        return None
+    param = getattr(error, 'param', None)
+    message = str(error)
+    rejected = next((group for group in present if param in group), None)
+    if rejected is None:
+        rejected = next((group for group in present if any(name in message for name in group)), present[0])
+    return {key: value for key, value in options.items() if key not in rejected}
+
+
+def parse_label_output(content):
+    """
+    从分类模式的回复中取出标签，停止序列截掉的右花括号不影响解析
+
+    参数:
+    content (str): 模型回复
+
+    返回:
+    str: CLASSIFICATION_LABELS中的标签，回复不符合格式时返回None
+    """
+    if not content:
+        return None
+    match = _LABEL_PATTERN.search(content)
+    if match is None:
+        try:
+            parsed = json.loads(content)
+        except ValueError:
+            return None
+        label = parsed.get('label') if isinstance(parsed, dict) else None
+    else:
+        label = match.group('label')
+    label = label.strip().lower() if isinstance(label, str) else None
+    return label if label in COMPLEXITY_TYPES else None
+
+
+def _candidate_label(token):
+    # 候选token是唯一一个标签的前缀时归属该标签（如"quad"），有歧义或不是前缀时返回None
+    token = token.strip().strip('"').lower()
+    if not token:
+        return None
+    matches = [label for label in CLASSIFICATION_LABELS if label.startswith(token) or token.startswith(label)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def label_probabilities(logprobs, content, label):
+    """
+    根据标签第一个token位置的top_logprobs估计各标签的概率
+
+    参数:
+    logprobs: choices[0].logprobs，包含content（逐token的token、logprob和top_logprobs）
+    content (str): 模型回复
+    label (str): parse_label_output()解析出的标签
+
+    返回:
+    dict: 标签到概率（候选token概率之和，未出现在候选中的标签不列出），
+        服务端未返回logprobs或回复中找不到标签时返回None
+    """
+    tokens = getattr(logprobs, 'content', None) if logprobs is not None else None
+    if not tokens or label is None:
+        return None
+    match = _LABEL_PATTERN.search(content)
+    start = match.start('label') if match else content.find(label)
+    if start < 0:
+        return None
+    offset = 0
+    for token in tokens:
+        end = offset + len(token.token)
+        if end > start:
+            probabilities = {}
+            for candidate in token.top_logprobs or [token]:
+                candidate_label = _candidate_label(candidate.token[max(0, start - offset):])
+                if candidate_label is not None:
+                    probabilities[candidate_label] = probabilities.get(candidate_label, 0.0) + math.exp(
+                        candidate.logprob)
+            return probabilities or None
+        offset = end
+    return None
+
+
+def summarize_decoding(records):
+    """
+    汇总分类模式的格式符合率与置信度
+
+    参数:
+    records (list): 带有off_format和label_confidence字段的验证记录
+
+    返回:
+    dict: responses（得到回复的请求数）、off_format、off_format_rate、with_logprobs（有置信度的回复数）
+        和mean_confidence
+    """
+    responses = [record for record in records
+                 if record.get('off_format') is not None and not record.get('propagated_from')]
+    off_format = sum(1 for record in responses if record['off_format'])
+    confidences = [record['label_confidence'] for record in responses if record.get('label_confidence') is not None]
+    return {
+        'responses': len(responses),
+        'off_format': off_format,
+        'off_format_rate': off_format / len(responses) if responses else None,
+        'with_logprobs': len(confidences),
+        'mean_confidence': sum(confidences) / len(confidences) if confidences else None
+    }
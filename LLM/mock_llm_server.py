@@ -0,0 +1,383 @@
+"""
+本地模拟大模型服务
+实现OpenAI兼容的/v1/chat/completions接口，用于在不访问真实服务的情况下测量解码方式对延迟和格式符合率的影响：
+延迟为固定开销加每个输出token的解码耗时；自由生成时一部分样本会输出带解释的长回答（格式不符），
+response_format为json_schema时按枚举约束只输出{"label": ...}；支持max_tokens/max_completion_tokens截断、停止序列和top_logprobs。
+模型对每段代码的"判断"由用户消息的哈希确定，相同的提示词得到相同的回答。
+测试中也用它代替真实服务：可以指定依次返回的错误状态码、固定回答的函数和是否返回usage，
+并记录收到的请求体和每个模型的最大并发
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import OpenAI
+
+from LLM import build_messages, validate_code_complexity, complexity_label
+from token_estimator import estimate_messages_tokens
+from constrained_decoding import CLASSIFICATION_LABELS
+from telemetry import percentile
+
+# 模拟分词：字母每4个一段，其余字符各一个token，空白合并
+_TOKEN_PATTERN = re.compile(r'[A-Za-z]{1,4}|\d|\s+|[^\sA-Za-z\d]')
+
+# 各标签在长回答中的写法
+_FORMULAS = {
+    'constant': 'O(1)', 'linear': 'O(n)', 'logn': 'O(log n)', 'nlogn': 'O(n log n)',
+    'quadratic': 'O(n^2)', 'cubic': 'O(n^3)', 'np': 'O(2^n)'
+}
+
+_EXPLANATION = ('该代码的时间复杂度为 {formula}。外层循环遍历全部输入，内层操作的次数随输入规模增长，'
+                'The dominant cost comes from the nested iteration over the input array, '
+                'so the overall running time grows as {formula} in the worst case.')
+
+
+def mock_tokenize(text):
+    """
+    模拟服务端的分词
+
+    参数:
+    text (str): 文本
+
+    返回:
+    list: token字符串列表，拼接后等于原文本
+    """
+    return _TOKEN_PATTERN.findall(text)
+
+
+class MockModel:
+    """
+    模拟模型的判断与解码行为
+
+    参数:
+    base_latency (float): 每次请求的固定耗时（秒）
+    token_latency (float): 每个输出token的解码耗时（秒）
+    chatty_rate (float): 自由生成时输出带解释的长回答的样本比例
+    accuracy (float): 模型认为最可能的标签获得的概率，其余概率在其他标签间按哈希分配
+    supports_logprobs (bool): 是否支持logprobs参数，不支持时返回400
+    supports_json_schema (bool): 是否支持结构化输出，不支持时忽略response_format
+    failures (list, optional): 依次返回给最先到达的请求的错误状态码（如[429, 503]），用完后正常响应
+    responder (callable, optional): 参数为请求体、返回回复文本的函数，指定时代替模拟模型的判断，
+        停止序列和max_tokens截断照常生效
+    usage (bool): 响应中是否包含usage
+    rejected_params (iterable, optional): 不支持的请求参数名，请求中出现时返回400并在error.param中指明
+    """
+
+    def __init__(self, base_latency=0.02, token_latency=0.002, chatty_rate=0.2, accuracy=0.8,
+                 supports_logprobs=True, supports_json_schema=True, failures=None, responder=None, usage=True,
+                 rejected_params=None):
+        self.base_latency = base_latency
+        self.token_latency = token_latency
+        self.chatty_rate = chatty_rate
+        self.accuracy = accuracy
+        self.supports_logprobs = supports_logprobs
+        self.supports_json_schema = supports_json_schema
+        self.failures = list(failures or [])
+        self.responder = responder
+        self.usage = usage
+        self.rejected_params = set(rejected_params or ())
+        self.requests = 0
+        # 收到的请求体，以及按请求中model字段统计的请求数、在途数和最大并发
+        self.bodies = []
+        self.model_requests = Counter()
+        self.peak_in_flight = Counter()
+        self._in_flight = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(messages):
+        user = next((message['content'] for message in reversed(messages) if message['role'] == 'user'), '')
+        return int.from_bytes(hashlib.sha256(user.encode('utf-8')).digest()[:8], 'big')
+
+    def label_for(self, messages):
+        """
+        模型对一组消息最可能的回答
+
+        参数:
+        messages (list): 请求消息
+
+        返回:
+        str: 标签
+        """
+        return CLASSIFICATION_LABELS[self._digest(messages) % len(CLASSIFICATION_LABELS)]
+
+    def probabilities(self, messages):
+        """
+        模型对各标签的概率
+
+        参数:
+        messages (list): 请求消息
+
+        返回:
+        dict: 标签到概率
+        """
+        digest = self._digest(messages)
+        best = self.label_for(messages)
+        others = [label for label in CLASSIFICATION_LABELS if label != best]
+        weights = [((digest >> (8 * i)) & 0xFF) + 1 for i in range(len(others))]
+        total = sum(weights)
+        probabilities = {label: (1 - self.accuracy) * weight / total for label, weight in zip(others, weights)}
+        probabilities[best] = self.accuracy
+        return probabilities
+
+    def complete(self, body):
+        """
+        生成一次chat.completions响应
+
+        参数:
+        body (dict): 请求体
+
+        返回:
+        tuple: (HTTP状态码, 响应体字典)
+        """
+        name = body.get('model', 'mock')
+        with self._lock:
+            self.requests += 1
+            self.bodies.append(body)
+            self.model_requests[name] += 1
+            self._in_flight[name] += 1
+            self.peak_in_flight[name] = max(self.peak_in_flight[name], self._in_flight[name])
+            failure = self.failures.pop(0) if self.failures else None
+        try:
+            if failure is not None:
+                return failure, {'error': {'message': f'mock failure {failure}', 'type': 'server_error'}}
+            return self._complete(body)
+        finally:
+            with self._lock:
+                self._in_flight[name] -= 1
+
+    def _complete(self, body):
+        if body.get('logprobs') and not self.supports_logprobs:
+            return 400, {'error': {'message': 'logprobs is not supported for this model',
+                                   'type': 'invalid_request_error', 'param': 'logprobs'}}
+        rejected = sorted(self.rejected_params.intersection(body))
+        if rejected:
+            message = f"Unsupported parameter: '{rejected[0]}' is not supported with this model."
+            return 400, {'error': {'message': message, 'type': 'invalid_request_error', 'param': rejected[0]}}
+        messages = body['messages']
+        probabilities = self.probabilities(messages)
+        if body.get('temperature'):
+            rng = random.Random()
+            label = rng.choices(list(probabilities), weights=list(probabilities.values()))[0]
+        else:
+            label = self.label_for(messages)
+        response_format = body.get('response_format') or {}
+        constrained = response_format.get('type') == 'json_schema' and self.supports_json_schema
+        chatty = (self._digest(messages) >> 40) % 1000 < self.chatty_rate * 1000
+        if self.responder is not None:
+            text = self.responder(body)
+        elif constrained:
+            text = json.dumps({'label': label}, separators=(',', ':'))
+        elif chatty:
+            text = _EXPLANATION.format(formula=_FORMULAS[label])
+        else:
+            text = label
+
+        finish_reason = 'stop'
+        stop = body.get('stop') or []
+        for sequence in [stop] if isinstance(stop, str) else stop:
+            position = text.find(sequence)
+            if position >= 0:
+                text = text[:position]
+        tokens = mock_tokenize(text)
+        max_tokens = body.get('max_tokens') or body.get('max_completion_tokens')
+        if max_tokens and len(tokens) > max_tokens:
+            tokens = tokens[:max_tokens]
+            finish_reason = 'length'
+        text = ''.join(tokens)
+        time.sleep(self.base_latency + self.token_latency * len(tokens))
+
+        choice = {'index': 0, 'finish_reason': finish_reason, 'message': {'role': 'assistant', 'content': text},
+                  'logprobs': None}
+        if body.get('logprobs'):
+            choice['logprobs'] = {'content': self._logprobs(tokens, text, label, probabilities,
+                                                            body.get('top_logprobs') or 0)}
+        payload = {
+            'id': f'mock-{self.requests}', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'mock'), 'choices': [choice]
+        }
+        if self.usage:
+            prompt_tokens = estimate_messages_tokens(messages)
+            payload['usage'] = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens),
+                                'total_tokens': prompt_tokens + len(tokens)}
+        return 200, payload
+
+    @staticmethod
+    def _logprobs(tokens, text, label, probabilities, top_logprobs):
+        # 标签第一个token的位置给出各标签首段的候选，其余位置为确定的token
+        start = text.find(label)
+        entries = []
+        offset = 0
+        for token in tokens:
+            if start >= 0 and offset <= start < offset + len(token):
+                prefix = token[:start - offset]
+                candidates = sorted(((prefix + mock_tokenize(candidate)[0], probability)
+                                     for candidate, probability in probabilities.items()),
+                                    key=lambda item: item[1], reverse=True)
+                logprob = math.log(probabilities[label])
+                top = [{'token': candidate, 'logprob': math.log(probability), 'bytes': None}
+                       for candidate, probability in candidates[:top_logprobs]]
+            else:
+                logprob = 0.0
+                top = [{'token': token, 'logprob': 0.0, 'bytes': None}] if top_logprobs else []
+            entries.append({'token': token, 'logprob': logprob, 'bytes': None, 'top_logprobs': top})
+            offset += len(token)
+        return entries
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        status, payload = self.server.model.complete(body)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        if status in (429, 503):
+            # 让客户端立即重试，测试不必等待SDK的默认退避
+            self.send_header('retry-after-ms', '1')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockLLMServer:
+    """
+    在后台线程运行的模拟服务，可用作上下文管理器
+
+    参数:
+    model (MockModel, optional): 模拟模型，默认使用MockModel()的默认参数
+    host (str): 监听地址
+    port (int): 监听端口，0表示自动分配
+    """
+
+    def __init__(self, model=None, host='127.0.0.1', port=0):
+        self.model = model or MockModel()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.model = self.model
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """OpenAI客户端使用的API基础URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark_decoding(sources, server, expected=None, repeat=1):
+    """
+    在模拟服务上比较自由生成与分类模式的延迟、输出token数和格式符合率
+
+    参数:
+    sources (list): 源代码列表
+    server (MockLLMServer): 已启动的模拟服务
+    expected (list, optional): 期望复杂度列表，默认使用模拟模型最可能的回答（此时只有格式不符会导致不匹配）
+    repeat (int): 每个样本的请求轮数
+
+    返回:
+    dict: free和constrained两种模式各自的requests、latency_ms（mean/p50/p95）、completion_tokens_mean、
+        off_format_rate（回复无法归一为标签的比例）、accuracy和mean_confidence，以及latency_speedup
+    """
+    client = OpenAI(api_key='mock', base_url=server.base_url, max_retries=0)
+    if expected is None:
+        expected = [server.model.label_for(build_messages(src)) for src in sources]
+    report = {}
+    for mode, constrained in (('free', False), ('constrained', True)):
+        records = []
+        for _ in range(repeat):
+            for src, label in zip(sources, expected):
+                records.append(validate_code_complexity(src, label, verbose=False, client=client,
+                                                        constrained=constrained))
+        latencies = sorted(record['latency_ms'] for record in records)
+        confidences = [record['label_confidence'] for record in records if record.get('label_confidence') is not None]
+        off_format = sum(1 for record in records if record['error'] is None and (
+            record['off_format'] if constrained else complexity_label(record['model_raw_output'])
+            not in CLASSIFICATION_LABELS))
+        report[mode] = {
+            'requests': len(records),
+            'errors': sum(1 for record in records if record['error']),
+            'latency_ms': {'mean': sum(latencies) / len(latencies), 'p50': percentile(latencies, 0.5),
+                           'p95': percentile(latencies, 0.95)},
+            'completion_tokens_mean': sum(record['completion_tokens'] or 0 for record in records) / len(records),
+            'off_format_rate': off_format / len(records),
+            'accuracy': sum(1 for record in records if record['is_match']) / len(records),
+            'mean_confidence': sum(confidences) / len(confidences) if confidences else None
+        }
+    report['latency_speedup'] = report['free']['latency_ms']['mean'] / report['constrained']['latency_ms']['mean']
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟大模型服务与解码方式对比')
+    parser.add_argument('--serve', action='store_true', help='只启动服务，直到Ctrl+C')
+    parser.add_argument('--port', type=int, default=0, help='监听端口')
+    parser.add_argument('--data', help='JSONL数据文件，为空时使用合成代码')
+    parser.add_argument('--samples', type=int, default=200, help='对比使用的样本数')
+    parser.add_argument('--base-latency', type=float, default=0.02, help='每次请求的固定耗时（秒）')
+    parser.add_argument('--token-latency', type=float, default=0.002, help='每个输出token的解码耗时（秒）')
+    parser.add_argument('--chatty-rate', type=float, default=0.2, help='自由生成时输出长回答的样本比例')
+    parser.add_argument('--no-logprobs', action='store_true', help='模拟不支持logprobs的服务')
+    args = parser.parse_args()
+
+    model = MockModel(base_latency=args.base_latency, token_latency=args.token_latency,
+                      chatty_rate=args.chatty_rate, supports_logprobs=not args.no_logprobs)
+    with MockLLMServer(model, port=args.port) as server:
+        if args.serve:
+            print(f"模拟服务已启动: {server.base_url}")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                return
+        if args.data:
+            sources = []
+            with open(args.data, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if len(sources) >= args.samples:
+                        break
+                    line = line.strip()
+                    if line:
+                        src = json.loads(line).get('src')
+                        if src:
+                            sources.append(src)
+        else:
+            sources = [f'class Main{i} {{ void f(int n) {{ for (int i = 0; i < n * {i}; i++) g(i); }} }}'
+                       for i in range(args.samples)]
+        report = benchmark_decoding(sources, server)
+    for mode in ('free', 'constrained'):
+        result = report[mode]
+        latency = result['latency_ms']
+        print(f"{mode:<12} 请求 {result['requests']}，延迟 mean/p50/p95 = {latency['mean']:.1f}/{latency['p50']:.1f}/"
+              f"{latency['p95']:.1f} ms，输出token均值 {result['completion_tokens_mean']:.1f}，"
+              f"格式不符 {result['off_format_rate'] * 100:.1f}%，准确率 {result['accuracy'] * 100:.1f}%"
+              + (f"，平均置信度 {result['mean_confidence']:.3f}" if result['mean_confidence'] is not None else ''))
+    print(f"平均延迟加速比: {report['latency_speedup']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+多模型并发对比模块
+一次遍历数据文件，为每个样本只构造一次消息，同时分发给多个(服务商, 模型)目标，
+每个目标有独立的并发上限；结束后输出并排的准确率/延迟/token矩阵，以及逐样本的各模型输出、
+是否匹配和一致性列，供后续错误分析
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from openai import OpenAI
+
+from LLM import DEFAULT_MODEL, DEFAULT_API_KEY, DEFAULT_BASE_URL, build_messages, validate_code_complexity
+from adaptive_concurrency import AIMDController, fixed_controller, run_with_controller, is_throttled_record
+from telemetry import summarize_telemetry, provider_name
+
+# 队列结束标记
+_DONE = object()
+
+
+def parse_target(spec):
+    """
+    解析命令行的目标描述
+
+    格式为逗号分隔的key=value，如"model=gpt-4o,base_url=https://api.openai.com/v1,concurrency=4"。
+    支持的键：name（默认与model相同）、model、base_url、api_key_env（读取API密钥的环境变量）、concurrency。
+    只有使用默认服务（未指定base_url或为DEFAULT_BASE_URL）时才回退到默认密钥，其他服务必须指定api_key_env，
+    避免把默认密钥发给任意地址。
+
+    参数:
+    spec (str): 目标描述
+
+    返回:
+    dict: 包含name、model、base_url、api_key和concurrency的目标
+
+    异常:
+    ValueError: 描述格式错误、包含未知的键、api_key_env指定的环境变量未设置，或非默认服务未指定api_key_env
+    """
+    fields = {}
+    for part in spec.split(','):
+        key, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValueError(f"目标描述格式错误: {part!r}，应为key=value")
+        fields[key.strip()] = value.strip()
+    unknown = set(fields) - {'name', 'model', 'base_url', 'api_key_env', 'concurrency'}
+    if unknown:
+        raise ValueError(f"目标描述包含未知的键: {', '.join(sorted(unknown))}")
+    model = fields.get('model', DEFAULT_MODEL)
+    base_url = fields.get('base_url')
+    api_key_env = fields.get('api_key_env')
+    if api_key_env:
+        api_key = os.environ.get(api_key_env)
+        if not api_key:
+            raise ValueError(f"环境变量 {api_key_env} 未设置，无法读取目标 {fields.get('name', model)} 的API密钥")
+    elif base_url in (None, DEFAULT_BASE_URL):
+        api_key = DEFAULT_API_KEY
+    else:
+        raise ValueError(f"base_url为 {base_url} 时必须用api_key_env指定API密钥")
+    return {
+        'name': fields.get('name', model),
+        'model': model,
+        'base_url': base_url,
+        'api_key': api_key,
+        'concurrency': int(fields.get('concurrency', 1))
+    }
+
+
+def agreement_columns(outputs, matches):
+    """
+    计算一个样本在各目标之间的一致性
+
+    参数:
+    outputs (dict): 目标名称到模型输出（请求失败时为None）
+    matches (dict): 目标名称到是否匹配期望复杂度
+
+    返回:
+    dict: majority_output（多数输出）、agreement（与多数输出一致的目标比例）、
+        correct_targets（匹配的目标数）、unanimous（所有目标输出相同）
+    """
+    answered = [output for output in outputs.values() if output is not None]
+    majority, votes = Counter(answered).most_common(1)[0] if answered else (None, 0)
+    return {
+        'majority_output': majority,
+        'agreement': votes / len(outputs) if outputs else None,
+        'correct_targets': sum(1 for match in matches.values() if match),
+        'unanimous': bool(answered) and len(answered) == len(outputs) and votes == len(outputs)
+    }
+
+
+def _read_samples(jsonl_file_path, max_items):
+    # 与batch_validate_from_jsonl相同的过滤规则：跳过空行、格式错误和缺少src或complexity的记录
+    with open(jsonl_file_path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            if max_items is not None and i >= max_items:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if data.get('src') and data.get('complexity'):
+                yield i + 1, data
+
+
+def run_multi_model(jsonl_file_path, targets, max_items=None, output_dir=None, adaptive_concurrency=False,
+                    buffer_size=None, pricing=None):
+    """
+    在多个目标上并发验证同一个数据文件
+
+    读取线程逐行解析并构造消息，把同一份消息放入每个目标的有界队列；每个目标由一个调度线程
+    在自己的并发控制器下发出请求。队列有界，读取进度受最慢的目标约束，内存中只保留有限个样本的消息。
+
+    参数:
+    jsonl_file_path (str): JSONL数据文件路径
+    targets (list): 目标列表，每项包含name、model、base_url、api_key和concurrency（见parse_target()）
+    max_items (int): 最多读取的行数
+    output_dir (str): 输出目录，指定时写出matrix.csv（每个目标一行）、samples.csv（逐样本并排对比）和summary.json
+    adaptive_concurrency (bool): 是否对每个目标使用AIMD自适应并发，以concurrency为窗口上限
+    buffer_size (int): 每个目标队列的容量，默认为该目标并发数的4倍
+    pricing (dict): 模型单价，见telemetry.estimate_cost()
+
+    返回:
+    tuple: (矩阵列表, 逐样本记录列表)；矩阵每项为一个目标的统计，逐样本记录按样本ID排序
+
+    异常:
+    ValueError: 没有目标、目标名称重复，或非默认服务的目标没有API密钥
+    """
+    if not targets:
+        raise ValueError("至少需要一个目标")
+    names = [target['name'] for target in targets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"目标名称重复: {names}")
+    for target in targets:
+        if not target.get('api_key') and target.get('base_url') not in (None, DEFAULT_BASE_URL):
+            raise ValueError(f"目标 {target['name']} 使用 {target['base_url']}，但没有指定API密钥")
+
+    samples = {}
+    results = {target['name']: {} for target in targets}
+    queues = {target['name']: queue.Queue(maxsize=buffer_size or 4 * target['concurrency']) for target in targets}
+    errors = []
+
+    def _reader():
+        try:
+            for sample_id, data in _read_samples(jsonl_file_path, max_items):
+                problem = data.get('problem', '')
+                samples[sample_id] = {
+                    'sample_id': sample_id,
+                    'problem': problem[:100] + '...' if len(problem) > 100 else problem,
+                    'source': data.get('from', ''),
+                    'expected_complexity': data['complexity'].lower().strip()
+                }
+                # 每个样本只构造一次消息，所有目标共享
+                task = (sample_id, data['complexity'], build_messages(data['src']))
+                for target_queue in queues.values():
+                    target_queue.put(task)
+        except Exception as e:
+            errors.append(f"读取文件时出错: {e}")
+        finally:
+            for target_queue in queues.values():
+                target_queue.put(_DONE)
+
+    def _drain(target_queue):
+        while True:
+            task = target_queue.get()
+            if task is _DONE:
+                return
+            yield task
+
+    def _run_target(target, client, controller):
+        def _worker(task):
+            sample_id, expected_complexity, messages = task
+            return validate_code_complexity(None, expected_complexity, verbose=False, model=target['model'],
+                                            messages=messages, client=client)
+
+        def _on_result(task, record):
+            results[target['name']][task[0]] = record
+
+        tasks = _drain(queues[target['name']])
+        try:
+            run_with_controller(tasks, _worker, controller, is_throttled=is_throttled_record, on_result=_on_result)
+        except Exception as e:
+            errors.append(f"目标 {target['name']} 出错: {e}")
+            # 继续取空队列直到结束标记，否则读取线程会阻塞在有界队列的put上，整个运行无法结束
+            for _ in tasks:
+                pass
+
+    threads = [threading.Thread(target=_reader, daemon=True)]
+    controllers = {}
+    for target in targets:
+        # 每个目标一个客户端，在该目标的并发请求间共享；SDK内部重试过的请求由is_throttled_record计为限流
+        client = OpenAI(api_key=target.get('api_key') or DEFAULT_API_KEY,
+                        base_url=target.get('base_url') or DEFAULT_BASE_URL)
+        if adaptive_concurrency:
+            controller = AIMDController(initial_window=1, max_window=target['concurrency'])
+        else:
+            controller = fixed_controller(target['concurrency'])
+        controllers[target['name']] = controller
+        threads.append(threading.Thread(target=_run_target, args=(target, client, controller), daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - started
+    for error in errors:
+        print(error)
+
+    rows = []
+    for sample_id in sorted(samples):
+        row = dict(samples[sample_id])
+        outputs, matches = {}, {}
+        for name in names:
+            record = results[name].get(sample_id, {})
+            outputs[name] = record.get('model_raw_output')
+            matches[name] = bool(record.get('is_match'))
+            row[f'{name}_output'] = outputs[name]
+            row[f'{name}_match'] = matches[name]
+            row[f'{name}_latency_ms'] = record.get('latency_ms')
+            row[f'{name}_error'] = record.get('error')
+        row.update(agreement_columns(outputs, matches))
+        rows.append(row)
+
+    matrix = []
+    for target in targets:
+        records = [results[target['name']][sample_id] for sample_id in sorted(results[target['name']])]
+        telemetry = summarize_telemetry(records, wall_seconds=wall_seconds, pricing=pricing)
+        correct = sum(1 for record in records if record['is_match'])
+        matrix.append({
+            'name': target['name'],
+            'model': target['model'],
+            'provider': provider_name(target.get('base_url') or DEFAULT_BASE_URL),
+            'samples': len(records),
+            'correct': correct,
+            'accuracy': correct / len(records) * 100 if records else 0,
+            'errors': telemetry['failed_requests'],
+            'latency_p50_ms': telemetry['latency_ms']['p50'],
+            'latency_p95_ms': telemetry['latency_ms']['p95'],
+            'prompt_tokens': telemetry['prompt_tokens'],
+            'completion_tokens': telemetry['completion_tokens'],
+            'tokens_per_second': telemetry['tokens_per_second'],
+            'retries': telemetry['retries'],
+            'cost_usd': telemetry['cost_usd']['total'],
+            'concurrency': controllers[target['name']].snapshot()
+        })
+
+    if output_dir:
+        _write_outputs(output_dir, matrix, rows, names, {
+            'input_file': jsonl_file_path,
+            'max_items': max_items,
+            'wall_seconds': wall_seconds,
+            'unanimous_rate': sum(row['unanimous'] for row in rows) / len(rows) if rows else None
+        })
+    return matrix, rows
+
+
+def _write_outputs(output_dir, matrix, rows, names, run_info):
+    os.makedirs(output_dir, exist_ok=True)
+    matrix_columns = [key for key in matrix[0] if key != 'concurrency']
+    with open(os.path.join(output_dir, 'matrix.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=matrix_columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(matrix)
+    sample_columns = ['sample_id', 'problem', 'source', 'expected_complexity']
+    for name in names:
+        sample_columns += [f'{name}_output', f'{name}_match', f'{name}_latency_ms', f'{name}_error']
+    sample_columns += ['majority_output', 'agreement', 'correct_targets', 'unanimous']
+    with open(os.path.join(output_dir, 'samples.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=sample_columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(run_info, matrix=matrix), f, ensure_ascii=False, indent=2)
+
+
+def format_matrix(matrix):
+    """
+    把对比矩阵格式化为对齐的文本表格
+
+    参数:
+    matrix (list): run_multi_model()返回的矩阵
+
+    返回:
+    str: 多行文本
+    """
+    header = f"{'目标':<20}{'准确率':>10}{'错误':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'tokens':>10}{'费用($)':>10}"
+    lines = [header]
+    for row in matrix:
+        cost = f"{row['cost_usd']:.4f}" if row['cost_usd'] is not None else '-'
+        lines.append(f"{row['name']:<20}{row['accuracy']:>9.2f}%{row['errors']:>6}"
+                     f"{row['latency_p50_ms'] or 0:>10.0f}{row['latency_p95_ms'] or 0:>10.0f}"
+                     f"{row['prompt_tokens'] + row['completion_tokens']:>10}{cost:>10}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='一次遍历数据文件，在多个模型上并发验证并输出对比矩阵')
+    parser.add_argument('input', help='JSONL数据文件')
+    parser.add_argument('--target', action='append', required=True,
+                        help='目标描述，如model=gpt-4o,base_url=https://api.openai.com/v1,api_key_env=OPENAI_API_KEY,'
+                             'concurrency=4，可重复')
+    parser.add_argument('--max-items', type=int, help='最多读取的行数')
+    parser.add_argument('--output-dir', help='输出目录')
+    parser.add_argument('--adaptive', action='store_true', help='每个目标使用AIMD自适应并发')
+    args = parser.parse_args()
+
+    matrix, _ = run_multi_model(args.input, [parse_target(spec) for spec in args.target], max_items=args.max_items,
+                                output_dir=args.output_dir, adaptive_concurrency=args.adaptive)
+    print(format_matrix(matrix))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+自一致性投票模块
+对同一段代码以非零温度多次采样，按标签投票；某个标签已获得不可翻盘的多数时停止继续采样，
+投票分布作为置信度。每一轮只并行发出"全部投给领先标签时恰好能结束投票"所需的最少请求数，
+一致的样本通常只需要过半数的请求
+"""
+
+from collections import Counter
+
+
+class Election:
+    """
+    最多k票的投票过程
+
+    参数:
+    k (int): 每个样本的最大采样数
+    """
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError("k必须为正整数")
+        self.k = k
+        self.issued = 0
+        self.failed = 0
+        self.counts = Counter()
+
+    @property
+    def remaining(self):
+        """尚未发出的采样数"""
+        return self.k - self.issued
+
+    def _leaders(self):
+        ranked = self.counts.most_common(2) + [(None, 0), (None, 0)]
+        return ranked[0], ranked[1]
+
+    @property
+    def decided(self):
+        """领先标签的票数超过第二名加上全部剩余票数，或票已用完"""
+        (_, leader), (_, runner_up) = self._leaders()
+        return self.remaining == 0 or leader > runner_up + self.remaining
+
+    def next_wave(self):
+        """
+        发出下一轮采样并返回本轮的请求数
+
+        返回:
+        int: 剩余票全部投给领先标签时恰好能结束投票所需的最少请求数，投票已结束时为0
+        """
+        if self.decided:
+            return 0
+        (_, leader), (_, runner_up) = self._leaders()
+        # leader + x > runner_up + (remaining - x)
+        wave = min(self.remaining, (runner_up + self.remaining - leader) // 2 + 1)
+        self.issued += wave
+        return wave
+
+    def add(self, label):
+        """
+        记录一票
+
+        参数:
+        label (str): 投票的标签，请求失败或无法解析时为None（只消耗名额不计票）
+        """
+        if label is None:
+            self.failed += 1
+        else:
+            self.counts[label] += 1
+
+    @property
+    def winner(self):
+        """得票最多的标签，没有有效票时为None"""
+        return self._leaders()[0][0]
+
+    @property
+    def confidence(self):
+        """获胜标签占有效票的比例"""
+        votes = sum(self.counts.values())
+        return self.counts[self.winner] / votes if votes else None
+
+    @property
+    def saved(self):
+        """提前结束节省的采样数"""
+        return self.remaining
+
+
+def summarize_votes(records):
+    """
+    汇总批量验证中的投票结果
+
+    参数:
+    records (list): 带有vote_calls、vote_k和vote_confidence字段的验证记录
+
+    返回:
+    dict: samples、calls（实际请求数）、max_calls（不提前结束时的请求数）、calls_saved、saved_rate、
+        mean_confidence、unanimous（所有有效票一致的样本数）和accuracy_by_confidence
+        （置信度区间"1.0"、"[0.75,1)"、"<0.75"上的样本数与准确率）
+    """
+    voted = [record for record in records if record.get('vote_calls') and not record.get('propagated_from')]
+    calls = sum(record['vote_calls'] for record in voted)
+    max_calls = sum(record['vote_k'] for record in voted)
+    confidences = [record['vote_confidence'] for record in voted if record.get('vote_confidence') is not None]
+    buckets = {'1.0': [], '[0.75,1)': [], '<0.75': []}
+    for record in voted:
+        confidence = record.get('vote_confidence')
+        if confidence is None:
+            continue
+        key = '1.0' if confidence >= 1.0 else '[0.75,1)' if confidence >= 0.75 else '<0.75'
+        buckets[key].append(record['is_match'])
+    return {
+        'samples': len(voted),
+        'calls': calls,
+        'max_calls': max_calls,
+        'calls_saved': max_calls - calls,
+        'saved_rate': (max_calls - calls) / max_calls if max_calls else None,
+        'mean_confidence': sum(confidences) / len(confidences) if confidences else None,
+        'unanimous': sum(1 for confidence in confidences if confidence >= 1.0),
+        'accuracy_by_confidence': {
+            key: {'samples': len(matches), 'accuracy': sum(matches) / len(matches) if matches else None}
+            for key, matches in buckets.items()
+        }
+    }
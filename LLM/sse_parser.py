@@ -0,0 +1,233 @@
+"""
+SSE流式响应解析模块
+在字节层面增量解析Server-Sent Events，支持跨网络分片和多行data字段的事件，
+边接收边产出增量内容，并记录首字延迟（TTFT）和生成速度
+"""
+
+import json
+import re
+import time
+
+# 复杂度标签出现且已完整（后面已跟着一个非字母字符）时即可判定分类结果；
+# 边界只看ASCII字母，中文字符在\b和\W中算作单词字符，紧挨中文的标签（如"复杂度为nlogn的"）也要识别
+COMPLEXITY_LABEL_PATTERN = re.compile(
+    r'(?<![A-Za-z])(constant|linear|logn|nlogn|quadratic|cubic|np)(?=[^A-Za-z])', re.IGNORECASE)
+
+
+class SSEEvent:
+    """一个完整的SSE事件"""
+
+    __slots__ = ('event', 'data', 'id')
+
+    def __init__(self, event, data, id=None):
+        self.event = event
+        self.data = data
+        self.id = id
+
+    def __repr__(self):
+        return f"SSEEvent(event={self.event!r}, data={self.data!r}, id={self.id!r})"
+
+
+class SSEParser:
+    """
+    增量SSE解析器
+
+    feed()接收任意切分的字节块，内部使用可复用的bytearray缓冲区，
+    只对完整的行做UTF-8解码，因此多字节字符和事件被网络分片切断时也能正确解析。
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data_lines = []
+        self._event = None
+        self._id = None
+        self._pending_cr = False
+
+    def feed(self, chunk):
+        """
+        输入一段字节，返回其中已完整的事件
+
+        参数:
+        chunk (bytes): 网络收到的字节块
+
+        返回:
+        list: SSEEvent列表
+        """
+        buffer = self._buffer
+        buffer += chunk
+        events = []
+        start = 0
+        length = len(buffer)
+        next_lf = buffer.find(b'\n')
+        next_cr = buffer.find(b'\r')
+        while start < length:
+            # 上一块以\r结尾时，本块开头的\n属于同一个换行符
+            if self._pending_cr:
+                self._pending_cr = False
+                if buffer[start] == 0x0A:
+                    start += 1
+                    continue
+            # 缓存两种换行符的下一个位置，避免对长缓冲区反复从头查找
+            if 0 <= next_lf < start:
+                next_lf = buffer.find(b'\n', start)
+            if 0 <= next_cr < start:
+                next_cr = buffer.find(b'\r', start)
+            if next_lf < 0 and next_cr < 0:
+                break
+            newline = min(pos for pos in (next_lf, next_cr) if pos >= 0)
+            line = bytes(buffer[start:newline])
+            if buffer[newline] == 0x0D:
+                if newline + 1 < length:
+                    if buffer[newline + 1] == 0x0A:
+                        newline += 1
+                else:
+                    self._pending_cr = True
+            start = newline + 1
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        del buffer[:start]
+        return events
+
+    def close(self):
+        """
+        结束输入，按规范丢弃未以空行结尾的残缺事件
+
+        返回:
+        list: 空列表（保持与feed一致的返回类型）
+        """
+        self._buffer.clear()
+        self._data_lines = []
+        self._event = None
+        return []
+
+    def _process_line(self, line):
+        if not line:
+            # 空行：派发当前事件
+            if not self._data_lines:
+                self._event = None
+                return None
+            event = SSEEvent(self._event or 'message', '\n'.join(self._data_lines), self._id)
+            self._data_lines = []
+            self._event = None
+            return event
+        if line[:1] == b':':
+            return None  # 注释行
+        field, sep, value = line.partition(b':')
+        if sep and value[:1] == b' ':
+            value = value[1:]
+        text = value.decode('utf-8', errors='replace')
+        if field == b'data':
+            self._data_lines.append(text)
+        elif field == b'event':
+            self._event = text
+        elif field == b'id':
+            self._id = text
+        return None
+
+
+class StreamMetrics:
+    """单次流式响应的时延与速度指标"""
+
+    def __init__(self):
+        self.request_start = time.perf_counter()
+        self.first_token_time = None
+        self.end_time = None
+        self.delta_count = 0
+        self.completion_tokens = None
+        self.cancelled = False
+
+    def on_delta(self):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self.delta_count += 1
+
+    def finish(self, cancelled=False):
+        self.end_time = time.perf_counter()
+        self.cancelled = cancelled
+
+    @property
+    def ttft(self):
+        """首字延迟（秒）"""
+        if self.first_token_time is None:
+            return None
+        return self.first_token_time - self.request_start
+
+    @property
+    def tokens(self):
+        """生成的token数：优先使用服务端usage，否则以增量帧数近似"""
+        return self.completion_tokens if self.completion_tokens is not None else self.delta_count
+
+    @property
+    def tokens_per_sec(self):
+        """首字之后的生成速度（tokens/秒）"""
+        if self.first_token_time is None or self.end_time is None:
+            return None
+        duration = self.end_time - self.first_token_time
+        return self.tokens / duration if duration > 0 else None
+
+    def to_dict(self):
+        total = None if self.end_time is None else self.end_time - self.request_start
+        return {
+            'ttft': self.ttft,
+            'total_time': total,
+            'tokens': self.tokens,
+            'tokens_per_sec': self.tokens_per_sec,
+            'cancelled': self.cancelled
+        }
+
+
+def iter_chat_deltas(byte_chunks, metrics=None, stop_when=None):
+    """
+    从OpenAI兼容的chat completions流中逐个产出内容增量
+
+    参数:
+    byte_chunks (iterable): 字节块迭代器，如requests的response.iter_content(chunk_size=None)
+    metrics (StreamMetrics, optional): 需要填充的指标对象
+    stop_when (callable, optional): 以累计文本为参数的判断函数，返回True时提前结束读取
+
+    返回:
+    generator: 逐个产出的内容增量字符串
+    """
+    parser = SSEParser()
+    text = ''
+    for chunk in byte_chunks:
+        for event in parser.feed(chunk):
+            if event.data == '[DONE]':
+                if metrics:
+                    metrics.finish()
+                return
+            payload = json.loads(event.data)
+            usage = payload.get('usage')
+            if metrics and usage and usage.get('completion_tokens') is not None:
+                metrics.completion_tokens = usage['completion_tokens']
+            choices = payload.get('choices') or []
+            if not choices:
+                continue
+            content = (choices[0].get('delta') or {}).get('content')
+            if not content:
+                continue
+            if metrics:
+                metrics.on_delta()
+            text += content
+            yield content
+            if stop_when is not None and stop_when(text):
+                if metrics:
+                    metrics.finish(cancelled=True)
+                return
+    parser.close()
+    if metrics:
+        metrics.finish()
+
+
+def complexity_label_found(text):
+    """
+    判断累计文本中是否已出现完整的复杂度标签
+
+    参数:
+    text (str): 已接收的文本
+
+    返回:
+    bool: 是否已出现标签
+    """
+    return COMPLEXITY_LABEL_PATTERN.search(text) is not None
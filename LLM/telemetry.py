@@ -0,0 +1,237 @@
+"""
+请求遥测模块
+记录每次大模型请求的token用量、总延迟、首字节延迟、重试次数和服务商，
+汇总为总量、吞吐量、延迟分位数和费用估算，并导出为可跨运行绘图的CSV明细和JSONL运行摘要
+"""
+
+import csv
+import json
+import os
+from urllib.parse import urlparse
+
+from token_estimator import estimate_messages_tokens, estimate_tokens
+
+# 每条验证记录携带的遥测字段
+TELEMETRY_FIELDS = ('model', 'provider', 'prompt_tokens', 'completion_tokens', 'tokens_estimated',
+                    'latency_ms', 'ttfb_ms', 'retries')
+
+# 每百万token的美元价格，只用于费用估算；未列出的模型不计费用，可通过pricing参数覆盖
+DEFAULT_PRICING = {
+    'gpt-5.1': {'prompt': 1.25, 'completion': 10.0},
+    'gpt-4o': {'prompt': 2.5, 'completion': 10.0},
+    'gpt-4o-mini': {'prompt': 0.15, 'completion': 0.6},
+}
+
+# CSV明细的列顺序
+CSV_COLUMNS = ('run_id', 'sample_id', 'expected_complexity', 'is_match', 'error', 'propagated') + TELEMETRY_FIELDS
+
+
+def empty_telemetry():
+    """
+    未发出请求时的遥测字段
+
+    返回:
+    dict: 所有遥测字段均为None
+    """
+    return dict.fromkeys(TELEMETRY_FIELDS)
+
+
+def provider_name(base_url):
+    """
+    从API基础URL得到服务商名称（主机名）
+
+    参数:
+    base_url (str): API基础URL
+
+    返回:
+    str: 主机名，无法解析时返回原字符串
+    """
+    return urlparse(base_url).hostname or base_url
+
+
+def usage_tokens(response, messages, output):
+    """
+    读取响应中的token用量，服务端未返回usage时用本地估算代替
+
+    参数:
+    response: chat.completions接口的响应对象
+    messages (list): 请求消息
+    output (str): 模型回复文本
+
+    返回:
+    tuple: (提示token数, 生成token数, 是否为估算值)
+    """
+    usage = getattr(response, 'usage', None)
+    prompt = getattr(usage, 'prompt_tokens', None)
+    completion = getattr(usage, 'completion_tokens', None)
+    if prompt is not None and completion is not None:
+        return prompt, completion, False
+    return estimate_messages_tokens(messages), estimate_tokens(output or ''), True
+
+
+def estimate_cost(prompt_tokens, completion_tokens, model, pricing=None):
+    """
+    按单价估算一次请求的费用
+
+    参数:
+    prompt_tokens (int): 提示token数
+    completion_tokens (int): 生成token数
+    model (str): 模型名称
+    pricing (dict, optional): 模型到{'prompt': 美元/百万token, 'completion': 美元/百万token}的映射，默认DEFAULT_PRICING
+
+    返回:
+    float: 美元费用，模型没有单价时返回None
+    """
+    prices = (pricing or DEFAULT_PRICING).get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices['prompt'] + completion_tokens * prices['completion']) / 1e6
+
+
+def percentile(sorted_values, q):
+    """
+    线性插值分位数，与auto/instrumentation.percentile一致
+
+    参数:
+    sorted_values (list): 升序排列的数值
+    q (float): 分位点，取值0~1
+
+    返回:
+    float: 分位数，列表为空时返回None
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _distribution(values):
+    values = sorted(values)
+    return {
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'mean': sum(values) / len(values) if values else None,
+        'max': values[-1] if values else None
+    }
+
+
+def _request_count(record):
+    # 投票记录合并了多次请求
+    return record.get('vote_calls') or 1
+
+
+def summarize_telemetry(records, wall_seconds=None, pricing=None, slowest=5):
+    """
+    汇总验证记录中的遥测字段，传播得到的记录和未发出请求的记录不计入
+
+    投票得到的记录按vote_calls计入请求数和失败请求数（vote_failed），延迟分布仍按记录统计，
+    即描述整个投票过程而不是单个请求。
+
+    参数:
+    records (list): 验证记录
+    wall_seconds (float, optional): 批量验证的墙钟耗时，用于计算吞吐量
+    pricing (dict, optional): 模型单价，见estimate_cost()
+    slowest (int): 列出延迟最高的样本数
+
+    返回:
+    dict: 包含samples（计入的记录数）、requests、failed_requests、prompt_tokens、completion_tokens、total_tokens、estimated_token_records、
+        retries、wall_seconds、requests_per_second、tokens_per_second、completion_tokens_per_second、
+        latency_ms和ttfb_ms（p50/p95/p99/mean/max）、cost_usd（total、per_request、unpriced_requests）、
+        by_provider（服务商到请求数）和slowest（延迟最高的样本ID与延迟）
+    """
+    requests = [record for record in records
+                if record.get('latency_ms') is not None and not record.get('propagated_from')]
+    calls = sum(_request_count(record) for record in requests)
+    prompt_tokens = sum(record.get('prompt_tokens') or 0 for record in requests)
+    completion_tokens = sum(record.get('completion_tokens') or 0 for record in requests)
+    total_tokens = prompt_tokens + completion_tokens
+    total_cost = 0.0
+    unpriced = 0
+    by_provider = {}
+    for record in requests:
+        provider = record.get('provider') or 'unknown'
+        by_provider[provider] = by_provider.get(provider, 0) + _request_count(record)
+        if record.get('prompt_tokens') is None:
+            continue
+        cost = estimate_cost(record['prompt_tokens'], record.get('completion_tokens') or 0, record.get('model'),
+                             pricing)
+        if cost is None:
+            unpriced += _request_count(record)
+        else:
+            total_cost += cost
+    throughput = wall_seconds if wall_seconds else None
+    slow = sorted(requests, key=lambda record: record['latency_ms'], reverse=True)[:slowest]
+    return {
+        'samples': len(requests),
+        'requests': calls,
+        'failed_requests': sum(record['vote_failed'] if record.get('vote_calls') else bool(record.get('error'))
+                               for record in requests),
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': total_tokens,
+        'estimated_token_records': sum(1 for record in requests if record.get('tokens_estimated')),
+        'retries': sum(record.get('retries') or 0 for record in requests),
+        'wall_seconds': wall_seconds,
+        'requests_per_second': calls / throughput if throughput else None,
+        'tokens_per_second': total_tokens / throughput if throughput else None,
+        'completion_tokens_per_second': completion_tokens / throughput if throughput else None,
+        'latency_ms': _distribution([record['latency_ms'] for record in requests]),
+        'ttfb_ms': _distribution([record['ttfb_ms'] for record in requests if record.get('ttfb_ms') is not None]),
+        'cost_usd': {
+            'total': total_cost,
+            'per_request': total_cost / (calls - unpriced) if calls > unpriced else None,
+            'unpriced_requests': unpriced
+        },
+        'by_provider': by_provider,
+        'slowest': [{'sample_id': record.get('sample_id'), 'latency_ms': record['latency_ms']} for record in slow]
+    }
+
+
+def _flatten(prefix, value, row):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}" if prefix else key, item, row)
+    elif not isinstance(value, list):
+        row[prefix] = value
+
+
+def export_telemetry(records, summary, telemetry_dir, run_id, extra=None):
+    """
+    导出遥测数据，供跨运行绘图
+
+    每条记录追加为requests.csv中的一行（含run_id），运行摘要展平后追加为runs.jsonl中的一行，
+    两个文件都只追加，多次运行的数据可直接按run_id分组比较。
+
+    参数:
+    records (list): 验证记录
+    summary (dict): summarize_telemetry()的结果
+    telemetry_dir (str): 输出目录，不存在时创建
+    run_id (str): 运行标识
+    extra (dict, optional): 写入运行摘要的其他字段，如准确率和输入文件
+
+    返回:
+    tuple: (CSV明细路径, JSONL运行摘要路径)
+    """
+    os.makedirs(telemetry_dir, exist_ok=True)
+    csv_path = os.path.join(telemetry_dir, 'requests.csv')
+    runs_path = os.path.join(telemetry_dir, 'runs.jsonl')
+    new_file = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+    with open(csv_path, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        for record in records:
+            row = {key: record.get(key) for key in TELEMETRY_FIELDS}
+            row.update(run_id=run_id, sample_id=record.get('sample_id'),
+                       expected_complexity=record.get('expected_complexity'), is_match=record.get('is_match'),
+                       error=bool(record.get('error')), propagated=bool(record.get('propagated_from')))
+            writer.writerow(row)
+    row = {'run_id': run_id}
+    _flatten('', dict(extra or {}), row)
+    _flatten('', summary, row)
+    with open(runs_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return csv_path, runs_path
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+测试自适应并发控制模块
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from LLM import build_messages, batch_validate_from_jsonl
+from adaptive_concurrency import AIMDController, fixed_controller, run_with_controller, is_throttled_record
+from mock_llm_server import MockModel, MockLLMServer
+
+
+class TestAIMDController(unittest.TestCase):
+    """测试AIMD并发窗口控制"""
+
+    def test_additive_increase(self):
+        """测试正常完成时窗口加性增长"""
+        controller = AIMDController(initial_window=2, max_window=10)
+        for _ in range(3):
+            controller.release(controller.acquire())
+        # 每次完成增加1/窗口，完成约一个窗口的请求后窗口增加1
+        self.assertEqual(controller.window, 3)
+
+    def test_multiplicative_decrease_on_throttle(self):
+        """测试限流时窗口乘性收缩"""
+        controller = AIMDController(initial_window=8, max_window=16)
+        controller.release(controller.acquire(), throttled=True)
+        self.assertEqual(controller.window, 4)
+        self.assertEqual(controller.snapshot()['throttle_events'], 1)
+
+    def test_single_decrease_per_congestion_event(self):
+        """测试同一拥塞事件中在途请求只触发一次收缩"""
+        controller = AIMDController(initial_window=8, max_window=16)
+        tokens = [controller.acquire() for _ in range(4)]
+        for token in tokens:
+            controller.release(token, throttled=True)
+        self.assertEqual(controller.window, 4)
+        self.assertEqual(controller.snapshot()['window_decreases'], 1)
+
+    def test_window_bounds(self):
+        """测试窗口不超出上下限"""
+        controller = AIMDController(initial_window=2, min_window=2, max_window=3)
+        for _ in range(20):
+            controller.release(controller.acquire())
+        self.assertEqual(controller.window, 3)
+        controller.release(controller.acquire(), throttled=True)
+        self.assertEqual(controller.window, 2)
+
+    def test_fixed_controller(self):
+        """测试固定并发控制器不调整窗口"""
+        controller = fixed_controller(4)
+        for _ in range(10):
+            controller.release(controller.acquire())
+        self.assertEqual(controller.window, 4)
+
+
+class TestRunWithController(unittest.TestCase):
+    """测试受控并发执行"""
+
+    def test_respects_window(self):
+        """测试在途请求数不超过窗口"""
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'peak': 0}
+
+        def worker(task):
+            with lock:
+                state['in_flight'] += 1
+                state['peak'] = max(state['peak'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return task * 2
+
+        completed = run_with_controller(range(20), worker, fixed_controller(3))
+        self.assertEqual(sorted(result for _, result in completed), [i * 2 for i in range(20)])
+        self.assertLessEqual(state['peak'], 3)
+
+    def test_throttle_shrinks_window(self):
+        """测试限流结果会收缩窗口"""
+        controller = AIMDController(initial_window=8, max_window=8)
+        run_with_controller(range(4), lambda task: task, controller,
+                            is_throttled=lambda result: result == 0)
+        self.assertGreaterEqual(controller.snapshot()['throttle_events'], 1)
+        self.assertLess(controller.window, 8)
+
+
+class TestBatchThrottling(unittest.TestCase):
+    """测试批量验证对限流响应的处理"""
+
+    def test_is_throttled_record(self):
+        """测试最终失败的429和客户端内部重试过的请求都视为限流"""
+        self.assertTrue(is_throttled_record({'status_code': 429, 'retries': None}))
+        self.assertTrue(is_throttled_record({'status_code': None, 'retries': 1}))
+        self.assertFalse(is_throttled_record({'status_code': 400, 'retries': 0}))
+        self.assertFalse(is_throttled_record({'status_code': None, 'retries': None}))
+
+    def test_429_reaches_controller(self):
+        """测试客户端内部重试成功的429仍被计为限流事件并收缩窗口"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, chatty_rate=0.0, failures=[429])
+        sources = [f'class Main{i} {{ void f() {{ g({i}); }} }}' for i in range(6)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'data.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                for src in sources:
+                    f.write(json.dumps({'src': src, 'complexity': model.label_for(build_messages(src))}) + '\n')
+            with MockLLMServer(model) as server:
+                results, records = batch_validate_from_jsonl(path, save_results=False, progress=False,
+                                                             concurrency=4, adaptive_concurrency=True,
+                                                             api_key='k', base_url=server.base_url)
+        self.assertEqual(results['correct'], len(sources))
+        self.assertEqual(sum(record['retries'] for record in records), 1)
+        self.assertEqual(results['concurrency']['throttle_events'], 1)
+        self.assertEqual(results['concurrency']['window_decreases'], 1)
+        self.assertEqual(model.requests, len(sources) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+测试批量验证在本地模拟服务上的各条路径
+"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+from LLM import build_messages, batch_validate_from_jsonl
+from mock_llm_server import MockModel, MockLLMServer
+from dedup import deduplicate_jsonl
+from retrieval_index import build_retrieval_index
+
+
+def _source(i):
+    return f'class Main{i} {{ void f(int n) {{ for (int i = 0; i < n; i++) g(i, {i}); }} }}'
+
+
+class TestBatchValidate(unittest.TestCase):
+    """测试投票、分类模式、去重、提前停止、遥测导出和少样本示例"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.model = MockModel(base_latency=0.0, token_latency=0.0, chatty_rate=0.0)
+        self.server = MockLLMServer(self.model).start()
+
+    def tearDown(self):
+        self.server.close()
+        self.temp_dir.cleanup()
+
+    def _write_data(self, sources, name='data.jsonl', extra_lines=()):
+        # 期望复杂度取模拟模型最可能的回答，温度为0的请求全部匹配
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, src in enumerate(sources):
+                f.write(json.dumps({'src': src, 'complexity': self.model.label_for(build_messages(src)),
+                                    'problem': f'P{i % 7}', 'from': 'test'}) + '\n')
+            for line in extra_lines:
+                f.write(line + '\n')
+        return path
+
+    def _run(self, path, **kwargs):
+        return batch_validate_from_jsonl(path, save_results=False, progress=False, api_key='k',
+                                         base_url=self.server.base_url, **kwargs)
+
+    def test_telemetry_export(self):
+        """测试并发验证的统计、记录顺序和遥测导出"""
+        path = self._write_data([_source(i) for i in range(12)], extra_lines=['{broken'])
+        telemetry_dir = os.path.join(self.temp_dir.name, 'telemetry')
+        results, records = self._run(path, concurrency=4, telemetry_dir=telemetry_dir)
+        self.assertEqual((results['total'], results['correct'], results['failed']), (12, 12, 1))
+        self.assertEqual([record['sample_id'] for record in records], list(range(1, 14)))
+        self.assertEqual(results['telemetry']['requests'], 12)
+        self.assertEqual(self.model.requests, 12)
+        with open(os.path.join(telemetry_dir, 'requests.csv'), encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 13)
+        with open(os.path.join(telemetry_dir, 'runs.jsonl'), encoding='utf-8') as f:
+            runs = [json.loads(line) for line in f]
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]['total'], 12)
+
+    def test_votes(self):
+        """测试投票模式：回答一致时每个样本只用过半数的请求"""
+        self.model.accuracy = 1.0
+        path = self._write_data([_source(i) for i in range(6)])
+        results, records = self._run(path, votes=3, vote_temperature=0.7)
+        self.assertEqual(results['correct'], 6)
+        self.assertEqual((results['voting']['calls'], results['voting']['max_calls']), (12, 18))
+        self.assertEqual(self.model.requests, 12)
+        self.assertEqual((results['telemetry']['samples'], results['telemetry']['requests']), (6, 12))
+        self.assertEqual({body['temperature'] for body in self.model.bodies}, {0.7})
+        self.assertTrue(all(record['vote_confidence'] == 1.0 for record in records))
+
+    def test_votes_respect_concurrency(self):
+        """测试投票的每个采样请求都占用并发名额，在途请求数不超过并发窗口"""
+        self.model.accuracy = 1.0
+        self.model.base_latency = 0.02
+        path = self._write_data([_source(i) for i in range(6)])
+        results, _ = self._run(path, votes=5, concurrency=2)
+        self.assertEqual(results['correct'], 6)
+        self.assertEqual(self.model.requests, 18)
+        self.assertLessEqual(max(self.model.peak_in_flight.values()), 2)
+        self.assertEqual(results['concurrency']['completed'], 18)
+
+    def test_constrained(self):
+        """测试分类模式：全部回复符合格式并带有logprobs置信度"""
+        path = self._write_data([_source(i) for i in range(6)])
+        results, records = self._run(path, constrained=True)
+        self.assertEqual(results['correct'], 6)
+        decoding = results['decoding']
+        self.assertEqual((decoding['responses'], decoding['off_format'], decoding['with_logprobs']), (6, 0, 6))
+        self.assertAlmostEqual(decoding['mean_confidence'], self.model.accuracy, places=6)
+        self.assertTrue(all(body.get('response_format') for body in self.model.bodies))
+
+    def test_dedup(self):
+        """测试去重：每簇只请求一次，结果传播给簇内其他样本"""
+        sources = [_source(i) for i in range(4)]
+        path = self._write_data(sources * 3)
+        # 同一源代码的三份记录problem不同，跨问题查找近重复
+        sidecar = os.path.join(self.temp_dir.name, 'data.dedup.jsonl')
+        deduplicate_jsonl(path, sidecar, by_problem=False)
+        results, records = self._run(path, dedup_file=sidecar)
+        self.assertEqual(self.model.requests, 4)
+        self.assertEqual((results['total'], results['correct']), (12, 12))
+        self.assertEqual((results['dedup']['clusters'], results['dedup']['propagated']), (4, 8))
+        self.assertEqual(sum(1 for record in records if record.get('propagated_from')), 8)
+        self.assertEqual([record['sample_id'] for record in records], list(range(1, 13)))
+
+    def test_early_stop(self):
+        """测试提前停止：置信区间足够窄后不再发出请求"""
+        path = self._write_data([_source(i) for i in range(300)])
+        results, _ = self._run(path, early_stop=True, ci_width=0.3, seed=1)
+        early_stop = results['early_stop']
+        self.assertTrue(early_stop['stopped_early'])
+        self.assertLess(early_stop['evaluated'], 300)
+        self.assertEqual(self.model.requests, early_stop['evaluated'])
+        self.assertEqual(results['total'], early_stop['evaluated'])
+
+    def test_few_shot(self):
+        """测试少样本示例：按问题排除后放在待分析代码之前"""
+        path = self._write_data([_source(i) for i in range(14)])
+        index_dir = os.path.join(self.temp_dir.name, 'index')
+        build_retrieval_index(path, index_dir, num_buckets=1 << 12, max_df_ratio=None)
+        results, records = self._run(path, max_items=5, few_shot_index=index_dir, few_shot_k=2)
+        self.assertEqual(results['correct'], 5)
+        self.assertEqual(results['few_shot']['index_size'], 14)
+        self.assertTrue(all(record['few_shot_examples'] == 2 for record in records))
+        for body in self.model.bodies:
+            self.assertEqual(len(body['messages']), 1 + 2 * 2 + 1)
+            query = body['messages'][-1]['content']
+            self.assertTrue(all(message['content'] != query for message in body['messages'][1:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+测试批量验证容量规划
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from LLM import build_messages
+from capacity_planner import plan_capacity, load_mean_latency, format_plan
+from telemetry import estimate_cost
+from token_estimator import estimate_messages_tokens
+
+
+class TestCapacityPlanner(unittest.TestCase):
+    """测试token计数、耗时推算与最大提示词"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.temp_dir.name, 'data.jsonl')
+        self.sources = ['class A { int f(int n) { return n; } }',
+                        'class B { void f(int n) { for (int i = 0; i < n; i++) g(i); } }',
+                        'class C { void f() { ' + 'g(); ' * 500 + '} }']
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            for i, src in enumerate(self.sources):
+                f.write(json.dumps({'src': src, 'complexity': 'linear', 'problem': f'P{i}'}) + '\n')
+            f.write('\n')
+            f.write('{broken\n')
+            f.write(json.dumps({'src': 'class D {}'}) + '\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_exact_prompt_tokens(self):
+        """测试按实际发送的消息计数，跳过与批量验证相同的无效行"""
+        plan = plan_capacity(self.data_file, completion_tokens=5)
+        expected = [estimate_messages_tokens(build_messages(src)) for src in self.sources]
+        self.assertEqual(plan['samples'], 3)
+        self.assertEqual(plan['skipped'], 2)
+        self.assertEqual(plan['prompt_tokens']['total'], sum(expected))
+        self.assertEqual(plan['total_tokens'], sum(expected) + 15)
+        self.assertAlmostEqual(plan['cost_usd']['total'], estimate_cost(sum(expected), 15, 'gpt-5.1'))
+        self.assertEqual(plan['largest_prompts'][0], {'sample_id': 3, 'problem': 'P2', 'prompt_tokens': max(expected)})
+
+    def test_bottleneck(self):
+        """测试并发、每分钟请求数和每分钟token数中最紧的约束决定耗时"""
+        plan = plan_capacity(self.data_file, concurrency=3, mean_latency=1.0)
+        self.assertEqual(plan['bottleneck'], 'concurrency')
+        self.assertAlmostEqual(plan['wall_seconds'], 1.0)
+        self.assertIsNone(plan['saturating_concurrency'])
+        plan = plan_capacity(self.data_file, concurrency=3, mean_latency=1.0, rpm=60)
+        self.assertEqual(plan['bottleneck'], 'rpm')
+        self.assertAlmostEqual(plan['wall_seconds'], 3.0)
+        self.assertAlmostEqual(plan['saturating_concurrency'], 1.0)
+        plan = plan_capacity(self.data_file, concurrency=3, mean_latency=1.0, rpm=60, tpm=60)
+        self.assertEqual(plan['bottleneck'], 'tpm')
+        self.assertAlmostEqual(plan['wall_seconds'], plan['total_tokens'])
+
+    def test_context_window_and_limits(self):
+        """测试超出上下文窗口的样本计数、max_items和未知模型"""
+        plan = plan_capacity(self.data_file, context_window=500, model='unknown', max_items=2, top_k=1)
+        self.assertEqual((plan['samples'], plan['over_context']), (2, 0))
+        self.assertIsNone(plan['cost_usd']['total'])
+        self.assertEqual(len(plan['largest_prompts']), 1)
+        plan = plan_capacity(self.data_file, context_window=500)
+        self.assertEqual(plan['over_context'], 1)
+        self.assertIn('超出上下文窗口(500): 1', format_plan(plan))
+
+    def test_load_mean_latency(self):
+        """测试从遥测运行摘要读取最近一次运行的平均延迟"""
+        runs_path = os.path.join(self.temp_dir.name, 'runs.jsonl')
+        with open(runs_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'run_id': 'a', 'latency_ms_mean': 1500.0}) + '\n')
+            f.write(json.dumps({'run_id': 'b', 'latency_ms_mean': 800.0}) + '\n')
+            f.write(json.dumps({'run_id': 'c', 'latency_ms_mean': None}) + '\n')
+        self.assertAlmostEqual(load_mean_latency(runs_path), 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
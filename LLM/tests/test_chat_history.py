@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+测试对话历史管理与token估算模块
+"""
+
+import unittest
+from chat_history import ChatHistory
+from token_estimator import estimate_tokens, estimate_message_tokens, MESSAGE_OVERHEAD_TOKENS
+
+
+class TestTokenEstimator(unittest.TestCase):
+    """测试本地token估算"""
+
+    def test_estimate_tokens(self):
+        """测试中英文与代码的估算"""
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('你好，世界'), 5)
+        self.assertEqual(estimate_tokens('quadratic'), 3)
+        self.assertEqual(estimate_tokens('for (int i = 0; i < n; i++)'), 15)
+
+    def test_message_overhead(self):
+        """测试消息格式开销"""
+        message = {'role': 'user', 'content': 'linear'}
+        self.assertEqual(estimate_message_tokens(message), MESSAGE_OVERHEAD_TOKENS + 2)
+
+
+class TestChatHistory(unittest.TestCase):
+    """测试按token预算裁剪的对话历史"""
+
+    def test_running_total(self):
+        """测试token总数增量维护"""
+        history = ChatHistory(max_context_tokens=1000, reserve_tokens=100)
+        history.append('user', 'hello').append('assistant', 'world')
+        expected = sum(estimate_message_tokens(m) for m in history.messages())
+        self.assertEqual(history.total_tokens, expected)
+        self.assertEqual(len(history), 2)
+
+    def test_evicts_oldest_and_pins_system(self):
+        """测试超出预算时淘汰最早消息且保留系统消息"""
+        history = ChatHistory(max_context_tokens=60, reserve_tokens=10, system_prompt='你是算法专家')
+        for i in range(20):
+            history.append('user', f'question number {i}')
+            history.append('assistant', f'answer number {i}')
+        messages = history.messages()
+        self.assertEqual(messages[0]['role'], 'system')
+        self.assertEqual(messages[1]['role'], 'user')
+        self.assertEqual(messages[-1]['content'], 'answer number 19')
+        self.assertLessEqual(history.total_tokens, history.budget)
+        self.assertGreater(history.evicted, 0)
+
+    def test_keeps_latest_message(self):
+        """测试单条超长消息仍会保留"""
+        history = ChatHistory(max_context_tokens=40, reserve_tokens=10)
+        history.append('user', 'word ' * 100)
+        self.assertEqual(len(history), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
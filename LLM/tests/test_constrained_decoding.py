@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+测试受约束的标签解码与本地模拟服务
+"""
+
+import math
+import unittest
+from types import SimpleNamespace
+from LLM import build_messages, validate_code_complexity
+from constrained_decoding import parse_label_output, label_probabilities, summarize_decoding
+from mock_llm_server import MockModel, MockLLMServer, benchmark_decoding
+
+SOURCES = [f'class Main{i} {{ void f(int n) {{ for (int i = 0; i < n; i++) g({i}); }} }}' for i in range(40)]
+
+
+class TestLabelParsing(unittest.TestCase):
+    """测试回复解析与logprobs置信度"""
+
+    def test_parse_label_output(self):
+        """测试停止序列截断、完整JSON和不符合格式的回复"""
+        self.assertEqual(parse_label_output('{"label":"nlogn"'), 'nlogn')
+        self.assertEqual(parse_label_output('{"label": "Cubic"}'), 'cubic')
+        self.assertIsNone(parse_label_output('{"label":"sqrtn"'))
+        self.assertIsNone(parse_label_output('The complexity is O(n).'))
+        self.assertIsNone(parse_label_output(''))
+
+    def test_label_probabilities(self):
+        """测试按标签首个token位置的候选汇总概率，有歧义的候选被忽略"""
+        def token(text, logprob, top=()):
+            return SimpleNamespace(token=text, logprob=logprob, top_logprobs=list(top))
+        top = [token('quad', math.log(0.7)), token('cubi', math.log(0.2)), token('n', math.log(0.1))]
+        logprobs = SimpleNamespace(content=[token('{"', 0.0), token('label', 0.0), token('":"', 0.0),
+                                            token('quad', math.log(0.7), top), token('rati', 0.0),
+                                            token('c', 0.0), token('"', 0.0)])
+        probabilities = label_probabilities(logprobs, '{"label":"quadratic"', 'quadratic')
+        self.assertEqual(set(probabilities), {'quadratic', 'cubic'})
+        self.assertAlmostEqual(probabilities['quadratic'], 0.7)
+        self.assertIsNone(label_probabilities(None, '{"label":"quadratic"', 'quadratic'))
+        self.assertIsNone(label_probabilities(logprobs, 'x', None))
+
+
+class TestMockServer(unittest.TestCase):
+    """测试分类模式在模拟服务上的行为"""
+
+    def test_constrained_request(self):
+        """测试分类模式只输出JSON标签，并从logprobs得到置信度"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, chatty_rate=1.0, accuracy=0.8)
+        with MockLLMServer(model) as server:
+            expected = model.label_for(build_messages(SOURCES[0]))
+            record = validate_code_complexity(SOURCES[0], expected, api_key='k', base_url=server.base_url,
+                                              verbose=False, constrained=True)
+            self.assertTrue(record['is_match'])
+            self.assertFalse(record['off_format'])
+            self.assertEqual(record['model_raw_output'], expected)
+            self.assertAlmostEqual(record['label_confidence'], 0.8, places=6)
+            self.assertAlmostEqual(sum(record['label_probabilities'].values()), 1.0, places=6)
+            self.assertLessEqual(record['completion_tokens'], 16)
+
+            free = validate_code_complexity(SOURCES[0], expected, api_key='k', base_url=server.base_url,
+                                            verbose=False)
+            self.assertFalse(free['is_match'])
+            self.assertGreater(free['completion_tokens'], record['completion_tokens'])
+            self.assertNotIn('off_format', free)
+
+    def test_logprobs_fallback(self):
+        """测试服务端拒绝logprobs时去掉该参数重试一次，仍得到标签"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, supports_logprobs=False)
+        with MockLLMServer(model) as server:
+            record = validate_code_complexity(SOURCES[1], 'linear', api_key='k', base_url=server.base_url,
+                                              verbose=False, constrained=True)
+        self.assertIsNone(record['error'])
+        self.assertFalse(record['off_format'])
+        self.assertIsNone(record['label_confidence'])
+        self.assertEqual(model.requests, 2)
+
+    def test_rejected_parameters(self):
+        """测试服务端拒绝的分类模式参数被逐个去掉，logprobs等其余参数保留；非分类参数被拒绝时照常报错"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, rejected_params={'stop', 'max_completion_tokens'})
+        with MockLLMServer(model) as server:
+            expected = model.label_for(build_messages(SOURCES[2]))
+            record = validate_code_complexity(SOURCES[2], expected, api_key='k', base_url=server.base_url,
+                                              verbose=False, constrained=True)
+            self.assertTrue(record['is_match'])
+            self.assertIsNotNone(record['label_confidence'])
+            self.assertEqual(model.requests, 3)
+            self.assertEqual(model.bodies[0]['max_completion_tokens'], 16)
+            self.assertNotIn('max_tokens', model.bodies[0])
+            last = model.bodies[-1]
+            self.assertFalse({'stop', 'max_completion_tokens'} & set(last))
+            self.assertTrue(last['logprobs'] and last['response_format'])
+
+            model.rejected_params = {'temperature'}
+            failed = validate_code_complexity(SOURCES[2], expected, api_key='k', base_url=server.base_url,
+                                              verbose=False, constrained=True)
+            self.assertEqual(failed['status_code'], 400)
+            self.assertEqual(model.requests, 3 + 5)
+
+    def test_benchmark_decoding(self):
+        """测试分类模式消除格式不符的回答，平均输出token数和延迟低于自由生成"""
+        model = MockModel(base_latency=0.001, token_latency=0.001, chatty_rate=0.3)
+        with MockLLMServer(model) as server:
+            report = benchmark_decoding(SOURCES, server)
+        self.assertGreater(report['free']['off_format_rate'], 0.1)
+        self.assertEqual(report['constrained']['off_format_rate'], 0.0)
+        self.assertEqual(report['constrained']['accuracy'], 1.0)
+        self.assertLess(report['constrained']['completion_tokens_mean'], report['free']['completion_tokens_mean'])
+        self.assertGreater(report['latency_speedup'], 1.0)
+
+    def test_summarize_decoding(self):
+        """测试分类模式汇总"""
+        records = [{'off_format': False, 'label_confidence': 0.9}, {'off_format': True, 'label_confidence': None},
+                   {'off_format': None}, {'off_format': False, 'label_confidence': 0.5, 'propagated_from': 1}]
+        summary = summarize_decoding(records)
+        self.assertEqual((summary['responses'], summary['off_format'], summary['with_logprobs']), (2, 1, 1))
+        self.assertAlmostEqual(summary['mean_confidence'], 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+测试少样本示例的检索与提示词构造
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from LLM import select_few_shot_examples, few_shot_messages, format_user_prompt
+from retrieval_index import build_retrieval_index, RetrievalIndex
+
+
+class TestFewShot(unittest.TestCase):
+    """测试按token预算选取相似示例"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_file = os.path.join(self.temp_dir.name, 'data.jsonl')
+        records = [
+            {'src': 'class A { void f(int n) { for (int i = 0; i < n; i++) g(i); } }',
+             'complexity': 'linear', 'problem': 'P1'},
+            {'src': 'class B { void f(int n) { for (int i = 0; i < n; i++) h(i); } }',
+             'complexity': 'linear', 'problem': 'P2'},
+            {'src': 'class C { void f(int n) { for (int i = 0; i < n; i++) { ' + 'h(i); ' * 200 + '} } }',
+             'complexity': 'linear', 'problem': 'P3'},
+            {'src': 'class D { int f(int a, int b) { return a * b; } }',
+             'complexity': 'constant', 'problem': 'P4'},
+        ]
+        with open(data_file, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        index_dir = os.path.join(self.temp_dir.name, 'index')
+        build_retrieval_index(data_file, index_dir, num_buckets=1 << 12, max_df_ratio=None)
+        self.index = RetrievalIndex(index_dir)
+        self.records = records
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_select_excludes_problem_and_respects_budget(self):
+        """测试排除同一问题的样本，超出预算的长示例被跳过"""
+        query = self.records[0]
+        examples = select_few_shot_examples(self.index, query['src'], query['problem'], k=2, token_budget=300)
+        problems = [example['problem'] for example in examples]
+        self.assertEqual(problems[0], 'P2')
+        self.assertNotIn('P1', problems)
+        self.assertNotIn('P3', problems)
+        self.assertEqual(len(examples), 2)
+
+        examples = select_few_shot_examples(self.index, query['src'], query['problem'], k=2, token_budget=10)
+        self.assertEqual(examples, [])
+
+    def test_skip_identical_source_without_problem(self):
+        """测试记录没有problem时不会把待分析代码本身作为示例"""
+        query = self.records[0]
+        examples = select_few_shot_examples(self.index, query['src'], None, k=1, token_budget=1000)
+        self.assertNotEqual(examples[0]['src'], query['src'])
+
+    def test_empty_problem_does_not_exclude(self):
+        """测试problem为空字符串时不排除缺少problem字段的样本"""
+        data_file = os.path.join(self.temp_dir.name, 'no_problem.jsonl')
+        with open(data_file, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps({'src': record['src'], 'complexity': record['complexity']}) + '\n')
+        index_dir = os.path.join(self.temp_dir.name, 'no_problem_index')
+        build_retrieval_index(data_file, index_dir, num_buckets=1 << 12, max_df_ratio=None)
+        with RetrievalIndex(index_dir) as index:
+            examples = select_few_shot_examples(index, self.records[0]['src'], '', k=2, token_budget=300)
+        self.assertEqual([example['src'] for example in examples], [self.records[1]['src'], self.records[3]['src']])
+
+    def test_messages(self):
+        """测试示例转换为用户/助手消息对"""
+        messages = few_shot_messages([{'src': 'int x;', 'complexity': 'constant'}])
+        self.assertEqual(messages, [{'role': 'user', 'content': format_user_prompt('int x;')},
+                                    {'role': 'assistant', 'content': 'constant'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+测试多模型并发对比
+"""
+
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from unittest import mock
+import multi_model_runner
+from LLM import DEFAULT_API_KEY, DEFAULT_BASE_URL
+from mock_llm_server import MockModel, MockLLMServer
+from multi_model_runner import parse_target, agreement_columns, run_multi_model
+
+# 本地端点上每个模型固定给出的回答
+ANSWERS = {'always-linear': 'linear', 'always-quadratic': 'quadratic'}
+
+
+class TestMultiModelRunner(unittest.TestCase):
+    """测试一次遍历、多目标分发与并排输出"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = MockModel(base_latency=0.01, token_latency=0.0, responder=lambda body: ANSWERS[body['model']])
+        cls.server = MockLLMServer(cls.model).start()
+        cls.base_url = cls.server.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def setUp(self):
+        os.environ['MOCK_LLM_KEY'] = 'k'
+        self.addCleanup(os.environ.pop, 'MOCK_LLM_KEY')
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.temp_dir.name, 'data.jsonl')
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            for i in range(12):
+                complexity = 'linear' if i % 3 else 'quadratic'
+                f.write(json.dumps({'src': f'class A{i} {{}}', 'complexity': complexity, 'problem': f'P{i}'}) + '\n')
+            f.write('{broken\n')
+        self.model.model_requests.clear()
+        self.model.peak_in_flight.clear()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_side_by_side(self):
+        """测试每个目标对每个样本各请求一次，并发不超过各自上限，输出矩阵和逐样本列"""
+        targets = [parse_target(f'model=always-linear,base_url={self.base_url},api_key_env=MOCK_LLM_KEY,concurrency=3'),
+                   parse_target(f'name=quad,model=always-quadratic,base_url={self.base_url},api_key_env=MOCK_LLM_KEY,concurrency=1')]
+        output_dir = os.path.join(self.temp_dir.name, 'out')
+        matrix, rows = run_multi_model(self.data_file, targets, output_dir=output_dir)
+        self.assertEqual(self.model.model_requests, Counter({'always-linear': 12, 'always-quadratic': 12}))
+        self.assertLessEqual(self.model.peak_in_flight['always-linear'], 3)
+        self.assertEqual(self.model.peak_in_flight['always-quadratic'], 1)
+
+        by_name = {row['name']: row for row in matrix}
+        self.assertEqual((by_name['always-linear']['correct'], by_name['quad']['correct']), (8, 4))
+        self.assertEqual(by_name['quad']['completion_tokens'], 12 * 3)
+        self.assertEqual(by_name['quad']['provider'], '127.0.0.1')
+
+        self.assertEqual([row['sample_id'] for row in rows], list(range(1, 13)))
+        self.assertEqual(rows[0]['quad_output'], 'quadratic')
+        self.assertEqual(rows[0]['correct_targets'], 1)
+        self.assertEqual(rows[0]['agreement'], 0.5)
+        self.assertFalse(rows[0]['unanimous'])
+
+        with open(os.path.join(output_dir, 'samples.csv'), encoding='utf-8') as f:
+            sample_rows = list(csv.DictReader(f))
+        self.assertEqual(len(sample_rows), 12)
+        self.assertIn('always-linear_match', sample_rows[0])
+        with open(os.path.join(output_dir, 'summary.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['unanimous_rate'], 0)
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'matrix.csv')))
+
+    def test_failing_target_does_not_hang(self):
+        """测试一个目标的调度线程出错时仍取空队列，其他目标正常完成"""
+        validate = multi_model_runner.validate_code_complexity
+
+        def _validate(*args, **kwargs):
+            if kwargs['model'] == 'always-quadratic':
+                raise RuntimeError('boom')
+            return validate(*args, **kwargs)
+
+        targets = [parse_target(f'model=always-linear,base_url={self.base_url},api_key_env=MOCK_LLM_KEY,concurrency=2'),
+                   parse_target(f'model=always-quadratic,base_url={self.base_url},api_key_env=MOCK_LLM_KEY,concurrency=1')]
+        outcome = []
+        with mock.patch.object(multi_model_runner, 'validate_code_complexity', _validate):
+            thread = threading.Thread(target=lambda: outcome.append(
+                run_multi_model(self.data_file, targets, buffer_size=1)), daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+        self.assertFalse(thread.is_alive())
+        matrix, rows = outcome[0]
+        by_name = {row['name']: row for row in matrix}
+        self.assertEqual((by_name['always-linear']['samples'], by_name['always-quadratic']['samples']), (12, 0))
+        self.assertEqual(len(rows), 12)
+        self.assertTrue(all(row['always-quadratic_output'] is None for row in rows))
+
+    def test_parse_target(self):
+        """测试目标描述解析与校验"""
+        os.environ['TEST_TARGET_KEY'] = 'secret'
+        self.addCleanup(os.environ.pop, 'TEST_TARGET_KEY')
+        target = parse_target('model=m,api_key_env=TEST_TARGET_KEY,concurrency=2')
+        self.assertEqual(target, {'name': 'm', 'model': 'm', 'base_url': None, 'api_key': 'secret',
+                                  'concurrency': 2})
+        with self.assertRaises(ValueError):
+            parse_target('model=m,colour=blue')
+        with self.assertRaises(ValueError):
+            parse_target('model')
+        with self.assertRaises(ValueError):
+            run_multi_model(self.data_file, [target, target])
+
+    def test_parse_target_api_key(self):
+        """测试只有默认服务回退到默认密钥，环境变量缺失或非默认服务未指定密钥时报错"""
+        self.assertEqual(parse_target('model=m')['api_key'], DEFAULT_API_KEY)
+        self.assertEqual(parse_target(f'model=m,base_url={DEFAULT_BASE_URL}')['api_key'], DEFAULT_API_KEY)
+        with self.assertRaises(ValueError):
+            parse_target('model=m,api_key_env=TEST_TARGET_KEY_MISSING')
+        with self.assertRaises(ValueError):
+            parse_target(f'model=m,base_url={self.base_url}')
+        with self.assertRaises(ValueError):
+            run_multi_model(self.data_file, [{'name': 'm', 'model': 'm', 'base_url': self.base_url, 'api_key': None,
+                                              'concurrency': 1}])
+        self.assertEqual(self.model.model_requests, Counter())
+
+    def test_agreement_columns(self):
+        """测试多数输出、一致比例和全体一致"""
+        columns = agreement_columns({'a': 'linear', 'b': 'linear', 'c': None}, {'a': True, 'b': True, 'c': False})
+        self.assertEqual(columns['majority_output'], 'linear')
+        self.assertAlmostEqual(columns['agreement'], 2 / 3)
+        self.assertEqual(columns['correct_targets'], 2)
+        self.assertFalse(columns['unanimous'])
+        self.assertTrue(agreement_columns({'a': 'np', 'b': 'np'}, {'a': True, 'b': True})['unanimous'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+测试自一致性投票与提前结束
+"""
+
+import itertools
+import random
+import threading
+import unittest
+from LLM import vote_code_complexity, complexity_label, build_messages
+from mock_llm_server import MockModel, MockLLMServer
+from self_consistency import Election, summarize_votes
+from token_estimator import estimate_messages_tokens
+
+
+class _VotingResponder:
+    # 代码中含STEADY时总是回答O(n)，含SPLIT时交替回答linear和nlogn
+    def __init__(self):
+        self.alternating = itertools.cycle(['linear', 'nlogn'])
+        self.lock = threading.Lock()
+
+    def __call__(self, body):
+        if 'STEADY' in body['messages'][-1]['content']:
+            return 'O(n)'
+        with self.lock:
+            return next(self.alternating)
+
+
+class TestElection(unittest.TestCase):
+    """测试投票的轮次与结束条件"""
+
+    def test_unanimous_stops_at_majority(self):
+        """测试首轮一致时只用过半数的请求"""
+        election = Election(5)
+        self.assertEqual(election.next_wave(), 3)
+        for _ in range(3):
+            election.add('linear')
+        self.assertTrue(election.decided)
+        self.assertEqual(election.next_wave(), 0)
+        self.assertEqual((election.winner, election.confidence, election.saved), ('linear', 1.0, 2))
+
+    def test_split_continues(self):
+        """测试首轮分歧时每轮只补发能结束投票的最少请求"""
+        election = Election(5)
+        election.next_wave()
+        for label in ('linear', 'nlogn', 'linear'):
+            election.add(label)
+        self.assertFalse(election.decided)
+        self.assertEqual(election.next_wave(), 1)
+        election.add('linear')
+        self.assertTrue(election.decided)
+        self.assertEqual((election.issued, election.confidence), (4, 0.75))
+
+    def test_failures_and_validation(self):
+        """测试失败的请求消耗名额但不计票，全部失败时没有获胜标签"""
+        election = Election(1)
+        election.next_wave()
+        election.add(None)
+        self.assertTrue(election.decided)
+        self.assertIsNone(election.winner)
+        self.assertIsNone(election.confidence)
+        with self.assertRaises(ValueError):
+            Election(0)
+
+    def test_simulated_savings(self):
+        """测试单次准确率80%的模拟模型：多数票更准确，平均请求数明显少于k"""
+        rng = random.Random(3)
+        k, samples = 7, 2000
+        calls = correct = single = 0
+        for _ in range(samples):
+            election = Election(k)
+            first = None
+            while True:
+                wave = election.next_wave()
+                if not wave:
+                    break
+                for _ in range(wave):
+                    label = 'right' if rng.random() < 0.8 else rng.choice(['wrong1', 'wrong2'])
+                    first = first or label
+                    election.add(label)
+            calls += election.issued
+            correct += election.winner == 'right'
+            single += first == 'right'
+        self.assertGreater(correct, single)
+        self.assertLess(calls / samples, 0.75 * k)
+
+
+class TestVoteCodeComplexity(unittest.TestCase):
+    """测试对本地端点的投票请求"""
+
+    def test_steady_and_split(self):
+        """测试一致的回答提前结束，交替的回答用满名额，遥测为全部请求的合计"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, responder=_VotingResponder())
+        with MockLLMServer(model) as server:
+            record = vote_code_complexity('class STEADY {}', 'linear', k=5, api_key='k', base_url=server.base_url)
+            self.assertTrue(record['is_match'])
+            self.assertEqual(record['votes'], {'linear': 3})
+            self.assertEqual((record['vote_calls'], record['vote_confidence']), (3, 1.0))
+            self.assertEqual(record['prompt_tokens'], 3 * estimate_messages_tokens(build_messages('class STEADY {}')))
+            self.assertEqual({body['temperature'] for body in model.bodies}, {0.7})
+
+            record = vote_code_complexity('class SPLIT {}', 'nlogn', k=5, api_key='k', base_url=server.base_url)
+            self.assertEqual(record['votes'], {'linear': 3, 'nlogn': 2})
+            self.assertEqual(record['vote_calls'], 5)
+            self.assertFalse(record['is_match'])
+            self.assertAlmostEqual(record['vote_confidence'], 0.6)
+
+    def test_complexity_label(self):
+        """测试输出归一为标签"""
+        self.assertEqual(complexity_label('o(n log n)'), 'nlogn')
+        self.assertEqual(complexity_label('something'), 'something')
+        self.assertIsNone(complexity_label(''))
+
+    def test_summarize_votes(self):
+        """测试批量汇总节省的请求数与置信度分桶"""
+        records = [
+            {'vote_calls': 3, 'vote_k': 5, 'vote_confidence': 1.0, 'is_match': True},
+            {'vote_calls': 5, 'vote_k': 5, 'vote_confidence': 0.6, 'is_match': False},
+            {'vote_calls': 3, 'vote_k': 5, 'vote_confidence': 1.0, 'is_match': True, 'propagated_from': 1},
+        ]
+        summary = summarize_votes(records)
+        self.assertEqual((summary['calls'], summary['max_calls'], summary['calls_saved']), (8, 10, 2))
+        self.assertEqual(summary['unanimous'], 1)
+        self.assertEqual(summary['accuracy_by_confidence']['<0.75'], {'samples': 1, 'accuracy': 0.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
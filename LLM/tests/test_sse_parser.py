@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+测试SSE流式解析模块
+"""
+
+import json
+import unittest
+from sse_parser import SSEParser, StreamMetrics, iter_chat_deltas, complexity_label_found
+
+
+def _frames(contents, newline=b'\n'):
+    """构造OpenAI兼容的流式响应字节"""
+    body = b''
+    for content in contents:
+        payload = json.dumps({'choices': [{'delta': {'content': content}}]}, ensure_ascii=False)
+        body += b'data: ' + payload.encode('utf-8') + newline + newline
+    return body + b'data: [DONE]' + newline + newline
+
+
+def _split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestSSEParser(unittest.TestCase):
+    """测试增量SSE解析"""
+
+    def test_split_chunks(self):
+        """测试任意字节切分（包括切断多字节字符和CRLF）都得到相同事件"""
+        data = _frames(['复杂度', '是', 'linear'], newline=b'\r\n')
+        expected = [event.data for event in SSEParser().feed(data)]
+        for size in (1, 2, 5, 13):
+            parser = SSEParser()
+            events = [event.data for chunk in _split(data, size) for event in parser.feed(chunk)]
+            self.assertEqual(events, expected)
+        self.assertEqual(len(expected), 4)
+
+    def test_multiline_event(self):
+        """测试多行data字段、事件类型和注释行"""
+        parser = SSEParser()
+        events = parser.feed(b': keep-alive\nevent: update\ndata: a\ndata: b\n\n')
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].event, 'update')
+        self.assertEqual(events[0].data, 'a\nb')
+
+    def test_incomplete_event_not_emitted(self):
+        """测试未以空行结尾的事件不会被派发"""
+        parser = SSEParser()
+        self.assertEqual(parser.feed(b'data: partial\n'), [])
+        self.assertEqual(len(parser.feed(b'\n')), 1)
+
+
+class TestChatDeltas(unittest.TestCase):
+    """测试内容增量提取与指标"""
+
+    def test_deltas_and_metrics(self):
+        """测试逐个产出增量并记录首字延迟"""
+        metrics = StreamMetrics()
+        deltas = list(iter_chat_deltas(_split(_frames(['n', 'log', 'n']), 7), metrics))
+        self.assertEqual(''.join(deltas), 'nlogn')
+        stats = metrics.to_dict()
+        self.assertIsNotNone(stats['ttft'])
+        self.assertEqual(stats['tokens'], 3)
+        self.assertFalse(stats['cancelled'])
+
+    def test_cancel_on_label(self):
+        """测试出现完整复杂度标签后提前结束"""
+        metrics = StreamMetrics()
+        deltas = list(iter_chat_deltas([_frames(['quadratic', '\n', '因为', '两层循环'])], metrics,
+                                       complexity_label_found))
+        self.assertEqual(deltas, ['quadratic', '\n'])
+        self.assertTrue(metrics.cancelled)
+
+    def test_label_detection(self):
+        """测试标签必须完整出现"""
+        self.assertFalse(complexity_label_found('linear'))
+        self.assertTrue(complexity_label_found('linear.'))
+        self.assertFalse(complexity_label_found('linearithmic '))
+        self.assertTrue(complexity_label_found('O(nlogn) '))
+        self.assertFalse(complexity_label_found('xlinear.'))
+
+    def test_label_next_to_chinese(self):
+        """测试紧挨中文的标签"""
+        self.assertTrue(complexity_label_found('时间复杂度是linear。'))
+        self.assertTrue(complexity_label_found('复杂度为nlogn的'))
+        self.assertFalse(complexity_label_found('复杂度为nlogn'))
+        self.assertFalse(complexity_label_found('复杂度为linearithmic的'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+测试请求遥测的记录、汇总与导出
+"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+from LLM import validate_code_complexity, build_messages
+from mock_llm_server import MockModel, MockLLMServer
+from token_estimator import estimate_messages_tokens
+from telemetry import summarize_telemetry, export_telemetry, usage_tokens, estimate_cost, provider_name
+
+
+def _linear(body):
+    return 'Linear'
+
+
+class TestValidateTelemetry(unittest.TestCase):
+    """测试单次验证记录中的遥测字段"""
+
+    def test_usage_latency_and_retries(self):
+        """测试记录服务端usage、延迟、首字节延迟和重试次数"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, failures=[503], responder=_linear)
+        with MockLLMServer(model) as server:
+            record = validate_code_complexity('class A {}', 'linear', api_key='k', base_url=server.base_url,
+                                              verbose=False)
+        self.assertTrue(record['is_match'])
+        self.assertEqual((record['prompt_tokens'], record['completion_tokens']),
+                         (estimate_messages_tokens(build_messages('class A {}')), 2))
+        self.assertFalse(record['tokens_estimated'])
+        self.assertEqual(record['retries'], 1)
+        self.assertEqual(record['provider'], '127.0.0.1')
+        self.assertLessEqual(record['ttfb_ms'], record['latency_ms'])
+
+    def test_missing_usage_is_estimated(self):
+        """测试服务端不返回usage时使用本地估算并标记"""
+        model = MockModel(base_latency=0.0, token_latency=0.0, responder=_linear, usage=False)
+        with MockLLMServer(model) as server:
+            record = validate_code_complexity('class A {}', 'linear', api_key='k', base_url=server.base_url,
+                                              verbose=False)
+        self.assertTrue(record['tokens_estimated'])
+        self.assertGreater(record['prompt_tokens'], 0)
+        self.assertEqual(record['retries'], 0)
+
+
+class TestTelemetrySummary(unittest.TestCase):
+    """测试遥测汇总与导出"""
+
+    def _records(self):
+        records = []
+        for i in range(100):
+            records.append({'sample_id': i + 1, 'model': 'gpt-5.1', 'provider': 'api.example.com',
+                            'prompt_tokens': 100, 'completion_tokens': 10, 'tokens_estimated': i % 10 == 0,
+                            'latency_ms': float(i + 1), 'ttfb_ms': float(i + 1) / 2, 'retries': i % 2,
+                            'is_match': True, 'error': None, 'expected_complexity': 'linear'})
+        # 传播得到的记录和未发出请求的记录不计入
+        records.append(dict(records[0], sample_id=101, propagated_from=1))
+        records.append({'sample_id': 102, 'error': 'JSON格式错误', 'latency_ms': None})
+        return records
+
+    def test_summary(self):
+        """测试总量、吞吐量、分位数和费用"""
+        summary = summarize_telemetry(self._records(), wall_seconds=10.0)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['total_tokens'], 11000)
+        self.assertEqual(summary['tokens_per_second'], 1100.0)
+        self.assertEqual(summary['retries'], 50)
+        self.assertEqual(summary['estimated_token_records'], 10)
+        self.assertAlmostEqual(summary['latency_ms']['p50'], 50.5)
+        self.assertAlmostEqual(summary['latency_ms']['p99'], 99.01)
+        self.assertEqual(summary['ttfb_ms']['max'], 50.0)
+        self.assertAlmostEqual(summary['cost_usd']['total'], 100 * estimate_cost(100, 10, 'gpt-5.1'))
+        self.assertEqual(summary['by_provider'], {'api.example.com': 100})
+        self.assertEqual(summary['slowest'][0], {'sample_id': 100, 'latency_ms': 100.0})
+
+    def test_unpriced_and_empty(self):
+        """测试未知模型不计费用，空记录不报错"""
+        summary = summarize_telemetry(self._records(), pricing={'other': {'prompt': 1, 'completion': 1}})
+        self.assertEqual(summary['cost_usd']['unpriced_requests'], 100)
+        self.assertIsNone(summary['cost_usd']['per_request'])
+        self.assertIsNone(summary['tokens_per_second'])
+        empty = summarize_telemetry([])
+        self.assertEqual(empty['requests'], 0)
+        self.assertIsNone(empty['latency_ms']['p95'])
+
+    def test_vote_records(self):
+        """测试投票记录按实际发出的请求数计入请求数和失败请求数"""
+        records = self._records()[:10]
+        for record in records[:4]:
+            record.update(vote_calls=3, vote_failed=1)
+        summary = summarize_telemetry(records, wall_seconds=2.0)
+        self.assertEqual((summary['samples'], summary['requests'], summary['failed_requests']), (10, 18, 4))
+        self.assertEqual(summary['requests_per_second'], 9.0)
+        self.assertEqual(summary['by_provider'], {'api.example.com': 18})
+        self.assertEqual(len(summary['slowest']), 5)
+
+    def test_export_appends_runs(self):
+        """测试两次导出追加到同一CSV（只写一次表头）和运行摘要"""
+        records = self._records()
+        summary = summarize_telemetry(records, wall_seconds=10.0)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for run_id in ('run1', 'run2'):
+                csv_path, runs_path = export_telemetry(records, summary, temp_dir, run_id, extra={'accuracy': 90.0})
+            with open(csv_path, encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 2 * len(records))
+            self.assertEqual(rows[-1]['run_id'], 'run2')
+            self.assertEqual(rows[100]['propagated'], 'True')
+            with open(runs_path, encoding='utf-8') as f:
+                runs = [json.loads(line) for line in f]
+            self.assertEqual([run['run_id'] for run in runs], ['run1', 'run2'])
+            self.assertEqual(runs[0]['latency_ms_p95'], summary['latency_ms']['p95'])
+            self.assertEqual(runs[0]['accuracy'], 90.0)
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, 'requests.csv')))
+
+    def test_helpers(self):
+        """测试usage读取与服务商名称"""
+        usage = type('Usage', (), {'prompt_tokens': 5, 'completion_tokens': 1})()
+        response = type('Response', (), {'usage': usage})()
+        self.assertEqual(usage_tokens(response, [], 'x'), (5, 1, False))
+        self.assertEqual(provider_name('https://yunwu.ai/v1'), 'yunwu.ai')
+
+
+if __name__ == '__main__':
+    unittest.main()
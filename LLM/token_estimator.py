@@ -0,0 +1,71 @@
+"""
+本地token数估算模块
+不依赖具体模型的分词器，用一条预编译正则近似BPE分词结果：
+中日韩字符约1个token，英文单词约每4个字母1个token，数字约每3位1个token，
+其余符号各1个token，连续空白（缩进、换行）合并计数
+"""
+
+import re
+
+# 每条消息的角色、分隔符等格式开销
+MESSAGE_OVERHEAD_TOKENS = 4
+# 回复引导的固定开销
+REPLY_PRIMING_TOKENS = 3
+
+_TOKEN_PATTERN = re.compile(
+    r'(?P<cjk>[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef])'
+    r'|(?P<word>[A-Za-z]+)'
+    r'|(?P<digits>\d+)'
+    r'|(?P<space>\s{2,})'
+    r'|(?P<other>[^\sA-Za-z\d])'
+)
+
+
+def estimate_tokens(text):
+    """
+    估算一段文本的token数
+
+    参数:
+    text (str): 文本
+
+    返回:
+    int: 估算的token数
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'word':
+            tokens += (len(match.group()) + 3) // 4
+        elif kind == 'digits':
+            tokens += (len(match.group()) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(message):
+    """
+    估算单条对话消息的token数（含格式开销）
+
+    参数:
+    message (dict): 包含role和content的消息
+
+    返回:
+    int: 估算的token数
+    """
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get('content') or '')
+
+
+def estimate_messages_tokens(messages):
+    """
+    估算一次请求全部消息的token数
+
+    参数:
+    messages (list): 消息列表
+
+    返回:
+    int: 估算的token数
+    """
+    return REPLY_PRIMING_TOKENS + sum(estimate_message_tokens(message) for message in messages)
@@ -1,14 +1,31 @@
 # encoding:UTF-8
-import json
+import os
+import sys
 import requests
 
+# 复用LLM目录下的流式解析模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'LLM'))
+from sse_parser import StreamMetrics, iter_chat_deltas, complexity_label_found
+from chat_history import ChatHistory
+
 
 # 请替换XXXXXXXXXX为您的 APIpassword, 获取地址：https://console.xfyun.cn/services/bmx1
 api_key = "Bearer GnZpLRUqXACfasNtdRzM:DOmdLvpitzquFcnIXimk"
 url = "https://spark-api-open.xf-yun.com/v1/chat/completions"
 
 # 请求模型，并将结果输出
-def get_answer(message):
+def get_answer(message, stop_on_label=False, metrics=None):
+    """
+    流式请求模型并逐字输出
+
+    参数:
+    message (list): 对话历史
+    stop_on_label (bool): 是否在输出中出现复杂度标签后立即结束读取，用于复杂度分类等短回答
+    metrics (StreamMetrics, optional): 需要填充首字延迟、生成速度等指标的对象
+
+    返回:
+    str: 模型回复
+    """
     #初始化请求体
     headers = {
         'Authorization':api_key,
@@ -31,64 +48,38 @@ def get_answer(message):
         ]
     }
     full_response = ""  # 存储返回结果
-    isFirstContent = True  # 首帧标识
+    if metrics is None:
+        metrics = StreamMetrics()
 
     response = requests.post(url=url,json= body,headers= headers,stream= True)
-    # print(response)
-    for chunks in response.iter_lines():
-        # 打印返回的每帧内容
-        # print(chunks)
-        if (chunks and '[DONE]' not in str(chunks)):
-            data_org = chunks[6:]
-
-            chunk = json.loads(data_org)
-            text = chunk['choices'][0]['delta']
-
-            # 判断最终结果状态并输出
-            if ('content' in text and '' != text['content']):
-                content = text["content"]
-                if (True == isFirstContent):
-                    isFirstContent = False
-                print(content, end="")
-                full_response += content
+    try:
+        # 按到达顺序增量解析字节流，逐个输出内容增量
+        stop_when = complexity_label_found if stop_on_label else None
+        for content in iter_chat_deltas(response.iter_content(chunk_size=None), metrics, stop_when):
+            print(content, end="")
+            full_response += content
+    finally:
+        # 提前结束时关闭连接，不再接收剩余内容
+        response.close()
     return full_response
 
 
-# 管理对话历史，按序编为列表
-def getText(text,role, content):
-    jsoncon = {}
-    jsoncon["role"] = role
-    jsoncon["content"] = content
-    text.append(jsoncon)
-    return text
-
-# 获取对话中的所有角色的content长度
-def getlength(text):
-    length = 0
-    for content in text:
-        temp = content["content"]
-        leng = len(temp)
-        length += leng
-    return length
-
-# 判断长度是否超长，当前限制8K tokens
-def checklen(text):
-    while (getlength(text) > 11000):
-        del text[0]
-    return text
-
-
 #主程序入口
 if __name__ =='__main__':
 
-    #对话历史存储列表
-    chatHistory = []
+    #对话历史：按估算token数裁剪，当前限制8K tokens，并为回复预留空间
+    chatHistory = ChatHistory(max_context_tokens=8192, reserve_tokens=1024)
     #循环对话轮次
     while (1):
         # 等待控制台输入
         Input = input("\n" + "我:")
-        question = checklen(getText(chatHistory,"user", Input))
+        question = chatHistory.append("user", Input).messages()
         # 开始输出模型内容
         print("星火:", end="")
-        getText(chatHistory,"assistant", get_answer(question))
-        print("chatHistory:", chatHistory)
\ No newline at end of file
+        metrics = StreamMetrics()
+        chatHistory.append("assistant", get_answer(question, metrics=metrics))
+        stats = metrics.to_dict()
+        if stats['ttft'] is not None:
+            print(f"\n[首字延迟 {stats['ttft']:.3f}s, {stats['tokens']} tokens, "
+                  f"{(stats['tokens_per_sec'] or 0):.1f} tokens/s]")
+        print(f"chatHistory: {len(chatHistory)} 条消息, 约 {chatHistory.total_tokens} tokens")
\ No newline at end of file
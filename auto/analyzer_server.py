@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻分析服务模块
+在本机HTTP端口上提供复杂度分析接口，进程池中的工作进程预先导入javalang并完成一次分析预热，
+请求只需付出分析本身的耗时；支持单个或批量源码、按完成顺序流式返回JSON行，并提供延迟指标
+"""
+
+import collections
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from java_complexity_analyzer import analyze_java_complexity
+from instrumentation import summarize_durations
+from parser_backends import DEFAULT_BACKEND
+from utils import AnalysisError
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# 单个请求体上限，防止误传超大文件占满内存
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# 指标只保留最近的若干次耗时，常驻进程内存不随请求数增长
+METRICS_WINDOW = 10000
+
+_WARMUP_SOURCE = 'class Warmup { void f(int n) { for (int i = 0; i < n; i++) { } } }'
+# 工作进程内使用的解析器后端，由进程池initializer设置
+_worker_backend: Optional[str] = None
+
+
+def _warm_worker(backend: Optional[str] = None) -> None:
+    """工作进程初始化：记录解析器后端并完成一次完整分析，使解析器和词法表都已加载"""
+    global _worker_backend
+    _worker_backend = backend
+    analyze_java_complexity(_WARMUP_SOURCE, backend=backend)
+
+
+def _analyze_in_worker(source: str) -> Tuple[str, Optional[str], float]:
+    """
+    在工作进程中用初始化时指定的解析器后端分析一段源码
+
+    Args:
+        source (str): Java源代码
+
+    Returns:
+        Tuple[str, Optional[str], float]: (复杂度标识或"error", 错误信息, 分析耗时秒数)
+    """
+    start = time.perf_counter()
+    try:
+        output, error = analyze_java_complexity(source, backend=_worker_backend), None
+    except AnalysisError as e:
+        output, error = 'error', str(e)
+    return output, error, time.perf_counter() - start
+
+
+class ServerMetrics:
+    """线程安全的服务端延迟统计，按滑动窗口保留最近的耗时"""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        """
+        Args:
+            window (int): 每类耗时保留的最近样本数
+        """
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=window))
+        self._counters: Dict[str, int] = collections.Counter()
+        self._started_at = time.time()
+
+    def record(self, name: str, duration: float) -> None:
+        """
+        记录一次耗时
+
+        Args:
+            name (str): 指标名，如request、analysis、queue
+            duration (float): 耗时（秒）
+        """
+        with self._lock:
+            self._durations[name].append(duration)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        """
+        累加计数器
+
+        Args:
+            name (str): 计数器名
+            count (int): 增量
+        """
+        with self._lock:
+            self._counters[name] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取指标快照
+
+        Returns:
+            Dict[str, Any]: 包含uptime_seconds、counters和各类耗时分位数（毫秒）的字典
+        """
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+            counters = dict(self._counters)
+        latencies = {}
+        for name, values in durations.items():
+            stats = summarize_durations(values)
+            stats.pop('histogram')
+            latencies[name] = stats
+        return {
+            'uptime_seconds': time.time() - self._started_at,
+            'counters': counters,
+            'latency': latencies
+        }
+
+
+class AnalyzerService:
+    """持有预热进程池和指标的分析服务"""
+
+    def __init__(self, workers: Optional[int] = None, backend: Optional[str] = None):
+        """
+        Args:
+            workers (Optional[int]): 工作进程数，默认为CPU核数
+            backend (Optional[str]): 解析器后端名称，默认为javalang
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend or DEFAULT_BACKEND
+        self.metrics = ServerMetrics()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                         initargs=(self.backend,))
+        # 提交空任务，让所有工作进程在首个请求之前启动并完成预热
+        for future in [self._pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def analyze(self, sources: Sequence[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        并行分析一批源码，按完成顺序产出结果
+
+        Args:
+            sources (Sequence[str]): Java源代码列表
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: (源码下标, {'output', 'error', 'duration_ms'})
+        """
+        submitted_at = time.perf_counter()
+        futures = {self._pool.submit(_analyze_in_worker, source): index for index, source in enumerate(sources)}
+        for future in as_completed(futures):
+            output, error, duration = future.result()
+            self.metrics.record('analysis', duration)
+            # 排队时间：提交到拿到结果的时长减去分析本身耗时
+            self.metrics.record('queue', max(0.0, time.perf_counter() - submitted_at - duration))
+            self.metrics.increment('sources')
+            if error is not None:
+                self.metrics.increment('analysis_errors')
+            yield futures[future], {'output': output, 'error': error, 'duration_ms': duration * 1000}
+
+    def close(self) -> None:
+        """关闭进程池"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _AnalyzerRequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理：POST /analyze、GET /metrics、GET /health"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ComplexityAnalyzer/1.0'
+
+    @property
+    def service(self) -> AnalyzerService:
+        return self.server.service
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 访问日志默认关闭，避免每个请求一行输出
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'workers': self.service.workers, 'parser': self.service.backend})
+        elif self.path == '/metrics':
+            self._send_json(200, self.service.metrics.snapshot())
+        else:
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+
+    def do_POST(self) -> None:
+        if self.path != '/analyze':
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+            return
+        start = time.perf_counter()
+        self.service.metrics.increment('requests')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            self.service.metrics.increment('bad_requests')
+            self._send_json(400, {'error': f'Content-Length must be between 1 and {MAX_REQUEST_BYTES}'})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            sources, ids, batched = _parse_analyze_request(request)
+        except (ValueError, TypeError) as e:
+            self.service.metrics.increment('bad_requests')
+            self._send_json(400, {'error': str(e)})
+            return
+
+        if not batched:
+            _, result = next(self.service.analyze(sources))
+            self._send_json(200, result)
+        else:
+            # 批量请求以分块传输逐行返回，先完成的源码先返回
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for index, result in self.service.analyze(sources):
+                result = dict(result, index=index, id=ids[index])
+                self._write_chunk((json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8'))
+            self._write_chunk(b'')
+        self.service.metrics.record('request', time.perf_counter() - start)
+
+
+def _parse_analyze_request(request: Any) -> Tuple[List[str], List[Any], bool]:
+    """
+    解析/analyze的请求体
+
+    支持三种格式：{"source": "..."}单个源码；{"sources": ["...", ...]}批量源码；
+    {"samples": [{"id": ..., "source": "..."}, ...]}带调用方ID的批量源码。
+
+    Args:
+        request (Any): 解码后的JSON请求体
+
+    Returns:
+        Tuple[List[str], List[Any], bool]: (源码列表, 对应ID列表, 是否为批量请求)
+
+    Raises:
+        ValueError: 请求格式不正确时抛出
+    """
+    if not isinstance(request, dict):
+        raise ValueError('Request body must be a JSON object')
+    if isinstance(request.get('source'), str):
+        return [request['source']], [None], False
+    if isinstance(request.get('sources'), list):
+        sources = request['sources']
+        ids = list(range(len(sources)))
+    elif isinstance(request.get('samples'), list):
+        sources = [sample.get('source') or sample.get('src') for sample in request['samples']]
+        ids = [sample.get('id', index) for index, sample in enumerate(request['samples'])]
+    else:
+        raise ValueError('Request must contain "source", "sources" or "samples"')
+    if not all(isinstance(source, str) for source in sources):
+        raise ValueError('Every source must be a string')
+    return sources, ids, True
+
+
+class AnalyzerServer(ThreadingHTTPServer):
+    """绑定分析服务的多线程HTTP服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: AnalyzerService, verbose: bool = False):
+        """
+        Args:
+            address (Tuple[str, int]): 监听地址，端口为0时由系统分配
+            service (AnalyzerService): 分析服务
+            verbose (bool): 是否输出访问日志
+        """
+        super().__init__(address, _AnalyzerRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def analyze_remote(sources: Sequence[str], url: str = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}',
+                   timeout: float = 300.0) -> Iterator[Dict[str, Any]]:
+    """
+    调用分析服务批量分析源码，逐条产出服务端流式返回的结果
+
+    Args:
+        sources (Sequence[str]): Java源代码列表
+        url (str): 服务地址
+        timeout (float): 超时时间（秒）
+
+    Yields:
+        Dict[str, Any]: 包含index、id、output、error和duration_ms的结果，按完成顺序产出
+    """
+    body = json.dumps({'sources': list(sources)}).encode('utf-8')
+    request = urllib.request.Request(f'{url}/analyze', data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+
+def analyze_remote_one(source: str, url: str = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}',
+                       timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    调用分析服务分析单个源码
+
+    Args:
+        source (str): Java源代码
+        url (str): 服务地址
+        timeout (float): 超时时间（秒）
+
+    Returns:
+        Dict[str, Any]: 包含output、error和duration_ms的结果
+    """
+    body = json.dumps({'source': source}).encode('utf-8')
+    request = urllib.request.Request(f'{url}/analyze', data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+          backend: Optional[str] = None, verbose: bool = False) -> None:
+    """
+    启动分析服务并一直运行，直到收到中断信号
+
+    Args:
+        host (str): 监听地址，默认只监听本机
+        port (int): 监听端口
+        workers (Optional[int]): 工作进程数
+        backend (Optional[str]): 解析器后端名称
+        verbose (bool): 是否输出访问日志
+    """
+    service = AnalyzerService(workers=workers, backend=backend)
+    server = AnalyzerServer((host, port), service, verbose=verbose)
+    print(f"分析服务已启动: {server.url}（{service.workers} 个预热工作进程，解析器: {service.backend}）",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻Java复杂度分析服务')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数，默认为CPU核数')
+    parser.add_argument('--parser', type=str, default=None, choices=['javalang', 'tree-sitter'],
+                        help='解析器后端')
+    parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+    args = parser.parse_args()
+
+    serve(host=args.host, port=args.port, workers=args.workers, backend=args.parser, verbose=args.verbose)
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态分析器性能基准模块
+分别测量javalang解析与_analyze_ast遍历的耗时，覆盖按源码长度分桶的真实样本
+和规模、嵌套深度递增的合成程序，拟合对数-对数缩放指数以发现超线性退化，
+结果写为JSON便于跨提交比较
+"""
+
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import javalang
+from java_complexity_analyzer import _analyze_ast
+from data_reader import extract_java_samples
+from synthetic_corpus import loop_nest_program
+
+# 合成程序的默认规模（方法数）与嵌套深度
+DEFAULT_SIZES = (4, 8, 16, 32, 64, 128)
+DEFAULT_NESTINGS = (1, 2, 3, 4)
+# 嵌套深度扫描：规模固定时加深嵌套，暴露与树深度相乘的遍历开销
+DEFAULT_DEPTHS = (2, 4, 8, 16, 32)
+
+
+def time_call(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.0) -> Dict[str, float]:
+    """
+    重复调用函数并统计单次耗时
+
+    Args:
+        fn (Callable[[], Any]): 无参函数
+        repeat (int): 重复次数
+        min_time (float): 每轮至少累计的时间（秒），单次过快时在一轮内多次调用取平均，降低计时误差
+
+    Returns:
+        Dict[str, float]: 包含min、median、mean（秒）和每轮调用次数loops的字典
+    """
+    loops = 1
+    if min_time > 0:
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            if time.perf_counter() - start >= min_time or loops >= 1 << 16:
+                break
+            loops *= 2
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - start) / loops)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'loops': loops
+    }
+
+
+def fit_scaling_exponent(sizes: Sequence[float], times: Sequence[float]) -> Dict[str, float]:
+    """
+    在对数-对数坐标下最小二乘拟合 time ≈ c · size^k
+
+    Args:
+        sizes (Sequence[float]): 输入规模（如字符数、AST节点数）
+        times (Sequence[float]): 对应耗时
+
+    Returns:
+        Dict[str, float]: 包含exponent（k）、coefficient（c）、r2和points的字典；
+            有效点少于2个或规模全部相同时exponent为nan
+    """
+    points = [(math.log(s), math.log(t)) for s, t in zip(sizes, times) if s > 0 and t > 0]
+    n = len(points)
+    if n < 2:
+        return {'exponent': float('nan'), 'coefficient': float('nan'), 'r2': float('nan'), 'points': n}
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    if sxx == 0:
+        return {'exponent': float('nan'), 'coefficient': float('nan'), 'r2': float('nan'), 'points': n}
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    r2 = (sxy * sxy) / (sxx * syy) if syy > 0 else 1.0
+    return {'exponent': slope, 'coefficient': math.exp(intercept), 'r2': r2, 'points': n}
+
+
+def count_ast_nodes(tree) -> int:
+    """
+    统计AST节点数
+
+    Args:
+        tree: javalang解析得到的AST
+
+    Returns:
+        int: 节点数
+    """
+    return sum(1 for _ in javalang.ast.walk_tree(tree))
+
+
+def measure_source(source: str, repeat: int = 5, min_time: float = 0.0) -> Dict[str, Any]:
+    """
+    分别测量一段源码的解析与AST分析耗时
+
+    Args:
+        source (str): Java源代码
+        repeat (int): 每个阶段的重复次数
+        min_time (float): 每轮至少累计的时间（秒）
+
+    Returns:
+        Dict[str, Any]: 包含chars、lines、ast_nodes以及parse、analyze_ast阶段耗时（毫秒）的字典
+
+    Raises:
+        javalang.parser.JavaSyntaxError: 源码无法解析时抛出
+    """
+    tree = javalang.parse.parse(source)
+    parse = time_call(lambda: javalang.parse.parse(source), repeat=repeat, min_time=min_time)
+    analyze = time_call(lambda: _analyze_ast(tree), repeat=repeat, min_time=min_time)
+    return {
+        'chars': len(source),
+        'lines': source.count('\n') + 1,
+        'ast_nodes': count_ast_nodes(tree),
+        'parse_ms': parse['min'] * 1000,
+        'analyze_ast_ms': analyze['min'] * 1000,
+        'parse_median_ms': parse['median'] * 1000,
+        'analyze_ast_median_ms': analyze['median'] * 1000
+    }
+
+
+def _fit_stages(measurements: List[Dict[str, Any]], size_key: str) -> Dict[str, Dict[str, float]]:
+    sizes = [m[size_key] for m in measurements]
+    return {
+        stage: fit_scaling_exponent(sizes, [m[f'{stage}_ms'] for m in measurements])
+        for stage in ('parse', 'analyze_ast')
+    }
+
+
+def benchmark_synthetic(sizes: Sequence[int] = DEFAULT_SIZES, nestings: Sequence[int] = DEFAULT_NESTINGS,
+                        depths: Sequence[int] = DEFAULT_DEPTHS, repeat: int = 5,
+                        min_time: float = 0.0) -> Dict[str, Any]:
+    """
+    在规模和嵌套深度递增的合成程序上测量耗时，并拟合缩放指数
+
+    规模扫描中各方法相互独立，耗时应随AST节点数线性增长；深度扫描固定方法数、加深循环嵌套，
+    每个节点都重新递归子树的遍历（如walk_tree + calculate_max_depth）会在这里表现为超线性指数。
+
+    Args:
+        sizes (Sequence[int]): 规模扫描的方法个数序列
+        nestings (Sequence[int]): 规模扫描的循环嵌套深度序列
+        depths (Sequence[int]): 深度扫描的循环嵌套深度序列，为空时跳过
+        repeat (int): 重复次数
+        min_time (float): 每轮至少累计的时间（秒）
+
+    Returns:
+        Dict[str, Any]: 包含measurements（规模扫描的测量结果）、fits（按嵌套深度、以AST节点数为规模的拟合结果）、
+            depth_measurements和depth_fit（深度扫描的测量与拟合结果）的字典
+    """
+    measurements = []
+    fits = {}
+    for nesting in nestings:
+        group = []
+        for size in sizes:
+            measurement = measure_source(loop_nest_program(size, nesting), repeat=repeat,
+                                         min_time=min_time)
+            measurement.update({'methods': size, 'nesting': nesting})
+            group.append(measurement)
+        measurements.extend(group)
+        fits[str(nesting)] = _fit_stages(group, 'ast_nodes')
+    depth_measurements = []
+    for depth in depths:
+        measurement = measure_source(loop_nest_program(2, depth), repeat=repeat, min_time=min_time)
+        measurement.update({'methods': 2, 'nesting': depth})
+        depth_measurements.append(measurement)
+    return {
+        'measurements': measurements,
+        'fits': fits,
+        'depth_measurements': depth_measurements,
+        'depth_fit': _fit_stages(depth_measurements, 'ast_nodes') if depth_measurements else {}
+    }
+
+
+def benchmark_dataset(data_file: str, buckets: int = 5, per_bucket: int = 10, repeat: int = 3,
+                      min_time: float = 0.0, seed: Optional[int] = 0) -> Dict[str, Any]:
+    """
+    在按源码长度分桶的真实样本上测量耗时
+
+    样本按字符数排序后等分为若干桶，每个桶随机抽取per_bucket个样本，
+    保证短、中、长源码都有代表；缩放指数在全部被测样本上以AST节点数为规模拟合。
+
+    Args:
+        data_file (str): JSONL数据集文件路径
+        buckets (int): 桶数
+        per_bucket (int): 每个桶测量的样本数
+        repeat (int): 重复次数
+        min_time (float): 每轮至少累计的时间（秒）
+        seed (Optional[int]): 抽样随机种子
+
+    Returns:
+        Dict[str, Any]: 包含buckets（各桶的长度范围和耗时中位数）、measurements、fit和parse_failures的字典
+    """
+    samples = sorted(extract_java_samples(data_file), key=lambda sample: len(sample['source']))
+    rng = random.Random(seed)
+    bucket_results = []
+    measurements = []
+    parse_failures = 0
+    for b in range(buckets):
+        members = samples[len(samples) * b // buckets:len(samples) * (b + 1) // buckets]
+        if not members:
+            continue
+        chosen = rng.sample(members, min(per_bucket, len(members)))
+        group = []
+        for sample in chosen:
+            try:
+                measurement = measure_source(sample['source'], repeat=repeat, min_time=min_time)
+            except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+                parse_failures += 1
+                continue
+            measurement['sample_id'] = sample['sample_id']
+            group.append(measurement)
+        measurements.extend(group)
+        if group:
+            bucket_results.append({
+                'bucket': b,
+                'min_chars': len(members[0]['source']),
+                'max_chars': len(members[-1]['source']),
+                'measured': len(group),
+                'median_ast_nodes': statistics.median(m['ast_nodes'] for m in group),
+                'median_parse_ms': statistics.median(m['parse_ms'] for m in group),
+                'median_analyze_ast_ms': statistics.median(m['analyze_ast_ms'] for m in group)
+            })
+    return {
+        'buckets': bucket_results,
+        'measurements': measurements,
+        'fit': _fit_stages(measurements, 'ast_nodes'),
+        'parse_failures': parse_failures
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def benchmark_metadata() -> Dict[str, Any]:
+    """
+    收集基准运行环境信息，用于跨提交比较
+
+    Returns:
+        Dict[str, Any]: 包含时间戳、git版本、Python版本、javalang版本和平台的字典
+    """
+    return {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'javalang': getattr(javalang, '__version__', None),
+        'platform': platform.platform()
+    }
+
+
+def write_benchmark_results(results: Dict[str, Any], output_file: str) -> str:
+    """
+    将基准结果连同运行环境信息写入JSON文件
+
+    Args:
+        results (Dict[str, Any]): 基准结果
+        output_file (str): 输出文件路径
+
+    Returns:
+        str: 输出文件路径
+    """
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    payload = {'metadata': benchmark_metadata()}
+    payload.update(results)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return output_file
+
+
+def check_exponents(fits: Dict[str, Dict[str, float]], max_exponent: float) -> List[Tuple[str, float]]:
+    """
+    找出缩放指数超过阈值的阶段
+
+    Args:
+        fits (Dict[str, Dict[str, float]]): 阶段名到拟合结果的映射
+        max_exponent (float): 允许的最大缩放指数
+
+    Returns:
+        List[Tuple[str, float]]: 超过阈值的(阶段, 指数)列表
+    """
+    return [(stage, fit['exponent']) for stage, fit in fits.items()
+            if not math.isnan(fit['exponent']) and fit['exponent'] > max_exponent]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='静态复杂度分析器性能基准')
+    parser.add_argument('--data', '-d', type=str, default=None,
+                        help='JSONL数据集文件路径，指定时测量按长度分桶的真实样本')
+    parser.add_argument('--buckets', type=int, default=5, help='真实样本的长度分桶数')
+    parser.add_argument('--per-bucket', type=int, default=10, help='每个桶测量的样本数')
+    parser.add_argument('--sizes', type=str, default=','.join(map(str, DEFAULT_SIZES)),
+                        help='合成程序的方法数序列，逗号分隔')
+    parser.add_argument('--nesting', type=str, default=','.join(map(str, DEFAULT_NESTINGS)),
+                        help='合成程序的循环嵌套深度序列，逗号分隔')
+    parser.add_argument('--depths', type=str, default=','.join(map(str, DEFAULT_DEPTHS)),
+                        help='深度扫描的循环嵌套深度序列，逗号分隔，为空时跳过')
+    parser.add_argument('--repeat', type=int, default=5, help='每个阶段的重复次数')
+    parser.add_argument('--min-time', type=float, default=0.01, help='每轮至少累计的时间（秒）')
+    parser.add_argument('--seed', type=int, default=0, help='真实样本抽样的随机种子')
+    parser.add_argument('--output', '-o', type=str, default='results/benchmark_analyzer.json',
+                        help='JSON结果输出路径')
+    parser.add_argument('--max-exponent', type=float, default=None,
+                        help='缩放指数上限，任一阶段超过时以非零状态退出')
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    synthetic = benchmark_synthetic(sizes=[int(s) for s in args.sizes.split(',')],
+                                    nestings=[int(n) for n in args.nesting.split(',')],
+                                    depths=[int(d) for d in args.depths.split(',') if d],
+                                    repeat=args.repeat, min_time=args.min_time)
+    results['synthetic'] = synthetic
+    print("合成程序（以AST节点数为规模的缩放指数）:")
+    print(f"  {'嵌套深度':<8} {'parse':<10} {'analyze_ast':<12}")
+    exceeded = []
+    for nesting, fits in synthetic['fits'].items():
+        print(f"  {nesting:<8} {fits['parse']['exponent']:<10.3f} {fits['analyze_ast']['exponent']:<12.3f}")
+        if args.max_exponent is not None:
+            exceeded += [(f'synthetic[{nesting}].{stage}', k) for stage, k in check_exponents(fits, args.max_exponent)]
+    if synthetic['depth_fit']:
+        depth_fit = synthetic['depth_fit']
+        print(f"  深度扫描: parse={depth_fit['parse']['exponent']:.3f}, "
+              f"analyze_ast={depth_fit['analyze_ast']['exponent']:.3f}")
+        if args.max_exponent is not None:
+            exceeded += [(f'depth.{stage}', k) for stage, k in check_exponents(depth_fit, args.max_exponent)]
+
+    if args.data:
+        dataset = benchmark_dataset(args.data, buckets=args.buckets, per_bucket=args.per_bucket,
+                                    repeat=args.repeat, min_time=args.min_time, seed=args.seed)
+        results['dataset'] = dataset
+        print("真实样本（按源码长度分桶）:")
+        print(f"  {'桶':<4} {'字符数':<16} {'节点中位数':<10} {'parse ms':<10} {'analyze_ast ms':<14}")
+        for bucket in dataset['buckets']:
+            print(f"  {bucket['bucket']:<4} {bucket['min_chars']:>6}-{bucket['max_chars']:<9} "
+                  f"{bucket['median_ast_nodes']:<10.0f} {bucket['median_parse_ms']:<10.3f} "
+                  f"{bucket['median_analyze_ast_ms']:<14.3f}")
+        print(f"  缩放指数: parse={dataset['fit']['parse']['exponent']:.3f}, "
+              f"analyze_ast={dataset['fit']['analyze_ast']['exponent']:.3f}")
+        if args.max_exponent is not None:
+            exceeded += [(f'dataset.{stage}', k) for stage, k in check_exponents(dataset['fit'], args.max_exponent)]
+
+    print(f"结果已保存到: {write_benchmark_results(results, args.output)}")
+    for name, exponent in exceeded:
+        print(f"缩放指数超过上限 {args.max_exponent}: {name} = {exponent:.3f}")
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析器后端对比模块
+在数据集或合成语料上逐样本比较各后端提取的复杂度信息和最终标识（一致性），
+并分别统计解析与提取阶段的吞吐量（性能对比），结果写为JSON
+"""
+
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from java_complexity_analyzer import _calculate_complexity, analyze_java_complexity
+from parser_backends import available_backends, get_backend, normalize_complexity_info
+from data_reader import extract_java_samples
+from synthetic_corpus import iter_corpus
+from benchmark_analyzer import write_benchmark_results
+from utils import AnalysisError
+
+
+def compare_backends(sources: Sequence[str], backends: Sequence[str], max_mismatches: int = 20) -> Dict[str, Any]:
+    """
+    逐样本比较各后端与第一个后端（参考后端）的结果
+
+    Args:
+        sources (Sequence[str]): Java源代码列表
+        backends (Sequence[str]): 后端名称列表，第一个为参考后端
+        max_mismatches (int): 最多记录的不一致样本数
+
+    Returns:
+        Dict[str, Any]: 包含samples、每个后端的info_mismatches、label_mismatches、error_mismatches
+            以及不一致样本示例mismatches的字典
+    """
+    reference, *others = [get_backend(name) for name in backends]
+    report: Dict[str, Any] = {'samples': len(sources), 'reference': reference.name, 'backends': {}}
+    for backend in others:
+        stats = {'info_mismatches': 0, 'label_mismatches': 0, 'error_mismatches': 0, 'both_errors': 0,
+                 'mismatches': []}
+        for index, source in enumerate(sources):
+            expected = _extract_or_error(reference, source)
+            actual = _extract_or_error(backend, source)
+            if isinstance(expected, str) or isinstance(actual, str):
+                if isinstance(expected, str) and isinstance(actual, str):
+                    stats['both_errors'] += 1
+                else:
+                    stats['error_mismatches'] += 1
+                    _add_example(stats, max_mismatches, index, 'error', expected, actual)
+                continue
+            if normalize_complexity_info(expected) != normalize_complexity_info(actual):
+                stats['info_mismatches'] += 1
+                differences = {key: [expected[key], actual[key]] for key in expected
+                               if normalize_complexity_info(expected)[key] != normalize_complexity_info(actual)[key]}
+                _add_example(stats, max_mismatches, index, 'info', differences, None)
+            if _calculate_complexity(expected) != _calculate_complexity(actual):
+                stats['label_mismatches'] += 1
+        report['backends'][backend.name] = stats
+    return report
+
+
+def _extract_or_error(backend, source: str) -> Any:
+    try:
+        return backend.analyze(source)
+    except backend.syntax_errors as e:
+        return f"syntax error: {e}"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _add_example(stats: Dict[str, Any], limit: int, index: int, kind: str, expected: Any, actual: Any) -> None:
+    if len(stats['mismatches']) < limit:
+        stats['mismatches'].append({'index': index, 'kind': kind, 'reference': expected, 'backend': actual})
+
+
+def measure_throughput(sources: Sequence[str], backend_name: str) -> Dict[str, float]:
+    """
+    测量后端在一组源码上的解析、提取和端到端吞吐量
+
+    Args:
+        sources (Sequence[str]): Java源代码列表
+        backend_name (str): 后端名称
+
+    Returns:
+        Dict[str, float]: 包含parse_seconds、extract_seconds、end_to_end_seconds、samples_per_second和parse_failures的字典
+    """
+    backend = get_backend(backend_name)
+    parse_seconds = extract_seconds = 0.0
+    failures = 0
+    for source in sources:
+        start = time.perf_counter()
+        try:
+            tree = backend.parse(source)
+        except Exception:
+            failures += 1
+            continue
+        parsed = time.perf_counter()
+        backend.extract(tree)
+        parse_seconds += parsed - start
+        extract_seconds += time.perf_counter() - parsed
+    # 端到端计时包含源码模式匹配与最终标识计算
+    start = time.perf_counter()
+    for source in sources:
+        try:
+            analyze_java_complexity(source, backend=backend)
+        except AnalysisError:
+            pass
+    end_to_end = time.perf_counter() - start
+    return {
+        'parse_seconds': parse_seconds,
+        'extract_seconds': extract_seconds,
+        'end_to_end_seconds': end_to_end,
+        'samples_per_second': len(sources) / end_to_end if end_to_end > 0 else 0.0,
+        'parse_failures': failures
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='解析器后端一致性与吞吐量对比')
+    parser.add_argument('--data', '-d', type=str, default=None, help='JSONL数据集文件路径，为空时使用合成语料')
+    parser.add_argument('--synthetic', type=int, default=500, help='未指定数据集时生成的合成样本数')
+    parser.add_argument('--limit', type=int, default=None, help='最多使用的数据集样本数')
+    parser.add_argument('--backends', type=str, default=','.join(available_backends()),
+                        help='参与比较的后端，逗号分隔，第一个为参考后端')
+    parser.add_argument('--output', '-o', type=str, default='results/benchmark_parsers.json',
+                        help='JSON结果输出路径')
+    args = parser.parse_args(argv)
+
+    if args.data:
+        sources = []
+        for sample in extract_java_samples(args.data):
+            if args.limit is not None and len(sources) >= args.limit:
+                break
+            sources.append(sample['source'])
+    else:
+        sources = [record['src'] for record in iter_corpus(args.synthetic, seed=0, max_padding=10)]
+    backends = args.backends.split(',')
+
+    parity = compare_backends(sources, backends) if len(backends) > 1 else {}
+    throughput = {name: measure_throughput(sources, name) for name in backends}
+
+    print(f"样本数: {len(sources)}")
+    print(f"  {'后端':<12} {'解析s':<10} {'提取s':<10} {'端到端s':<10} {'样本/秒':<10}")
+    for name, stats in throughput.items():
+        print(f"  {name:<12} {stats['parse_seconds']:<10.2f} {stats['extract_seconds']:<10.2f} "
+              f"{stats['end_to_end_seconds']:<10.2f} {stats['samples_per_second']:<10.1f}")
+    reference = throughput[backends[0]]['end_to_end_seconds']
+    for name in backends[1:]:
+        speedup = reference / throughput[name]['end_to_end_seconds'] if throughput[name]['end_to_end_seconds'] else 0
+        stats = parity['backends'][name]
+        print(f"  {name} 相对 {backends[0]}: 加速 {speedup:.1f}x，复杂度信息不一致 {stats['info_mismatches']}，"
+              f"标识不一致 {stats['label_mismatches']}，解析成败不一致 {stats['error_mismatches']}")
+
+    print(f"结果已保存到: {write_benchmark_results({'parity': parity, 'throughput': throughput}, args.output)}")
+    mismatched = any(stats['label_mismatches'] for stats in parity.get('backends', {}).values())
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字符串启发式规则的匹配性能对比模块
+在数据集或合成语料上比较逐个模式的子串查找与MultiPatternMatcher的耗时，并校验两者结果一致，
+覆盖源码对数循环模式、for循环更新表达式模式、排序方法名关键字和测试用例特征字符串四组模式
+"""
+
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import javalang
+from java_complexity_analyzer import LOG_LOOP_PATTERNS, FOR_UPDATE_LOG_PATTERNS, _operand_text
+from parser_backends import SORTING_KEYWORDS
+from pattern_matcher import MultiPatternMatcher
+from data_reader import extract_java_samples
+from synthetic_corpus import iter_corpus
+from benchmark_analyzer import write_benchmark_results
+
+# test/analyze_test_cases.py中的测试用例特征字符串
+TEST_CASE_MARKERS = [
+    "Test: #", "Checker Log",
+    "Sample Input", "Sample Output", "Sample Input 1", "Sample Output 1",
+    "inputCopy", "outputCopy",
+    "/*"
+]
+
+
+def _loop_any(patterns: Sequence[str]) -> Callable[[str], bool]:
+    def check(text: str) -> bool:
+        for pattern in patterns:
+            if pattern in text:
+                return True
+        return False
+    return check
+
+
+def _loop_all(patterns: Sequence[str]) -> Callable[[str], List[str]]:
+    return lambda text: [pattern for pattern in patterns if pattern in text]
+
+
+def _time_over(fn: Callable[[str], Any], texts: Sequence[str], repeat: int) -> Dict[str, Any]:
+    best = float('inf')
+    results: List[Any] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return {'seconds': best, 'results': results}
+
+
+def compare_pattern_set(name: str, patterns: Sequence[str], texts: Sequence[str], mode: str,
+                        repeat: int = 3) -> Dict[str, Any]:
+    """
+    比较一组模式在逐个查找与编译匹配器两种方式下的耗时
+
+    Args:
+        name (str): 模式组名称
+        patterns (Sequence[str]): 字面量模式
+        texts (Sequence[str]): 待匹配文本
+        mode (str): 'any'判断是否命中任一模式，'all'找出命中的全部模式
+        repeat (int): 重复次数，取最短耗时
+
+    Returns:
+        Dict[str, Any]: 包含texts、hits、两种方式的耗时（微秒/文本）、加速比和结果是否一致的字典
+    """
+    matcher = MultiPatternMatcher(patterns)
+    if mode == 'any':
+        baseline, compiled = _loop_any(patterns), matcher.contains_any
+    else:
+        baseline, compiled = _loop_all(patterns), matcher.matched
+    loop = _time_over(baseline, texts, repeat)
+    fast = _time_over(compiled, texts, repeat)
+    count = max(1, len(texts))
+    return {
+        'name': name,
+        'mode': mode,
+        'patterns': len(patterns),
+        'texts': len(texts),
+        'hits': sum(1 for result in loop['results'] if result),
+        'loop_us': loop['seconds'] / count * 1e6,
+        'matcher_us': fast['seconds'] / count * 1e6,
+        'speedup': loop['seconds'] / fast['seconds'] if fast['seconds'] > 0 else 0.0,
+        'identical': loop['results'] == fast['results']
+    }
+
+
+def collect_texts(sources: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    从源码中收集各组模式实际匹配的文本
+
+    for循环更新表达式取自javalang的ForControl.update，按record_for_update()的形式渲染赋值表达式，
+    方法名取自所有MethodInvocation，解析失败的源码跳过。
+
+    Args:
+        sources (Sequence[str]): Java源代码列表
+
+    Returns:
+        Dict[str, List[str]]: 文本组名到文本列表的映射
+    """
+    updates: List[str] = []
+    method_names: List[str] = []
+    for source in sources:
+        try:
+            tree = javalang.parse.parse(source)
+        except Exception:
+            continue
+        for _, node in tree.filter(javalang.tree.ForControl):
+            for update in node.update or ():
+                if isinstance(update, javalang.tree.Assignment):
+                    updates.append(f'{_operand_text(update.expressionl)} {update.type} '
+                                   f'{_operand_text(update.value)}'.lower())
+        for _, node in tree.filter(javalang.tree.MethodInvocation):
+            method_names.append(str(node.member).lower())
+    return {
+        'source': list(sources),
+        'source_lower': [source.lower() for source in sources],
+        'for_update': updates,
+        'method_name': method_names
+    }
+
+
+def run_benchmark(sources: Sequence[str], repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    对四组启发式模式分别运行对比
+
+    Args:
+        sources (Sequence[str]): Java源代码列表
+        repeat (int): 重复次数
+
+    Returns:
+        List[Dict[str, Any]]: 每组模式的对比结果
+    """
+    texts = collect_texts(sources)
+    return [
+        compare_pattern_set('log_patterns', LOG_LOOP_PATTERNS, texts['source_lower'], 'any', repeat),
+        compare_pattern_set('for_update', FOR_UPDATE_LOG_PATTERNS, texts['for_update'], 'any', repeat),
+        compare_pattern_set('sorting_keywords', SORTING_KEYWORDS, texts['method_name'], 'any', repeat),
+        compare_pattern_set('test_case_markers', TEST_CASE_MARKERS, texts['source'], 'all', repeat),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='启发式字符串模式匹配性能对比')
+    parser.add_argument('--data', '-d', type=str, default=None, help='JSONL数据集文件路径，为空时使用合成语料')
+    parser.add_argument('--synthetic', type=int, default=2000, help='未指定数据集时生成的合成样本数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--output', '-o', type=str, default='results/benchmark_patterns.json',
+                        help='JSON结果输出路径')
+    args = parser.parse_args(argv)
+
+    if args.data:
+        sources = [sample['source'] for sample in extract_java_samples(args.data)]
+    else:
+        sources = [record['src'] for record in iter_corpus(args.synthetic, seed=0, max_padding=10)]
+    results = run_benchmark(sources, repeat=args.repeat)
+
+    print(f"样本数: {len(sources)}")
+    print(f"  {'模式组':<20} {'文本数':<8} {'命中':<8} {'逐个查找us':<12} {'匹配器us':<10} {'加速比':<8} {'一致':<4}")
+    for result in results:
+        print(f"  {result['name']:<20} {result['texts']:<8} {result['hits']:<8} {result['loop_us']:<12.2f} "
+              f"{result['matcher_us']:<10.2f} {result['speedup']:<8.2f} {'是' if result['identical'] else '否'}")
+    print(f"结果已保存到: {write_benchmark_results({'pattern_sets': results}, args.output)}")
+    return 0 if all(result['identical'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
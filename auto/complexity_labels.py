@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+复杂度标签规范化模块
+把模型输出和分析器输出中各种写法的复杂度（大小写、Unicode上标、O/Θ/Ω包裹、代码块、反引号、
+句末标点等）归一为utils.COMPLEXITY_TYPES中的标签。别名表在导入时预先展开，
+逐次调用只做一次字典查找，未命中时再经过一个预编译正则和一次字符映射
+"""
+
+import json
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils import COMPLEXITY_TYPES
+
+# 各标签的紧凑写法（小写、去掉空白和乘号、去掉O(...)包裹后），LOG代表对数的各种写法
+_ALIASES: Dict[str, Sequence[str]] = {
+    'constant': ('constant', '1', 'const'),
+    'linear': ('linear', 'n'),
+    'logn': ('logn', 'LOG', 'logarithmic'),
+    'nlogn': ('nlogn', 'nLOG', 'LOGn', 'linearithmic', 'n(LOG)'),
+    'quadratic': ('quadratic', 'n^2', 'n2', 'n^{2}', 'nn'),
+    'cubic': ('cubic', 'n^3', 'n3', 'n^{3}', 'nnn'),
+    'np': ('np', 'n^p', 'np-hard', 'nphard', 'np-complete', 'exponential', '2^n', '2^{n}', 'n!', 'k^n'),
+}
+assert set(_ALIASES) == set(COMPLEXITY_TYPES)
+
+# 对数的写法
+_LOG_FORMS = ('logn', 'log(n)', 'log2n', 'log_2n', 'log_2(n)', 'log2(n)', 'lgn', 'lg(n)', '\\logn')
+
+
+def _expand_aliases() -> Dict[str, str]:
+    table: Dict[str, str] = {}
+    for label, aliases in _ALIASES.items():
+        for alias in aliases:
+            forms = [alias.replace('LOG', log) for log in _LOG_FORMS] if 'LOG' in alias else [alias]
+            for form in forms:
+                table[form] = label
+    return table
+
+
+# 紧凑写法到标签的查找表
+_COMPACT_LOOKUP = _expand_aliases()
+
+# 原样输出的快速路径：标签本身及常见的完整写法
+LABEL_LOOKUP: Dict[str, str] = dict(_COMPACT_LOOKUP)
+for _compact, _label in _COMPACT_LOOKUP.items():
+    for _wrapped in (f'o({_compact})', f'O({_compact})', f'{_label}.', _label.capitalize()):
+        LABEL_LOOKUP.setdefault(_wrapped, _label)
+LABEL_LOOKUP.update({'n log n': 'nlogn', 'log n': 'logn', 'O(n log n)': 'nlogn', 'O(log n)': 'logn',
+                     'o(n log n)': 'nlogn', 'o(log n)': 'logn', 'O(N)': 'linear', 'O(N^2)': 'quadratic'})
+
+# 上标、全角括号、乘号等字符的映射，空白和乘号直接删除
+_CHAR_MAP = str.maketrans({
+    '²': '^2', '³': '^3', 'ⁿ': '^n', '¹': '', '⁰': '^0', 'ᵖ': '^p', '₂': '_2',
+    '（': '(', '）': ')', '·': None, '⋅': None, '×': None, '*': None, ' ': None, '\t': None, '\n': None,
+    '\r': None, '　': None,
+})
+
+# 去掉代码块、反引号、引号、前后标点和O/Θ/Ω包裹，取出核心写法
+_OUTPUT_PATTERN = re.compile(
+    r"^[\s`'\"*]*(?:```[a-z]*\s*)?[\s`'\"*]*"
+    r"(?:(?:[oθω]|big-?o)\s*[(\[]\s*(?P<inner>[^`]*?)\s*[)\]]|(?P<bare>[^`'\"]*?))"
+    r"[\s`'\"*]*(?:```)?[\s`'\".。,，;；!！]*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def canonical_label(text: Optional[str]) -> Optional[str]:
+    """
+    把一段复杂度描述归一为标签
+
+    Args:
+        text (Optional[str]): 模型输出、分析器输出或数据集标签
+
+    Returns:
+        Optional[str]: utils.COMPLEXITY_TYPES中的标签，无法识别时返回None
+    """
+    if not text:
+        return None
+    label = LABEL_LOOKUP.get(text)
+    if label is not None:
+        return label
+    match = _OUTPUT_PATTERN.match(text.lower())
+    if match is None:
+        return None
+    core = match.group('inner')
+    if core is None:
+        core = match.group('bare')
+    return _COMPACT_LOOKUP.get(core.translate(_CHAR_MAP))
+
+
+def labels_match(actual: Optional[str], expected: Optional[str]) -> bool:
+    """
+    判断两段复杂度描述是否表示同一个标签
+
+    期望标签无法识别时退化为原样比较，与旧的LLM.compare_complexity行为一致。
+
+    Args:
+        actual (Optional[str]): 预测的复杂度描述
+        expected (Optional[str]): 期望的复杂度描述
+
+    Returns:
+        bool: 是否匹配
+    """
+    expected_label = canonical_label(expected)
+    if expected_label is None:
+        return actual is not None and actual == expected
+    return canonical_label(actual) == expected_label
+
+
+# 原LLM.compare_complexity的等价集合，只用于基准对比
+_LEGACY_EQUIVALENCE = {
+    'constant': {'constant', 'o(1)', '1'},
+    'linear': {'linear', 'o(n)', 'n'},
+    'logn': {'logn', 'log n', 'o(log n)', 'o(logn)'},
+    'nlogn': {'nlogn', 'n log n', 'o(n log n)', 'o(n logn)'},
+    'quadratic': {'quadratic', 'o(n^2)', 'n^2'},
+    'cubic': {'cubic', 'o(n^3)', 'n^3'},
+    'np': {'np', 'o(n^p)', 'n^p'}
+}
+
+
+def _legacy_match(actual: Optional[str], expected: str) -> bool:
+    # 原实现：每次调用都重建等价集合，且要求输出已去除空白并转为小写
+    equivalence = {label: set(aliases) for label, aliases in _LEGACY_EQUIVALENCE.items()}
+    if expected in equivalence:
+        return actual in equivalence[expected] or actual == expected
+    return actual == expected
+
+
+def load_model_outputs(paths: Sequence[str]) -> List[Tuple[Optional[str], str]]:
+    """
+    从LLM批量验证的结果文件中读取(模型原始输出, 期望复杂度)对
+
+    Args:
+        paths (Sequence[str]): complexity_validation_results_*.json文件路径
+
+    Returns:
+        List[Tuple[Optional[str], str]]: 输出与期望标签对，期望标签为空的记录被跳过
+    """
+    pairs: List[Tuple[Optional[str], str]] = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f).get('detailed_records', [])
+        for record in records:
+            if record.get('expected_complexity'):
+                pairs.append((record.get('model_raw_output'), record['expected_complexity']))
+    return pairs
+
+
+def benchmark_canonicalizer(pairs: Sequence[Tuple[Optional[str], str]], repeat: int = 5) -> Dict[str, Any]:
+    """
+    在模型输出上比较原等价集合匹配与规范化匹配的吞吐量和匹配数
+
+    Args:
+        pairs (Sequence[Tuple[Optional[str], str]]): (模型输出, 期望复杂度)对
+        repeat (int): 重复次数，取最短耗时
+
+    Returns:
+        Dict[str, Any]: 包含pairs、两种方式的耗时（微秒/次）与吞吐量（次/秒）、加速比、
+            两种方式的匹配数、只有规范化才匹配的数量、只有原实现才匹配的数量和未识别的输出数
+    """
+    timings = {}
+    results = {}
+    for name, fn in (('legacy', _legacy_match), ('canonical', labels_match)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matched = [fn(output, expected) for output, expected in pairs]
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        results[name] = matched
+    count = max(1, len(pairs))
+    return {
+        'pairs': len(pairs),
+        'legacy_us': timings['legacy'] / count * 1e6,
+        'canonical_us': timings['canonical'] / count * 1e6,
+        'legacy_per_second': count / timings['legacy'] if timings['legacy'] > 0 else 0.0,
+        'canonical_per_second': count / timings['canonical'] if timings['canonical'] > 0 else 0.0,
+        'speedup': timings['legacy'] / timings['canonical'] if timings['canonical'] > 0 else 0.0,
+        'legacy_matches': sum(results['legacy']),
+        'canonical_matches': sum(results['canonical']),
+        'gained': sum(1 for old, new in zip(results['legacy'], results['canonical']) if new and not old),
+        'lost': sum(1 for old, new in zip(results['legacy'], results['canonical']) if old and not new),
+        'unrecognized': sum(1 for output, _ in pairs if canonical_label(output) is None)
+    }
+
+
+# 基准中附加的不规范写法，原实现均无法匹配
+MESSY_OUTPUTS: List[Tuple[str, str]] = [
+    ('O(N log N)', 'nlogn'), ('Θ(n²)', 'quadratic'), ('`nlogn`', 'nlogn'), ('linear.', 'linear'),
+    ('```\nquadratic\n```', 'quadratic'), ('O(n³)', 'cubic'), ('Linear', 'linear'), ('O(log(n))', 'logn'),
+    ('"constant"', 'constant'), ('O(2^n)', 'np'), ('θ(n·log n)', 'nlogn'), ('O(1)。', 'constant'),
+]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from benchmark_analyzer import write_benchmark_results
+
+    parser = argparse.ArgumentParser(description='复杂度标签规范化的吞吐量与匹配数对比')
+    parser.add_argument('results', nargs='+', help='LLM批量验证的结果JSON文件')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    parser.add_argument('--messy', type=int, default=0,
+                        help='附加的不规范写法样本数（从内置列表循环取用），用于观察召回变化')
+    parser.add_argument('--output', '-o', type=str, default='results/benchmark_labels.json', help='JSON结果输出路径')
+    args = parser.parse_args(argv)
+
+    pairs = load_model_outputs(args.results)
+    pairs += [MESSY_OUTPUTS[i % len(MESSY_OUTPUTS)] for i in range(args.messy)]
+    result = benchmark_canonicalizer(pairs, repeat=args.repeat)
+    print(f"样本数: {result['pairs']}")
+    print(f"  原等价集合: {result['legacy_us']:.3f} us/次 ({result['legacy_per_second']:.0f} 次/s)，"
+          f"匹配 {result['legacy_matches']}")
+    print(f"  规范化:     {result['canonical_us']:.3f} us/次 ({result['canonical_per_second']:.0f} 次/s)，"
+          f"匹配 {result['canonical_matches']}")
+    print(f"  加速比 {result['speedup']:.2f}，新增匹配 {result['gained']}，丢失匹配 {result['lost']}，"
+          f"未识别输出 {result['unrecognized']}")
+    print(f"结果已保存到: {write_benchmark_results({'labels': result}, args.output)}")
+    return 0 if result['lost'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
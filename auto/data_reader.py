@@ -6,8 +6,10 @@
 """
 
 import json
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, List, Optional, Sequence
 from utils import DataFormatError, FileReadError
+from sampling import sample_jsonl
+from instrumentation import NULL_INSTRUMENTATION
 
 
 def read_jsonl_file(file_path: str) -> Generator[Dict[str, Any], None, None]:
@@ -49,12 +51,49 @@ def read_jsonl_file(file_path: str) -> Generator[Dict[str, Any], None, None]:
         raise FileReadError(f"IO error reading file: {str(e)}")
 
 
-def extract_java_samples(file_path: str) -> Generator[Dict[str, Any], None, None]:
+def normalize_sample(sample: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+    """
+    将原始JSONL记录转换为标准化的Java代码样本
+    
+    Args:
+        sample (Dict[str, Any]): 原始记录
+        line_number (int): 记录所在行号，记录中没有sample_id时用作样本ID
+    
+    Returns:
+        Dict[str, Any]: 标准化的Java代码样本字典
+    
+    Raises:
+        DataFormatError: 缺少源代码或复杂度字段时抛出
+    """
+    # 提取必要字段，支持多种字段名
+    sample_id = sample.get('sample_id', line_number)
+    problem = sample.get('problem', '')
+    # 支持'source'或'src'作为Java源代码字段
+    source = sample.get('source', '') or sample.get('src', '')
+    # 支持'expected_complexity'或'complexity'作为预期复杂度字段
+    expected_complexity = sample.get('expected_complexity', '') or sample.get('complexity', '')
+    
+    # 验证必要字段
+    if not source:
+        raise DataFormatError(f"Missing or empty source field in sample {sample_id}")
+    if not expected_complexity:
+        raise DataFormatError(f"Missing or empty complexity field in sample {sample_id}")
+    
+    return {
+        'sample_id': int(sample_id),
+        'problem': str(problem),
+        'source': str(source),
+        'expected_complexity': str(expected_complexity)
+    }
+
+
+def extract_java_samples(file_path: str, instrumentation=NULL_INSTRUMENTATION) -> Generator[Dict[str, Any], None, None]:
     """
     从JSONL文件中提取Java代码样本，返回标准化格式
     
     Args:
         file_path (str): JSONL文件路径
+        instrumentation (optional): 性能统计对象，记录每行的json_decode阶段耗时
     
     Yields:
         Dict[str, Any]: 标准化的Java代码样本字典，包含以下字段：
@@ -80,28 +119,10 @@ def extract_java_samples(file_path: str) -> Generator[Dict[str, Any], None, None
                     continue
                 
                 try:
-                    sample = json.loads(line)
-                    # 提取必要字段，支持多种字段名
-                    sample_id = sample.get('sample_id', line_number)
-                    problem = sample.get('problem', '')
-                    # 支持'source'或'src'作为Java源代码字段
-                    source = sample.get('source', '') or sample.get('src', '')
-                    # 支持'expected_complexity'或'complexity'作为预期复杂度字段
-                    expected_complexity = sample.get('expected_complexity', '') or sample.get('complexity', '')
-                    
-                    # 验证必要字段
-                    if not source:
-                        raise DataFormatError(f"Missing or empty source field in sample {sample_id}")
-                    if not expected_complexity:
-                        raise DataFormatError(f"Missing or empty complexity field in sample {sample_id}")
-                    
+                    with instrumentation.stage('json_decode'):
+                        sample = normalize_sample(json.loads(line), line_number)
                     # 返回标准化样本
-                    yield {
-                        'sample_id': int(sample_id),
-                        'problem': str(problem),
-                        'source': str(source),
-                        'expected_complexity': str(expected_complexity)
-                    }
+                    yield sample
                 except json.JSONDecodeError as e:
                     raise DataFormatError(f"Line {line_number}: Invalid JSON format - {str(e)}")
     except FileNotFoundError:
@@ -112,3 +133,26 @@ def extract_java_samples(file_path: str) -> Generator[Dict[str, Any], None, None
         raise FileReadError(f"IO error reading file: {str(e)}")
     except Exception as e:
         raise DataFormatError(f"Error processing file: {str(e)}")
+
+
+def sample_java_samples(file_path: str, sample_size: int, stratify_by: Optional[Sequence[str]] = None,
+                        seed: Optional[int] = None, allocation: str = 'proportional') -> List[Dict[str, Any]]:
+    """
+    单次流式遍历JSONL文件，抽取均匀或分层的Java代码样本子集
+    
+    Args:
+        file_path (str): JSONL文件路径
+        sample_size (int): 样本规模
+        stratify_by (Optional[Sequence[str]]): 分层字段，如['complexity']或['complexity', 'from']，为空时均匀采样
+        seed (Optional[int]): 随机种子
+        allocation (str): 分层名额分配方式，'proportional'或'equal'
+    
+    Returns:
+        List[Dict[str, Any]]: 标准化的Java代码样本列表，按文件顺序排列
+    
+    Raises:
+        FileReadError: 文件无法读取时抛出
+        DataFormatError: 数据格式错误时抛出
+    """
+    sampled = sample_jsonl(file_path, sample_size, stratify_by=stratify_by, seed=seed, allocation=allocation)
+    return [normalize_sample(record, line_number) for line_number, record in sampled]
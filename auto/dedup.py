@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近重复样本检测模块
+对归一化后的源代码做词法分片（shingle），计算MinHash签名并用LSH分桶，
+把同一问题下几乎相同的提交聚成簇，簇ID写入与数据集逐行对应的旁路JSONL文件（sidecar）；
+评估入口据此只评估每簇的代表样本，再把结果传播给簇内其他样本
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+from utils import FileReadError
+
+T = TypeVar('T')
+
+# 注释被丢弃；字符串和字符字面量归一化为占位符，其余按标识符、数字和单个符号切分
+_TOKEN_RE = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|[A-Za-z_$][\w$]*|\d[\w.]*|\S',
+    re.DOTALL
+)
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+_EMPTY_HASH = np.uint32(0xFFFFFFFF)
+_token_ids: Dict[str, int] = {}
+_TOKEN_CACHE_LIMIT = 1 << 20
+
+
+def tokenize_source(source: str) -> List[str]:
+    """
+    把Java源代码切分为归一化的词法单元，忽略注释、空白和字面量内容
+
+    Args:
+        source (str): Java源代码
+
+    Returns:
+        List[str]: 词法单元列表
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(source):
+        first = token[0]
+        if first == '/' and token[:2] in ('//', '/*'):
+            continue
+        if first == '"':
+            token = '"'
+        elif first == "'":
+            token = "'"
+        tokens.append(token)
+    return tokens
+
+
+def _token_id(token: str) -> int:
+    token_id = _token_ids.get(token)
+    if token_id is None:
+        if len(_token_ids) >= _TOKEN_CACHE_LIMIT:
+            _token_ids.clear()
+        # crc32与进程无关，保证签名在不同进程和运行之间可复现
+        token_id = _token_ids[token] = zlib.crc32(token.encode('utf-8'))
+    return token_id
+
+
+def token_ids(tokens: List[str]) -> np.ndarray:
+    """
+    把词法单元映射为与进程无关的32位整数
+
+    Args:
+        tokens (List[str]): 词法单元列表
+
+    Returns:
+        np.ndarray: 与tokens等长的uint64数组
+    """
+    return np.fromiter((_token_id(token) for token in tokens), dtype=np.uint64, count=len(tokens))
+
+
+def shingle_hashes(tokens: List[str], shingle_size: int = 5) -> np.ndarray:
+    """
+    计算连续shingle_size个词法单元组成的分片的64位哈希集合
+
+    Args:
+        tokens (List[str]): 词法单元列表
+        shingle_size (int): 每个分片的词法单元数，源码较短时取全部词法单元作为一个分片
+
+    Returns:
+        np.ndarray: 去重后的uint64哈希数组
+    """
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    ids = token_ids(tokens)
+    size = min(shingle_size, len(ids))
+    count = len(ids) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        # 多项式滚动哈希，uint64溢出即取模2^64
+        hashes = hashes * _SHINGLE_BASE + ids[offset:offset + count]
+    return np.unique(hashes)
+
+
+class MinHasher:
+    """
+    MinHash签名计算器
+
+    每个置换是一个multiply-shift哈希h(x) = ((a*x + b) mod 2^64) >> 32，
+    签名中相同位置相等的比例是两个分片集合Jaccard相似度的无偏估计。
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1, chunk_size: int = 4096):
+        """
+        Args:
+            num_perm (int): 置换（签名长度）数
+            seed (int): 随机种子，相同种子的签名可以相互比较
+            chunk_size (int): 分块计算的分片数，限制单个样本的临时内存
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._chunk_size = chunk_size
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        计算分片哈希集合的MinHash签名
+
+        Args:
+            hashes (np.ndarray): shingle_hashes()返回的uint64数组
+
+        Returns:
+            np.ndarray: 长度为num_perm的uint32签名，空集合的签名全为最大值
+        """
+        signature = np.full(self.num_perm, _EMPTY_HASH, dtype=np.uint32)
+        for start in range(0, len(hashes), self._chunk_size):
+            chunk = hashes[start:start + self._chunk_size, None]
+            values = ((chunk * self._a + self._b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+            np.minimum(signature, values, out=signature)
+        return signature
+
+    def source_signature(self, source: str, shingle_size: int = 5) -> np.ndarray:
+        """
+        计算源代码的MinHash签名
+
+        Args:
+            source (str): Java源代码
+            shingle_size (int): 分片的词法单元数
+
+        Returns:
+            np.ndarray: uint32签名
+        """
+        return self.signature(shingle_hashes(tokenize_source(source), shingle_size))
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    用两个MinHash签名估计Jaccard相似度
+
+    Args:
+        first (np.ndarray): 签名
+        second (np.ndarray): 签名
+
+    Returns:
+        float: 相等位置的比例
+    """
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """
+    基于LSH分桶的增量近重复聚类索引
+
+    签名被切成bands段，每段rows个值；任一段完全相同的样本成为候选，
+    再用完整签名估计相似度，达到阈值才归入候选所在的簇。
+    桶中只保存每簇的代表样本（首个出现的样本），新样本只与代表比较，
+    因此簇内每个样本都与代表相似，不会出现传递链把不相似的样本连成一簇；
+    每个样本最多比较max_candidates个代表，总耗时与样本数近似线性。
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, max_candidates: int = 8):
+        """
+        Args:
+            threshold (float): 归入同一簇的最低估计Jaccard相似度
+            num_perm (int): 签名长度
+            bands (int): LSH段数，必须整除num_perm；默认16段×8行，
+                相似度约0.71时成为候选的概率为50%，0.8时约为96%
+            max_candidates (int): 每个样本最多比较的代表数
+
+        Raises:
+            ValueError: bands不能整除num_perm时抛出
+        """
+        if bands <= 0 or num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_candidates = max_candidates
+        self._buckets: Dict[Tuple[Any, int, bytes], List[int]] = {}
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    @property
+    def clusters(self) -> int:
+        """已建立的簇数"""
+        return len(self._signatures)
+
+    def add(self, key: int, signature: np.ndarray, group: Any = None) -> Tuple[int, float]:
+        """
+        加入一个样本并返回它所属的簇
+
+        Args:
+            key (int): 样本键，成为新簇代表时即为簇ID
+            signature (np.ndarray): MinHash签名
+            group (Any): 分组键（如问题名），只在同组内查找近重复
+
+        Returns:
+            Tuple[int, float]: (簇ID, 与代表的估计相似度)，新建簇时相似度为1.0
+        """
+        band_keys = [(group, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                     for band in range(self.bands)]
+        checked = set()
+        best_key, best_similarity = None, 0.0
+        for band_key in band_keys:
+            for candidate in self._buckets.get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                similarity = estimate_similarity(signature, self._signatures[candidate])
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_key, best_similarity = candidate, similarity
+                if len(checked) >= self.max_candidates:
+                    break
+            if len(checked) >= self.max_candidates:
+                break
+        if best_key is not None:
+            return best_key, best_similarity
+        self._signatures[key] = signature
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return key, 1.0
+
+
+def default_sidecar_path(data_file: str) -> str:
+    """
+    数据集对应的默认旁路文件路径，如data.jsonl对应data.dedup.jsonl
+
+    Args:
+        data_file (str): 数据集路径
+
+    Returns:
+        str: 旁路文件路径
+    """
+    root, _ = os.path.splitext(data_file)
+    return root + '.dedup.jsonl'
+
+
+def deduplicate_jsonl(data_file: str, output_file: Optional[str] = None, threshold: float = 0.8,
+                      num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                      by_problem: bool = True, seed: int = 1) -> Dict[str, Any]:
+    """
+    单次流式遍历数据集，为每条有效记录写出簇ID
+
+    旁路文件每行对应一条有源代码的记录：line为数据集中的行号（从1开始），
+    sample_id与data_reader.normalize_sample的取值一致，cluster为簇代表的行号，
+    similarity为与代表的估计相似度；空行、JSON格式错误和没有源代码的行不写出。
+
+    Args:
+        data_file (str): JSONL数据集路径
+        output_file (Optional[str]): 旁路文件路径，为空时使用default_sidecar_path()
+        threshold (float): 归入同一簇的最低估计Jaccard相似度
+        num_perm (int): MinHash签名长度
+        bands (int): LSH段数
+        shingle_size (int): 分片的词法单元数
+        by_problem (bool): 是否只在相同problem的记录之间查找近重复
+        seed (int): MinHash随机种子
+
+    Returns:
+        Dict[str, Any]: 包含records、clusters、duplicates、largest_cluster、seconds和output的统计
+
+    Raises:
+        FileReadError: 数据集无法读取时抛出
+    """
+    output_file = output_file or default_sidecar_path(data_file)
+    hasher = MinHasher(num_perm=num_perm, seed=seed)
+    index = NearDuplicateIndex(threshold=threshold, num_perm=num_perm, bands=bands)
+    sizes: Dict[int, int] = {}
+    start = time.perf_counter()
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        with open(data_file, 'r', encoding='utf-8') as f, \
+                open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as out:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                source = record.get('source', '') or record.get('src', '')
+                if not source:
+                    continue
+                signature = hasher.source_signature(str(source), shingle_size)
+                group = record.get('problem', '') if by_problem else None
+                cluster, similarity = index.add(line_number, signature, group=group)
+                sample_id = record.get('sample_id', line_number)
+                sizes[cluster] = sizes.get(cluster, 0) + 1
+                out.write(json.dumps({
+                    'line': line_number,
+                    'sample_id': int(sample_id) if str(sample_id).isdigit() else sample_id,
+                    'cluster': cluster,
+                    'similarity': round(similarity, 4)
+                }) + '\n')
+    except FileNotFoundError:
+        raise FileReadError(f"File not found: {data_file}")
+    except PermissionError:
+        raise FileReadError(f"Permission denied: {data_file}")
+    records = sum(sizes.values())
+    return {
+        'records': records,
+        'clusters': len(sizes),
+        'duplicates': records - len(sizes),
+        'largest_cluster': max(sizes.values(), default=0),
+        'seconds': time.perf_counter() - start,
+        'output': output_file
+    }
+
+
+def load_clusters(sidecar_file: str, key: str = 'line') -> Dict[Any, int]:
+    """
+    读取旁路文件中的簇ID
+
+    Args:
+        sidecar_file (str): deduplicate_jsonl()写出的旁路文件
+        key (str): 映射的键，'line'（数据集行号）或'sample_id'
+
+    Returns:
+        Dict[Any, int]: 键到簇ID的映射
+
+    Raises:
+        FileReadError: 旁路文件无法读取时抛出
+    """
+    try:
+        with open(sidecar_file, 'r', encoding='utf-8') as f:
+            return {entry[key]: entry['cluster'] for entry in map(json.loads, f) if entry}
+    except FileNotFoundError:
+        raise FileReadError(f"File not found: {sidecar_file}")
+    except (json.JSONDecodeError, KeyError) as e:
+        raise FileReadError(f"Invalid dedup sidecar {sidecar_file}: {e}")
+
+
+def group_by_cluster(items: Iterable[T], cluster_of: Callable[[T], Optional[int]]) -> List[Tuple[T, List[T]]]:
+    """
+    按簇分组，每簇第一个出现的元素作为代表
+
+    抽样或提前截断后簇的原代表可能不在items中，此时由该簇在items中第一个出现的元素代表；
+    cluster_of返回None的元素（旁路文件中没有记录）单独成簇。
+
+    Args:
+        items (Iterable[T]): 样本
+        cluster_of (Callable[[T], Optional[int]]): 返回样本的簇ID
+
+    Returns:
+        List[Tuple[T, List[T]]]: [(代表, 其余成员), ...]，按代表出现的顺序排列
+    """
+    groups: List[Tuple[T, List[T]]] = []
+    positions: Dict[int, int] = {}
+    for item in items:
+        cluster = cluster_of(item)
+        if cluster is None:
+            groups.append((item, []))
+        elif cluster in positions:
+            groups[positions[cluster]][1].append(item)
+        else:
+            positions[cluster] = len(groups)
+            groups.append((item, []))
+    return groups
+
+
+def dedup_summary(groups: List[Tuple[Any, List[Any]]], representative_matches: int,
+                  evaluated: Optional[int] = None, propagated: Optional[int] = None) -> Dict[str, Any]:
+    """
+    汇总去重评估的统计
+
+    Args:
+        groups (List[Tuple[Any, List[Any]]]): group_by_cluster()的结果
+        representative_matches (int): 代表样本中结果匹配的个数
+        evaluated (Optional[int]): 实际评估的代表数（提前停止时少于簇数），为空时等于簇数
+        propagated (Optional[int]): 获得传播结果的样本数，为空时等于所有簇的非代表成员数
+
+    Returns:
+        Dict[str, Any]: 包含samples、clusters、evaluated、propagated、calls_saved（等于获得传播结果的样本数）和
+            representative_accuracy（每簇计一次的准确率）的字典
+    """
+    evaluated = len(groups) if evaluated is None else evaluated
+    propagated = sum(len(members) for _, members in groups) if propagated is None else propagated
+    return {
+        'samples': sum(1 + len(members) for _, members in groups),
+        'clusters': len(groups),
+        'evaluated': evaluated,
+        'propagated': propagated,
+        # 只有已评估代表的成员得到了传播的结果；提前停止时未评估的簇没有节省任何请求
+        'calls_saved': propagated,
+        'representative_accuracy': representative_matches / evaluated if evaluated else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='MinHash/LSH近重复样本检测，输出簇ID旁路文件')
+    parser.add_argument('--data', '-d', type=str, default='../data/data.jsonl', help='JSONL数据集文件路径')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='旁路文件路径，默认为数据集同目录下的<名称>.dedup.jsonl')
+    parser.add_argument('--threshold', type=float, default=0.8, help='归入同一簇的最低估计Jaccard相似度')
+    parser.add_argument('--num-perm', type=int, default=128, help='MinHash签名长度')
+    parser.add_argument('--bands', type=int, default=16, help='LSH段数，必须整除签名长度')
+    parser.add_argument('--shingle-size', type=int, default=5, help='分片的词法单元数')
+    parser.add_argument('--across-problems', action='store_true', help='在不同problem的记录之间也查找近重复')
+    args = parser.parse_args()
+
+    stats = deduplicate_jsonl(args.data, args.output, threshold=args.threshold, num_perm=args.num_perm,
+                              bands=args.bands, shingle_size=args.shingle_size,
+                              by_problem=not args.across_problems)
+    rate = stats['records'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    print(f"记录 {stats['records']}，簇 {stats['clusters']}，近重复 {stats['duplicates']}，"
+          f"最大簇 {stats['largest_cluster']}，耗时 {stats['seconds']:.1f}s（{rate:.0f} 条/秒），"
+          f"写入 {stats['output']}", file=sys.stderr)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能统计模块
+为分析流程的各个阶段计时，统计分位数、吞吐量和最慢样本；
+未启用时使用空实现，计时调用几乎没有开销
+"""
+
+import heapq
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    计算已排序序列的分位数（线性插值）
+
+    Args:
+        sorted_values (List[float]): 升序排列的数值
+        q (float): 分位点，取值[0, 1]
+
+    Returns:
+        float: 分位数，序列为空时返回0.0
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_durations(durations: List[float]) -> Dict[str, Any]:
+    """
+    汇总一组耗时（秒）为毫秒单位的统计指标和对数直方图
+
+    Args:
+        durations (List[float]): 耗时列表（秒）
+
+    Returns:
+        Dict[str, Any]: 包含count、total_ms、mean_ms、p50_ms、p95_ms、p99_ms、max_ms和histogram的字典，
+            histogram为按2的幂划分的毫秒区间[(上界毫秒, 次数), ...]
+    """
+    values = sorted(durations)
+    count = len(values)
+    total = sum(values)
+    histogram: Dict[float, int] = {}
+    for value in values:
+        ms = value * 1000
+        bound = 2.0 ** math.ceil(math.log2(ms)) if ms > 0 else 0.0
+        histogram[bound] = histogram.get(bound, 0) + 1
+    return {
+        'count': count,
+        'total_ms': total * 1000,
+        'mean_ms': total / count * 1000 if count else 0.0,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+        'histogram': sorted(histogram.items())
+    }
+
+
+class _StageTimer:
+    """单次阶段计时的上下文管理器"""
+
+    __slots__ = ('_owner', '_name', '_start')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        self._owner = owner
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._owner.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NullTimer:
+    """空计时器，所有调用均为空操作"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """
+    分阶段性能统计
+
+    用法:
+        with instrumentation.stage('parse'):
+            ...
+        instrumentation.sample_done(sample_id, duration)
+    """
+
+    enabled = True
+
+    def __init__(self, slowest_n: int = 10):
+        """
+        Args:
+            slowest_n (int): 记录最慢样本的个数
+        """
+        self.slowest_n = slowest_n
+        self._stages: Dict[str, List[float]] = {}
+        self._slowest: List[Tuple[float, Any]] = []
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+
+    def start(self) -> None:
+        """开始统计整体耗时"""
+        self._started_at = time.perf_counter()
+        self._stopped_at = None
+
+    def stop(self) -> None:
+        """结束统计整体耗时"""
+        self._stopped_at = time.perf_counter()
+
+    def stage(self, name: str) -> _StageTimer:
+        """
+        获取阶段计时上下文管理器
+
+        Args:
+            name (str): 阶段名称
+
+        Returns:
+            _StageTimer: 退出时记录耗时的上下文管理器
+        """
+        return _StageTimer(self, name)
+
+    def record(self, name: str, duration: float) -> None:
+        """
+        记录某阶段的一次耗时
+
+        Args:
+            name (str): 阶段名称
+            duration (float): 耗时（秒）
+        """
+        durations = self._stages.get(name)
+        if durations is None:
+            durations = self._stages[name] = []
+        durations.append(duration)
+
+    def sample_done(self, sample_id: Any, duration: float) -> None:
+        """
+        记录一个样本的总耗时，用于吞吐量和最慢样本统计
+
+        Args:
+            sample_id (Any): 样本ID
+            duration (float): 该样本的总耗时（秒）
+        """
+        self._samples += 1
+        entry = (duration, sample_id)
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成性能统计摘要
+
+        Returns:
+            Dict[str, Any]: 包含各阶段统计、样本数、总耗时、吞吐量和最慢样本的字典
+        """
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._stopped_at or time.perf_counter()) - self._started_at
+        return {
+            'samples': self._samples,
+            'elapsed_seconds': elapsed,
+            'samples_per_second': self._samples / elapsed if elapsed > 0 else 0.0,
+            'stages': {name: summarize_durations(durations) for name, durations in self._stages.items()},
+            'slowest_samples': [
+                {'sample_id': sample_id, 'duration_ms': duration * 1000}
+                for duration, sample_id in sorted(self._slowest, reverse=True)
+            ]
+        }
+
+
+class NullInstrumentation:
+    """未启用统计时使用的空实现，接口与Instrumentation一致"""
+
+    enabled = False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def stage(self, name: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def record(self, name: str, duration: float) -> None:
+        pass
+
+    def sample_done(self, sample_id: Any, duration: float) -> None:
+        pass
+
+    def summary(self) -> Dict[str, Any]:
+        return {}
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+def format_performance_report(performance: Dict[str, Any]) -> List[str]:
+    """
+    将性能统计摘要格式化为报告文本行
+
+    Args:
+        performance (Dict[str, Any]): Instrumentation.summary()的返回值
+
+    Returns:
+        List[str]: 报告文本行
+    """
+    lines = []
+    lines.append("性能统计:")
+    lines.append(f"  样本数: {performance['samples']}, 总耗时: {performance['elapsed_seconds']:.2f}s, "
+                 f"吞吐量: {performance['samples_per_second']:.2f} 样本/秒")
+    lines.append(f"  {'阶段':<14} {'次数':<8} {'总计ms':<12} {'p50ms':<10} {'p95ms':<10} {'最大ms':<10}")
+    for name, stats in performance['stages'].items():
+        lines.append(f"  {name:<14} {stats['count']:<8} {stats['total_ms']:<12.1f} "
+                     f"{stats['p50_ms']:<10.3f} {stats['p95_ms']:<10.3f} {stats['max_ms']:<10.3f}")
+    if performance['slowest_samples']:
+        slowest = ', '.join(f"{entry['sample_id']}({entry['duration_ms']:.1f}ms)"
+                            for entry in performance['slowest_samples'])
+        lines.append(f"  最慢样本: {slowest}")
+    return lines
@@ -7,53 +7,125 @@ Java代码时间复杂度静态分析，识别复杂度相关结构并计算复
 
 import javalang
 from typing import Dict, List, Optional, Tuple
-from utils import AnalysisError
+from utils import AnalysisError, ParseError
+from instrumentation import NULL_INSTRUMENTATION
+from parser_backends import (get_backend, new_complexity_info, record_method_call, record_for_update,
+                             apply_loop_depth, FOR_UPDATE_LOG_PATTERNS)
+from pattern_matcher import MultiPatternMatcher
+from parse_registry import KnownParseFailure
 
+# 分析器版本：修改解析、AST分析或最终标识规则时递增，使缓存的分析结果（如解析失败登记）失效
+ANALYZER_VERSION = '1.1'
 
-def analyze_java_complexity(source_code: str) -> str:
+# 源码中常见的对数循环模式（在小写源码上匹配）
+LOG_LOOP_PATTERNS = [
+    'i *= 2', 'i *=2', 'i /= 2', 'i /=2',
+    'j *= 2', 'j *=2', 'j /= 2', 'j /=2',
+    'k *= 2', 'k *=2', 'k /= 2', 'k /=2'
+]
+_LOG_LOOP_MATCHER = MultiPatternMatcher(LOG_LOOP_PATTERNS)
+
+
+def analyze_java_complexity(source_code: str, instrumentation=NULL_INSTRUMENTATION, backend=None,
+                            registry=None) -> str:
     """
     分析Java代码的时间复杂度
     
     Args:
         source_code (str): Java源代码字符串
+        instrumentation (optional): 性能统计对象，分别记录parse、analyze_ast和heuristics阶段耗时
+        backend (optional): 解析器后端名称（'javalang'或'tree-sitter'）或ParserBackend实例，默认为javalang
+        registry (optional): ParseFailureRegistry解析失败登记表，已知无法解析的源代码不再解析，
+            新的解析失败和旧版本失败的修复都会被登记
     
     Returns:
         str: 时间复杂度标识，取值范围：constant、linear、logn、nlogn、quadratic、cubic、np
     
     Raises:
-        AnalysisError: 无法解析或识别的代码结构时抛出
+        KnownParseFailure: 源代码在当前解析器版本下已登记为无法解析时抛出（ParseError的子类）
+        ParseError: 解析器无法解析源代码时抛出（AnalysisError的子类）
+        AnalysisError: 无法识别的代码结构时抛出
     """
+    parser_backend = get_backend(backend)
+    if registry is not None:
+        known = registry.lookup(source_code, parser_backend)
+        if known is not None:
+            raise KnownParseFailure(f"Java syntax error (known): {known['error']}")
     try:
         # 解析Java代码，生成AST
-        tree = javalang.parse.parse(source_code)
+        with instrumentation.stage('parse'):
+            try:
+                tree = parser_backend.parse(source_code)
+            except Exception as e:
+                if registry is not None:
+                    registry.record_failure(source_code, parser_backend, e)
+                prefix = 'Java syntax error' if isinstance(e, parser_backend.syntax_errors) else \
+                    'Unexpected error during analysis'
+                raise ParseError(f"{prefix}: {str(e)}")
+        if registry is not None:
+            registry.record_success(source_code, parser_backend)
         
         # 分析AST，获取复杂度相关信息
-        complexity_info = _analyze_ast(tree)
+        with instrumentation.stage('analyze_ast'):
+            complexity_info = parser_backend.extract(tree)
         
-        # 直接从源代码字符串检测对数模式（备用方法）
-        # 这对于简单的for循环模式非常有效
-        source_lower = source_code.lower()
-        # 检查常见的对数循环模式
-        log_patterns = [
-            'i *= 2', 'i *=2', 'i /= 2', 'i /=2',
-            'j *= 2', 'j *=2', 'j /= 2', 'j /=2',
-            'k *= 2', 'k *=2', 'k /= 2', 'k /=2'
-        ]
-        for pattern in log_patterns:
-            if pattern in source_lower:
+        with instrumentation.stage('heuristics'):
+            # 直接从源代码字符串检测对数模式（备用方法）
+            # 这对于简单的for循环模式非常有效
+            source_lower = source_code.lower()
+            # 一次扫描检查所有常见的对数循环模式
+            if _LOG_LOOP_MATCHER.contains_any(source_lower):
                 complexity_info['has_logarithmic_loop'] = True
-                break
-        
-        # 计算最终复杂度
-        final_complexity = _calculate_complexity(complexity_info)
+            
+            # 计算最终复杂度
+            final_complexity = _calculate_complexity(complexity_info)
         
         return final_complexity
-    except javalang.parser.JavaSyntaxError as e:
-        raise AnalysisError(f"Java syntax error: {str(e)}")
+    except AnalysisError:
+        raise
     except Exception as e:
         raise AnalysisError(f"Unexpected error during analysis: {str(e)}")
 
 
+def analyze_with_fallback(source_code: str, instrumentation=NULL_INSTRUMENTATION, backend=None,
+                          fallback=None, registry=None) -> str:
+    """
+    用主解析器分析源代码，主解析器无法解析（包括已登记的失败）时改用备用解析器
+
+    Args:
+        source_code (str): Java源代码字符串
+        instrumentation (optional): 性能统计对象
+        backend (optional): 主解析器后端
+        fallback (optional): 备用解析器后端，为空时直接抛出主解析器的异常
+        registry (optional): 解析失败登记表或工作进程中的ParseEventRecorder
+
+    Returns:
+        str: 时间复杂度标识
+
+    Raises:
+        AnalysisError: 分析失败时抛出
+    """
+    try:
+        return analyze_java_complexity(source_code, instrumentation=instrumentation, backend=backend,
+                                       registry=registry)
+    except ParseError:
+        if not fallback:
+            raise
+    return analyze_java_complexity(source_code, instrumentation=instrumentation, backend=fallback,
+                                   registry=registry)
+
+
+def _operand_text(node) -> str:
+    """赋值表达式两侧的文本：没有限定符和运算符的变量取变量名，字面量取原文，其他表达式为'?'"""
+    if isinstance(node, javalang.tree.MemberReference):
+        if not (node.qualifier or node.selectors or node.prefix_operators or node.postfix_operators):
+            return node.member
+    elif isinstance(node, javalang.tree.Literal):
+        if not (node.selectors or node.prefix_operators or node.postfix_operators):
+            return node.value
+    return '?'
+
+
 def _analyze_ast(tree) -> Dict[str, any]:
     """
     遍历AST，分析复杂度相关结构
@@ -65,23 +137,9 @@ def _analyze_ast(tree) -> Dict[str, any]:
         Dict[str, any]: 包含复杂度相关信息的字典
     """
     # 初始化复杂度信息
-    complexity_info = {
-        'loop_depth': 0,
-        'max_loop_depth': 0,
-        'has_nested_loops': False,
-        'has_recursion': False,
-        'has_binary_search': False,
-        'has_sorting_algorithm': False,
-        'has_quadratic_pattern': False,
-        'has_cubic_pattern': False,
-        'has_exponential_pattern': False,
-        'has_logarithmic_loop': False,
-        'loop_types': [],
-        'method_calls': [],
-        'recursive_calls': 0
-    }
+    complexity_info = new_complexity_info()
     
-    # 1. 首先，识别递归调用
+    # 1. 首先，识别递归调用，同时检测for循环更新表达式中的对数模式
     function_stack = []
     for path, node in javalang.ast.walk_tree(tree):
         node_type = type(node).__name__
@@ -92,22 +150,16 @@ def _analyze_ast(tree) -> Dict[str, any]:
         
         elif node_type == 'MethodInvocation':
             if hasattr(node, 'member'):
-                method_name = str(node.member).lower()
-                complexity_info['method_calls'].append(method_name)
-                
-                # 检测递归
-                if function_stack and method_name == function_stack[-1].lower():
-                    complexity_info['has_recursion'] = True
-                    complexity_info['recursive_calls'] += 1
-                
-                # 检测排序算法
-                sorting_keywords = ['sort', 'quicksort', 'mergesort', 'heapsort', 'bubblesort', 'insertionsort']
-                if any(keyword in method_name for keyword in sorting_keywords):
-                    complexity_info['has_sorting_algorithm'] = True
-                
-                # 检测二分查找
-                if 'binary' in method_name and 'search' in method_name:
-                    complexity_info['has_binary_search'] = True
+                # 记录调用并检测递归、排序算法和二分查找
+                record_method_call(complexity_info, str(node.member).lower(),
+                                   function_stack[-1] if function_stack else None)
+        
+        elif node_type == 'ForStatement':
+            # 更新表达式在ForControl上，增强for的EnhancedForControl没有update
+            for update in getattr(node.control, 'update', None) or ():
+                if isinstance(update, javalang.tree.Assignment):
+                    record_for_update(complexity_info, _operand_text(update.expressionl), update.type,
+                                      _operand_text(update.value))
         
         elif node_type == 'MethodDeclaration':
             if function_stack:
@@ -140,34 +192,8 @@ def _analyze_ast(tree) -> Dict[str, any]:
     for path, node in javalang.ast.walk_tree(tree):
         calculate_max_depth(node)
     
-    # 3. 更新复杂度信息
-    complexity_info['max_loop_depth'] = max_depth
-    
-    # 4. 设置复杂度模式
-    if max_depth >= 2:
-        complexity_info['has_nested_loops'] = True
-    if max_depth == 2:
-        complexity_info['has_quadratic_pattern'] = True
-    elif max_depth == 3:
-        complexity_info['has_cubic_pattern'] = True
-    elif max_depth > 3:
-        complexity_info['has_exponential_pattern'] = True
-    
-    # 5. 检测对数循环
-    has_log_pattern = False
-    for path, node in javalang.ast.walk_tree(tree):
-        node_type = type(node).__name__
-        if node_type == 'ForStatement':
-            if hasattr(node, 'update') and node.update:
-                update_str = str(node.update).lower()
-                log_patterns = ['*= 2', '*=2', '/= 2', '/=2', 'i *=', 'i /=']
-                for pattern in log_patterns:
-                    if pattern in update_str:
-                        has_log_pattern = True
-                        break
-    
-    if has_log_pattern:
-        complexity_info['has_logarithmic_loop'] = True
+    # 3. 更新复杂度信息并设置复杂度模式
+    apply_loop_depth(complexity_info, max_depth)
     
     return complexity_info
 
@@ -6,12 +6,21 @@
 """
 
 import sys
+import time
 import logging
-from typing import List, Dict, Any
-from data_reader import extract_java_samples, FileReadError, DataFormatError
-from java_complexity_analyzer import analyze_java_complexity, AnalysisError
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from data_reader import extract_java_samples, sample_java_samples, FileReadError, DataFormatError
+from java_complexity_analyzer import analyze_with_fallback, AnalysisError, ANALYZER_VERSION
 from result_comparator import compare_individual_result, generate_statistics_report
 from result_saver import save_results, format_result
+from sequential_eval import SequentialEvaluator, stratified_order, load_baseline_accuracy
+from instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from progress import ProgressReporter, JsonlLogSink
+from parser_backends import DEFAULT_BACKEND
+from dedup import load_clusters, group_by_cluster, dedup_summary
+from parse_registry import ParseFailureRegistry
+from shared_dataset import analyze_in_workers, default_chunksize
+from scheduler import load_timings, estimate_costs, longest_first, makespan_report
 
 # 配置日志
 logging.basicConfig(
@@ -24,50 +33,152 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main(data_file: str = '../data/data.jsonl', output_dir: str = '.') -> None:
+def _analyze_samples(samples: List[Dict[str, Any]], instrumentation, backend: Optional[str],
+                     fallback: Optional[str], registry, workers: int, order: Optional[List[int]] = None
+                     ) -> Iterator[Tuple[Dict[str, Any], str, Optional[str], float]]:
+    """
+    按顺序分析样本，workers大于1时交给共享内存工作进程池
+
+    Args:
+        samples (List[Dict[str, Any]]): 样本列表
+        instrumentation: 性能统计对象，只用于单进程分析
+        backend (Optional[str]): 主解析器后端
+        fallback (Optional[str]): 备用解析器后端
+        registry (optional): 解析失败登记表
+        workers (int): 工作进程数
+        order (Optional[List[int]]): 多进程分析时的任务派发顺序，结果仍按样本顺序产出
+
+    Yields:
+        Tuple[Dict[str, Any], str, Optional[str], float]: (样本, 复杂度标识或"error", 错误信息, 分析耗时秒数)
+    """
+    if workers > 1:
+        results = analyze_in_workers([sample['source'] for sample in samples], workers,
+                                     backend=backend, fallback=fallback, registry=registry, order=order)
+        try:
+            for index, output, error, duration in results:
+                yield samples[index], output, error, duration
+        finally:
+            results.close()
+        return
+    for sample in samples:
+        start = time.perf_counter()
+        try:
+            # 分析Java代码复杂度
+            output, error = analyze_with_fallback(sample['source'], instrumentation=instrumentation,
+                                                  backend=backend, fallback=fallback, registry=registry), None
+        except AnalysisError as e:
+            # 处理分析错误
+            output, error = 'error', str(e)
+        yield sample, output, error, time.perf_counter() - start
+
+
+def main(data_file: str = '../data/data.jsonl', output_dir: str = '.',
+         early_stop: bool = False, ci_width: float = 0.05, confidence: float = 0.95,
+         baseline_file: Optional[str] = None, seed: Optional[int] = None,
+         sample_size: Optional[int] = None, stratify_by: Optional[List[str]] = None,
+         profile: bool = False, progress: bool = True, sample_log: Optional[str] = None,
+         parser_backend: Optional[str] = None, dedup_file: Optional[str] = None,
+         parse_registry: Optional[str] = None, parse_fallback: Optional[str] = None,
+         workers: int = 1, schedule: str = 'fifo', schedule_timings: Optional[str] = None) -> None:
     """
     主程序入口，执行完整的分析流程
     
     Args:
         data_file (str, optional): JSONL数据集文件路径，默认为'./data.jsonl'
         output_dir (str, optional): 输出结果目录路径，默认为当前目录
+        early_stop (bool, optional): 是否启用提前停止评估，按复杂度分层随机顺序处理样本
+        ci_width (float, optional): 提前停止的置信区间目标宽度
+        confidence (float, optional): 置信区间的置信度
+        baseline_file (str, optional): 基线结果文件，准确率与其比较已有定论时停止
+        seed (int, optional): 分层随机顺序和抽样的随机种子
+        sample_size (int, optional): 抽样规模，指定时只分析单次流式抽取的样本子集
+        stratify_by (List[str], optional): 抽样分层字段，如['complexity', 'from']，为空时均匀抽样
+        profile (bool, optional): 是否启用分阶段性能统计，结果写入summary.performance并打印在统计报告中
+        progress (bool, optional): 是否显示限频刷新的进度行
+        sample_log (str, optional): 逐样本明细JSONL日志路径，由后台线程写入
+        parser_backend (str, optional): 解析器后端，'javalang'（默认）或'tree-sitter'
+        dedup_file (str, optional): dedup.py生成的簇ID旁路文件，指定时每簇只分析一个代表样本，
+            其结果传播给簇内其他样本
+        parse_registry (str, optional): 解析失败登记文件，当前解析器版本下已知无法解析的样本不再解析
+        parse_fallback (str, optional): 备用解析器后端，主解析器无法解析（包括已登记的失败）时改用它分析
+        workers (int, optional): 分析用的工作进程数，大于1时全部源代码写入共享内存，工作进程按偏移读取；
+            此时分阶段统计只包含主进程中的阶段
+        schedule (str, optional): 多进程分析的派发顺序，'fifo'按样本顺序，'longest'按代价估计从大到小
+        schedule_timings (str, optional): 上一次运行的逐样本明细日志，有历史耗时的样本以耗时作为代价估计，
+            其余样本按源代码长度估计
     """
     logger.info("=== 开始Java代码时间复杂度分析与验证 ===")
     
     results = []
+    instrumentation = Instrumentation() if profile else NULL_INSTRUMENTATION
+    sink = None
+    registry = None
     
     try:
         # 1. 读取数据
         logger.info(f"1. 正在读取数据文件: {data_file}")
-        samples = list(extract_java_samples(data_file))
+        with instrumentation.stage('load'):
+            if sample_size:
+                samples = sample_java_samples(data_file, sample_size, stratify_by=stratify_by, seed=seed)
+                logger.info(f"   抽样方式: {'分层(' + ','.join(stratify_by) + ')' if stratify_by else '均匀蓄水池'}")
+            else:
+                samples = list(extract_java_samples(data_file, instrumentation=instrumentation))
         total_samples = len(samples)
         logger.info(f"   成功读取 {total_samples} 个Java代码样本")
+        # 去重和提前停止会改变处理顺序，保存前按样本在数据集中的顺序恢复
+        position = {sample['sample_id']: i for i, sample in enumerate(samples)}
+        
+        groups = None
+        members_of = {}
+        if dedup_file:
+            clusters = load_clusters(dedup_file, key='sample_id')
+            groups = group_by_cluster(samples, lambda sample: clusters.get(sample['sample_id']))
+            members_of = {rep['sample_id']: members for rep, members in groups}
+            samples = [rep for rep, _ in groups]
+            logger.info(f"   近重复去重：{total_samples} 个样本归为 {len(samples)} 个簇，只分析每簇的代表样本")
+        
+        evaluator = None
+        if early_stop:
+            baseline = load_baseline_accuracy(baseline_file) if baseline_file else None
+            evaluator = SequentialEvaluator(target_width=ci_width, confidence=confidence, baseline=baseline)
+            samples = stratified_order(samples, key=lambda sample: sample['expected_complexity'], seed=seed)
+            logger.info(f"   已启用提前停止：目标区间宽度={ci_width}, 置信度={confidence}, 基线={baseline}")
         
         # 2. 复杂度分析
-        logger.info("2. 正在进行复杂度分析...")
-        for i, sample in enumerate(samples, 1):
-            logger.info(f"   分析样本 {i}/{total_samples} (ID: {sample['sample_id']})")
-            
+        logger.info(f"2. 正在进行复杂度分析（解析器: {parser_backend or DEFAULT_BACKEND}）...")
+        reporter = ProgressReporter(len(samples), enabled=progress, label='   ')
+        if sample_log:
+            sink = JsonlLogSink(sample_log)
+            logger.info(f"   逐样本明细写入: {sample_log}")
+        if parse_registry:
+            registry = ParseFailureRegistry(parse_registry, ANALYZER_VERSION)
+            logger.info(f"   解析失败登记: {parse_registry}（已有 {len(registry)} 条记录）")
+        costs = order = None
+        if workers > 1:
+            timings = load_timings(schedule_timings) if schedule_timings else None
+            costs = estimate_costs([sample['source'] for sample in samples], timings=timings,
+                                   keys=[sample['sample_id'] for sample in samples])
+            if schedule == 'longest':
+                order = longest_first(costs)
+            logger.info(f"   使用 {workers} 个工作进程，源代码经共享内存传递，派发顺序: {schedule}"
+                        f"{'（代价参考 ' + schedule_timings + '）' if schedule_timings else ''}")
+        instrumentation.start()
+        representatives = representative_matches = propagated = 0
+        durations = []
+        analyzed = _analyze_samples(samples, instrumentation, parser_backend, parse_fallback, registry, workers,
+                                    order=order)
+        for sample, output, error, duration in analyzed:
             sample_id = sample['sample_id']
             problem = sample['problem']
             source = sample['source']
             expected_complexity = sample['expected_complexity']
             
-            try:
-                # 分析Java代码复杂度
-                output = analyze_java_complexity(source)
-                error = None
-                
-                # 比较结果
-                is_match = compare_individual_result(expected_complexity, output)
-                
-                logger.info(f"   样本 {sample_id}: 预期={expected_complexity}, 分析结果={output}, {'匹配' if is_match else '不匹配'}")
-            except AnalysisError as e:
-                # 处理分析错误
-                output = "error"
+            # 比较结果
+            if error is None:
+                with instrumentation.stage('compare'):
+                    is_match = compare_individual_result(expected_complexity, output)
+            else:
                 is_match = False
-                error = str(e)
-                logger.error(f"   样本 {sample_id}: 分析错误 - {error}")
             
             # 格式化结果
             result = format_result(
@@ -80,16 +191,90 @@ def main(data_file: str = '../data/data.jsonl', output_dir: str = '.') -> None:
                 error=error
             )
             results.append(result)
+            representatives += 1
+            representative_matches += is_match
+            # 代表样本的分析结果传播给簇内其他样本，按各自的预期复杂度判断是否匹配
+            for member in members_of.get(sample_id, ()):
+                member_result = format_result(
+                    sample_id=member['sample_id'],
+                    problem=member['problem'],
+                    source=member['source'],
+                    expected_complexity=member['expected_complexity'],
+                    output=output,
+                    is_match=error is None and compare_individual_result(member['expected_complexity'], output),
+                    error=error
+                )
+                member_result['propagated_from'] = sample_id
+                results.append(member_result)
+                propagated += 1
+            durations.append(duration)
+            instrumentation.sample_done(sample_id, duration)
+            reporter.update(is_match=is_match, error=error is not None)
+            if sink is not None:
+                sink.write({
+                    'sample_id': sample_id,
+                    'expected_complexity': expected_complexity,
+                    'output': output,
+                    'is_match': is_match,
+                    'error': error,
+                    'duration_ms': duration * 1000
+                })
+            
+            if evaluator is not None and evaluator.update(is_match):
+                low, high = evaluator.interval
+                reporter.log(f"   提前停止({evaluator.reason})：准确率置信区间=[{low:.4f}, {high:.4f}]")
+                break
+        analyzed.close()
+        
+        instrumentation.stop()
+        reporter.close()
+        if reporter.errors:
+            logger.warning(f"   分析错误 {reporter.errors} 个，错误信息见结果文件"
+                           f"{'和明细日志' if sample_log else ''}")
         
         # 3. 生成统计报告
         logger.info("3. 正在生成统计报告...")
-        report = generate_statistics_report(results)
+        performance = instrumentation.summary()
+        report = generate_statistics_report(results, performance=performance)
         logger.info(f"\n{report}")
         
+        extra_summary = {}
+        if performance:
+            extra_summary['performance'] = performance
+        if registry is not None:
+            registry_summary = registry.summary()
+            extra_summary['parse_registry'] = registry_summary
+            logger.info(f"   解析失败登记：跳过已知失败 {registry_summary['skipped']}，新增失败 {registry_summary['new_failures']}，"
+                        f"版本变更后仍失败 {registry_summary['still_failing']}，已修复 {registry_summary['fixed']}")
+        if groups is not None:
+            extra_summary['dedup'] = dedup_summary(groups, representative_matches, evaluated=representatives,
+                                                   propagated=propagated)
+            logger.info(f"   去重评估：{extra_summary['dedup']['clusters']} 个簇，"
+                        f"传播 {extra_summary['dedup']['propagated']} 个样本的结果，"
+                        f"每簇计一次的准确率 {extra_summary['dedup']['representative_accuracy']:.4f}")
+        if costs is not None and durations:
+            schedule_summary = dict(makespan_report(durations, costs[:len(durations)], workers,
+                                                    fifo_chunksize=default_chunksize(len(samples), workers)),
+                                    policy=schedule)
+            extra_summary['schedule'] = schedule_summary
+            logger.info(f"   调度：按实测耗时模拟 {workers} 个进程的完成时间，FIFO {schedule_summary['fifo_s']:.2f}s，"
+                        f"最长优先 {schedule_summary['longest_first_s']:.2f}s（缩短 {schedule_summary['improvement']:.1%}），"
+                        f"下界 {schedule_summary['lower_bound_s']:.2f}s")
+        if evaluator is not None:
+            early_stop_summary = evaluator.summary(len(samples))
+            extra_summary['early_stop'] = early_stop_summary
+            logger.info(f"   已评估 {early_stop_summary['evaluated']}/{len(samples)} 个样本，"
+                        f"节省 {early_stop_summary['samples_saved']} 个样本")
+        
         # 4. 保存结果
         logger.info("4. 正在保存结果...")
-        filename = save_results(results, output_dir)
+        results.sort(key=lambda result: position[result['sample_id']])
+        save_start = time.perf_counter()
+        filename = save_results(results, output_dir, extra_summary=extra_summary)
         logger.info(f"   结果已保存到文件: {filename}")
+        if instrumentation.enabled:
+            # 保存阶段发生在写入summary之后，只能输出到日志
+            logger.info(f"   保存耗时: {(time.perf_counter() - save_start) * 1000:.1f}ms")
         
         logger.info("=== Java代码时间复杂度分析与验证完成 ===")
         
@@ -104,6 +289,11 @@ def main(data_file: str = '../data/data.jsonl', output_dir: str = '.') -> None:
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if sink is not None:
+            sink.close()
+        if registry is not None:
+            registry.close()
 
 
 if __name__ == "__main__":
@@ -115,7 +305,49 @@ if __name__ == "__main__":
                         help='JSONL数据集文件路径')
     parser.add_argument('--output', '-o', type=str, default='results',
                         help='输出结果目录路径')
+    parser.add_argument('--early-stop', action='store_true',
+                        help='启用提前停止评估（分层随机顺序 + 序贯置信区间）')
+    parser.add_argument('--ci-width', type=float, default=0.05,
+                        help='提前停止的置信区间目标宽度')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='置信区间的置信度')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='基线结果文件路径，准确率与其比较已有定论时停止')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='分层随机顺序和抽样的随机种子')
+    parser.add_argument('--profile', action='store_true',
+                        help='启用分阶段性能统计（耗时分位数、吞吐量、最慢样本）')
+    parser.add_argument('--no-progress', action='store_true',
+                        help='不显示进度行')
+    parser.add_argument('--sample-log', type=str, default=None,
+                        help='逐样本明细JSONL日志路径')
+    parser.add_argument('--parser', type=str, default=None, choices=['javalang', 'tree-sitter'],
+                        help='解析器后端，tree-sitter需要安装tree-sitter和tree-sitter-java')
+    parser.add_argument('--parse-registry', type=str, default=None,
+                        help='解析失败登记文件，已知无法解析的样本不再重复解析')
+    parser.add_argument('--parse-fallback', type=str, default=None, choices=['javalang', 'tree-sitter'],
+                        help='主解析器无法解析时改用的备用解析器后端')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='分析用的工作进程数，大于1时源代码经共享内存传给工作进程')
+    parser.add_argument('--schedule', type=str, default='fifo', choices=['fifo', 'longest'],
+                        help='多进程分析的派发顺序，longest按估计代价从大到小派发')
+    parser.add_argument('--schedule-timings', type=str, default=None,
+                        help='上一次运行的逐样本明细日志，用其中的耗时估计代价')
+    parser.add_argument('--dedup', type=str, default=None,
+                        help='dedup.py生成的簇ID旁路文件，每簇只分析一个代表样本并传播结果')
+    parser.add_argument('--sample-size', type=int, default=None,
+                        help='抽样规模，单次流式遍历数据集抽取样本子集')
+    parser.add_argument('--stratify', type=str, default=None,
+                        help='抽样分层字段，逗号分隔，如complexity或complexity,from')
     
     args = parser.parse_args()
     
-    main(data_file=args.data, output_dir=args.output)
+    main(data_file=args.data, output_dir=args.output,
+         early_stop=args.early_stop, ci_width=args.ci_width, confidence=args.confidence,
+         baseline_file=args.baseline, seed=args.seed,
+         sample_size=args.sample_size,
+         stratify_by=args.stratify.split(',') if args.stratify else None,
+         profile=args.profile, progress=not args.no_progress, sample_log=args.sample_log,
+         parser_backend=args.parser, dedup_file=args.dedup,
+         parse_registry=args.parse_registry, parse_fallback=args.parse_fallback,
+         workers=args.workers, schedule=args.schedule, schedule_timings=args.schedule_timings)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析失败登记模块
+以源代码哈希为键持久化记录解析失败的样本、错误位置以及当时的解析器和分析器版本；
+再次运行时，版本未变的已知失败样本不再重复解析，直接按缓存的错误处理或交给备用解析器；
+解析器或分析器升级后，旧版本的记录会被重新验证，并统计修复和仍然失败的样本数
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import ParseError, FileReadError
+
+
+class KnownParseFailure(ParseError):
+    """源代码在当前解析器版本下已知无法解析时抛出的异常，不会重新解析"""
+    pass
+
+
+def source_key(source_code: str) -> str:
+    """
+    计算源代码的登记键
+
+    Args:
+        source_code (str): 源代码
+
+    Returns:
+        str: 128位blake2b哈希的十六进制串
+    """
+    return hashlib.blake2b(source_code.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def describe_parse_error(error: BaseException) -> str:
+    """
+    生成解析异常的可读描述
+
+    javalang的JavaSyntaxError通常没有描述文字，出错的词法单元保存在at属性中。
+
+    Args:
+        error (BaseException): 解析异常
+
+    Returns:
+        str: 异常描述
+    """
+    message = str(error)
+    at = getattr(error, 'at', None)
+    if not message and at is not None:
+        message = f"unexpected {at}"
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+class ParseFailureRegistry:
+    """
+    持久化的解析失败登记表
+
+    记录以追加方式写入JSONL文件，每行是某个(源代码哈希, 后端)的最新状态，读取时后写的记录覆盖先写的；
+    compact()把文件重写为每个键一行。每条记录包含:
+        key, backend, parser_version, analyzer_version, status（failed或fixed）, error, line, column, time
+    只有解析器版本和分析器版本都与当前一致的failed记录会被lookup()命中。
+    """
+
+    def __init__(self, file_path: str, analyzer_version: str):
+        """
+        Args:
+            file_path (str): 登记文件路径，不存在时自动创建
+            analyzer_version (str): 当前分析器版本
+
+        Raises:
+            FileReadError: 登记文件无法读取或格式错误时抛出
+        """
+        self.file_path = file_path
+        self.analyzer_version = analyzer_version
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self.stats = {'skipped': 0, 'new_failures': 0, 'still_failing': 0, 'fixed': 0}
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        self._entries[(entry['key'], entry['backend'])] = entry
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError) as e:
+            raise FileReadError(f"Invalid parse registry {file_path} at line {line_number}: {e}")
+
+    def _is_current(self, entry: Dict[str, Any], backend) -> bool:
+        return entry['parser_version'] == backend.version and entry['analyzer_version'] == self.analyzer_version
+
+    def lookup(self, source_code: str, backend) -> Optional[Dict[str, Any]]:
+        """
+        查询源代码在当前版本下是否已知无法解析
+
+        Args:
+            source_code (str): 源代码
+            backend (ParserBackend): 解析器后端
+
+        Returns:
+            Optional[Dict[str, Any]]: 已知失败的记录，没有记录、记录已修复或版本不同时返回None
+        """
+        entry = self._entries.get((source_key(source_code), backend.name))
+        if entry is None or entry['status'] != 'failed' or not self._is_current(entry, backend):
+            return None
+        with self._lock:
+            self.stats['skipped'] += 1
+        return entry
+
+    def record_failure(self, source_code: str, backend, error: BaseException) -> Dict[str, Any]:
+        """
+        登记一次解析失败
+
+        Args:
+            source_code (str): 源代码
+            backend (ParserBackend): 解析器后端
+            error (BaseException): 解析异常
+
+        Returns:
+            Dict[str, Any]: 新记录
+        """
+        return self._record_failure(source_code, backend, describe_parse_error(error), backend.error_location(error))
+
+    def _record_failure(self, source_code: str, backend, description: str,
+                        location: Optional[Tuple[int, Optional[int]]]) -> Dict[str, Any]:
+        key = (source_key(source_code), backend.name)
+        entry = {
+            'key': key[0],
+            'backend': backend.name,
+            'parser_version': backend.version,
+            'analyzer_version': self.analyzer_version,
+            'status': 'failed',
+            'error': description,
+            'line': location[0] if location else None,
+            'column': location[1] if location else None,
+            'time': datetime.datetime.now().isoformat(timespec='seconds')
+        }
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous['status'] == 'failed':
+                # 旧版本下已失败，新版本仍然失败
+                self.stats['still_failing'] += 1
+            else:
+                self.stats['new_failures'] += 1
+            self._write(key, entry)
+        return entry
+
+    def record_success(self, source_code: str, backend) -> None:
+        """
+        登记一次解析成功；只有此前有失败记录的源代码才会写入（标记为fixed）
+
+        Args:
+            source_code (str): 源代码
+            backend (ParserBackend): 解析器后端
+        """
+        if not self._entries:
+            return
+        key = (source_key(source_code), backend.name)
+        previous = self._entries.get(key)
+        if previous is None or previous['status'] != 'failed':
+            return
+        entry = dict(previous, status='fixed', parser_version=backend.version,
+                     analyzer_version=self.analyzer_version,
+                     time=datetime.datetime.now().isoformat(timespec='seconds'))
+        with self._lock:
+            self.stats['fixed'] += 1
+            self._write(key, entry)
+
+    def _write(self, key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        if self._file is None:
+            directory = os.path.dirname(self.file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def known_failures(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        当前所有failed记录的快照，供工作进程中的ParseEventRecorder判断已知失败
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: (源代码哈希, 后端)到记录的映射
+        """
+        with self._lock:
+            return {key: entry for key, entry in self._entries.items() if entry['status'] == 'failed'}
+
+    def apply_events(self, source_code: str, events: List[Tuple[Any, ...]], get_backend) -> None:
+        """
+        回放工作进程中ParseEventRecorder记录的事件
+
+        Args:
+            source_code (str): 源代码
+            events (List[Tuple[Any, ...]]): ParseEventRecorder.take_events()的结果
+            get_backend (Callable): 按名称获取解析器后端的函数
+        """
+        for event in events:
+            kind, backend = event[0], get_backend(event[1])
+            if kind == 'skipped':
+                with self._lock:
+                    self.stats['skipped'] += 1
+            elif kind == 'failure':
+                self._record_failure(source_code, backend, event[2], event[3])
+            elif kind == 'success':
+                self.record_success(source_code, backend)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总登记表
+
+        Returns:
+            Dict[str, Any]: 包含本次运行的skipped、new_failures、still_failing、fixed，
+                当前仍失败的记录数known_failures，以及按"后端 解析器版本 / analyzer 分析器版本"分组的失败数by_version
+        """
+        by_version: Dict[str, int] = {}
+        known_failures = 0
+        with self._lock:
+            for entry in self._entries.values():
+                if entry['status'] != 'failed':
+                    continue
+                known_failures += 1
+                label = f"{entry['backend']} {entry['parser_version']} / analyzer {entry['analyzer_version']}"
+                by_version[label] = by_version.get(label, 0) + 1
+            return dict(self.stats, known_failures=known_failures, by_version=by_version)
+
+    def compact(self) -> None:
+        """把登记文件重写为每个键一行，去掉被覆盖的历史记录"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temp_path = self.file_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(temp_path, self.file_path)
+
+    def close(self) -> None:
+        """关闭登记文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ParseEventRecorder:
+    """
+    工作进程中代替ParseFailureRegistry的记录器
+
+    按主进程登记表的只读快照判断已知失败，新的解析失败和成功只记录为可序列化的事件，
+    随分析结果返回主进程后由ParseFailureRegistry.apply_events()回放，登记文件只由主进程写入。
+    """
+
+    def __init__(self, known: Dict[Tuple[str, str], Dict[str, Any]], analyzer_version: str):
+        """
+        Args:
+            known (Dict[Tuple[str, str], Dict[str, Any]]): ParseFailureRegistry.known_failures()的快照
+            analyzer_version (str): 当前分析器版本
+        """
+        self._known = known
+        self.analyzer_version = analyzer_version
+        self._events: List[Tuple[Any, ...]] = []
+
+    def lookup(self, source_code: str, backend) -> Optional[Dict[str, Any]]:
+        if not self._known:
+            return None
+        entry = self._known.get((source_key(source_code), backend.name))
+        if entry is None or entry['parser_version'] != backend.version or \
+                entry['analyzer_version'] != self.analyzer_version:
+            return None
+        self._events.append(('skipped', backend.name))
+        return entry
+
+    def record_failure(self, source_code: str, backend, error: BaseException) -> None:
+        self._events.append(('failure', backend.name, describe_parse_error(error), backend.error_location(error)))
+
+    def record_success(self, source_code: str, backend) -> None:
+        if self._known:
+            self._events.append(('success', backend.name))
+
+    def take_events(self) -> List[Tuple[Any, ...]]:
+        """
+        取出并清空已记录的事件
+
+        Returns:
+            List[Tuple[Any, ...]]: 事件列表
+        """
+        events, self._events = self._events, []
+        return events
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='查看或压缩解析失败登记表')
+    parser.add_argument('registry', type=str, help='登记文件路径')
+    parser.add_argument('--compact', action='store_true', help='重写登记文件，每个键只保留最新记录')
+    args = parser.parse_args()
+
+    from java_complexity_analyzer import ANALYZER_VERSION
+    registry = ParseFailureRegistry(args.registry, ANALYZER_VERSION)
+    if args.compact:
+        registry.compact()
+    summary = registry.summary()
+    print(f"登记记录 {len(registry)} 条，仍失败 {summary['known_failures']} 条", file=sys.stderr)
+    for label, count in sorted(summary['by_version'].items()):
+        print(f"  {label}: {count}", file=sys.stderr)
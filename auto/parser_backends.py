@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析器后端模块
+为复杂度分析提供可替换的Java解析器：纯Python的javalang（默认）和C实现的tree-sitter-java（可选依赖）。
+两个后端从各自的语法树中提取相同的归一化complexity_info，交给_calculate_complexity计算最终标识
+"""
+
+import re
+from importlib import metadata
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+import javalang
+from pattern_matcher import MultiPatternMatcher
+
+try:
+    import tree_sitter
+    import tree_sitter_java
+except ImportError:  # 未安装时只提供javalang后端
+    tree_sitter = None
+    tree_sitter_java = None
+
+DEFAULT_BACKEND = 'javalang'
+
+# 方法名中包含这些关键字时视为调用了排序算法
+SORTING_KEYWORDS = ('sort', 'quicksort', 'mergesort', 'heapsort', 'bubblesort', 'insertionsort')
+_SORTING_MATCHER = MultiPatternMatcher(SORTING_KEYWORDS)
+# for循环更新部分的对数模式，在"变量 运算符 值"形式的小写文本上匹配，见record_for_update()
+FOR_UPDATE_LOG_PATTERNS = ['*= 2', '*=2', '/= 2', '/=2', 'i *=', 'i /=']
+_FOR_UPDATE_LOG_MATCHER = MultiPatternMatcher(FOR_UPDATE_LOG_PATTERNS)
+
+
+def new_complexity_info() -> Dict[str, Any]:
+    """
+    创建初始的复杂度信息字典
+
+    Returns:
+        Dict[str, Any]: 所有标志为False、计数为0的复杂度信息
+    """
+    return {
+        'loop_depth': 0,
+        'max_loop_depth': 0,
+        'has_nested_loops': False,
+        'has_recursion': False,
+        'has_binary_search': False,
+        'has_sorting_algorithm': False,
+        'has_quadratic_pattern': False,
+        'has_cubic_pattern': False,
+        'has_exponential_pattern': False,
+        'has_logarithmic_loop': False,
+        'loop_types': [],
+        'method_calls': [],
+        'recursive_calls': 0
+    }
+
+
+def record_method_call(complexity_info: Dict[str, Any], method_name: str, current_method: Optional[str]) -> None:
+    """
+    记录一次方法调用，并据此更新递归、排序和二分查找标志
+
+    Args:
+        complexity_info (Dict[str, Any]): 复杂度信息字典
+        method_name (str): 小写的被调用方法名
+        current_method (Optional[str]): 遍历顺序中最近一个方法声明的名称
+    """
+    complexity_info['method_calls'].append(method_name)
+    if current_method and method_name == current_method.lower():
+        complexity_info['has_recursion'] = True
+        complexity_info['recursive_calls'] += 1
+    if _SORTING_MATCHER.contains_any(method_name):
+        complexity_info['has_sorting_algorithm'] = True
+    if 'binary' in method_name and 'search' in method_name:
+        complexity_info['has_binary_search'] = True
+
+
+def record_for_update(complexity_info: Dict[str, Any], left: str, operator: str, right: str) -> None:
+    """
+    记录for循环更新部分的一个赋值表达式，匹配FOR_UPDATE_LOG_PATTERNS时设置对数循环标志
+
+    两个后端都从语法树渲染"变量 运算符 值"文本，不依赖源码中的空白，保证结果一致。
+
+    Args:
+        complexity_info (Dict[str, Any]): 复杂度信息字典
+        left (str): 被赋值的简单变量名，其他左值为'?'
+        operator (str): 赋值运算符，如'*='
+        right (str): 右侧的字面量或简单变量名，其他表达式为'?'
+    """
+    if _FOR_UPDATE_LOG_MATCHER.contains_any(f'{left} {operator} {right}'.lower()):
+        complexity_info['has_logarithmic_loop'] = True
+
+
+def apply_loop_depth(complexity_info: Dict[str, Any], max_depth: int) -> None:
+    """
+    根据最大循环嵌套深度设置嵌套、平方、立方和指数模式标志
+
+    Args:
+        complexity_info (Dict[str, Any]): 复杂度信息字典
+        max_depth (int): 最大循环嵌套深度
+    """
+    complexity_info['max_loop_depth'] = max_depth
+    if max_depth >= 2:
+        complexity_info['has_nested_loops'] = True
+    if max_depth == 2:
+        complexity_info['has_quadratic_pattern'] = True
+    elif max_depth == 3:
+        complexity_info['has_cubic_pattern'] = True
+    elif max_depth > 3:
+        complexity_info['has_exponential_pattern'] = True
+
+
+def _package_version(*packages: str) -> str:
+    versions = []
+    for package in packages:
+        try:
+            versions.append(metadata.version(package))
+        except metadata.PackageNotFoundError:
+            versions.append('unknown')
+    return '+'.join(versions)
+
+
+def normalize_complexity_info(complexity_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    归一化复杂度信息用于比较：method_calls按名称排序，其余字段不变
+
+    Args:
+        complexity_info (Dict[str, Any]): 复杂度信息
+
+    Returns:
+        Dict[str, Any]: 归一化后的副本
+    """
+    normalized = dict(complexity_info)
+    normalized['method_calls'] = sorted(complexity_info['method_calls'])
+    return normalized
+
+
+# 异常信息中"line 3, column 5"、"line 3, position 5"或只有"line 3"形式的位置
+_LOCATION_RE = re.compile(r'line (\d+)(?:, (?:column|position) (\d+))?')
+
+
+class ParserSyntaxError(Exception):
+    """后端无法解析源代码时抛出的异常"""
+    pass
+
+
+class ParserBackend:
+    """
+    解析器后端基类
+
+    子类实现parse()和extract()；syntax_errors列出parse()在源码有语法错误时抛出的异常类型。
+    """
+
+    name = ''
+    syntax_errors: Tuple[Type[BaseException], ...] = (ParserSyntaxError,)
+    _version: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        """解析器所依赖包的版本，用于判断缓存的解析结果是否仍然有效"""
+        return ''
+
+    def error_location(self, error: BaseException) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        从解析异常中提取出错位置
+
+        Args:
+            error (BaseException): parse()抛出的异常
+
+        Returns:
+            Optional[Tuple[int, Optional[int]]]: (行, 列)，从1开始，列未知时为None；无法确定时返回None
+        """
+        match = _LOCATION_RE.search(str(error))
+        if match is None:
+            return None
+        return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+    def parse(self, source_code: str) -> Any:
+        """
+        解析源代码
+
+        Args:
+            source_code (str): Java源代码
+
+        Returns:
+            Any: 后端自己的语法树
+        """
+        raise NotImplementedError
+
+    def extract(self, tree: Any) -> Dict[str, Any]:
+        """
+        从语法树提取归一化的复杂度信息
+
+        Args:
+            tree (Any): parse()返回的语法树
+
+        Returns:
+            Dict[str, Any]: 与new_complexity_info()结构相同的复杂度信息
+        """
+        raise NotImplementedError
+
+    def analyze(self, source_code: str) -> Dict[str, Any]:
+        """
+        解析并提取复杂度信息
+
+        Args:
+            source_code (str): Java源代码
+
+        Returns:
+            Dict[str, Any]: 复杂度信息
+        """
+        return self.extract(self.parse(source_code))
+
+
+class JavalangBackend(ParserBackend):
+    """纯Python的javalang后端，即原有的解析与AST分析流程"""
+
+    name = 'javalang'
+    syntax_errors = (javalang.parser.JavaSyntaxError,)
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            self._version = _package_version('javalang')
+        return self._version
+
+    def error_location(self, error: BaseException) -> Optional[Tuple[int, Optional[int]]]:
+        # JavaSyntaxError的出错词法单元保存在at属性中
+        position = getattr(getattr(error, 'at', None), 'position', None)
+        if position is not None:
+            return position.line, position.column
+        return super().error_location(error)
+
+    def parse(self, source_code: str) -> Any:
+        return javalang.parse.parse(source_code)
+
+    def extract(self, tree: Any) -> Dict[str, Any]:
+        # 延迟导入：java_complexity_analyzer在模块级导入本模块
+        from java_complexity_analyzer import _analyze_ast
+        return _analyze_ast(tree)
+
+
+class TreeSitterBackend(ParserBackend):
+    """
+    C实现的tree-sitter-java后端
+
+    与javalang后端的语义保持一致：
+    - 递归判断使用前序遍历中最近一个方法声明（不含构造器）的名称，遍历离开方法时不出栈；
+    - super.method()对应javalang的SuperMethodInvocation，不计入方法调用；
+    - for、增强for、while、do-while都计入循环嵌套深度；
+    - 链式调用a().b()的遍历顺序与javalang不同，method_calls中的顺序可能不同，
+      _calculate_complexity只做成员判断，比较时使用normalize_complexity_info；
+    - for循环更新部分的赋值表达式由record_for_update()检查，左值只认identifier，右值只认identifier和字面量，
+      与javalang后端对MemberReference和Literal的处理相同。
+    tree-sitter对语法错误是容错的，语法树中存在ERROR或缺失节点时按语法错误处理。
+    """
+
+    name = 'tree-sitter'
+    _LOOP_TYPES = frozenset(('for_statement', 'enhanced_for_statement', 'while_statement', 'do_statement'))
+
+    def __init__(self):
+        if tree_sitter is None:
+            raise ImportError("tree-sitter backend requires the 'tree-sitter' and 'tree-sitter-java' packages")
+        language = tree_sitter.Language(tree_sitter_java.language())
+        try:
+            self._parser = tree_sitter.Parser(language)
+        except TypeError:  # tree-sitter < 0.22
+            self._parser = tree_sitter.Parser()
+            self._parser.set_language(language)
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            self._version = _package_version('tree-sitter', 'tree-sitter-java')
+        return self._version
+
+    def parse(self, source_code: str) -> Any:
+        tree = self._parser.parse(source_code.encode('utf-8'))
+        if tree.root_node.has_error:
+            raise ParserSyntaxError(self._error_location(tree.root_node))
+        return tree
+
+    @staticmethod
+    def _error_location(root) -> str:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.type == 'ERROR' or node.is_missing:
+                row, column = node.start_point
+                return f"line {row + 1}, column {column + 1}: unexpected {node.type}"
+            stack.extend(reversed([child for child in node.children if child.has_error or child.is_missing]))
+        return 'syntax error'
+
+    @staticmethod
+    def _operand_text(node: Any) -> str:
+        if node is not None and (node.type == 'identifier' or node.type.endswith('_literal')):
+            return node.text.decode('utf-8')
+        return '?'
+
+    def extract(self, tree: Any) -> Dict[str, Any]:
+        complexity_info = new_complexity_info()
+        current_method = None
+        max_depth = 0
+        # 显式栈做前序遍历，栈中保存(节点, 所在循环深度)
+        stack: List[Tuple[Any, int]] = [(tree.root_node, 0)]
+        while stack:
+            node, depth = stack.pop()
+            node_type = node.type
+            if node_type in self._LOOP_TYPES:
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+                if node_type == 'for_statement':
+                    for update in node.children_by_field_name('update'):
+                        if update.type == 'assignment_expression':
+                            record_for_update(complexity_info, self._operand_text(update.child_by_field_name('left')),
+                                              update.child_by_field_name('operator').text.decode('utf-8'),
+                                              self._operand_text(update.child_by_field_name('right')))
+            elif node_type == 'method_declaration':
+                name = node.child_by_field_name('name')
+                if name is not None:
+                    current_method = name.text.decode('utf-8')
+            elif node_type == 'method_invocation':
+                target = node.child_by_field_name('object')
+                name = node.child_by_field_name('name')
+                if name is not None and (target is None or target.type != 'super'):
+                    record_method_call(complexity_info, name.text.decode('utf-8').lower(), current_method)
+            children = node.named_children
+            if children:
+                stack.extend((child, depth) for child in reversed(children))
+        apply_loop_depth(complexity_info, max_depth)
+        return complexity_info
+
+
+_BACKEND_CLASSES: Dict[str, Type[ParserBackend]] = {
+    JavalangBackend.name: JavalangBackend,
+    TreeSitterBackend.name: TreeSitterBackend,
+}
+_instances: Dict[str, ParserBackend] = {}
+
+
+def available_backends() -> List[str]:
+    """
+    列出当前环境可用的后端名称
+
+    Returns:
+        List[str]: 后端名称列表
+    """
+    names = [JavalangBackend.name]
+    if tree_sitter is not None:
+        names.append(TreeSitterBackend.name)
+    return names
+
+
+def get_backend(backend: Union[str, ParserBackend, None] = None) -> ParserBackend:
+    """
+    获取解析器后端实例，同名后端在进程内共享一个实例
+
+    Args:
+        backend (Union[str, ParserBackend, None]): 后端名称或实例，为空时使用默认的javalang
+
+    Returns:
+        ParserBackend: 后端实例
+
+    Raises:
+        ValueError: 后端名称未知时抛出
+        ImportError: 后端依赖的包未安装时抛出
+    """
+    if isinstance(backend, ParserBackend):
+        return backend
+    name = backend or DEFAULT_BACKEND
+    instance = _instances.get(name)
+    if instance is None:
+        backend_class = _BACKEND_CLASSES.get(name)
+        if backend_class is None:
+            raise ValueError(f"Unknown parser backend: {name}")
+        instance = _instances[name] = backend_class()
+    return instance
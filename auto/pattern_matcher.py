@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式字符串匹配模块
+把一组字面量模式编译成一个按前缀树合并的正则表达式，一次扫描文本即可判断是否命中、
+找出命中了哪些模式以及每个命中的位置（包括相互重叠的模式），替代逐个模式的子串查找
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def _build_trie_regex(patterns: Iterable[str]) -> str:
+    """
+    把字面量模式合并成前缀树形式的正则表达式
+
+    共同前缀只出现一次，例如['i *= 2', 'i *=2']编译为'i\\ \\*=(?:\\ 2|2)'；
+    某个模式是另一个模式的前缀时，较长的分支用贪婪的可选组表示，因此每个位置匹配到的是最长的模式。
+
+    Args:
+        patterns (Iterable[str]): 非空的字面量模式
+
+    Returns:
+        str: 正则表达式
+    """
+    trie: Dict[str, dict] = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def _build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + _build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # 模式可以在这里结束，也可以继续匹配更长的模式
+            return body + '?' if body.startswith('(?:') and len(branches) > 1 else '(?:' + body + ')?'
+        return body
+
+    return _build(trie)
+
+
+class MultiPatternMatcher:
+    """
+    编译后的多模式匹配器
+
+    用法:
+        matcher = MultiPatternMatcher(['i *= 2', 'i /= 2'])
+        matcher.contains_any(text)   # 是否命中任一模式
+        matcher.matched(text)        # 命中的模式（按构造时的顺序）
+        matcher.find_all(text)       # [(位置, 模式), ...]，包括重叠的命中
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        """
+        Args:
+            patterns (Sequence[str]): 字面量模式，重复项和空串会被忽略
+            ignore_case (bool): 是否忽略大小写；与现有启发式规则一致，先对文本做lower()再匹配，
+                命中位置对应lower()之后的文本（ASCII文本与原文位置相同）
+
+        Raises:
+            ValueError: 没有有效模式时抛出
+        """
+        unique = []
+        for pattern in patterns:
+            if ignore_case:
+                pattern = pattern.lower()
+            if pattern and pattern not in unique:
+                unique.append(pattern)
+        if not unique:
+            raise ValueError("MultiPatternMatcher requires at least one non-empty pattern")
+        self.patterns: Tuple[str, ...] = tuple(unique)
+        self.ignore_case = ignore_case
+        self._order = {pattern: index for index, pattern in enumerate(self.patterns)}
+        # 判断是否命中时，包含其他模式的模式是多余的（如'quicksort'包含'sort'）
+        minimal = [p for p in self.patterns if not any(q != p and q in p for q in self.patterns)]
+        self._any_regex = re.compile(_build_trie_regex(minimal))
+        self._any_search = self._any_regex.search
+        self._regex = re.compile(_build_trie_regex(self.patterns))
+        # 前缀闭包：在某位置命中最长模式时，它的所有前缀模式也在同一位置命中
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            pattern: tuple(sorted((q for q in self.patterns if pattern.startswith(q)), key=len, reverse=True))
+            for pattern in self.patterns
+        }
+        # 包含闭包：命中某模式即命中它包含的所有模式
+        self._contained: Dict[str, Tuple[str, ...]] = {
+            pattern: tuple(q for q in self.patterns if q in pattern) for pattern in self.patterns
+        }
+        # 某模式的真后缀是另一个更长模式的前缀时，两者的命中可能部分重叠，非重叠扫描会漏掉后一个
+        self._can_overlap = any(len(q) > len(p) - i and q.startswith(p[i:])
+                                for p in self.patterns for q in self.patterns for i in range(1, len(p)))
+
+    def _prepare(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def contains_any(self, text: str) -> bool:
+        """
+        判断文本是否包含任一模式
+
+        Args:
+            text (str): 待匹配文本
+
+        Returns:
+            bool: 是否命中
+        """
+        if self.ignore_case:
+            text = text.lower()
+        return self._any_search(text) is not None
+
+    def search(self, text: str) -> Optional[Tuple[int, str]]:
+        """
+        查找最左侧的命中，同一位置取最长的模式
+
+        Args:
+            text (str): 待匹配文本
+
+        Returns:
+            Optional[Tuple[int, str]]: (位置, 模式)，未命中时返回None
+        """
+        match = self._regex.search(self._prepare(text))
+        return (match.start(), match.group()) if match else None
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        逐个产出所有命中，包括相互重叠和互为前缀的模式
+
+        Args:
+            text (str): 待匹配文本
+
+        Yields:
+            Tuple[int, str]: (位置, 模式)，按位置升序、同一位置按模式长度降序
+        """
+        text = self._prepare(text)
+        search = self._regex.search
+        match = search(text)
+        while match is not None:
+            position = match.start()
+            for pattern in self._prefixes[match.group()]:
+                yield position, pattern
+            # 从下一个字符继续查找，以便找到从命中内部开始的重叠模式
+            match = search(text, position + 1)
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        返回所有命中
+
+        Args:
+            text (str): 待匹配文本
+
+        Returns:
+            List[Tuple[int, str]]: [(位置, 模式), ...]
+        """
+        return list(self.finditer(text))
+
+    def matched(self, text: str) -> List[str]:
+        """
+        返回文本中出现过的模式，所有模式都已命中时提前结束扫描
+
+        Args:
+            text (str): 待匹配文本
+
+        Returns:
+            List[str]: 命中的模式，按构造时的顺序排列
+        """
+        found = set()
+        total = len(self.patterns)
+        if self._can_overlap:
+            hits = (pattern for _, pattern in self.finditer(text))
+        else:
+            # 模式之间不会部分重叠时，非重叠扫描加包含闭包即可找全
+            hits = (match.group() for match in self._regex.finditer(self._prepare(text)))
+        for pattern in hits:
+            found.update(self._contained[pattern])
+            if len(found) == total:
+                break
+        return sorted(found, key=self._order.__getitem__)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度报告模块
+限频刷新的单行进度条（完成数、吞吐量、剩余时间、实时准确率、错误数），
+以及在后台线程写入JSONL的逐样本明细日志，替代逐样本的日志输出
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """
+    限频刷新的进度报告器
+
+    update()只做计数，距上次输出超过min_interval秒才格式化并写出一行；
+    终端中用回车覆盖同一行，输出被重定向到文件时改为低频换行输出。
+    """
+
+    def __init__(self, total: int, stream: Optional[TextIO] = None, min_interval: float = 0.25,
+                 enabled: bool = True, label: str = ''):
+        """
+        Args:
+            total (int): 样本总数
+            stream (TextIO, optional): 输出流，默认为sys.stderr
+            min_interval (float): 终端中两次刷新的最小间隔（秒）
+            enabled (bool): 是否输出进度
+            label (str): 进度行前缀
+        """
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.enabled = enabled
+        self.label = label
+        self._is_tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        # 非终端输出每行都会保留，降低刷新频率
+        self.min_interval = min_interval if self._is_tty else max(min_interval, 5.0)
+        self.done = 0
+        self.correct = 0
+        self.errors = 0
+        self._started_at = time.monotonic()
+        self._last_render = 0.0
+        self._line_width = 0
+
+    def update(self, is_match: Optional[bool] = None, error: bool = False, count: int = 1) -> None:
+        """
+        记录完成的样本，必要时刷新进度行
+
+        Args:
+            is_match (Optional[bool]): 样本是否匹配，为None时不计入准确率
+            error (bool): 样本是否出错
+            count (int): 完成的样本数
+        """
+        self.done += count
+        if is_match:
+            self.correct += count
+        if error:
+            self.errors += count
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_render >= self.min_interval:
+            self._last_render = now
+            self._render(now)
+
+    def log(self, message: str) -> None:
+        """
+        输出一条独立的消息，不破坏进度行；关闭进度输出时消息照常写出
+
+        Args:
+            message (str): 消息内容
+        """
+        if self.enabled:
+            self._clear()
+        self.stream.write(message + '\n')
+        self.stream.flush()
+
+    def close(self) -> None:
+        """输出最终进度并换行"""
+        if not self.enabled:
+            return
+        self._render(time.monotonic())
+        if self._is_tty:
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前进度指标
+
+        Returns:
+            Dict[str, Any]: 包含完成数、吞吐量、剩余时间、准确率和错误数的字典
+        """
+        elapsed = time.monotonic() - self._started_at
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        return {
+            'done': self.done,
+            'total': self.total,
+            'elapsed': elapsed,
+            'rate': rate,
+            'eta': remaining / rate if rate > 0 else None,
+            'accuracy': self.correct / self.done if self.done else 0.0,
+            'errors': self.errors
+        }
+
+    def _render(self, now: float) -> None:
+        stats = self.snapshot()
+        percent = stats['done'] / self.total * 100 if self.total else 100.0
+        eta = _format_duration(stats['eta']) if stats['eta'] is not None else '--:--'
+        width = len(str(self.total))
+        line = (f"{self.label}[{stats['done']:>{width}}/{self.total}] {percent:5.1f}% | "
+                f"{stats['rate']:.1f} 样本/s | ETA {eta} | "
+                f"准确率 {stats['accuracy'] * 100:.2f}% | 错误 {stats['errors']}")
+        if self._is_tty:
+            padding = ' ' * max(0, self._line_width - len(line))
+            self.stream.write('\r' + line + padding)
+            self._line_width = len(line)
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def _clear(self) -> None:
+        if self._is_tty and self._line_width:
+            self.stream.write('\r' + ' ' * self._line_width + '\r')
+            self._line_width = 0
+            self._last_render = 0.0
+
+
+class JsonlLogSink:
+    """
+    后台线程写入的JSONL明细日志
+
+    write()只把记录放入队列，序列化和磁盘写入都在后台线程完成，不阻塞分析主循环。
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, file_path: str, max_queue: int = 10000):
+        """
+        Args:
+            file_path (str): 日志文件路径
+            max_queue (int): 队列容量，写入过慢时write()会阻塞以限制内存
+        """
+        self.file_path = file_path
+        self._queue: 'queue.Queue[Any]' = queue.Queue(maxsize=max_queue)
+        self._file = open(file_path, 'w', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='jsonl-log-sink', daemon=True)
+        self._thread.start()
+        self.written = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        提交一条记录
+
+        Args:
+            record (Dict[str, Any]): 可JSON序列化的记录
+        """
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is self._SENTINEL:
+                break
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.written += 1
+        self._file.close()
+
+    def close(self) -> None:
+        """写完队列中剩余的记录并关闭文件"""
+        if self._thread.is_alive():
+            self._queue.put(self._SENTINEL)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
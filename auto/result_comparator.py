@@ -5,8 +5,9 @@
 将分析得到的时间复杂度与数据集中自带的复杂度标签进行比较，计算统计指标
 """
 
-from typing import List, Dict, Any, Tuple
-from utils import validate_complexity
+from typing import List, Dict, Any, Optional, Tuple
+from complexity_labels import canonical_label
+from instrumentation import format_performance_report
 
 
 def compare_results(results: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Dict[str, Any]]:
@@ -97,12 +98,14 @@ def compare_results(results: List[Dict[str, Any]]) -> Tuple[Dict[str, float], Di
     return overall_stats, class_stats
 
 
-def generate_statistics_report(results: List[Dict[str, Any]]) -> str:
+def generate_statistics_report(results: List[Dict[str, Any]],
+                               performance: Optional[Dict[str, Any]] = None) -> str:
     """
     生成详细的统计报告
     
     Args:
         results (List[Dict[str, Any]]): 包含分析结果的列表
+        performance (Dict[str, Any], optional): 性能统计摘要（Instrumentation.summary()），提供时附加到报告末尾
     
     Returns:
         str: 格式化的统计报告字符串
@@ -138,6 +141,10 @@ def generate_statistics_report(results: List[Dict[str, Any]]) -> str:
         stats = class_stats[complexity]
         report.append(f"{complexity:<15} {stats['precision']:<10.4f} {stats['recall']:<10.4f} {stats['f1_score']:<10.4f} {stats['support']:<8}")
     
+    if performance:
+        report.append("-" * 60)
+        report.extend(format_performance_report(performance))
+    
     report.append("=" * 60)
     
     return '\n'.join(report)
@@ -154,8 +161,9 @@ def compare_individual_result(expected: str, predicted: str) -> bool:
     Returns:
         bool: 预测是否正确
     """
-    # 验证复杂度类型合法性
-    if not validate_complexity(expected) or not validate_complexity(predicted):
+    # 两者都归一为合法的复杂度标签时才比较，O(n log n)等写法与nlogn等价
+    expected_label = canonical_label(expected)
+    if expected_label is None:
         return False
     
-    return expected == predicted
+    return canonical_label(predicted) == expected_label
@@ -8,11 +8,12 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 def save_results(results: List[Dict[str, Any]], output_dir: str = 'results', 
-                 input_file: str = '', max_items: int = 0) -> str:
+                 input_file: str = '', max_items: int = 0,
+                 extra_summary: Optional[Dict[str, Any]] = None) -> str:
     """
     将分析结果保存为标准化JSON格式文件，严格参照示例结构
     
@@ -21,6 +22,7 @@ def save_results(results: List[Dict[str, Any]], output_dir: str = 'results',
         output_dir (str, optional): 输出目录路径，默认为当前目录
         input_file (str, optional): 输入数据文件路径，默认为空字符串
         max_items (int, optional): 处理的最大样本数，默认为0
+        extra_summary (Dict[str, Any], optional): 合并到summary中的附加统计信息，如提前停止信息
     
     Returns:
         str: 保存的文件名
@@ -49,6 +51,8 @@ def save_results(results: List[Dict[str, Any]], output_dir: str = 'results',
         'accuracy': round(accuracy, 1),
         'timestamp': datetime.now().isoformat()
     }
+    if extra_summary:
+        summary.update(extra_summary)
     
     # 转换结果为示例格式（注意字段名是ouput而不是output）
     detailed_records = []
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相似样本检索模块
+对数据集中有标签的源代码建立BM25倒排索引，用于为LLM提示词挑选少样本示例。
+词项为归一化词法单元的一元和二元组，哈希到固定数量的桶，索引以numpy数组写入目录，
+打开时按内存映射加载，多个进程共享同一份页缓存；建索引时丢弃文档频率过高的词项（max_df_ratio），
+查询只需累加剩余词项的短倒排表
+"""
+
+import json
+import mmap
+import os
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dedup import tokenize_source, token_ids
+from utils import FileReadError
+
+INDEX_FORMAT_VERSION = 1
+DEFAULT_NUM_BUCKETS = 1 << 20
+DEFAULT_MAX_DF_RATIO = 0.1
+_BIGRAM_BASE = np.uint64(0x100000001B3)
+_ARRAY_FILES = ('term_offsets', 'postings', 'weights', 'line_offsets', 'line_lengths', 'problem_hashes', 'labels')
+
+
+def problem_hash(problem: str) -> int:
+    """
+    问题名的32位哈希，用于排除与查询同一问题的样本
+
+    Args:
+        problem (str): 问题名
+
+    Returns:
+        int: crc32哈希
+    """
+    return zlib.crc32(str(problem).encode('utf-8'))
+
+
+def source_terms(source: str, num_buckets: int = DEFAULT_NUM_BUCKETS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把源代码转换为词项桶号及其出现次数
+
+    Args:
+        source (str): Java源代码
+        num_buckets (int): 词项桶数，必须是2的幂
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (升序的桶号, 对应的词频)
+    """
+    ids = token_ids(tokenize_source(source))
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    terms = np.concatenate([ids, ids[:-1] * _BIGRAM_BASE + ids[1:]])
+    buckets = ((terms ^ (terms >> np.uint64(29))) & np.uint64(num_buckets - 1)).astype(np.int64)
+    return np.unique(buckets, return_counts=True)
+
+
+def build_retrieval_index(data_file: str, index_dir: str, k1: float = 1.2, b: float = 0.75,
+                          num_buckets: int = DEFAULT_NUM_BUCKETS,
+                          max_df_ratio: Optional[float] = DEFAULT_MAX_DF_RATIO) -> Dict[str, Any]:
+    """
+    单次遍历数据集，建立BM25倒排索引并写入目录
+
+    每个倒排项的权重预先算好：idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))，
+    查询时只需按文档累加。出现在超过max_df_ratio比例文档中的词项（括号、分号、常用关键字等）
+    idf很低却有最长的倒排表，建索引时直接丢弃，查询耗时因此取决于区分度高的词项。
+    示例的源代码和标签不复制到索引中，按行偏移从数据集读取。
+
+    Args:
+        data_file (str): JSONL数据集路径，只收录同时有源代码和复杂度标签的记录
+        index_dir (str): 索引目录
+        k1 (float): BM25词频饱和参数
+        b (float): BM25文档长度归一化参数
+        num_buckets (int): 词项桶数，必须是2的幂
+        max_df_ratio (Optional[float]): 保留词项的最大文档频率比例，为空时不丢弃
+
+    Returns:
+        Dict[str, Any]: 包含documents、postings、pruned_terms、seconds和index_dir的统计
+
+    Raises:
+        ValueError: num_buckets不是2的幂时抛出
+        FileReadError: 数据集无法读取时抛出
+    """
+    if num_buckets <= 0 or num_buckets & (num_buckets - 1):
+        raise ValueError(f"num_buckets must be a power of two, got {num_buckets}")
+    start = time.perf_counter()
+    doc_terms: List[np.ndarray] = []
+    doc_counts: List[np.ndarray] = []
+    line_offsets: List[int] = []
+    line_lengths: List[int] = []
+    problem_hashes: List[int] = []
+    label_ids: List[int] = []
+    labels: Dict[str, int] = {}
+    try:
+        with open(data_file, 'rb') as f:
+            offset = 0
+            for line in f:
+                line_offset, offset = offset, offset + len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                source = record.get('src', '') or record.get('source', '')
+                label = (record.get('complexity', '') or record.get('expected_complexity', '')).lower().strip()
+                if not source or not label:
+                    continue
+                terms, counts = source_terms(source, num_buckets)
+                doc_terms.append(terms)
+                doc_counts.append(counts)
+                line_offsets.append(line_offset)
+                line_lengths.append(offset - line_offset)
+                problem_hashes.append(problem_hash(record.get('problem', '')))
+                label_ids.append(labels.setdefault(label, len(labels)))
+    except FileNotFoundError:
+        raise FileReadError(f"File not found: {data_file}")
+    except PermissionError:
+        raise FileReadError(f"Permission denied: {data_file}")
+
+    documents = len(doc_terms)
+    lengths = np.array([counts.sum() for counts in doc_counts], dtype=np.float64)
+    avgdl = float(lengths.mean()) if documents else 0.0
+    terms = np.concatenate(doc_terms) if documents else np.empty(0, dtype=np.int64)
+    tf = np.concatenate(doc_counts).astype(np.float64) if documents else np.empty(0)
+    docs = np.repeat(np.arange(documents, dtype=np.int32), [len(t) for t in doc_terms])
+    # 按桶号稳定排序，同一桶内保持文档顺序
+    order = np.argsort(terms, kind='stable')
+    terms, tf, docs = terms[order], tf[order], docs[order]
+    df = np.bincount(terms, minlength=num_buckets)
+    term_offsets = np.zeros(num_buckets + 1, dtype=np.int64)
+    np.cumsum(df, out=term_offsets[1:])
+    idf = np.log(1.0 + (documents - df + 0.5) / (df + 0.5))
+    norm = k1 * (1.0 - b + b * lengths[docs] / avgdl) if documents else np.empty(0)
+    weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+    pruned_terms = 0
+    if max_df_ratio is not None:
+        frequent = df > max_df_ratio * documents
+        pruned_terms = int(np.count_nonzero(frequent))
+        kept = ~frequent[terms]
+        docs, weights = docs[kept], weights[kept]
+        df[frequent] = 0
+        np.cumsum(df, out=term_offsets[1:])
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        'term_offsets': term_offsets,
+        'postings': docs,
+        'weights': weights,
+        'line_offsets': np.array(line_offsets, dtype=np.int64),
+        'line_lengths': np.array(line_lengths, dtype=np.int64),
+        'problem_hashes': np.array(problem_hashes, dtype=np.uint32),
+        'labels': np.array(label_ids, dtype=np.int16),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, name + '.npy'), array)
+    stat = os.stat(data_file)
+    meta = {
+        'format_version': INDEX_FORMAT_VERSION,
+        'data_file': os.path.abspath(data_file),
+        'data_size': stat.st_size,
+        'data_mtime': stat.st_mtime,
+        'documents': documents,
+        'num_buckets': num_buckets,
+        'k1': k1,
+        'b': b,
+        'avgdl': avgdl,
+        'max_df_ratio': max_df_ratio,
+        'pruned_terms': pruned_terms,
+        'labels': sorted(labels, key=labels.get),
+    }
+    with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return {
+        'documents': documents,
+        'postings': len(docs),
+        'pruned_terms': pruned_terms,
+        'seconds': time.perf_counter() - start,
+        'index_dir': index_dir
+    }
+
+
+class RetrievalIndex:
+    """
+    以内存映射方式打开的BM25检索索引
+
+    用法:
+        index = RetrievalIndex('results/retrieval_index')
+        for example in index.neighbors(src, k=3, exclude_problem=problem):
+            example['src'], example['complexity'], example['score']
+    """
+
+    def __init__(self, index_dir: str, data_file: Optional[str] = None):
+        """
+        Args:
+            index_dir (str): build_retrieval_index()写出的索引目录
+            data_file (Optional[str]): 数据集路径，为空时使用建索引时记录的路径
+
+        Raises:
+            FileReadError: 索引文件缺失、格式版本不符或数据集在建索引后被修改时抛出
+        """
+        try:
+            with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            # 转为普通ndarray视图（仍由内存映射支持），避免np.memmap切片的额外开销
+            arrays = {name: np.load(os.path.join(index_dir, name + '.npy'), mmap_mode='r').view(np.ndarray)
+                      for name in _ARRAY_FILES}
+        except (OSError, ValueError) as e:
+            raise FileReadError(f"Cannot open retrieval index {index_dir}: {e}")
+        if self.meta.get('format_version') != INDEX_FORMAT_VERSION:
+            raise FileReadError(f"Unsupported retrieval index format: {self.meta.get('format_version')}")
+        self.data_file = data_file or self.meta['data_file']
+        try:
+            if os.path.getsize(self.data_file) != self.meta['data_size']:
+                raise FileReadError(f"{self.data_file} changed after the retrieval index was built; rebuild it")
+        except OSError as e:
+            raise FileReadError(f"Cannot open indexed data file: {e}")
+        self.documents: int = self.meta['documents']
+        self.num_buckets: int = self.meta['num_buckets']
+        self.labels: List[str] = self.meta['labels']
+        self._term_offsets = arrays['term_offsets']
+        self._postings = arrays['postings']
+        self._weights = arrays['weights']
+        self._line_offsets = arrays['line_offsets']
+        self._problem_hashes = arrays['problem_hashes']
+        self._label_ids = arrays['labels']
+        self._line_lengths = arrays['line_lengths']
+        # 数据集同样按内存映射读取，切片读取不共享文件位置，可在多个线程中并发调用example()
+        self._data = None
+        if self.documents:
+            with open(self.data_file, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.documents
+
+    def search(self, source: str, k: int = 5, exclude_problem: Optional[str] = None,
+               max_query_terms: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        检索与源代码最相似的文档
+
+        Args:
+            source (str): 查询源代码
+            k (int): 返回的文档数
+            exclude_problem (Optional[str]): 排除该问题下的所有文档，避免示例泄漏答案
+            max_query_terms (Optional[int]): 最多使用的查询词项数，超出时只保留idf最高（文档频率最低）的词项；
+                默认不截断。只保留最稀有的词项会使排名偏向偶然共有的罕见标识符，
+                查询耗时已由建索引时的文档频率剪枝控制，仅在超长查询的耗时比排名更重要时设置
+
+        Returns:
+            List[Tuple[int, float]]: [(文档号, BM25得分), ...]，按得分降序
+        """
+        if not self.documents or k <= 0:
+            return []
+        terms, _ = source_terms(source, self.num_buckets)
+        starts = self._term_offsets[terms]
+        df = self._term_offsets[terms + 1] - starts
+        present = df > 0
+        terms, starts, df = terms[present], starts[present], df[present]
+        if max_query_terms is not None and len(terms) > max_query_terms:
+            # df最小即idf最大
+            keep = np.argpartition(df, max_query_terms)[:max_query_terms]
+            starts, df = starts[keep], df[keep]
+        if not len(starts):
+            return []
+        docs = np.concatenate([self._postings[start:start + count]
+                               for start, count in zip(starts.tolist(), df.tolist())])
+        weights = np.concatenate([self._weights[start:start + count]
+                                  for start, count in zip(starts.tolist(), df.tolist())])
+        if len(docs) * 8 >= self.documents:
+            # 倒排项较多时按文档号直接累加，避免排序
+            scores = np.bincount(docs, weights=weights, minlength=self.documents)
+            candidates = np.flatnonzero(scores)
+            scores = scores[candidates]
+        else:
+            candidates, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+        if exclude_problem is not None:
+            allowed = self._problem_hashes[candidates] != problem_hash(exclude_problem)
+            candidates, scores = candidates[allowed], scores[allowed]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        # 得分相同时按文档号排序，结果与遍历顺序无关
+        order = np.lexsort((candidates, -scores))
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def example(self, doc: int) -> Dict[str, Any]:
+        """
+        从数据集读取一个文档对应的记录
+
+        Args:
+            doc (int): 文档号
+
+        Returns:
+            Dict[str, Any]: 包含src、complexity、problem和line_offset的字典
+        """
+        offset = int(self._line_offsets[doc])
+        record = json.loads(self._data[offset:offset + int(self._line_lengths[doc])])
+        return {
+            'src': record.get('src', '') or record.get('source', ''),
+            'complexity': self.labels[int(self._label_ids[doc])],
+            'problem': record.get('problem', ''),
+            'line_offset': offset
+        }
+
+    def neighbors(self, source: str, k: int = 3, exclude_problem: Optional[str] = None,
+                  max_query_terms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        检索最相似的有标签示例
+
+        Args:
+            source (str): 查询源代码
+            k (int): 示例数
+            exclude_problem (Optional[str]): 排除该问题下的所有示例
+            max_query_terms (Optional[int]): 参与打分的查询词项数上限，默认不截断，见search()
+
+        Returns:
+            List[Dict[str, Any]]: example()的结果，附加score字段
+        """
+        return [dict(self.example(doc), score=score)
+                for doc, score in self.search(source, k, exclude_problem, max_query_terms)]
+
+    def close(self) -> None:
+        """关闭数据集的内存映射"""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def __enter__(self) -> 'RetrievalIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='为少样本提示词建立BM25相似样本检索索引')
+    parser.add_argument('--data', '-d', type=str, default='../data/data.jsonl', help='JSONL数据集文件路径')
+    parser.add_argument('--output', '-o', type=str, default='results/retrieval_index', help='索引目录')
+    parser.add_argument('--k1', type=float, default=1.2, help='BM25词频饱和参数')
+    parser.add_argument('--b', type=float, default=0.75, help='BM25文档长度归一化参数')
+    parser.add_argument('--max-df-ratio', type=float, default=DEFAULT_MAX_DF_RATIO,
+                        help='丢弃文档频率超过该比例的词项，设为1保留全部词项')
+    parser.add_argument('--buckets', type=int, default=DEFAULT_NUM_BUCKETS, help='词项桶数，必须是2的幂')
+    args = parser.parse_args()
+
+    stats = build_retrieval_index(args.data, args.output, k1=args.k1, b=args.b, num_buckets=args.buckets,
+                                  max_df_ratio=args.max_df_ratio)
+    print(f"已索引 {stats['documents']} 个样本，{stats['postings']} 个倒排项（丢弃 {stats['pruned_terms']} 个高频词项），"
+          f"耗时 {stats['seconds']:.1f}s，写入 {stats['index_dir']}", file=sys.stderr)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行时间拟合模块
+把(规模, 耗时)测量曲线批量转换为复杂度标签：Theil–Sen估计log-log斜率，
+对每个候选模型 t ≈ a + c·f(n) 用Huber损失的迭代重加权最小二乘拟合相对残差，
+按稳健损失比较候选模型并给出每个标签的置信度。所有计算都在NumPy数组上对一批曲线同时进行，
+JIT预热等个别离群测量点不会主导拟合结果
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 候选模型，顺序与fit_timings()返回的probabilities列一致
+CANDIDATE_MODELS = ('constant', 'logn', 'linear', 'nlogn', 'quadratic', 'cubic', 'np')
+# 拟合时忽略低于该耗时的测量点，它们主要反映计时噪声
+MIN_FIT_SECONDS = 0.0005
+# 参与拟合的最少测量点数
+MIN_POINTS = 3
+HUBER_DELTA = 1.345
+# 相对残差尺度的下限，防止几乎无噪声的曲线得到过于尖锐的置信度
+NOISE_FLOOR = 0.02
+# 增长系数的惩罚，以ln(有效点数)为单位；BIC取0.5，离群点较多的短曲线上平坦曲线仍会被噪声带偏
+GROWTH_PENALTY = 1.5
+# log-log斜率到复杂度标签的分界
+SLOPE_THRESHOLDS = (
+    (0.2, 'constant'),
+    (0.5, 'logn'),
+    (1.15, 'linear'),
+    (1.5, 'nlogn'),
+    (2.5, 'quadratic'),
+    (3.5, 'cubic'),
+)
+
+
+def slope_to_complexity(slope: float) -> str:
+    """
+    把log-log斜率映射为复杂度标签
+
+    Args:
+        slope (float): 耗时对规模的log-log斜率
+
+    Returns:
+        str: 复杂度标签
+    """
+    for bound, label in SLOPE_THRESHOLDS:
+        if slope < bound:
+            return label
+    return 'np'
+
+
+def pack_timings(curves: Sequence[Sequence[Tuple[float, float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把长度不一的测量曲线打包为以NaN补齐的二维数组
+
+    Args:
+        curves (Sequence[Sequence[Tuple[float, float]]]): 每条曲线是[(规模, 耗时秒数), ...]
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 形状均为(曲线数, 最大点数)的规模数组和耗时数组
+    """
+    width = max((len(curve) for curve in curves), default=0)
+    n = np.full((len(curves), width), np.nan)
+    t = np.full((len(curves), width), np.nan)
+    for row, curve in enumerate(curves):
+        if len(curve):
+            values = np.asarray(curve, dtype=float)
+            n[row, :len(curve)] = values[:, 0]
+            t[row, :len(curve)] = values[:, 1]
+    return n, t
+
+
+def _masked_median(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """沿最后一维求有效元素的中位数，没有有效元素时为NaN；比nanmedian快一个数量级"""
+    if values.shape[-1] == 0:
+        return np.full(values.shape[:-1], np.nan)
+    ordered = np.sort(np.where(valid, values, np.inf), axis=-1)
+    counts = valid.sum(axis=-1)
+    lower = np.take_along_axis(ordered, np.maximum(counts - 1, 0)[..., None] // 2, axis=-1)[..., 0]
+    upper = np.take_along_axis(ordered, (counts // 2)[..., None], axis=-1)[..., 0]
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, (lower + upper) / 2, np.nan)
+
+
+def theil_sen_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    批量计算Theil–Sen斜率：所有点对斜率的中位数
+
+    Args:
+        x (np.ndarray): 形状(B, K)，无效点为NaN
+        y (np.ndarray): 形状(B, K)，无效点为NaN
+
+    Returns:
+        np.ndarray: 形状(B,)，有效点少于2个的行为NaN
+    """
+    if x.shape[1] < 2:
+        return np.full(x.shape[0], np.nan)
+    first, second = np.triu_indices(x.shape[1], k=1)
+    dx = x[:, second] - x[:, first]
+    dy = y[:, second] - y[:, first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pair_slopes = np.where(dx != 0, dy / dx, np.nan)
+    return _masked_median(pair_slopes, ~np.isnan(pair_slopes))
+
+
+def model_features(n: np.ndarray) -> np.ndarray:
+    """
+    计算各候选模型的增长函数f(n)，按每行最大有效规模归一化到[0, 1]，避免2^n溢出
+
+    Args:
+        n (np.ndarray): 形状(B, K)的规模，无效点为NaN
+
+    Returns:
+        np.ndarray: 形状(B, M, K)，constant模型的特征恒为0（只保留截距）
+    """
+    reference = np.max(np.where(np.isnan(n), -np.inf, n), axis=1, keepdims=True, initial=-np.inf)
+    reference = np.where(np.isfinite(reference) & (reference > 1), reference, 2.0)
+    safe_n = np.where(np.isnan(n) | (n < 1), 1.0, n)
+    log_n, log_ref = np.log(safe_n), np.log(reference)
+    features = np.stack([
+        np.zeros_like(safe_n),
+        np.log1p(safe_n) / np.log1p(reference),
+        safe_n / reference,
+        safe_n * np.log1p(safe_n) / (reference * np.log1p(reference)),
+        np.exp(2 * (log_n - log_ref)),
+        np.exp(3 * (log_n - log_ref)),
+        np.exp2(np.maximum(safe_n - reference, -1074.0)),
+    ], axis=1)
+    return features
+
+
+def _weighted_fit(features: np.ndarray, t: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """批量求解带非负约束的加权最小二乘 t ≈ a + c·f，返回(a, c)，形状均为(B, M)"""
+    sw = weights.sum(axis=2)
+    sf = (weights * features).sum(axis=2)
+    sff = (weights * features * features).sum(axis=2)
+    st = (weights * t).sum(axis=2)
+    sft = (weights * features * t).sum(axis=2)
+    det = sw * sff - sf * sf
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(det > 1e-12 * np.maximum(sw * sff, 1e-300), (sw * sft - sf * st) / det, 0.0)
+        slope = np.maximum(slope, 0.0)
+        intercept = (st - slope * sf) / sw
+        # 截距为负时改为过原点拟合
+        through_origin = np.where(sff > 0, sft / sff, 0.0)
+    negative = intercept < 0
+    slope = np.where(negative, np.maximum(through_origin, 0.0), slope)
+    intercept = np.where(negative, 0.0, intercept)
+    return np.nan_to_num(intercept), np.nan_to_num(slope)
+
+
+def _huber_loss(residuals: np.ndarray, delta: float) -> np.ndarray:
+    magnitude = np.abs(residuals)
+    return np.where(magnitude <= delta, 0.5 * residuals ** 2, delta * (magnitude - 0.5 * delta))
+
+
+def fit_timings(n: np.ndarray, t: np.ndarray, min_seconds: float = MIN_FIT_SECONDS, min_points: int = MIN_POINTS,
+                delta: float = HUBER_DELTA, iterations: int = 10) -> Dict[str, np.ndarray]:
+    """
+    批量拟合测量曲线并给出复杂度标签
+
+    每个候选模型拟合 t ≈ a + c·f(n)（a, c ≥ 0，a吸收JVM和输入读取等固定开销），残差按实测耗时取相对值，
+    Huber权重的迭代重加权最小二乘压低离群点。以最优模型残差的MAD作为每行的噪声尺度，
+    各模型的Huber损失视作负对数似然，加上BIC式的参数惩罚后经softmax得到每个标签的置信度：
+    其余模型都包含constant（c=0时退化为它），多出的增长系数要使损失下降超过GROWTH_PENALTY·ln(点数)才被采用，
+    否则平坦曲线的标签由噪声决定。
+
+    Args:
+        n (np.ndarray): 形状(B, K)的规模，无效点为NaN，见pack_timings()
+        t (np.ndarray): 形状(B, K)的耗时秒数
+        min_seconds (float): 低于该耗时的点不参与拟合
+        min_points (int): 有效点少于该数的行不给出标签
+        delta (float): Huber损失的分界（以噪声尺度为单位）
+        iterations (int): 迭代重加权的次数
+
+    Returns:
+        Dict[str, np.ndarray]: 包含
+            labels: 形状(B,)的标签（object数组，无法拟合时为None）
+            confidence: 形状(B,)的所选标签置信度，无法拟合时为NaN
+            probabilities: 形状(B, M)的各候选模型置信度，列顺序同CANDIDATE_MODELS
+            losses: 形状(B, M)的各候选模型稳健损失
+            slopes: 形状(B,)的Theil–Sen log-log斜率
+            slope_labels: 形状(B,)的按斜率阈值得到的标签，斜率为NaN时为None
+            points: 形状(B,)的有效点数
+    """
+    n = np.asarray(n, dtype=float)
+    t = np.asarray(t, dtype=float)
+    valid = ~np.isnan(n) & ~np.isnan(t) & (t >= min_seconds) & (n > 0)
+    points = valid.sum(axis=1)
+    fitted = points >= min_points
+    batch = n.shape[0]
+    models = len(CANDIDATE_MODELS)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = theil_sen_slopes(np.where(valid, np.log(n), np.nan), np.where(valid, np.log(t), np.nan))
+    slopes[~fitted] = np.nan
+
+    masked_n = np.where(valid, n, np.nan)
+    features = model_features(masked_n)
+    safe_t = np.where(valid, t, 1.0)[:, None, :]
+    # 相对残差：权重1/t²使每个点按相对误差计入
+    base_weights = np.where(valid, 1.0 / np.square(np.where(valid, t, 1.0)), 0.0)[:, None, :]
+    base_weights = np.broadcast_to(base_weights, features.shape)
+    weights = base_weights
+    scale = np.full((batch, models, 1), 1.0)
+    for _ in range(iterations):
+        intercept, coefficient = _weighted_fit(features, safe_t, weights)
+        residuals = (safe_t - intercept[..., None] - coefficient[..., None] * features) / safe_t
+        mad = 1.4826 * _masked_median(np.abs(residuals), np.broadcast_to(valid[:, None, :], residuals.shape))
+        scale = np.maximum(np.nan_to_num(mad, nan=NOISE_FLOOR), NOISE_FLOOR)[..., None]
+        scaled = np.abs(residuals) / scale
+        huber_weights = np.where(scaled <= delta, 1.0, delta / np.maximum(scaled, 1e-12))
+        weights = base_weights * huber_weights
+
+    intercept, coefficient = _weighted_fit(features, safe_t, weights)
+    residuals = (safe_t - intercept[..., None] - coefficient[..., None] * features) / safe_t
+    residuals = np.where(valid[:, None, :], residuals, 0.0)
+    # 用各行最优模型的噪声尺度统一衡量所有模型，使损失可比较
+    raw_losses = np.square(residuals).sum(axis=2)
+    best = np.argmin(raw_losses, axis=1)
+    row_scale = np.take_along_axis(scale[:, :, 0], best[:, None], axis=1)
+    losses = _huber_loss(residuals / row_scale[:, :, None], delta).sum(axis=2)
+    # BIC式惩罚：只有constant模型没有增长系数
+    extra_parameters = np.array([0.0 if model == 'constant' else 1.0 for model in CANDIDATE_MODELS])
+    losses = losses + GROWTH_PENALTY * np.log(np.maximum(points, 1))[:, None] * extra_parameters
+
+    shifted = losses - losses.min(axis=1, keepdims=True)
+    probabilities = np.exp(-shifted)
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    probabilities[~fitted] = np.nan
+    choice = np.argmax(np.where(fitted[:, None], probabilities, 0.0), axis=1)
+
+    labels = np.empty(batch, dtype=object)
+    slope_labels = np.empty(batch, dtype=object)
+    for row in range(batch):
+        labels[row] = CANDIDATE_MODELS[choice[row]] if fitted[row] else None
+        slope_labels[row] = slope_to_complexity(slopes[row]) if fitted[row] and not np.isnan(slopes[row]) else None
+    confidence = np.where(fitted, np.take_along_axis(np.nan_to_num(probabilities), choice[:, None], axis=1)[:, 0],
+                          np.nan)
+    return {
+        'labels': labels,
+        'confidence': confidence,
+        'probabilities': probabilities,
+        'losses': np.where(fitted[:, None], losses, np.nan),
+        'slopes': slopes,
+        'slope_labels': slope_labels,
+        'points': points
+    }
+
+
+def fit_curves(curves: Sequence[Sequence[Tuple[float, float]]], **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    fit_timings()的便捷封装：输入曲线列表，返回每条曲线的可JSON序列化结果
+
+    Args:
+        curves (Sequence[Sequence[Tuple[float, float]]]): 每条曲线是[(规模, 耗时秒数), ...]
+        **kwargs: 传给fit_timings()的参数
+
+    Returns:
+        List[Dict[str, Any]]: 每条曲线的label、confidence、slope、slope_label和probabilities（标签到置信度），
+            无法拟合时label为None
+    """
+    if not curves:
+        return []
+    fit = fit_timings(*pack_timings(curves), **kwargs)
+    results = []
+    for row in range(len(curves)):
+        label = fit['labels'][row]
+        results.append({
+            'label': label,
+            'confidence': None if label is None else float(fit['confidence'][row]),
+            'slope': None if label is None or np.isnan(fit['slopes'][row]) else float(fit['slopes'][row]),
+            'slope_label': fit['slope_labels'][row],
+            'probabilities': None if label is None else {
+                model: round(float(p), 6) for model, p in zip(CANDIDATE_MODELS, fit['probabilities'][row])
+            }
+        })
+    return results
+
+
+def synthetic_curves(count: int, scales: Sequence[float] = tuple(50 * 2 ** k for k in range(8)),
+                     noise: float = 0.05, outlier_rate: float = 0.1, seed: Optional[int] = 0
+                     ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    生成已知复杂度的合成测量曲线，用于评估拟合方法
+
+    耗时为固定开销加增长项，乘以对数正态噪声；每条曲线的首个点以outlier_rate的概率放大2到10倍，
+    模拟JIT预热，其余点也以outlier_rate/2的概率成为离群点。
+
+    Args:
+        count (int): 曲线数
+        scales (Sequence[float]): 规模
+        noise (float): 相对噪声的标准差
+        outlier_rate (float): 离群概率
+        seed (Optional[int]): 随机种子
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, List[str]]: (规模数组, 耗时数组, 真实标签)
+    """
+    rng = np.random.default_rng(seed)
+    truth_models = ['constant', 'logn', 'linear', 'nlogn', 'quadratic', 'cubic']
+    truth = [truth_models[i] for i in rng.integers(0, len(truth_models), count)]
+    n = np.tile(np.asarray(scales, dtype=float), (count, 1))
+    growth = {
+        'constant': np.ones_like(n), 'logn': np.log(n), 'linear': n, 'nlogn': n * np.log(n), 'quadratic': n ** 2, 'cubic': n ** 3
+    }
+    t = np.empty_like(n)
+    for row, label in enumerate(truth):
+        curve = growth[label][row]
+        # 最大规模的耗时在0.05到1秒之间，固定开销在0到最大耗时的5%之间
+        top = rng.uniform(0.05, 1.0)
+        t[row] = top * curve / curve[-1] + rng.uniform(0, 0.05) * top
+    t *= np.exp(rng.normal(0, noise, t.shape))
+    warmup = rng.random(count) < outlier_rate
+    t[warmup, 0] *= rng.uniform(2, 10, warmup.sum())
+    spikes = rng.random(t.shape) < outlier_rate / 2
+    t[spikes] *= rng.uniform(1.5, 4, spikes.sum())
+    return n, t, truth
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='拟合运行时间测量，或在合成曲线上比较最小二乘斜率与稳健拟合')
+    parser.add_argument('input', type=str, nargs='?', default=None,
+                        help='runtime_scaling.py输出的JSONL，不指定时在合成曲线上评估')
+    parser.add_argument('--count', type=int, default=5000, help='合成曲线数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        fits = fit_curves([record.get('timings') or [] for record in records])
+        labelled = [(record, fit) for record, fit in zip(records, fits) if fit['label'] is not None]
+        print(f"{len(records)} 条记录，可拟合 {len(labelled)} 条")
+        for key in ('label', 'slope_label'):
+            correct = sum(fit[key] == record['expected_complexity'] for record, fit in labelled)
+            print(f"  {key}: 准确率 {correct / max(1, len(labelled)):.4f}")
+    else:
+        n, t, truth = synthetic_curves(args.count, seed=args.seed)
+        start = time.perf_counter()
+        fit = fit_timings(n, t)
+        elapsed = time.perf_counter() - start
+        truth = np.asarray(truth, dtype=object)
+        log_n, log_t = np.log(n), np.log(t)
+        centered = log_n - log_n.mean(axis=1, keepdims=True)
+        ols = (centered * (log_t - log_t.mean(axis=1, keepdims=True))).sum(axis=1) / (centered ** 2).sum(axis=1)
+        ols_labels = np.array([slope_to_complexity(slope) for slope in ols], dtype=object)
+        print(f"{args.count} 条合成曲线，批量拟合耗时 {elapsed * 1000:.1f}ms")
+        print(f"  最小二乘斜率+阈值    准确率 {np.mean(ols_labels == truth):.4f}")
+        print(f"  Theil–Sen斜率+阈值   准确率 {np.mean(fit['slope_labels'] == truth):.4f}")
+        print(f"  Huber候选模型比较    准确率 {np.mean(fit['labels'] == truth):.4f}")
+        confident = fit['confidence'] >= 0.9
+        print(f"  置信度≥0.9的 {confident.mean():.1%} 曲线准确率 {np.mean(fit['labels'][confident] == truth[confident]):.4f}")
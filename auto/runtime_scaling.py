@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+经验运行时间缩放模块
+用本机JDK编译数据集样本，按递增的输入规模n生成标准输入并计时，由runtime_fit批量稳健拟合给出经验复杂度标签，
+与静态分析结果并列输出。编译和运行都在常驻的JVM测试夹具（RuntimeHarness）中完成：
+夹具用系统Java编译器在进程内编译，每次运行用新的类加载器加载样本类，省去每个样本、每个规模的JVM启动开销。
+多个夹具进程并发处理不同样本，每个夹具都在临时目录中以CPU时间、数据段和写文件大小的rlimit运行，
+样本中的System.exit()被改写为只结束样本本身，单次运行超时或夹具因超出限制退出时夹具会被重启。
+rlimit和对管道的select()只在POSIX系统上可用，Windows上创建RuntimeScalingEngine会抛出RuntimeScalingError
+"""
+
+import concurrent.futures
+import hashlib
+import os
+import queue
+import random
+import re
+import select
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from java_complexity_analyzer import analyze_java_complexity
+from runtime_fit import fit_curves
+from utils import AnalysisError
+
+try:
+    import resource
+except ImportError:  # Windows没有rlimit，经验运行时间测量不可用
+    resource = None
+
+# 与auto1/Main.java相同的起点，按2倍递增，单次运行超过max_run_seconds后不再增大规模
+DEFAULT_SCALES = tuple(50 * 2 ** k for k in range(14))
+DEFAULT_REPEATS = 3
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_RUN_SECONDS = 1.0
+DEFAULT_MEMORY_MB = 512
+# 单个夹具进程生命周期内的CPU时间上限（秒），超过后由内核终止，夹具随即重启
+DEFAULT_CPU_SECONDS = 600
+
+_PUBLIC_CLASS_RE = re.compile(r'\bpublic\s+(?:(?:final|abstract|strictfp)\s+)*class\s+(\w+)')
+_EXIT_RE = re.compile(r'\bSystem\s*\.\s*exit\s*\(')
+_MAIN_CLASS_RE = re.compile(r'\bclass\s+(\w+)[^{]*\{(?:(?!\bclass\b).)*?\bstatic\s+void\s+main\s*\(', re.S)
+
+HARNESS_CLASS = 'RuntimeHarness'
+HARNESS_SOURCE = r'''
+import java.io.*;
+import java.lang.reflect.*;
+import java.net.*;
+import java.nio.file.*;
+import javax.tools.*;
+
+public class RuntimeHarness {
+    public static void main(String[] args) throws Exception {
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        BufferedReader commands = new BufferedReader(new InputStreamReader(new FileInputStream(FileDescriptor.in), "UTF-8"));
+        PrintStream sink = new PrintStream(OutputStream.nullOutputStream());
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        String line;
+        while ((line = commands.readLine()) != null) {
+            String[] parts = line.split("\t");
+            try {
+                if (parts[0].equals("COMPILE")) {
+                    protocol.println(compile(compiler, parts[1], parts[2]));
+                } else if (parts[0].equals("RUN")) {
+                    protocol.println(run(parts[1], parts[2], parts[3], Long.parseLong(parts[4]), sink));
+                } else {
+                    protocol.println("ERROR\tunknown command " + parts[0]);
+                }
+            } catch (Throwable e) {
+                protocol.println("ERROR\t" + oneLine(e));
+            }
+        }
+    }
+
+    static String compile(JavaCompiler compiler, String source, String outDir) throws Exception {
+        if (compiler == null) {
+            return "ERROR\tno system Java compiler";
+        }
+        ByteArrayOutputStream errors = new ByteArrayOutputStream();
+        String classPath = new File(RuntimeHarness.class.getProtectionDomain().getCodeSource().getLocation().toURI())
+                .getPath();
+        int status = compiler.run(null, null, errors, "-nowarn", "-encoding", "UTF-8", "-cp", classPath,
+                "-d", outDir, source);
+        return status == 0 ? "OK" : "ERROR\t" + errors.toString().split("\n")[0].replace('\t', ' ');
+    }
+
+    static String run(String classDir, String className, String inputFile, long timeoutMs, PrintStream sink)
+            throws Exception {
+        URLClassLoader loader = new URLClassLoader(new URL[]{new File(classDir).toURI().toURL()},
+                RuntimeHarness.class.getClassLoader());
+        Method main = loader.loadClass(className).getMethod("main", String[].class);
+        byte[] input = Files.readAllBytes(Paths.get(inputFile));
+        InputStream originalIn = System.in;
+        PrintStream originalOut = System.out, originalErr = System.err;
+        Throwable[] failure = new Throwable[1];
+        // 样本常在大栈的新线程中运行主体，线程组内所有线程结束才算运行结束
+        ThreadGroup group = new ThreadGroup("submission") {
+            @Override
+            public void uncaughtException(Thread t, Throwable e) {
+                if (!(e instanceof Exit)) {
+                    failure[0] = e;
+                }
+            }
+        };
+        Thread thread = new Thread(group, () -> {
+            try {
+                main.invoke(null, (Object) new String[0]);
+            } catch (InvocationTargetException e) {
+                if (!(e.getCause() instanceof Exit)) {
+                    failure[0] = e.getCause();
+                }
+            } catch (Throwable e) {
+                failure[0] = e;
+            }
+        }, "submission", 1L << 28);
+        thread.setDaemon(true);
+        System.setIn(new ByteArrayInputStream(input));
+        System.setOut(sink);
+        System.setErr(sink);
+        long start = System.nanoTime();
+        long deadline = start + timeoutMs * 1_000_000L;
+        boolean timedOut = false;
+        thread.start();
+        while (true) {
+            Thread[] threads = new Thread[group.activeCount() + 1];
+            int count = group.enumerate(threads);
+            if (count == 0) {
+                break;
+            }
+            long remaining = deadline - System.nanoTime();
+            if (remaining <= 0) {
+                timedOut = true;
+                break;
+            }
+            threads[0].join(Math.max(1, remaining / 1_000_000L));
+        }
+        long elapsed = System.nanoTime() - start;
+        System.setIn(originalIn);
+        System.setOut(originalOut);
+        System.setErr(originalErr);
+        if (timedOut) {
+            return "TIMEOUT";
+        }
+        loader.close();
+        return failure[0] != null ? "ERROR\t" + oneLine(failure[0]) : "OK\t" + elapsed;
+    }
+
+    /** 样本源代码中的System.exit()被改写为调用此方法，结束样本而不结束夹具 */
+    public static void exit(int status) {
+        throw new Exit();
+    }
+
+    static class Exit extends Error {
+        Exit() {
+            super(null, null, false, false);
+        }
+    }
+
+    static String oneLine(Throwable e) {
+        return (e.getClass().getName() + ": " + e.getMessage()).replace('\n', ' ').replace('\t', ' ');
+    }
+}
+'''
+
+
+class RuntimeScalingError(AnalysisError):
+    """JDK不可用、编译失败或运行失败时的异常类"""
+    pass
+
+
+class HarnessCrashed(RuntimeScalingError):
+    """夹具进程意外退出（如超出rlimit）或无响应时的异常类"""
+    pass
+
+
+def find_jdk() -> Optional[Tuple[str, str]]:
+    """
+    查找本机JDK，优先使用JAVA_HOME
+
+    Returns:
+        Optional[Tuple[str, str]]: (javac路径, java路径)，找不到时返回None
+    """
+    java_home = os.environ.get('JAVA_HOME')
+    if java_home:
+        javac = os.path.join(java_home, 'bin', 'javac')
+        java = os.path.join(java_home, 'bin', 'java')
+        if os.access(javac, os.X_OK) and os.access(java, os.X_OK):
+            return javac, java
+    javac, java = shutil.which('javac'), shutil.which('java')
+    if javac and java:
+        return javac, java
+    return None
+
+
+def main_class_name(source_code: str) -> str:
+    """
+    确定样本的入口类名：优先取public类，否则取声明了main方法的类，都没有时为Main
+
+    Args:
+        source_code (str): Java源代码
+
+    Returns:
+        str: 类名
+    """
+    match = _PUBLIC_CLASS_RE.search(source_code) or _MAIN_CLASS_RE.search(source_code)
+    return match.group(1) if match else 'Main'
+
+
+def prepare_source(source_code: str) -> str:
+    """
+    把样本中的System.exit()改写为RuntimeHarness.exit()，使其只结束样本本身
+
+    Args:
+        source_code (str): Java源代码
+
+    Returns:
+        str: 改写后的源代码
+    """
+    return _EXIT_RE.sub(HARNESS_CLASS + '.exit(', source_code)
+
+
+def _array_input(n: int, rng: random.Random) -> str:
+    return f"{n}\n{' '.join(str(rng.randint(1, n)) for _ in range(n))}\n"
+
+
+def _number_input(n: int, rng: random.Random) -> str:
+    return f"{n}\n"
+
+
+def _string_input(n: int, rng: random.Random) -> str:
+    return f"{n}\n{''.join(rng.choice('ab') for _ in range(n))}\n"
+
+
+def _pairs_input(n: int, rng: random.Random) -> str:
+    lines = [f"{n} {n}"] + [f"{rng.randint(1, n)} {rng.randint(1, n)}" for _ in range(n)]
+    return '\n'.join(lines) + '\n'
+
+
+# 样本的输入格式未知，按顺序试探，第一个能在最小规模上正常运行的格式用于所有规模
+INPUT_GENERATORS: Dict[str, Callable[[int, random.Random], str]] = {
+    'array': _array_input,
+    'number': _number_input,
+    'string': _string_input,
+    'pairs': _pairs_input,
+}
+
+
+def _limit_resources(pid: int, cpu_seconds: int, data_mb: int, file_mb: int) -> None:
+    """
+    设置夹具进程的rlimit：CPU时间、可写数据段（JVM保留而未提交的地址空间不计入）和写文件大小
+
+    用prlimit在进程启动后设置，而不是preexec_fn：后者在多线程中fork并不安全。
+    """
+    resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+    resource.prlimit(pid, resource.RLIMIT_DATA, (data_mb << 20, data_mb << 20))
+    resource.prlimit(pid, resource.RLIMIT_FSIZE, (file_mb << 20, file_mb << 20))
+
+
+# 没有prlimit的POSIX系统（macOS等）上先启动这段脚本，用setrlimit设置自身的限制后exec夹具
+_RLIMIT_LAUNCHER = (
+    "import os, resource, sys\n"
+    "cpu, data, size = (int(value) for value in sys.argv[1:4])\n"
+    "resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))\n"
+    "resource.setrlimit(resource.RLIMIT_DATA, (data << 20, data << 20))\n"
+    "resource.setrlimit(resource.RLIMIT_FSIZE, (size << 20, size << 20))\n"
+    "os.execvp(sys.argv[4], sys.argv[4:])\n"
+)
+
+
+def _limited_command(command: Sequence[str], cpu_seconds: int, data_mb: int, file_mb: int) -> List[str]:
+    """
+    把命令包装为先设置rlimit再exec的形式，rlimit与_limit_resources()相同
+
+    Args:
+        command (Sequence[str]): 原命令
+        cpu_seconds (int): CPU时间上限（秒）
+        data_mb (int): 数据段上限（MB）
+        file_mb (int): 写文件大小上限（MB）
+
+    Returns:
+        List[str]: 包装后的命令
+    """
+    return [sys.executable, '-c', _RLIMIT_LAUNCHER, str(cpu_seconds), str(data_mb), str(file_mb), *command]
+
+
+def build_harness(javac: str, cache_dir: Optional[str] = None) -> str:
+    """
+    编译JVM测试夹具，按源代码哈希缓存
+
+    Args:
+        javac (str): javac路径
+        cache_dir (Optional[str]): 缓存目录，默认为系统临时目录
+
+    Returns:
+        str: 夹具的classpath目录
+
+    Raises:
+        RuntimeScalingError: 编译失败时抛出
+    """
+    digest = hashlib.blake2b(HARNESS_SOURCE.encode('utf-8'), digest_size=8).hexdigest()
+    harness_dir = os.path.join(cache_dir or tempfile.gettempdir(), f'complexity_harness_{digest}')
+    if os.path.exists(os.path.join(harness_dir, HARNESS_CLASS + '.class')):
+        return harness_dir
+    os.makedirs(harness_dir, exist_ok=True)
+    source_path = os.path.join(harness_dir, HARNESS_CLASS + '.java')
+    with open(source_path, 'w', encoding='utf-8') as f:
+        f.write(HARNESS_SOURCE)
+    completed = subprocess.run([javac, '-encoding', 'UTF-8', '-d', harness_dir, source_path],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeScalingError(f"Cannot compile runtime harness: {completed.stderr.strip()}")
+    return harness_dir
+
+
+class JvmHarness:
+    """
+    常驻JVM测试夹具进程
+
+    通过标准输入输出按行收发制表符分隔的命令：
+        COMPILE 源文件 输出目录            -> OK | ERROR 信息
+        RUN 类目录 类名 输入文件 超时毫秒   -> OK 纳秒 | TIMEOUT | ERROR 信息
+    超时、进程退出或无响应时自动重启。
+    """
+
+    def __init__(self, java: str, harness_dir: str, work_dir: str, memory_mb: int = DEFAULT_MEMORY_MB,
+                 cpu_seconds: int = DEFAULT_CPU_SECONDS):
+        """
+        Args:
+            java (str): java路径
+            harness_dir (str): build_harness()返回的classpath目录
+            work_dir (str): 夹具进程的工作目录
+            memory_mb (int): JVM堆上限（MB），数据段rlimit在此基础上留出JVM自身的开销
+            cpu_seconds (int): 夹具进程生命周期内的CPU时间上限（秒）
+        """
+        self.command = [java, f'-Xmx{memory_mb}m', '-Xss16m', '-XX:+UseSerialGC', '-XX:-UsePerfData',
+                        '-XX:ReservedCodeCacheSize=64m', '-XX:MaxMetaspaceSize=256m',
+                        '-cp', harness_dir, HARNESS_CLASS]
+        self.work_dir = work_dir
+        self.limits = (cpu_seconds, memory_mb + 768, 64)
+        self.restarts = 0
+        self._started = False
+        self._process: Optional[subprocess.Popen] = None
+
+    def _start(self) -> None:
+        has_prlimit = hasattr(resource, 'prlimit')
+        command = self.command if has_prlimit else _limited_command(self.command, *self.limits)
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, cwd=self.work_dir, text=True,
+                                         encoding='utf-8', start_new_session=True)
+        if has_prlimit:
+            _limit_resources(self._process.pid, *self.limits)
+
+    def request(self, fields: Sequence[str], timeout: float) -> List[str]:
+        """
+        发送一条命令并等待一行响应
+
+        Args:
+            fields (Sequence[str]): 命令字段
+            timeout (float): 等待响应的秒数
+
+        Returns:
+            List[str]: 响应字段
+
+        Raises:
+            HarnessCrashed: 夹具退出或超时未响应时抛出，夹具已被终止，下次请求时重启
+        """
+        if self._process is None or self._process.poll() is not None:
+            if self._started:
+                self.restarts += 1
+            self._start()
+            self._started = True
+        ready = False
+        try:
+            self._process.stdin.write('\t'.join(fields) + '\n')
+            self._process.stdin.flush()
+            ready, _, _ = select.select([self._process.stdout], [], [], timeout)
+            line = self._process.stdout.readline() if ready else ''
+        except (BrokenPipeError, OSError):
+            line = ''
+        if not line:
+            try:
+                # 管道已关闭说明进程正在退出，等待它以取得退出码
+                status = self._process.wait(timeout=1) if ready else None
+            except subprocess.TimeoutExpired:
+                status = None
+            self.kill()
+            raise HarnessCrashed('harness did not respond' if status is None else f'harness exited with {status}')
+        return line.rstrip('\n').split('\t')
+
+    def kill(self) -> None:
+        """终止夹具进程"""
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            for stream in (self._process.stdin, self._process.stdout):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+            self._process = None
+
+
+class RuntimeScalingEngine:
+    """
+    并发测量样本运行时间随规模的变化
+
+    jobs个夹具进程放在队列中，每个样本占用一个夹具完成编译、输入格式试探和各规模计时。
+    """
+
+    def __init__(self, jobs: Optional[int] = None, scales: Sequence[int] = DEFAULT_SCALES,
+                 repeats: int = DEFAULT_REPEATS, timeout: float = DEFAULT_TIMEOUT,
+                 max_run_seconds: float = DEFAULT_MAX_RUN_SECONDS, memory_mb: int = DEFAULT_MEMORY_MB,
+                 cpu_seconds: int = DEFAULT_CPU_SECONDS, seed: int = 0, work_dir: Optional[str] = None):
+        """
+        Args:
+            jobs (Optional[int]): 并发夹具数，默认为CPU核数
+            scales (Sequence[int]): 递增的输入规模
+            repeats (int): 每个规模的计时次数，取中位数；每个样本另有一次不计入的预热运行
+            timeout (float): 单次运行的超时秒数
+            max_run_seconds (float): 某规模的中位耗时超过该值后不再测量更大的规模
+            memory_mb (int): 每个夹具的JVM堆上限（MB）
+            cpu_seconds (int): 每个夹具进程的CPU时间上限（秒）
+            seed (int): 输入生成的随机种子
+            work_dir (Optional[str]): 编译产物和输入文件的目录，默认为临时目录
+
+        Raises:
+            RuntimeScalingError: 不是POSIX系统、找不到JDK或夹具编译失败时抛出
+        """
+        if resource is None or os.name != 'posix':
+            raise RuntimeScalingError("Runtime scaling requires a POSIX system (rlimit and select() on pipes)")
+        jdk = find_jdk()
+        if jdk is None:
+            raise RuntimeScalingError("JDK not found: set JAVA_HOME or put javac and java on PATH")
+        self.jobs = jobs or os.cpu_count() or 1
+        self.scales = tuple(scales)
+        self.repeats = repeats
+        self.timeout = timeout
+        self.max_run_seconds = max_run_seconds
+        self.seed = seed
+        self._temp_dir = None if work_dir else tempfile.TemporaryDirectory(prefix='runtime_scaling_')
+        self.work_dir = work_dir or self._temp_dir.name
+        harness_dir = build_harness(jdk[0])
+        self._harnesses: 'queue.Queue[JvmHarness]' = queue.Queue()
+        self._all = [JvmHarness(jdk[1], harness_dir, self.work_dir, memory_mb=memory_mb, cpu_seconds=cpu_seconds)
+                     for _ in range(self.jobs)]
+        for harness in self._all:
+            self._harnesses.put(harness)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _sample_dir(self) -> str:
+        with self._lock:
+            self._counter += 1
+            path = os.path.join(self.work_dir, f's{self._counter}')
+        os.makedirs(os.path.join(path, 'classes'))
+        return path
+
+    def _run(self, harness: JvmHarness, sample_dir: str, class_name: str, input_text: str) -> float:
+        """运行一次样本，返回耗时秒数"""
+        input_path = os.path.join(sample_dir, 'input.txt')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(input_text)
+        timeout_ms = str(int(self.timeout * 1000))
+        response = harness.request(['RUN', os.path.join(sample_dir, 'classes'), class_name, input_path, timeout_ms],
+                                   timeout=self.timeout + 5)
+        if response[0] == 'TIMEOUT':
+            # 超时的样本线程无法可靠停止，重启夹具
+            harness.kill()
+            raise RuntimeScalingError(f"timed out after {self.timeout}s")
+        if response[0] != 'OK':
+            raise RuntimeScalingError(response[1] if len(response) > 1 else 'run failed')
+        return int(response[1]) / 1e9
+
+    def measure(self, source_code: str) -> Dict[str, Any]:
+        """
+        编译一个样本并测量各规模下的运行时间
+
+        Args:
+            source_code (str): Java源代码
+
+        Returns:
+            Dict[str, Any]: 包含status（ok、compile_error、no_input_format或error）、error、input_format
+                和timings（[[规模, 中位耗时秒数], ...]）
+        """
+        result = {'status': 'ok', 'error': None, 'input_format': None, 'timings': []}
+        harness = self._harnesses.get()
+        sample_dir = self._sample_dir()
+        try:
+            class_name = main_class_name(source_code)
+            source_path = os.path.join(sample_dir, class_name + '.java')
+            with open(source_path, 'w', encoding='utf-8') as f:
+                f.write(prepare_source(source_code))
+            try:
+                response = harness.request(['COMPILE', source_path, os.path.join(sample_dir, 'classes')],
+                                           timeout=120)
+            except RuntimeScalingError as e:
+                response = ['ERROR', str(e)]
+            if response[0] != 'OK':
+                result.update(status='compile_error', error=response[1] if len(response) > 1 else None)
+                return result
+
+            rng = random.Random(self.seed)
+            generator = None
+            for name, candidate in INPUT_GENERATORS.items():
+                try:
+                    # 最小规模上的试探同时作为预热运行
+                    self._run(harness, sample_dir, class_name, candidate(self.scales[0], rng))
+                except RuntimeScalingError as e:
+                    result['error'] = str(e)
+                    continue
+                generator, result['input_format'], result['error'] = candidate, name, None
+                break
+            if generator is None:
+                result['status'] = 'no_input_format'
+                return result
+
+            for n in self.scales:
+                input_text = generator(n, rng)
+                try:
+                    seconds = statistics.median(self._run(harness, sample_dir, class_name, input_text)
+                                                for _ in range(self.repeats))
+                except RuntimeScalingError as e:
+                    # 较大规模超时或超出资源限制时保留已测得的点
+                    result['error'] = f"n={n}: {e}"
+                    break
+                result['timings'].append([n, seconds])
+                if seconds > self.max_run_seconds:
+                    break
+            if not result['timings']:
+                result['status'] = 'error'
+            return result
+        finally:
+            shutil.rmtree(sample_dir, ignore_errors=True)
+            self._harnesses.put(harness)
+
+    def measure_samples(self, samples: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        并发测量多个样本，测量结束后批量拟合经验标签，并附上静态分析结果
+
+        Args:
+            samples (Sequence[Dict[str, Any]]): data_reader产出的样本
+
+        Returns:
+            List[Dict[str, Any]]: 与samples顺序一致的记录，每条包含sample_id、problem、expected_complexity、
+                static（静态分析标签或"error"）、measure()的各字段，以及empirical（经验标签，测量点不足时为None）、
+                confidence、slope和probabilities，见runtime_fit.fit_curves()
+        """
+        def measure_one(sample: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                static = analyze_java_complexity(sample['source'])
+            except AnalysisError:
+                static = 'error'
+            record = {
+                'sample_id': sample['sample_id'],
+                'problem': sample['problem'],
+                'expected_complexity': sample['expected_complexity'],
+                'static': static
+            }
+            record.update(self.measure(sample['source']))
+            return record
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            records = list(executor.map(measure_one, samples))
+        for record, fit in zip(records, fit_curves([record['timings'] for record in records])):
+            record.update(empirical=fit['label'], confidence=fit['confidence'], slope=fit['slope'],
+                          probabilities=fit['probabilities'])
+        return records
+
+    @property
+    def restarts(self) -> int:
+        """所有夹具的重启次数"""
+        return sum(harness.restarts for harness in self._all)
+
+    def close(self) -> None:
+        """终止所有夹具并删除临时目录"""
+        for harness in self._all:
+            harness.kill()
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def __enter__(self) -> 'RuntimeScalingEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    from data_reader import extract_java_samples, sample_java_samples
+
+    parser = argparse.ArgumentParser(description='编译并计时Java样本，按运行时间随规模的变化给出经验复杂度')
+    parser.add_argument('--data', '-d', type=str, default='../data/data.jsonl', help='JSONL数据集文件路径')
+    parser.add_argument('--output', '-o', type=str, default='runtime_scaling.jsonl', help='输出JSONL路径')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='并发夹具数，默认为CPU核数')
+    parser.add_argument('--sample-size', type=int, default=None, help='随机抽取的样本数')
+    parser.add_argument('--seed', type=int, default=0, help='抽样和输入生成的随机种子')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help='每个规模的计时次数')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='单次运行的超时秒数')
+    parser.add_argument('--max-run-seconds', type=float, default=DEFAULT_MAX_RUN_SECONDS,
+                        help='中位耗时超过该值后不再增大规模')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_MB, help='每个夹具的JVM堆上限（MB）')
+    args = parser.parse_args()
+
+    if args.sample_size:
+        samples = sample_java_samples(args.data, args.sample_size, seed=args.seed)
+    else:
+        samples = list(extract_java_samples(args.data))
+    try:
+        engine = RuntimeScalingEngine(jobs=args.jobs, repeats=args.repeats, timeout=args.timeout,
+                                      max_run_seconds=args.max_run_seconds, memory_mb=args.memory_mb,
+                                      seed=args.seed)
+    except RuntimeScalingError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    with engine:
+        records = engine.measure_samples(samples)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    measured = [record for record in records if record['empirical'] is not None]
+    print(f"{len(records)} 个样本，得到经验标签 {len(measured)} 个，夹具重启 {engine.restarts} 次", file=sys.stderr)
+    if measured:
+        for key in ('empirical', 'static'):
+            correct = sum(record[key] == record['expected_complexity'] for record in measured)
+            print(f"  {key}: 准确率 {correct / len(measured):.4f}", file=sys.stderr)
+        agree = sum(record['empirical'] == record['static'] for record in measured)
+        print(f"  经验标签与静态标签一致 {agree / len(measured):.4f}", file=sys.stderr)
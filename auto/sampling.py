@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据采样模块
+单次流式遍历JSONL数据集，生成均匀蓄水池样本或按标签/来源分层的样本，
+内存占用只与样本规模有关，随机种子可复现，供auto和LLM入口共用
+"""
+
+import heapq
+import json
+import random
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from utils import DataFormatError, FileReadError
+
+# 分层字段的别名：auto数据格式使用expected_complexity，原始数据集使用complexity
+STRATUM_FIELD_ALIASES = {
+    'complexity': ('complexity', 'expected_complexity'),
+    'from': ('from',),
+    'problem': ('problem',),
+}
+
+
+class _BottomK:
+    """保留随机键最小的k个元素，等价于一个蓄水池样本，且按随机键排序即为随机顺序"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self._heap: List[Tuple[float, int, Any]] = []
+
+    def offer(self, key: float, item: Any) -> None:
+        self.seen += 1
+        entry = (-key, self.seen, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def take(self, n: int) -> List[Any]:
+        """按随机键从小到大取前n个元素"""
+        ordered = sorted(self._heap, reverse=True)
+        return [item for _, _, item in ordered[:n]]
+
+
+def reservoir_sample(items: Iterable[Any], k: int, seed: Optional[int] = None) -> List[Any]:
+    """
+    单次遍历的均匀蓄水池采样
+
+    Args:
+        items (Iterable[Any]): 任意可迭代对象
+        k (int): 样本规模
+        seed (Optional[int]): 随机种子
+
+    Returns:
+        List[Any]: 至多k个元素，按随机顺序排列
+    """
+    rng = random.Random(seed)
+    reservoir = _BottomK(k)
+    for item in items:
+        reservoir.offer(rng.random(), item)
+    return reservoir.take(k)
+
+
+def allocate_quota(counts: Dict[Any, int], k: int, allocation: str = 'proportional') -> Dict[Any, int]:
+    """
+    将样本规模分配到各层
+
+    Args:
+        counts (Dict[Any, int]): 各层的总元素数
+        k (int): 样本规模
+        allocation (str): 'proportional'按层大小比例分配（最大余数法，每层至少1个），
+            'equal'各层平均分配；层内元素不足时多余名额转给其他层
+
+    Returns:
+        Dict[Any, int]: 各层的样本数
+    """
+    if allocation not in ('proportional', 'equal'):
+        raise ValueError(f"Unknown allocation: {allocation}")
+    total = sum(counts.values())
+    k = min(k, total)
+    strata = sorted(counts, key=str)
+    if not strata or k <= 0:
+        return {stratum: 0 for stratum in strata}
+
+    if allocation == 'proportional':
+        raw = {stratum: k * counts[stratum] / total for stratum in strata}
+    else:
+        raw = {stratum: k / len(strata) for stratum in strata}
+    quota = {stratum: min(counts[stratum], int(raw[stratum])) for stratum in strata}
+    if k >= len(strata):
+        for stratum in strata:
+            quota[stratum] = max(quota[stratum], 1)
+
+    # 按余数从大到小补足（或在每层至少1个导致超额时扣减）剩余名额
+    by_remainder = sorted(strata, key=lambda s: (raw[s] - int(raw[s]), counts[s]), reverse=True)
+    while sum(quota.values()) > k:
+        for stratum in reversed(by_remainder):
+            if quota[stratum] > 1 and sum(quota.values()) > k:
+                quota[stratum] -= 1
+    while sum(quota.values()) < k:
+        for stratum in by_remainder:
+            if quota[stratum] < counts[stratum] and sum(quota.values()) < k:
+                quota[stratum] += 1
+    return quota
+
+
+def stratified_sample(items: Iterable[Any], k: int, key: Callable[[Any], Any],
+                      seed: Optional[int] = None, allocation: str = 'proportional') -> List[Any]:
+    """
+    单次遍历的分层蓄水池采样
+
+    每层维护一个容量为k的蓄水池，遍历结束后按各层实际大小分配名额，
+    因此内存占用为O(k × 层数)，与数据集规模无关。
+
+    Args:
+        items (Iterable[Any]): 任意可迭代对象
+        k (int): 样本规模
+        key (Callable[[Any], Any]): 提取分层键的函数
+        seed (Optional[int]): 随机种子
+        allocation (str): 名额分配方式，'proportional'或'equal'
+
+    Returns:
+        List[Any]: 至多k个元素，按随机顺序排列
+    """
+    rng = random.Random(seed)
+    reservoirs: Dict[Any, _BottomK] = {}
+    for item in items:
+        stratum = key(item)
+        reservoir = reservoirs.get(stratum)
+        if reservoir is None:
+            reservoir = reservoirs[stratum] = _BottomK(k)
+        reservoir.offer(rng.random(), item)
+
+    quota = allocate_quota({stratum: r.seen for stratum, r in reservoirs.items()}, k, allocation)
+    sampled = []
+    for stratum, reservoir in reservoirs.items():
+        sampled.extend(reservoir.take(quota[stratum]))
+    rng.shuffle(sampled)
+    return sampled
+
+
+def stratum_key(record: Dict[str, Any], fields: Sequence[str]) -> Tuple[str, ...]:
+    """
+    计算记录的分层键
+
+    Args:
+        record (Dict[str, Any]): JSONL中的一条记录
+        fields (Sequence[str]): 分层字段，如('complexity',)或('complexity', 'from')
+
+    Returns:
+        Tuple[str, ...]: 分层键
+    """
+    values = []
+    for field in fields:
+        value = ''
+        for alias in STRATUM_FIELD_ALIASES.get(field, (field,)):
+            value = record.get(alias) or ''
+            if value:
+                break
+        values.append(str(value).lower().strip())
+    return tuple(values)
+
+
+def sample_jsonl(file_path: str, k: int, stratify_by: Optional[Sequence[str]] = None,
+                 seed: Optional[int] = None, allocation: str = 'proportional',
+                 max_lines: Optional[int] = None,
+                 filter_fn: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 skip_invalid: bool = False) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    单次流式遍历JSONL文件，返回均匀或分层样本
+
+    均匀采样时只保存被选中的原始行，结束后才解析JSON；分层采样需要解析每行以获取分层键。
+
+    Args:
+        file_path (str): JSONL文件路径
+        k (int): 样本规模
+        stratify_by (Optional[Sequence[str]]): 分层字段，如['complexity']、['complexity', 'from']，
+            为空时做均匀蓄水池采样
+        seed (Optional[int]): 随机种子
+        allocation (str): 分层名额分配方式，'proportional'或'equal'
+        max_lines (Optional[int]): 只从前max_lines行中采样
+        filter_fn (Optional[Callable]): 记录过滤函数，只对返回True的记录采样
+        skip_invalid (bool): 是否跳过JSON格式错误的行，否则抛出DataFormatError
+
+    Returns:
+        List[Tuple[int, Dict[str, Any]]]: (行号, 记录)列表，按行号升序排列
+
+    Raises:
+        FileReadError: 文件无法读取时抛出
+        DataFormatError: JSON格式错误且未设置skip_invalid时抛出
+    """
+    needs_parse = bool(stratify_by) or filter_fn is not None
+
+    def _parse(line_number: int, line: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            if skip_invalid:
+                return None
+            raise DataFormatError(f"Line {line_number}: Invalid JSON format - {str(e)}")
+
+    def _iter_lines():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if max_lines is not None and line_number > max_lines:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                if not needs_parse:
+                    yield line_number, line
+                    continue
+                record = _parse(line_number, line)
+                if record is None or (filter_fn is not None and not filter_fn(record)):
+                    continue
+                yield line_number, record
+
+    try:
+        if stratify_by:
+            fields = tuple(stratify_by)
+            sampled = stratified_sample(_iter_lines(), k, key=lambda entry: stratum_key(entry[1], fields),
+                                        seed=seed, allocation=allocation)
+        else:
+            sampled = reservoir_sample(_iter_lines(), k, seed=seed)
+    except FileNotFoundError:
+        raise FileReadError(f"File not found: {file_path}")
+    except PermissionError:
+        raise FileReadError(f"Permission denied: {file_path}")
+
+    if not needs_parse:
+        parsed = ((line_number, _parse(line_number, line)) for line_number, line in sampled)
+        sampled = [(line_number, record) for line_number, record in parsed if record is not None]
+    sampled.sort(key=lambda entry: entry[0])
+    return sampled
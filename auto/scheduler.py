@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析任务调度模块
+按源代码长度、词法单元数或上一次运行的逐样本耗时估计每个样本的分析代价，
+多进程分析时按代价从大到小派发，空闲的工作进程从共享任务队列领取下一个任务，
+避免按文件顺序派发时最后只剩一个进程在处理超长提交；结果仍按输入顺序产出，
+并用实测耗时模拟比较按文件顺序（FIFO）与最长优先两种派发的完成时间（makespan）
+"""
+
+import heapq
+import json
+import re
+import statistics
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils import FileReadError
+
+COST_METHODS = ('length', 'tokens')
+
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def load_timings(log_file: str) -> Dict[Any, float]:
+    """
+    从上一次运行的逐样本明细日志（main.py的--sample-log）读取分析耗时
+
+    Args:
+        log_file (str): 明细日志路径
+
+    Returns:
+        Dict[Any, float]: 样本ID到耗时秒数的映射
+
+    Raises:
+        FileReadError: 日志无法读取或格式错误时抛出
+    """
+    timings = {}
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    timings[record['sample_id']] = record['duration_ms'] / 1000
+    except OSError as e:
+        raise FileReadError(f"Cannot read timing log {log_file}: {e}")
+    except (json.JSONDecodeError, KeyError) as e:
+        raise FileReadError(f"Invalid timing log {log_file} at line {line_number}: {e}")
+    return timings
+
+
+def estimate_costs(sources: Sequence[str], method: str = 'length', timings: Optional[Dict[Any, float]] = None,
+                   keys: Optional[Sequence[Any]] = None) -> List[float]:
+    """
+    估计每个样本的分析代价
+
+    给出timings时，有历史耗时的样本直接使用耗时；其余样本按method计算的大小，
+    乘以有历史耗时样本的"耗时/大小"中位数换算为秒，使两类代价可以比较。
+
+    Args:
+        sources (Sequence[str]): 源代码列表
+        method (str): 'length'按字符数，'tokens'按词法单元数
+        timings (Optional[Dict[Any, float]]): 上一次运行的耗时，见load_timings()
+        keys (Optional[Sequence[Any]]): 与sources对应的样本ID，用于查找timings
+
+    Returns:
+        List[float]: 每个样本的代价估计
+
+    Raises:
+        ValueError: method未知，或给出timings而没有keys时抛出
+    """
+    if method not in COST_METHODS:
+        raise ValueError(f"Unknown cost method: {method}, expected one of {COST_METHODS}")
+    if method == 'tokens':
+        sizes = [float(len(_TOKEN_RE.findall(source))) for source in sources]
+    else:
+        sizes = [float(len(source)) for source in sources]
+    if not timings:
+        return sizes
+    if keys is None:
+        raise ValueError("keys are required when timings are given")
+    known = [timings.get(key) for key in keys]
+    ratios = [seconds / size for seconds, size in zip(known, sizes) if seconds is not None and size > 0]
+    scale = statistics.median(ratios) if ratios else 1.0
+    return [seconds if seconds is not None else size * scale for seconds, size in zip(known, sizes)]
+
+
+def longest_first(costs: Sequence[float]) -> List[int]:
+    """
+    按代价从大到小排列样本序号，代价相同的保持输入顺序
+
+    Args:
+        costs (Sequence[float]): 代价估计
+
+    Returns:
+        List[int]: 派发顺序
+    """
+    return sorted(range(len(costs)), key=lambda index: -costs[index])
+
+
+def simulate_makespan(durations: Sequence[float], order: Iterable[int], workers: int, chunksize: int = 1) -> float:
+    """
+    模拟按给定顺序分批派发、每个空闲工作进程领取下一批任务时的完成时间
+
+    Args:
+        durations (Sequence[float]): 每个样本的耗时
+        order (Iterable[int]): 派发顺序
+        workers (int): 工作进程数
+        chunksize (int): 每批任务数，与进程池的chunksize含义相同
+
+    Returns:
+        float: 全部任务完成的时间
+    """
+    finish = [0.0] * max(1, workers)
+    chunk = []
+    for index in order:
+        chunk.append(durations[index])
+        if len(chunk) == chunksize:
+            heapq.heappush(finish, heapq.heappop(finish) + sum(chunk))
+            chunk = []
+    if chunk:
+        heapq.heappush(finish, heapq.heappop(finish) + sum(chunk))
+    return max(finish)
+
+
+def makespan_report(durations: Sequence[float], costs: Sequence[float], workers: int,
+                    fifo_chunksize: int = 1) -> Dict[str, float]:
+    """
+    用实测耗时比较FIFO派发与按代价估计最长优先派发的完成时间
+
+    FIFO按fifo_chunksize分批派发（即多进程分析不指定派发顺序时的行为），最长优先逐个派发。
+
+    Args:
+        durations (Sequence[float]): 每个样本的实测耗时（秒）
+        costs (Sequence[float]): 派发时使用的代价估计
+        workers (int): 工作进程数
+        fifo_chunksize (int): FIFO派发的每批任务数
+
+    Returns:
+        Dict[str, float]: 包含workers、fifo_s、longest_first_s、lower_bound_s（总耗时/进程数与最长单个耗时的较大者）
+            和improvement（FIFO完成时间相对减少的比例）
+    """
+    fifo = simulate_makespan(durations, range(len(durations)), workers, chunksize=fifo_chunksize)
+    scheduled = simulate_makespan(durations, longest_first(costs), workers)
+    lower_bound = max(sum(durations) / workers, max(durations, default=0.0))
+    return {
+        'workers': workers,
+        'fifo_s': fifo,
+        'longest_first_s': scheduled,
+        'lower_bound_s': lower_bound,
+        'improvement': 1 - scheduled / fifo if fifo else 0.0
+    }
+
+
+def in_order(results: Iterable[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    """
+    把按完成顺序到达的结果恢复为输入顺序，结果的第一个元素是从0开始的样本序号
+
+    Args:
+        results (Iterable[Tuple[Any, ...]]): 乱序结果
+
+    Yields:
+        Tuple[Any, ...]: 按样本序号顺序的结果
+    """
+    pending: Dict[int, Tuple[Any, ...]] = {}
+    next_index = 0
+    for result in results:
+        pending[result[0]] = result
+        while next_index in pending:
+            yield pending.pop(next_index)
+            next_index += 1
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from data_reader import extract_java_samples
+    from java_complexity_analyzer import analyze_java_complexity
+    from shared_dataset import default_chunksize
+    from utils import AnalysisError
+
+    parser = argparse.ArgumentParser(description='用逐样本实测耗时比较FIFO与最长优先派发的完成时间')
+    parser.add_argument('--data', '-d', type=str, default='../data/data.jsonl', help='JSONL数据集文件路径')
+    parser.add_argument('--workers', '-w', type=str, default='2,4,8,16', help='工作进程数，逗号分隔')
+    parser.add_argument('--timings', type=str, default=None, help='已有的逐样本明细日志，不指定时单进程重新测量')
+    parser.add_argument('--chunksize', type=int, default=None, help='FIFO派发的每批任务数，默认与多进程分析相同')
+    args = parser.parse_args()
+
+    samples = list(extract_java_samples(args.data))
+    sources = [sample['source'] for sample in samples]
+    keys = [sample['sample_id'] for sample in samples]
+    if args.timings:
+        timings = load_timings(args.timings)
+        durations = [timings[key] for key in keys]
+    else:
+        durations = []
+        for source in sources:
+            start = time.perf_counter()
+            try:
+                analyze_java_complexity(source)
+            except AnalysisError:
+                pass
+            durations.append(time.perf_counter() - start)
+    print(f"{len(samples)} 个样本，总耗时 {sum(durations):.2f}s，最长单个 {max(durations):.3f}s")
+    for workers in (int(value) for value in args.workers.split(',')):
+        for method in COST_METHODS:
+            chunksize = args.chunksize or default_chunksize(len(sources), workers)
+            report = makespan_report(durations, estimate_costs(sources, method=method), workers,
+                                     fifo_chunksize=chunksize)
+            print(f"  {workers:3d} 进程 代价={method:6s} FIFO {report['fifo_s']:7.2f}s  "
+                  f"最长优先 {report['longest_first_s']:7.2f}s  下界 {report['lower_bound_s']:7.2f}s  "
+                  f"缩短 {report['improvement']:.1%}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+序贯评估模块
+按复杂度标签分层的随机顺序处理样本，维护准确率的实时置信区间，
+在区间宽度达到目标或与基线的比较已有定论时提前停止评估
+"""
+
+import json
+import math
+import random
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def stratified_order(items: List[Any], key: Callable[[Any], str], seed: Optional[int] = None) -> List[Any]:
+    """
+    生成按标签分层的随机处理顺序，使任意前缀中各标签的比例都接近整体比例
+
+    每个层内先随机打乱，第j个元素被赋予位置 (j + u) / n_层（u为[0,1)随机抖动），
+    再按位置合并所有层。
+
+    Args:
+        items (List[Any]): 待排序的样本列表
+        key (Callable[[Any], str]): 提取分层标签的函数
+        seed (Optional[int]): 随机种子，用于复现
+
+    Returns:
+        List[Any]: 分层随机顺序的新列表
+    """
+    rng = random.Random(seed)
+    strata: Dict[str, List[Any]] = {}
+    for item in items:
+        strata.setdefault(key(item), []).append(item)
+
+    positioned = []
+    for label in sorted(strata):
+        group = strata[label]
+        rng.shuffle(group)
+        size = len(group)
+        for j, item in enumerate(group):
+            positioned.append(((j + rng.random()) / size, item))
+
+    positioned.sort(key=lambda pair: pair[0])
+    return [item for _, item in positioned]
+
+
+def wilson_interval(successes: int, n: int, alpha: float) -> Tuple[float, float]:
+    """
+    计算二项比例的Wilson置信区间
+
+    Args:
+        successes (int): 成功次数
+        n (int): 总次数
+        alpha (float): 显著性水平（区间置信度为1 - alpha）
+
+    Returns:
+        Tuple[float, float]: 置信区间下界和上界
+    """
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def load_baseline_accuracy(results_file: str) -> float:
+    """
+    从已保存的结果文件中读取基线准确率
+
+    Args:
+        results_file (str): 结果JSON文件路径（LLM或auto保存的格式，summary.accuracy为百分数）
+
+    Returns:
+        float: 基线准确率，取值[0, 1]；有correct和total时按二者计算，否则为summary.accuracy / 100
+    """
+    with open(results_file, 'r', encoding='utf-8') as f:
+        summary = json.load(f)['summary']
+    if summary.get('total'):
+        # auto保存的accuracy保留一位小数，按计数计算更精确
+        return summary['correct'] / summary['total']
+    # 结果文件中的准确率总是百分数，不能按数值大小猜测单位（1%的基线就是0.01）
+    return float(summary['accuracy']) / 100
+
+
+class SequentialEvaluator:
+    """
+    准确率的序贯置信区间跟踪器
+
+    检验时刻按几何级数分布（样本数每增长look_growth倍检验一次），检验次数随样本数对数增长。
+    为了在反复查看结果时仍保证整体置信度，第k次检验使用 alpha * 6 / (pi^2 * k^2)
+    的显著性水平（各次之和不超过alpha）。
+    """
+
+    def __init__(self, target_width: float = 0.05, confidence: float = 0.95,
+                 baseline: Optional[float] = None, min_samples: int = 30, look_growth: float = 1.25):
+        """
+        Args:
+            target_width (float): 置信区间目标宽度，达到后停止
+            confidence (float): 整体置信度
+            baseline (Optional[float]): 基线准确率，区间完全高于或低于基线时停止
+            min_samples (int): 开始检验前的最少样本数
+            look_growth (float): 相邻两次检验之间样本数的增长倍数，须大于1
+        """
+        self.target_width = target_width
+        self.alpha = 1 - confidence
+        self.confidence = confidence
+        self.baseline = baseline
+        self.min_samples = min_samples
+        self.look_growth = look_growth
+        self._next_look = min_samples
+
+        self.n = 0
+        self.successes = 0
+        self.looks = 0
+        self.interval = (0.0, 1.0)
+        self.stopped = False
+        self.reason: Optional[str] = None
+
+    def update(self, is_match: bool) -> bool:
+        """
+        记录一个样本的评估结果
+
+        Args:
+            is_match (bool): 该样本是否预测正确
+
+        Returns:
+            bool: 是否应停止评估
+        """
+        self.n += 1
+        if is_match:
+            self.successes += 1
+
+        if self.stopped or self.n < self._next_look:
+            return self.stopped
+
+        self.looks += 1
+        self._next_look = max(self.n + 1, math.ceil(self.n * self.look_growth))
+        look_alpha = self.alpha * 6 / (math.pi ** 2 * self.looks ** 2)
+        low, high = wilson_interval(self.successes, self.n, look_alpha)
+        self.interval = (low, high)
+
+        if self.baseline is not None and low > self.baseline:
+            self.stopped, self.reason = True, 'better_than_baseline'
+        elif self.baseline is not None and high < self.baseline:
+            self.stopped, self.reason = True, 'worse_than_baseline'
+        elif high - low <= self.target_width:
+            self.stopped, self.reason = True, 'target_width_reached'
+        return self.stopped
+
+    @property
+    def accuracy(self) -> float:
+        """当前准确率点估计"""
+        return self.successes / self.n if self.n else 0.0
+
+    def summary(self, total_available: int) -> Dict[str, Any]:
+        """
+        生成提前停止的统计摘要
+
+        Args:
+            total_available (int): 可评估的样本总数
+
+        Returns:
+            Dict[str, Any]: 包含评估样本数、节省样本数、停止原因和置信区间的字典
+        """
+        if not self.stopped and self.n:
+            # 评估耗尽样本时追加一次检验，给出最终区间
+            look_alpha = self.alpha * 6 / (math.pi ** 2 * (self.looks + 1) ** 2)
+            self.interval = wilson_interval(self.successes, self.n, look_alpha)
+        return {
+            'evaluated': self.n,
+            'total_available': total_available,
+            'samples_saved': max(0, total_available - self.n),
+            'stopped_early': self.stopped,
+            'reason': self.reason or 'exhausted',
+            'accuracy': self.accuracy,
+            'confidence': self.confidence,
+            'ci_low': self.interval[0],
+            'ci_high': self.interval[1],
+            'target_width': self.target_width,
+            'baseline': self.baseline
+        }
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享内存数据集模块
+多进程分析时把全部样本源代码按UTF-8编码一次性写入共享内存区，工作进程在初始化时按名称挂载，
+任务只携带(样本序号, 偏移, 长度)三个整数，源代码在工作进程中直接从共享内存解码，
+不再为每个样本pickle并经管道复制整段源代码；同时提供与逐样本pickle传输方式的对比测量
+"""
+
+import contextlib
+import multiprocessing
+import pickle
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from java_complexity_analyzer import analyze_java_complexity, analyze_with_fallback, ANALYZER_VERSION
+from parser_backends import get_backend
+from parse_registry import ParseEventRecorder
+from scheduler import in_order
+from utils import AnalysisError
+
+TRANSPORTS = ('shared', 'pickle')
+
+_WARMUP_SOURCE = 'class Warmup { void f(int n) { for (int i = 0; i < n; i++) { } } }'
+
+# 工作进程内的状态，由进程池initializer设置
+_worker_arena: Optional[shared_memory.SharedMemory] = None
+_worker_backend: Optional[str] = None
+_worker_fallback: Optional[str] = None
+_worker_recorder: Optional[ParseEventRecorder] = None
+
+
+class SharedSourceArena:
+    """
+    保存全部源代码的共享内存区
+
+    源代码按顺序首尾相接写入一块共享内存，handles[i]是第i段源代码的(偏移, 长度)，单位为字节。
+    创建者负责close()，close()同时释放共享内存。
+    """
+
+    def __init__(self, sources: Sequence[str]):
+        """
+        Args:
+            sources (Sequence[str]): 源代码列表
+        """
+        encoded = [source.encode('utf-8') for source in sources]
+        self.nbytes = sum(len(data) for data in encoded)
+        # 共享内存大小不能为0
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.nbytes))
+        self.handles: List[Tuple[int, int]] = []
+        offset = 0
+        for data in encoded:
+            self._shm.buf[offset:offset + len(data)] = data
+            self.handles.append((offset, len(data)))
+            offset += len(data)
+
+    @property
+    def name(self) -> str:
+        """共享内存名称，工作进程据此挂载"""
+        return self._shm.name
+
+    def source(self, index: int) -> str:
+        """
+        读取第index段源代码
+
+        Args:
+            index (int): 样本序号
+
+        Returns:
+            str: 源代码
+        """
+        offset, length = self.handles[index]
+        return read_source(self._shm.buf, offset, length)
+
+    def close(self) -> None:
+        """关闭并释放共享内存"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def __enter__(self) -> 'SharedSourceArena':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def attach_arena(name: str) -> shared_memory.SharedMemory:
+    """
+    在工作进程中按名称挂载共享内存区
+
+    进程池的工作进程与创建者共用同一个resource_tracker，挂载时的重复登记不会导致提前释放，
+    共享内存只由创建者的close()释放。
+
+    Args:
+        name (str): 共享内存名称
+
+    Returns:
+        shared_memory.SharedMemory: 挂载的共享内存
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+def read_source(buffer: memoryview, offset: int, length: int) -> str:
+    """
+    从共享内存缓冲区解码一段源代码
+
+    Args:
+        buffer (memoryview): 共享内存缓冲区
+        offset (int): 字节偏移
+        length (int): 字节长度
+
+    Returns:
+        str: 源代码
+    """
+    return str(buffer[offset:offset + length], 'utf-8')
+
+
+def _init_worker(arena_name: Optional[str], backend: Optional[str], fallback: Optional[str],
+                 known: Optional[Dict[Tuple[str, str], Dict[str, Any]]]) -> None:
+    """工作进程初始化：挂载共享内存区，记录解析器后端并完成一次分析预热"""
+    global _worker_arena, _worker_backend, _worker_fallback, _worker_recorder
+    if arena_name is not None:
+        _worker_arena = attach_arena(arena_name)
+    _worker_backend = backend
+    _worker_fallback = fallback
+    _worker_recorder = ParseEventRecorder(known, ANALYZER_VERSION) if known is not None else None
+    analyze_java_complexity(_WARMUP_SOURCE, backend=backend)
+    if fallback:
+        analyze_java_complexity(_WARMUP_SOURCE, backend=fallback)
+
+
+def _analyze_task(task: Tuple[Any, ...]) -> Tuple[int, str, Optional[str], float, Optional[List[Tuple[Any, ...]]]]:
+    """
+    在工作进程中分析一个样本
+
+    Args:
+        task (Tuple[Any, ...]): 共享内存传输时为(样本序号, 偏移, 长度)，pickle传输时为(样本序号, 源代码)
+
+    Returns:
+        Tuple: (样本序号, 复杂度标识或"error", 错误信息, 分析耗时秒数, 解析失败登记事件)
+    """
+    start = time.perf_counter()
+    if len(task) == 3:
+        source = read_source(_worker_arena.buf, task[1], task[2])
+    else:
+        source = task[1]
+    try:
+        output, error = analyze_with_fallback(source, backend=_worker_backend, fallback=_worker_fallback,
+                                              registry=_worker_recorder), None
+    except AnalysisError as e:
+        output, error = 'error', str(e)
+    events = _worker_recorder.take_events() if _worker_recorder is not None else None
+    return task[0], output, error, time.perf_counter() - start, events
+
+
+def default_chunksize(total: int, workers: int) -> int:
+    """每个工作进程大约分到8批任务，批大小在1到64之间"""
+    return max(1, min(64, total // (workers * 8)))
+
+
+def build_tasks(sources: Sequence[str], arena: Optional[SharedSourceArena]) -> List[Tuple[Any, ...]]:
+    """
+    生成发送给工作进程的任务
+
+    Args:
+        sources (Sequence[str]): 源代码列表
+        arena (Optional[SharedSourceArena]): 共享内存区，为空时任务直接携带源代码
+
+    Returns:
+        List[Tuple[Any, ...]]: 任务列表
+    """
+    if arena is None:
+        return [(index, source) for index, source in enumerate(sources)]
+    return [(index, offset, length) for index, (offset, length) in enumerate(arena.handles)]
+
+
+def task_ipc_bytes(tasks: Sequence[Tuple[Any, ...]], chunksize: int) -> int:
+    """
+    估算任务经管道发送给工作进程的字节数，按进程池的批次分别pickle
+
+    Args:
+        tasks (Sequence[Tuple[Any, ...]]): 任务列表
+        chunksize (int): 批大小
+
+    Returns:
+        int: pickle后的总字节数
+    """
+    return sum(len(pickle.dumps(list(tasks[start:start + chunksize]), pickle.HIGHEST_PROTOCOL))
+               for start in range(0, len(tasks), chunksize))
+
+
+def analyze_in_workers(sources: Sequence[str], workers: int, backend: Optional[str] = None,
+                       fallback: Optional[str] = None, registry=None, transport: str = 'shared',
+                       chunksize: Optional[int] = None, order: Optional[Sequence[int]] = None
+                       ) -> Iterator[Tuple[int, str, Optional[str], float]]:
+    """
+    用多个工作进程分析源代码，按输入顺序逐个产出结果
+
+    给出order时按该顺序逐个派发任务（如scheduler.longest_first()），空闲的工作进程从共享队列领取下一个，
+    乱序完成的结果在主进程中缓存并恢复为输入顺序。
+
+    提前结束迭代（如提前停止评估）时关闭生成器即可，进程池会被终止、共享内存会被释放。
+
+    Args:
+        sources (Sequence[str]): 源代码列表
+        workers (int): 工作进程数
+        backend (Optional[str]): 主解析器后端
+        fallback (Optional[str]): 备用解析器后端
+        registry (optional): 解析失败登记表，工作进程按其快照跳过已知失败，新的事件在主进程中写回
+        transport (str): 'shared'通过共享内存传递源代码，'pickle'为每个任务pickle源代码
+        chunksize (Optional[int]): 每批任务数，为空时按样本数和进程数自动选择；给出order时默认为1
+        order (Optional[Sequence[int]]): 任务派发顺序，为空时按输入顺序分批派发
+
+    Yields:
+        Tuple[int, str, Optional[str], float]: (样本序号, 复杂度标识或"error", 错误信息, 分析耗时秒数)
+
+    Raises:
+        ValueError: 传输方式未知时抛出
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport}, expected one of {TRANSPORTS}")
+    arena = SharedSourceArena(sources) if transport == 'shared' else None
+    try:
+        tasks = build_tasks(sources, arena)
+        known = registry.known_failures() if registry is not None else None
+        initargs = (arena.name if arena is not None else None, backend, fallback, known)
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            if order is None:
+                results = pool.imap(_analyze_task, tasks, chunksize or default_chunksize(len(tasks), workers))
+            else:
+                results = in_order(pool.imap_unordered(_analyze_task, [tasks[index] for index in order],
+                                                       chunksize or 1))
+            for index, output, error, duration, events in results:
+                if events:
+                    registry.apply_events(sources[index], events, get_backend)
+                yield index, output, error, duration
+    finally:
+        if arena is not None:
+            arena.close()
+
+
+def benchmark_transports(sources: Sequence[str], workers: int, backend: Optional[str] = None,
+                         chunksize: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """
+    对比单进程、pickle传输和共享内存传输三种方式的端到端耗时与任务传输字节数
+
+    Args:
+        sources (Sequence[str]): 源代码列表
+        workers (int): 工作进程数
+        backend (Optional[str]): 解析器后端
+        chunksize (Optional[int]): 每批任务数
+
+    Returns:
+        Dict[str, Dict[str, float]]: 每种方式的seconds、ipc_bytes、ipc_bytes_per_sample和speedup（相对pickle传输）
+    """
+    chunksize = chunksize or default_chunksize(len(sources), workers)
+    report: Dict[str, Dict[str, float]] = {}
+
+    start = time.perf_counter()
+    for source in sources:
+        try:
+            analyze_java_complexity(source, backend=backend)
+        except AnalysisError:
+            pass
+    report['serial'] = {'seconds': time.perf_counter() - start, 'ipc_bytes': 0}
+
+    for transport in ('pickle', 'shared'):
+        start = time.perf_counter()
+        for _ in analyze_in_workers(sources, workers, backend=backend, transport=transport, chunksize=chunksize):
+            pass
+        seconds = time.perf_counter() - start
+        with SharedSourceArena(sources) if transport == 'shared' else contextlib.nullcontext() as arena:
+            ipc_bytes = task_ipc_bytes(build_tasks(sources, arena), chunksize)
+        report[transport] = {'seconds': seconds, 'ipc_bytes': ipc_bytes}
+
+    for entry in report.values():
+        entry['ipc_bytes_per_sample'] = entry['ipc_bytes'] / len(sources) if sources else 0.0
+        entry['speedup'] = report['pickle']['seconds'] / entry['seconds'] if entry['seconds'] else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from data_reader import extract_java_samples
+
+    parser = argparse.ArgumentParser(description='对比多进程分析时pickle传输与共享内存传输的开销')
+    parser.add_argument('--data', '-d', type=str, default='../data/data.jsonl', help='JSONL数据集文件路径')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='工作进程数')
+    parser.add_argument('--chunksize', type=int, default=None, help='每批任务数')
+    parser.add_argument('--parser', type=str, default=None, choices=['javalang', 'tree-sitter'], help='解析器后端')
+    args = parser.parse_args()
+
+    sources = [sample['source'] for sample in extract_java_samples(args.data)]
+    report = benchmark_transports(sources, args.workers, backend=args.parser, chunksize=args.chunksize)
+    print(f"{len(sources)} 个样本，源代码共 {sum(len(s.encode('utf-8')) for s in sources)} 字节，"
+          f"{args.workers} 个工作进程")
+    for name, entry in report.items():
+        print(f"  {name:7s} {entry['seconds']:8.2f}s  任务传输 {entry['ipc_bytes_per_sample']:10.1f} 字节/样本  "
+              f"相对pickle加速 {entry['speedup']:.2f}x")
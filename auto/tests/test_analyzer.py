@@ -139,6 +139,21 @@ class TestJavaComplexityAnalyzer(unittest.TestCase):
         """
         result = analyze_java_complexity(binary_search_code)
         self.assertEqual(result, "logn")
+    
+    def test_for_update_log_loop(self):
+        """测试for循环更新部分的乘除赋值，变量名不在源码模式列表中时同样识别为对数循环"""
+        doubling_code = """
+        public class Test {
+            public static void main(String[] args) {
+                int n = 1024;
+                for (int step = 1; step < n; step*=2) {
+                    System.out.println(step);
+                }
+            }
+        }
+        """
+        self.assertEqual(analyze_java_complexity(doubling_code), "logn")
+        self.assertEqual(analyze_java_complexity(doubling_code.replace('step*=2', 'step+=2')), "linear")
 
 
 if __name__ == '__main__':
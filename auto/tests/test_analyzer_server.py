@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试常驻分析服务模块
+"""
+
+import http.client
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from analyzer_server import AnalyzerService, AnalyzerServer, analyze_remote, analyze_remote_one, \
+    _parse_analyze_request
+
+
+class TestAnalyzerServer(unittest.TestCase):
+    """测试HTTP接口、流式批量结果与指标"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = AnalyzerService(workers=1)
+        cls.server = AnalyzerServer(('127.0.0.1', 0), cls.service)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def test_single(self):
+        """测试单个源码分析"""
+        result = analyze_remote_one('class A { void f(int n) { for (int i = 0; i < n; i++) { } } }',
+                                    url=self.server.url)
+        self.assertEqual(result['output'], 'linear')
+        self.assertIsNone(result['error'])
+
+    def test_batch_stream(self):
+        """测试批量分析按下标返回全部结果，语法错误单独标记"""
+        sources = ['class A { void f() { int a = 1; } }', 'not java',
+                   'class B { void f(int n) { for (int i = 0; i < n; i++) for (int j = 0; j < n; j++) { } } }']
+        results = sorted(analyze_remote(sources, url=self.server.url), key=lambda r: r['index'])
+        self.assertEqual([r['output'] for r in results], ['constant', 'error', 'quadratic'])
+        self.assertIsNotNone(results[1]['error'])
+
+    def test_metrics_and_errors(self):
+        """测试指标接口与错误请求"""
+        analyze_remote_one('class A { }', url=self.server.url)
+        with urllib.request.urlopen(f'{self.server.url}/metrics') as response:
+            metrics = json.load(response)
+        self.assertGreaterEqual(metrics['counters']['requests'], 1)
+        self.assertIn('p95_ms', metrics['latency']['analysis'])
+        request = urllib.request.Request(f'{self.server.url}/analyze', data=b'{"foo": 1}')
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(request)
+        self.assertEqual(context.exception.code, 400)
+
+    def test_invalid_content_length(self):
+        """测试非数字的Content-Length返回400并计入bad_requests，而不是断开连接"""
+        before = self.service.metrics.snapshot()['counters'].get('bad_requests', 0)
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=10)
+        try:
+            connection.request('POST', '/analyze', body=b'{}', headers={'Content-Length': 'abc'})
+            response = connection.getresponse()
+            self.assertEqual(response.status, 400)
+            self.assertIn('Content-Length', json.load(response)['error'])
+        finally:
+            connection.close()
+        self.assertEqual(self.service.metrics.snapshot()['counters']['bad_requests'], before + 1)
+
+    def test_parse_request(self):
+        """测试请求体格式解析"""
+        self.assertEqual(_parse_analyze_request({'source': 'x'}), (['x'], [None], False))
+        self.assertEqual(_parse_analyze_request({'samples': [{'id': 'a', 'src': 'y'}]}), (['y'], ['a'], True))
+        with self.assertRaises(ValueError):
+            _parse_analyze_request({'sources': [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试静态分析器性能基准模块
+"""
+
+import json
+import math
+import os
+import tempfile
+import unittest
+from benchmark_analyzer import (fit_scaling_exponent, measure_source, benchmark_synthetic, check_exponents,
+                                write_benchmark_results)
+from synthetic_corpus import loop_nest_program
+from java_complexity_analyzer import analyze_java_complexity
+
+
+class TestBenchmarkAnalyzer(unittest.TestCase):
+    """测试缩放指数拟合与合成程序基准"""
+
+    def test_fit_scaling_exponent(self):
+        """测试幂律数据的指数拟合"""
+        sizes = [10, 20, 40, 80, 160]
+        fit = fit_scaling_exponent(sizes, [3.0 * s ** 2 for s in sizes])
+        self.assertAlmostEqual(fit['exponent'], 2.0)
+        self.assertAlmostEqual(fit['coefficient'], 3.0)
+        self.assertAlmostEqual(fit['r2'], 1.0)
+        self.assertTrue(math.isnan(fit_scaling_exponent([10], [1.0])['exponent']))
+
+    def test_synthetic_program_labels(self):
+        """测试合成程序可解析且嵌套深度对应预期标签"""
+        self.assertEqual(analyze_java_complexity(loop_nest_program(3, 1)), 'linear')
+        self.assertEqual(analyze_java_complexity(loop_nest_program(3, 2)), 'quadratic')
+        self.assertEqual(analyze_java_complexity(loop_nest_program(3, 3)), 'cubic')
+
+    def test_measure_source(self):
+        """测试单个源码的分阶段测量"""
+        measurement = measure_source(loop_nest_program(2, 2), repeat=1)
+        self.assertGreater(measurement['ast_nodes'], 0)
+        self.assertGreater(measurement['parse_ms'], 0)
+        self.assertGreater(measurement['analyze_ast_ms'], 0)
+
+    def test_benchmark_synthetic_and_write(self):
+        """测试合成基准的结构与JSON输出"""
+        results = benchmark_synthetic(sizes=[2, 4], nestings=[1], depths=[2, 4], repeat=1)
+        self.assertEqual(len(results['measurements']), 2)
+        self.assertIn('analyze_ast', results['fits']['1'])
+        self.assertEqual(len(results['depth_measurements']), 2)
+        self.assertEqual(check_exponents({'stage': {'exponent': 1.5}}, 1.2), [('stage', 1.5)])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = write_benchmark_results(results, os.path.join(temp_dir, 'bench', 'out.json'))
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            self.assertIn('git_revision', payload['metadata'])
+            self.assertEqual(len(payload['depth_measurements']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
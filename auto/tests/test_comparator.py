@@ -26,6 +26,11 @@ class TestResultComparator(unittest.TestCase):
         result = compare_individual_result("linear", "invalid_type")
         self.assertFalse(result)
     
+    def test_compare_individual_result_equivalent_forms(self):
+        """测试等价写法归一后比较"""
+        self.assertTrue(compare_individual_result("nlogn", "O(n log n)"))
+        self.assertFalse(compare_individual_result("invalid_type", "invalid_type"))
+    
     def test_compare_results(self):
         """测试比较多个结果"""
         results = [
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试复杂度标签规范化模块
+"""
+
+import unittest
+from complexity_labels import canonical_label, labels_match, benchmark_canonicalizer, MESSY_OUTPUTS
+from utils import COMPLEXITY_TYPES
+
+
+class TestComplexityLabels(unittest.TestCase):
+    """测试各种写法归一为标签"""
+
+    def test_labels_are_fixed_points(self):
+        """测试标签本身归一为自身"""
+        for label in COMPLEXITY_TYPES:
+            self.assertEqual(canonical_label(label), label)
+
+    def test_messy_outputs(self):
+        """测试大小写、上标、O/Θ包裹、代码块、反引号和句末标点"""
+        for output, label in MESSY_OUTPUTS:
+            self.assertEqual(canonical_label(output), label, output)
+        self.assertEqual(canonical_label('o(n logn)'), 'nlogn')
+        self.assertEqual(canonical_label('Ω(log₂n)'), 'logn')
+        self.assertEqual(canonical_label('O(n * n)'), 'quadratic')
+        self.assertEqual(canonical_label(' **Cubic** '), 'cubic')
+
+    def test_unrecognized(self):
+        """测试无法识别的输出返回None"""
+        for output in (None, '', 'sqrtn', 'O(n^2 log n)', 'The answer is linear', 'c'):
+            self.assertIsNone(canonical_label(output), output)
+
+    def test_labels_match(self):
+        """测试匹配判断与未知期望标签的原样比较"""
+        self.assertTrue(labels_match('Θ(n²)', 'quadratic'))
+        self.assertFalse(labels_match('O(n)', 'quadratic'))
+        self.assertFalse(labels_match(None, 'linear'))
+        self.assertTrue(labels_match('custom', 'custom'))
+        self.assertFalse(labels_match(None, None))
+
+    def test_benchmark(self):
+        """测试基准对比：规范化不丢失原实现的匹配，并匹配不规范写法"""
+        pairs = [('linear', 'linear'), ('o(n^2)', 'quadratic'), ('np', 'cubic')] + MESSY_OUTPUTS
+        result = benchmark_canonicalizer(pairs, repeat=1)
+        self.assertEqual(result['legacy_matches'], 2)
+        self.assertEqual(result['canonical_matches'], 2 + len(MESSY_OUTPUTS))
+        self.assertEqual(result['gained'], len(MESSY_OUTPUTS))
+        self.assertEqual(result['lost'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试近重复样本检测模块
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from dedup import (tokenize_source, shingle_hashes, MinHasher, estimate_similarity, NearDuplicateIndex,
+                   deduplicate_jsonl, load_clusters, group_by_cluster, dedup_summary, default_sidecar_path)
+
+SUM_LOOP = """
+public class Main {
+    public static void main(String[] args) {
+        int n = 100, s = 0;
+        for (int i = 0; i < n; i++) { s += i; }
+        System.out.println("sum=" + s);
+    }
+}
+"""
+
+# 只改动注释、空白和字符串内容
+SUM_LOOP_REFORMATTED = """
+public class Main {  // 求和
+    public static void main(String[] args)
+    {
+        int n = 100, s = 0;   /* 累加 */
+        for (int i = 0; i < n; i++)
+        {
+            s += i;
+        }
+        System.out.println("total: " + s);
+    }
+}
+"""
+
+# 在相同代码后追加一个辅助方法
+SUM_LOOP_EXTENDED = SUM_LOOP.rstrip()[:-1] + """
+    static int max(int a, int b) { return a > b ? a : b; }
+}
+"""
+
+MATRIX = """
+public class Main {
+    public static void main(String[] args) {
+        int n = 50;
+        long[][] c = new long[n][n];
+        for (int x = 0; x < n; x++)
+            for (int y = 0; y < n; y++)
+                for (int z = 0; z < n; z++)
+                    c[x][y] += (long) x * z + y;
+        System.out.println(c[n - 1][n - 1]);
+    }
+}
+"""
+
+
+class TestMinHash(unittest.TestCase):
+    """测试词法归一化与MinHash签名"""
+
+    def test_tokenize_ignores_comments_and_layout(self):
+        """测试注释、空白和字面量内容不影响词法单元"""
+        self.assertEqual(tokenize_source(SUM_LOOP), tokenize_source(SUM_LOOP_REFORMATTED))
+        self.assertEqual(tokenize_source('a/b // c\n"x\\"y" \'z\''), ['a', '/', 'b', '"', "'"])
+
+    def test_shingle_hashes(self):
+        """测试分片哈希的去重和短输入"""
+        self.assertEqual(len(shingle_hashes([])), 0)
+        self.assertEqual(len(shingle_hashes(['a', 'b'], shingle_size=5)), 1)
+        self.assertEqual(len(shingle_hashes(['a', 'b', 'a', 'b', 'a', 'b'], shingle_size=2)), 2)
+
+    def test_similarity_estimate(self):
+        """测试签名相似度接近真实Jaccard相似度，且结果可复现"""
+        hasher = MinHasher(num_perm=256, seed=5)
+        first = shingle_hashes(tokenize_source(SUM_LOOP))
+        second = shingle_hashes(tokenize_source(SUM_LOOP_EXTENDED))
+        exact = len(np.intersect1d(first, second)) / len(np.union1d(first, second))
+        estimate = estimate_similarity(hasher.signature(first), hasher.signature(second))
+        self.assertAlmostEqual(estimate, exact, delta=0.1)
+        self.assertTrue(np.array_equal(hasher.signature(first), MinHasher(num_perm=256, seed=5).signature(first)))
+        self.assertEqual(estimate_similarity(hasher.source_signature(SUM_LOOP),
+                                             hasher.source_signature(SUM_LOOP_REFORMATTED)), 1.0)
+        self.assertLess(estimate_similarity(hasher.source_signature(SUM_LOOP),
+                                            hasher.source_signature(MATRIX)), 0.3)
+
+    def test_index(self):
+        """测试LSH索引的聚簇与分组隔离"""
+        hasher = MinHasher()
+        index = NearDuplicateIndex(threshold=0.8)
+        self.assertEqual(index.add(1, hasher.source_signature(SUM_LOOP), group='A'), (1, 1.0))
+        self.assertEqual(index.add(2, hasher.source_signature(MATRIX), group='A'), (2, 1.0))
+        self.assertEqual(index.add(3, hasher.source_signature(SUM_LOOP_REFORMATTED), group='A')[0], 1)
+        self.assertEqual(index.add(4, hasher.source_signature(SUM_LOOP), group='B')[0], 4)
+        self.assertEqual(index.clusters, 3)
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(num_perm=128, bands=7)
+
+
+class TestDeduplicateJsonl(unittest.TestCase):
+    """测试旁路文件的生成与读取"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.temp_dir.name, 'data.jsonl')
+        records = [
+            {'src': SUM_LOOP, 'complexity': 'linear', 'problem': 'P1'},
+            {'src': MATRIX, 'complexity': 'cubic', 'problem': 'P1'},
+            {'src': SUM_LOOP_REFORMATTED, 'complexity': 'linear', 'problem': 'P1'},
+            {'src': SUM_LOOP, 'complexity': 'linear', 'problem': 'P2'},
+        ]
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            for record in records[:2]:
+                f.write(json.dumps(record) + '\n')
+            f.write('\n{bad json\n')
+            for record in records[2:]:
+                f.write(json.dumps(record) + '\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_sidecar_round_trip(self):
+        """测试簇ID按数据集行号写出，并可按行号或样本ID读取"""
+        stats = deduplicate_jsonl(self.data_file)
+        self.assertEqual(stats['output'], default_sidecar_path(self.data_file))
+        self.assertEqual((stats['records'], stats['clusters'], stats['duplicates']), (4, 3, 1))
+        self.assertEqual(load_clusters(stats['output']), {1: 1, 2: 2, 5: 1, 6: 6})
+        self.assertEqual(load_clusters(stats['output'], key='sample_id'), {1: 1, 2: 2, 5: 1, 6: 6})
+
+        stats = deduplicate_jsonl(self.data_file, by_problem=False)
+        self.assertEqual(load_clusters(stats['output']), {1: 1, 2: 2, 5: 1, 6: 1})
+
+    def test_group_by_cluster(self):
+        """测试分组以首个出现的元素为代表，缺失簇ID的元素单独成簇"""
+        clusters = {1: 1, 2: 2, 5: 1, 6: 1}
+        groups = group_by_cluster([2, 5, 6, 7, 1], clusters.get)
+        self.assertEqual(groups, [(2, []), (5, [6, 1]), (7, [])])
+        summary = dedup_summary(groups, representative_matches=2)
+        self.assertEqual(summary['samples'], 5)
+        self.assertEqual(summary['clusters'], 3)
+        self.assertEqual(summary['propagated'], 2)
+        self.assertEqual(summary['calls_saved'], 2)
+        self.assertAlmostEqual(summary['representative_accuracy'], 2 / 3)
+        # 提前停止时只评估了前两个代表，节省的请求只来自已评估簇的成员
+        stopped = dedup_summary(groups, representative_matches=1, evaluated=2, propagated=2)
+        self.assertEqual(stopped['calls_saved'], 2)
+        stopped = dedup_summary(groups, representative_matches=1, evaluated=1, propagated=0)
+        self.assertEqual(stopped['calls_saved'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试性能统计模块
+"""
+
+import unittest
+from instrumentation import Instrumentation, NULL_INSTRUMENTATION, percentile, summarize_durations
+from java_complexity_analyzer import analyze_java_complexity
+from result_comparator import generate_statistics_report
+
+
+class TestInstrumentation(unittest.TestCase):
+    """测试分阶段计时与统计"""
+
+    def test_percentile(self):
+        """测试分位数插值"""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 0.5), 3.0)
+        self.assertEqual(percentile(values, 1.0), 5.0)
+        self.assertAlmostEqual(percentile(values, 0.95), 4.8)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_summarize_durations(self):
+        """测试耗时汇总与直方图"""
+        stats = summarize_durations([0.001, 0.002, 0.003])
+        self.assertEqual(stats['count'], 3)
+        self.assertAlmostEqual(stats['max_ms'], 3.0)
+        self.assertEqual(sum(count for _, count in stats['histogram']), 3)
+
+    def test_stages_and_slowest(self):
+        """测试阶段记录与最慢样本"""
+        instrumentation = Instrumentation(slowest_n=2)
+        instrumentation.start()
+        with instrumentation.stage('parse'):
+            pass
+        for sample_id, duration in [(1, 0.01), (2, 0.03), (3, 0.02)]:
+            instrumentation.sample_done(sample_id, duration)
+        instrumentation.stop()
+        summary = instrumentation.summary()
+        self.assertEqual(summary['samples'], 3)
+        self.assertEqual(summary['stages']['parse']['count'], 1)
+        self.assertEqual([entry['sample_id'] for entry in summary['slowest_samples']], [2, 3])
+
+    def test_analyzer_stages(self):
+        """测试分析器记录parse和analyze_ast阶段"""
+        instrumentation = Instrumentation()
+        analyze_java_complexity("public class T { void f() {} }", instrumentation=instrumentation)
+        stages = instrumentation.summary()['stages']
+        self.assertIn('parse', stages)
+        self.assertIn('analyze_ast', stages)
+
+    def test_null_instrumentation(self):
+        """测试空实现不记录任何数据"""
+        with NULL_INSTRUMENTATION.stage('parse'):
+            pass
+        NULL_INSTRUMENTATION.sample_done(1, 0.1)
+        self.assertEqual(NULL_INSTRUMENTATION.summary(), {})
+
+    def test_report_includes_performance(self):
+        """测试统计报告包含性能统计"""
+        instrumentation = Instrumentation()
+        instrumentation.start()
+        instrumentation.record('parse', 0.002)
+        instrumentation.sample_done(7, 0.002)
+        instrumentation.stop()
+        results = [{"sample_id": 7, "expected_complexity": "linear", "output": "linear", "is_match": True}]
+        report = generate_statistics_report(results, performance=instrumentation.summary())
+        self.assertIn("性能统计", report)
+        self.assertIn("最慢样本: 7", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试解析失败登记模块
+"""
+
+import os
+import tempfile
+import unittest
+from java_complexity_analyzer import analyze_java_complexity, ANALYZER_VERSION
+from parse_registry import ParseFailureRegistry, KnownParseFailure, source_key
+from parser_backends import JavalangBackend
+from utils import AnalysisError, ParseError
+
+BROKEN = 'class A { void f( { int x = 1; }'
+VALID = 'class A { void f(int n) { for (int i = 0; i < n; i++) { } } }'
+
+
+class CountingBackend(JavalangBackend):
+    """统计parse()调用次数、可指定版本号的javalang后端"""
+
+    def __init__(self, version='0.13.0'):
+        self._fake_version = version
+        self.parses = 0
+
+    @property
+    def version(self):
+        return self._fake_version
+
+    def parse(self, source_code):
+        self.parses += 1
+        return super().parse(source_code)
+
+
+class TestParseFailureRegistry(unittest.TestCase):
+    """测试已知失败的跳过、持久化与版本变更后的重新验证"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'registry.jsonl')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_known_failure_is_not_reparsed(self):
+        """测试登记过的失败样本在同一版本下不再解析"""
+        backend = CountingBackend()
+        registry = ParseFailureRegistry(self.path, ANALYZER_VERSION)
+        with self.assertRaises(ParseError) as first:
+            analyze_java_complexity(BROKEN, backend=backend, registry=registry)
+        self.assertNotIsInstance(first.exception, KnownParseFailure)
+        self.assertEqual(analyze_java_complexity(VALID, backend=backend, registry=registry), 'linear')
+        registry.close()
+
+        registry = ParseFailureRegistry(self.path, ANALYZER_VERSION)
+        self.assertEqual(len(registry), 1)
+        entry = registry.lookup(BROKEN, backend)
+        self.assertEqual(entry['key'], source_key(BROKEN))
+        self.assertEqual((entry['line'], entry['column']), (1, 19))
+        self.assertIn('JavaSyntaxError', entry['error'])
+        with self.assertRaises(KnownParseFailure):
+            analyze_java_complexity(BROKEN, backend=backend, registry=registry)
+        self.assertTrue(issubclass(KnownParseFailure, AnalysisError))
+        self.assertEqual(backend.parses, 2)
+        summary = registry.summary()
+        self.assertEqual(summary['skipped'], 2)
+        self.assertEqual(summary['known_failures'], 1)
+        self.assertEqual(summary['by_version'], {f'javalang 0.13.0 / analyzer {ANALYZER_VERSION}': 1})
+        registry.close()
+
+    def test_version_change_rechecks(self):
+        """测试解析器版本变更后重新解析，并统计仍失败与已修复的样本"""
+        old = CountingBackend(version='0.12.0')
+        registry = ParseFailureRegistry(self.path, ANALYZER_VERSION)
+        for source in (BROKEN, VALID):
+            registry.record_failure(source, old, SyntaxError('line 1, column 3'))
+        registry.close()
+
+        new = CountingBackend(version='0.13.0')
+        registry = ParseFailureRegistry(self.path, ANALYZER_VERSION)
+        with self.assertRaises(ParseError):
+            analyze_java_complexity(BROKEN, backend=new, registry=registry)
+        self.assertEqual(analyze_java_complexity(VALID, backend=new, registry=registry), 'linear')
+        self.assertEqual(new.parses, 2)
+        summary = registry.summary()
+        self.assertEqual((summary['still_failing'], summary['fixed'], summary['new_failures']), (1, 1, 0))
+        self.assertEqual(summary['known_failures'], 1)
+        registry.compact()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        # 分析器版本变更同样使旧记录失效
+        registry = ParseFailureRegistry(self.path, ANALYZER_VERSION + '-next')
+        self.assertIsNone(registry.lookup(BROKEN, new))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试解析器后端模块
+"""
+
+import unittest
+from parser_backends import (available_backends, get_backend, normalize_complexity_info, JavalangBackend,
+                             TreeSitterBackend)
+from java_complexity_analyzer import analyze_java_complexity, AnalysisError
+from synthetic_corpus import iter_corpus
+from benchmark_parsers import compare_backends
+
+HAS_TREE_SITTER = 'tree-sitter' in available_backends()
+
+# 容易让两种语法树的遍历产生差异的结构
+TRICKY_SOURCES = [
+    'class A { void solve(int[] a) { Arrays.sort(a, new Comparator<Integer>() { '
+    'public int compare(Integer x, Integer y) { return compare(y, x); } }); solve(a); '
+    'for (int v : a) { while (v > 0) { v--; } } } }',
+    'class A { int f(int n) { list.forEach(x -> { for (int i = 0; i < n; i++) { f(i); } }); '
+    'return f(n - 1) + f(n - 2); } }',
+    'class B extends A { void g() { super.g(); this.g(); } B() { g(); } }',
+    'class C { String s() { return new StringBuilder().append(1).reverse().toString(); } }',
+    'class D { void m(int n) { switch (n) { case 1: for (int i = 0; i < n; i++) { do { n--; } while (n > 0); } '
+    'break; default: m(n - 1); } } }',
+    'class F { int bs(int[] a, int k) { return Collections.binarySearch(list, k) + Arrays.binarySearch(a, k); } }',
+    'class G { void h(int n) { for (int x = n, y = 1; x > 0; x/=2, y++) { } for (int p = 1; p < n; this.q *= 2) { } '
+    'for (int z = 1; z < n; z *= -2) { } } int q; }',
+]
+
+
+class TestParserBackends(unittest.TestCase):
+    """测试后端注册与javalang后端"""
+
+    def test_default_backend(self):
+        """测试默认后端为javalang且实例共享"""
+        self.assertIsInstance(get_backend(), JavalangBackend)
+        self.assertIs(get_backend('javalang'), get_backend())
+        with self.assertRaises(ValueError):
+            get_backend('unknown')
+
+    def test_backend_instance_passthrough(self):
+        """测试直接传入后端实例"""
+        backend = JavalangBackend()
+        self.assertEqual(analyze_java_complexity('class A { void f() { } }', backend=backend), 'constant')
+
+
+@unittest.skipUnless(HAS_TREE_SITTER, 'tree-sitter-java is not installed')
+class TestTreeSitterParity(unittest.TestCase):
+    """测试tree-sitter后端与javalang后端的一致性"""
+
+    def test_tricky_sources(self):
+        """测试匿名类、lambda、super调用、链式调用等结构的复杂度信息一致"""
+        javalang_backend, tree_sitter_backend = get_backend('javalang'), get_backend('tree-sitter')
+        for source in TRICKY_SOURCES:
+            self.assertEqual(normalize_complexity_info(javalang_backend.analyze(source)),
+                             normalize_complexity_info(tree_sitter_backend.analyze(source)), source)
+
+    def test_synthetic_corpus_parity(self):
+        """测试合成语料上的复杂度信息和标识完全一致"""
+        sources = [record['src'] for record in iter_corpus(70, seed=11, max_padding=6)]
+        report = compare_backends(sources, ['javalang', 'tree-sitter'])
+        stats = report['backends']['tree-sitter']
+        self.assertEqual(stats['info_mismatches'], 0, stats['mismatches'])
+        self.assertEqual(stats['label_mismatches'], 0)
+        self.assertEqual(stats['error_mismatches'], 0)
+
+    def test_syntax_error(self):
+        """测试语法错误转换为AnalysisError"""
+        with self.assertRaises(AnalysisError) as context:
+            analyze_java_complexity('class A { void f( }', backend='tree-sitter')
+        self.assertIn('Java syntax error', str(context.exception))
+        self.assertIsInstance(get_backend('tree-sitter'), TreeSitterBackend)
+
+
+if __name__ == '__main__':
+    unittest.main()
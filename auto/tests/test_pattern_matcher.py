@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多模式字符串匹配模块
+"""
+
+import random
+import unittest
+from pattern_matcher import MultiPatternMatcher
+from java_complexity_analyzer import LOG_LOOP_PATTERNS
+
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    """测试编译匹配器与逐个子串查找结果一致"""
+
+    def test_contains_any(self):
+        """测试是否命中任一模式"""
+        matcher = MultiPatternMatcher(LOG_LOOP_PATTERNS)
+        self.assertTrue(matcher.contains_any('for (int i = 1; i < n; i *= 2) {}'))
+        self.assertTrue(matcher.contains_any('while (k /=2 > 0)'))
+        self.assertFalse(matcher.contains_any('for (int i = 0; i < n; i++) {}'))
+
+    def test_overlapping_positions(self):
+        """测试互为前缀和部分重叠的模式都能找到并给出位置"""
+        matcher = MultiPatternMatcher(['abc', 'bcd', 'b', 'abcd'])
+        self.assertEqual(matcher.find_all('xabcdx'), [(1, 'abcd'), (1, 'abc'), (2, 'bcd'), (2, 'b')])
+        self.assertEqual(matcher.search('xxbcd'), (2, 'bcd'))
+        self.assertIsNone(matcher.search('xyz'))
+
+    def test_matched_order(self):
+        """测试命中模式按构造顺序返回"""
+        markers = ['Sample Input', 'Sample Output', 'Sample Input 1', '/*']
+        matcher = MultiPatternMatcher(markers)
+        self.assertEqual(matcher.matched('/* Sample Input 1 */'), ['Sample Input', 'Sample Input 1', '/*'])
+
+    def test_ignore_case_and_special_chars(self):
+        """测试忽略大小写与正则特殊字符转义"""
+        matcher = MultiPatternMatcher(['Test: #', 'a.b', '(x)'], ignore_case=True)
+        self.assertEqual(matcher.matched('TEST: # and A.B'), ['test: #', 'a.b'])
+        self.assertFalse(matcher.contains_any('axb'))
+
+    def test_random_agreement(self):
+        """测试随机文本上与逐个子串查找的结果完全一致"""
+        rng = random.Random(7)
+        alphabet = 'ab c'
+        patterns = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+        matcher = MultiPatternMatcher(patterns)
+        unique = list(dict.fromkeys(patterns))
+        for _ in range(300):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(matcher.matched(text), [p for p in unique if p in text])
+            self.assertEqual(matcher.contains_any(text), any(p in text for p in unique))
+            expected = sorted(((i, p) for p in unique for i in range(len(text)) if text.startswith(p, i)),
+                              key=lambda hit: (hit[0], -len(hit[1])))
+            self.assertEqual(matcher.find_all(text), expected)
+
+    def test_empty_patterns(self):
+        """测试没有有效模式时抛出异常"""
+        with self.assertRaises(ValueError):
+            MultiPatternMatcher(['', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
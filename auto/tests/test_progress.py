@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进度报告模块
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from progress import ProgressReporter, JsonlLogSink
+
+
+class TestProgressReporter(unittest.TestCase):
+    """测试限频进度行"""
+
+    def test_counts(self):
+        """测试完成数、准确率和错误数统计"""
+        reporter = ProgressReporter(4, stream=io.StringIO())
+        reporter.update(is_match=True)
+        reporter.update(is_match=False, error=True)
+        reporter.update(is_match=True, count=2)
+        stats = reporter.snapshot()
+        self.assertEqual(stats['done'], 4)
+        self.assertEqual(stats['errors'], 1)
+        self.assertAlmostEqual(stats['accuracy'], 0.75)
+
+    def test_rate_limited_output(self):
+        """测试非终端输出被限频，close时输出最终进度"""
+        stream = io.StringIO()
+        reporter = ProgressReporter(1000, stream=stream)
+        for _ in range(1000):
+            reporter.update(is_match=True)
+        reporter.close()
+        lines = stream.getvalue().splitlines()
+        self.assertLessEqual(len(lines), 2)
+        self.assertIn('[1000/1000]', lines[-1])
+
+    def test_disabled(self):
+        """测试关闭时不输出进度行但仍计数，独立消息照常输出"""
+        stream = io.StringIO()
+        reporter = ProgressReporter(2, stream=stream, enabled=False)
+        reporter.update(is_match=True)
+        reporter.log('message')
+        reporter.close()
+        self.assertEqual(stream.getvalue(), 'message\n')
+        self.assertEqual(reporter.done, 1)
+
+
+class TestJsonlLogSink(unittest.TestCase):
+    """测试后台JSONL日志"""
+
+    def test_write_and_close(self):
+        """测试记录全部写入且close可重复调用"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'samples.jsonl')
+            with JsonlLogSink(path) as sink:
+                for i in range(100):
+                    sink.write({'sample_id': i, 'output': '线性'})
+            sink.close()
+            with open(path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([record['sample_id'] for record in records], list(range(100)))
+            self.assertEqual(records[0]['output'], '线性')
+
+
+if __name__ == '__main__':
+    unittest.main()
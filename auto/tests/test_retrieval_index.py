@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试相似样本检索模块
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from retrieval_index import build_retrieval_index, RetrievalIndex, source_terms
+from utils import FileReadError
+
+PROGRAMS = [
+    ('P1', 'linear', 'class A { int sum(int[] a) { int s = 0; for (int x : a) s += x; return s; } }'),
+    ('P1', 'linear', 'class B { int total(int[] a) { int t = 0; for (int y : a) t += y; return t; } }'),
+    ('P2', 'linear', 'class C { int sum(int[] v) { int s = 0; for (int x : v) s += x; return s; } }'),
+    ('P3', 'quadratic', 'class D { void pairs(int n) { for (int i = 0; i < n; i++) '
+                        'for (int j = 0; j < n; j++) count(i, j); } }'),
+    ('P4', 'logn', 'class E { int search(int[] a, int key) { int lo = 0, hi = a.length; '
+                   'while (lo < hi) { int mid = (lo + hi) / 2; if (a[mid] < key) lo = mid + 1; else hi = mid; } '
+                   'return lo; } }'),
+]
+
+
+class TestRetrievalIndex(unittest.TestCase):
+    """测试BM25索引的建立、检索与内存映射读取"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.temp_dir.name, 'data.jsonl')
+        self.index_dir = os.path.join(self.temp_dir.name, 'index')
+        with open(self.data_file, 'w', encoding='utf-8') as f:
+            for i, (problem, label, src) in enumerate(PROGRAMS):
+                f.write(json.dumps({'src': src, 'complexity': label, 'problem': problem}, ensure_ascii=False) + '\n')
+                if i == 1:
+                    f.write('\n{"src": "class X {}"}\n')
+        # 样本很少，保留全部词项
+        self.stats = build_retrieval_index(self.data_file, self.index_dir, num_buckets=1 << 12, max_df_ratio=None)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_source_terms(self):
+        """测试词项包含一元和二元组，注释不影响词项"""
+        terms, counts = source_terms('a b a', num_buckets=1 << 12)
+        self.assertEqual(int(counts.sum()), 5)
+        with_comment, _ = source_terms('a /* c */ b a', num_buckets=1 << 12)
+        self.assertEqual(terms.tolist(), with_comment.tolist())
+
+    def test_search(self):
+        """测试最相似的样本排在前面，且排除查询所属的问题"""
+        self.assertEqual(self.stats['documents'], 5)
+        query = PROGRAMS[0][2]
+        with RetrievalIndex(self.index_dir) as index:
+            self.assertEqual(len(index), 5)
+            ranked = index.search(query, k=5)
+            self.assertEqual(ranked[0][0], 0)
+            self.assertEqual([score for _, score in ranked], sorted((score for _, score in ranked), reverse=True))
+            neighbors = index.neighbors(query, k=2, exclude_problem='P1')
+            self.assertEqual(neighbors[0]['problem'], 'P2')
+            self.assertEqual(neighbors[0]['complexity'], 'linear')
+            self.assertEqual(neighbors[0]['src'], PROGRAMS[2][2])
+            self.assertTrue(all(neighbor['problem'] != 'P1' for neighbor in neighbors))
+            self.assertEqual(index.search('', k=3), [])
+            # 默认使用全部查询词项，显式截断时只用最稀有的词项打分
+            self.assertEqual(ranked, index.search(query, k=5, max_query_terms=10 ** 6))
+            truncated = index.search(query, k=5, max_query_terms=2)
+            self.assertLess(sum(score for _, score in truncated), sum(score for _, score in ranked))
+
+    def test_pruning_and_staleness(self):
+        """测试高频词项被丢弃，以及数据集修改后拒绝打开旧索引"""
+        stats = build_retrieval_index(self.data_file, self.index_dir, num_buckets=1 << 12, max_df_ratio=0.5)
+        self.assertGreater(stats['pruned_terms'], 0)
+        self.assertLess(stats['postings'], self.stats['postings'])
+        with open(self.data_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'src': 'class Z {}', 'complexity': 'constant'}) + '\n')
+        with self.assertRaises(FileReadError):
+            RetrievalIndex(self.index_dir)
+        with self.assertRaises(ValueError):
+            build_retrieval_index(self.data_file, self.index_dir, num_buckets=1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试运行时间拟合模块
+"""
+
+import unittest
+import numpy as np
+from runtime_fit import (CANDIDATE_MODELS, pack_timings, theil_sen_slopes, fit_timings, fit_curves,
+                         slope_to_complexity, synthetic_curves)
+
+SCALES = np.array([50, 100, 200, 400, 800, 1600, 3200], dtype=float)
+
+
+class TestRuntimeFit(unittest.TestCase):
+    """测试批量稳健拟合"""
+
+    def test_pack_timings(self):
+        """测试长度不一的曲线以NaN补齐"""
+        n, t = pack_timings([[(1, 0.1), (2, 0.2)], [], [(4, 0.4)]])
+        self.assertEqual(n.shape, (3, 2))
+        self.assertEqual(t[0, 1], 0.2)
+        self.assertTrue(np.isnan(n[1]).all())
+        self.assertTrue(np.isnan(t[2, 1]))
+
+    def test_theil_sen_ignores_outlier(self):
+        """测试单个预热离群点不影响Theil–Sen斜率"""
+        x = np.log(SCALES)[None, :]
+        y = 2 * x + 0.3
+        y[0, 0] += 3
+        self.assertAlmostEqual(theil_sen_slopes(x, y)[0], 2.0)
+        padded = np.array([[0.0, 1.0, np.nan], [0.0, np.nan, np.nan]])
+        slopes = theil_sen_slopes(padded, padded * 3)
+        self.assertAlmostEqual(slopes[0], 3.0)
+        self.assertTrue(np.isnan(slopes[1]))
+
+    def test_candidate_models(self):
+        """测试含固定开销和JIT预热离群点的曲线得到正确的候选模型"""
+        growth = {
+            'constant': np.zeros_like(SCALES), 'linear': SCALES, 'nlogn': SCALES * np.log(SCALES), 'quadratic': SCALES ** 2, 'cubic': SCALES ** 3
+        }
+        curves = []
+        for label, curve in growth.items():
+            t = 0.5 * curve / max(curve[-1], 1.0) + 0.01
+            t[0] *= 6
+            curves.append(list(zip(SCALES, t)))
+        exponential = np.array([10, 12, 14, 16, 18, 20], dtype=float)
+        curves.append(list(zip(exponential, 1e-3 * 2 ** (exponential - 10) + 0.002)))
+        results = fit_curves(curves)
+        self.assertEqual([result['label'] for result in results], ['constant', 'linear', 'nlogn', 'quadratic', 'cubic', 'np'])
+        for result in results:
+            self.assertGreater(result['confidence'], 0.5)
+            self.assertAlmostEqual(sum(result['probabilities'].values()), 1.0, places=4)
+
+    def test_unfittable_rows(self):
+        """测试测量点不足或耗时低于计时下限的曲线不给出标签"""
+        results = fit_curves([[(50, 0.1), (100, 0.2)], [(50, 1e-6), (100, 2e-6), (200, 4e-6)], []])
+        self.assertTrue(all(result['label'] is None and result['confidence'] is None for result in results))
+        self.assertEqual(fit_curves([]), [])
+
+    def test_short_curves(self):
+        """测试所有曲线都为空或只有一个点时不报错，斜率为NaN"""
+        for curves in ([[]], [[(50, 0.1)]], [[], [(50, 0.1)]]):
+            results = fit_curves(curves, min_points=1)
+            self.assertTrue(all(result['slope'] is None and result['slope_label'] is None for result in results))
+        self.assertTrue(np.isnan(theil_sen_slopes(np.empty((2, 0)), np.empty((2, 0)))).all())
+        fit = fit_timings(*pack_timings([[(50, 0.1)]]))
+        self.assertIsNone(fit['labels'][0])
+        self.assertTrue(np.isnan(fit['slopes'][0]))
+
+    def test_synthetic_batch(self):
+        """测试合成曲线批量拟合的准确率明显高于最小二乘斜率阈值"""
+        n, t, truth = synthetic_curves(500, seed=7)
+        fit = fit_timings(n, t)
+        self.assertEqual(fit['probabilities'].shape, (500, len(CANDIDATE_MODELS)))
+        accuracy = np.mean(fit['labels'] == np.asarray(truth, dtype=object))
+        self.assertGreater(accuracy, 0.9)
+        confident = fit['confidence'] >= 0.9
+        self.assertGreaterEqual(np.mean(fit['labels'][confident] == np.asarray(truth, dtype=object)[confident]),
+                                accuracy)
+
+    def test_slope_to_complexity(self):
+        """测试斜率阈值映射"""
+        self.assertEqual(slope_to_complexity(0.05), 'constant')
+        self.assertEqual(slope_to_complexity(1.0), 'linear')
+        self.assertEqual(slope_to_complexity(1.3), 'nlogn')
+        self.assertEqual(slope_to_complexity(2.1), 'quadratic')
+        self.assertEqual(slope_to_complexity(np.inf), 'np')
+
+
+if __name__ == '__main__':
+    unittest.main()
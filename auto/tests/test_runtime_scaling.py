@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试经验运行时间缩放模块
+"""
+
+import os
+import random
+import subprocess
+import sys
+import unittest
+from unittest import mock
+import runtime_scaling
+from runtime_scaling import (find_jdk, main_class_name, prepare_source, INPUT_GENERATORS, RuntimeScalingEngine,
+                             RuntimeScalingError)
+
+HAS_JDK = find_jdk() is not None
+IS_POSIX = os.name == 'posix'
+
+QUADRATIC = """
+import java.util.*;
+public class Main {
+    public static void main(String[] args) {
+        Scanner in = new Scanner(System.in);
+        int n = in.nextInt();
+        int[] a = new int[n];
+        for (int i = 0; i < n; i++) a[i] = in.nextInt();
+        long count = 0;
+        for (int i = 0; i < n; i++)
+            for (int j = 0; j < n; j++)
+                if (a[i] < a[j]) count++;
+        System.out.println(count);
+        System.exit(0);
+    }
+}
+"""
+
+
+class TestRuntimeScalingHelpers(unittest.TestCase):
+    """测试不依赖JDK的部分"""
+
+    def test_main_class_name(self):
+        """测试入口类名的确定"""
+        self.assertEqual(main_class_name(QUADRATIC), 'Main')
+        self.assertEqual(main_class_name('class Helper {}\nclass Solution { public static void main(String[] a) {} }'),
+                         'Solution')
+        self.assertEqual(main_class_name('public final class Task { public static class Inner {} }'), 'Task')
+        self.assertEqual(main_class_name('interface X {}'), 'Main')
+
+    def test_prepare_source(self):
+        """测试System.exit()被改写为夹具的exit()"""
+        self.assertIn('RuntimeHarness.exit(0)', prepare_source(QUADRATIC))
+        self.assertNotIn('System.exit', prepare_source('if (done) System . exit (1);'))
+
+    def test_input_generators(self):
+        """测试输入生成器首行都是规模n"""
+        for generator in INPUT_GENERATORS.values():
+            text = generator(20, random.Random(1))
+            self.assertEqual(text.split()[0], '20')
+            self.assertTrue(text.endswith('\n'))
+
+    def test_requires_posix(self):
+        """测试没有rlimit的系统上给出明确的错误"""
+        with mock.patch.object(runtime_scaling, 'resource', None):
+            with self.assertRaises(RuntimeScalingError):
+                RuntimeScalingEngine(jobs=1)
+
+    @unittest.skipUnless(IS_POSIX, 'not a POSIX system')
+    def test_limited_command(self):
+        """测试没有prlimit时由启动脚本用setrlimit设置限制后exec原命令"""
+        probe = ('import resource; print(*(resource.getrlimit(limit)[0] for limit in '
+                 '(resource.RLIMIT_CPU, resource.RLIMIT_DATA, resource.RLIMIT_FSIZE)))')
+        command = runtime_scaling._limited_command([sys.executable, '-c', probe], 30, 2048, 64)
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout.split()
+        self.assertEqual(output, [str(30), str(2048 << 20), str(64 << 20)])
+
+
+@unittest.skipUnless(HAS_JDK and IS_POSIX, 'JDK is not installed or not a POSIX system')
+class TestRuntimeScalingEngine(unittest.TestCase):
+    """测试编译、计时与经验标签"""
+
+    def test_quadratic_sample(self):
+        """测试平方复杂度样本得到quadratic附近的经验标签，System.exit()不影响夹具"""
+        with RuntimeScalingEngine(jobs=2, scales=[200, 400, 800, 1600, 3200, 6400], repeats=3) as engine:
+            records = engine.measure_samples([
+                {'sample_id': 1, 'problem': 'P', 'expected_complexity': 'quadratic', 'source': QUADRATIC},
+                {'sample_id': 2, 'problem': 'P', 'expected_complexity': 'linear', 'source': 'class Main {'},
+            ])
+            self.assertEqual(records[0]['status'], 'ok')
+            self.assertEqual(records[0]['input_format'], 'array')
+            self.assertIn(records[0]['empirical'], ('nlogn', 'quadratic', 'cubic'))
+            self.assertEqual(records[1]['status'], 'compile_error')
+            self.assertEqual(engine.restarts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据采样模块
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from sampling import reservoir_sample, stratified_sample, allocate_quota, sample_jsonl
+from data_reader import sample_java_samples
+
+
+class TestSampling(unittest.TestCase):
+    """测试蓄水池采样与分层采样"""
+
+    def setUp(self):
+        """创建标签分布偏斜的临时数据集"""
+        labels = ['linear'] * 70 + ['quadratic'] * 20 + ['np'] * 10
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.jsonl', encoding='utf-8') as f:
+            for i, label in enumerate(labels):
+                record = {'src': f'class T{i} {{}}', 'complexity': label, 'problem': f'P{i % 5}',
+                          'from': 'CODEFORCES' if i % 2 else 'CODECHEF'}
+                f.write(json.dumps(record) + '\n')
+            self.temp_file = f.name
+
+    def tearDown(self):
+        os.unlink(self.temp_file)
+
+    def test_reservoir_sample(self):
+        """测试均匀蓄水池采样的规模与可复现性"""
+        first = reservoir_sample(range(1000), 10, seed=3)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(set(first)), 10)
+        self.assertEqual(first, reservoir_sample(range(1000), 10, seed=3))
+        self.assertEqual(sorted(reservoir_sample(range(5), 10, seed=3)), list(range(5)))
+
+    def test_allocate_quota(self):
+        """测试分层名额分配"""
+        counts = {'linear': 70, 'quadratic': 20, 'np': 10}
+        self.assertEqual(allocate_quota(counts, 10), {'linear': 7, 'quadratic': 2, 'np': 1})
+        self.assertEqual(allocate_quota(counts, 30, 'equal'), {'linear': 10, 'quadratic': 10, 'np': 10})
+        # 层内元素不足时名额转给其他层
+        self.assertEqual(sum(allocate_quota({'a': 1, 'b': 50}, 20, 'equal').values()), 20)
+
+    def test_stratified_sample(self):
+        """测试分层采样保持各层比例"""
+        items = [('linear', i) for i in range(70)] + [('np', i) for i in range(30)]
+        sampled = stratified_sample(items, 10, key=lambda item: item[0], seed=1)
+        self.assertEqual(sum(1 for label, _ in sampled if label == 'linear'), 7)
+        self.assertEqual(sum(1 for label, _ in sampled if label == 'np'), 3)
+
+    def test_sample_jsonl_stratified(self):
+        """测试按复杂度和来源分层抽样JSONL文件"""
+        sampled = sample_jsonl(self.temp_file, 20, stratify_by=['complexity', 'from'], seed=5)
+        self.assertEqual(len(sampled), 20)
+        line_numbers = [line_number for line_number, _ in sampled]
+        self.assertEqual(line_numbers, sorted(line_numbers))
+        labels = [record['complexity'] for _, record in sampled]
+        self.assertEqual(labels.count('linear'), 14)
+        self.assertEqual(sampled, sample_jsonl(self.temp_file, 20, stratify_by=['complexity', 'from'], seed=5))
+
+    def test_sample_java_samples(self):
+        """测试抽样结果为标准化样本格式"""
+        samples = sample_java_samples(self.temp_file, 5, seed=2)
+        self.assertEqual(len(samples), 5)
+        for sample in samples:
+            self.assertIn('expected_complexity', sample)
+            self.assertTrue(sample['source'].startswith('class T'))
+
+
+if __name__ == '__main__':
+    unittest.main()
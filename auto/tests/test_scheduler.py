@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试分析任务调度模块
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from scheduler import (estimate_costs, longest_first, simulate_makespan, makespan_report, in_order,
+                       load_timings)
+from shared_dataset import analyze_in_workers
+from utils import FileReadError
+
+SHORT = 'class A { void f(int n) { for (int i = 0; i < n; i++) { } } }'
+LONG = '\n'.join(f'class B{i} {{ void g(int n) {{ for (int j = 0; j < n; j++) {{ }} }} }}' for i in range(30))
+
+
+class TestCostEstimate(unittest.TestCase):
+    """测试代价估计与派发顺序"""
+
+    def test_estimate_costs(self):
+        """测试按长度、词法单元和历史耗时估计代价"""
+        self.assertEqual(estimate_costs(['ab', 'abcd']), [2.0, 4.0])
+        self.assertEqual(estimate_costs(['a + bc', 'x'], method='tokens'), [3.0, 1.0])
+        # 无历史耗时的样本按其余样本的耗时/长度中位数换算
+        costs = estimate_costs(['ab', 'abcd', 'abcdefgh'], timings={1: 0.2, 2: 0.8}, keys=[1, 2, 3])
+        self.assertEqual(costs[:2], [0.2, 0.8])
+        self.assertAlmostEqual(costs[2], 8 * 0.15)
+        with self.assertRaises(ValueError):
+            estimate_costs(['a'], method='lines')
+        with self.assertRaises(ValueError):
+            estimate_costs(['a'], timings={1: 0.1})
+
+    def test_longest_first(self):
+        """测试按代价降序排列，相同代价保持原顺序"""
+        self.assertEqual(longest_first([1, 5, 3, 5]), [1, 3, 2, 0])
+
+    def test_load_timings(self):
+        """测试读取逐样本明细日志"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'log.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'sample_id': 3, 'duration_ms': 250.0}) + '\n\n')
+            self.assertEqual(load_timings(path), {3: 0.25})
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('{"sample_id": 4}\n')
+            with self.assertRaises(FileReadError):
+                load_timings(path)
+
+
+class TestMakespan(unittest.TestCase):
+    """测试完成时间模拟"""
+
+    def test_simulate_makespan(self):
+        """测试文件末尾的长任务使FIFO拖尾，最长优先接近下界"""
+        durations = [1.0] * 8 + [4.0]
+        self.assertEqual(simulate_makespan(durations, range(9), workers=3), 6.0)
+        self.assertEqual(simulate_makespan(durations, longest_first(durations), workers=3), 4.0)
+        self.assertEqual(simulate_makespan(durations, range(9), workers=3, chunksize=3), 6.0)
+        self.assertEqual(simulate_makespan([], [], workers=2), 0.0)
+
+    def test_makespan_report(self):
+        """测试报告中的FIFO、最长优先与下界"""
+        report = makespan_report([1.0] * 8 + [4.0], [1] * 8 + [4], workers=3)
+        self.assertEqual((report['fifo_s'], report['longest_first_s'], report['lower_bound_s']), (6.0, 4.0, 4.0))
+        self.assertAlmostEqual(report['improvement'], 1 / 3)
+
+
+class TestInOrder(unittest.TestCase):
+    """测试结果按输入顺序恢复"""
+
+    def test_in_order(self):
+        """测试乱序到达的结果按样本序号产出"""
+        arrived = [(2, 'c'), (0, 'a'), (3, 'd'), (1, 'b')]
+        self.assertEqual(list(in_order(arrived)), [(0, 'a'), (1, 'b'), (2, 'c'), (3, 'd')])
+
+    def test_workers_with_order(self):
+        """测试最长优先派发时多进程结果仍按输入顺序且与FIFO一致"""
+        sources = [SHORT, SHORT, LONG, SHORT, LONG]
+        order = longest_first(estimate_costs(sources))
+        self.assertEqual(order[:2], [2, 4])
+        scheduled = list(analyze_in_workers(sources, workers=2, order=order))
+        fifo = list(analyze_in_workers(sources, workers=2))
+        self.assertEqual([result[:3] for result in scheduled], [result[:3] for result in fifo])
+        self.assertEqual([result[0] for result in scheduled], list(range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试序贯评估模块
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from sequential_eval import SequentialEvaluator, stratified_order, wilson_interval, load_baseline_accuracy
+
+
+class TestStratifiedOrder(unittest.TestCase):
+    """测试分层随机顺序"""
+
+    def test_prefix_keeps_proportions(self):
+        """测试任意前缀中各标签比例接近整体比例"""
+        items = ['linear'] * 60 + ['quadratic'] * 30 + ['np'] * 10
+        ordered = stratified_order(items, key=lambda item: item, seed=1)
+        self.assertEqual(sorted(ordered), sorted(items))
+        prefix = ordered[:20]
+        self.assertAlmostEqual(prefix.count('linear'), 12, delta=2)
+        self.assertAlmostEqual(prefix.count('quadratic'), 6, delta=2)
+        self.assertAlmostEqual(prefix.count('np'), 2, delta=1)
+
+    def test_seed_reproducible(self):
+        """测试相同种子得到相同顺序"""
+        items = list(range(50))
+        first = stratified_order(items, key=lambda item: item % 3, seed=7)
+        second = stratified_order(items, key=lambda item: item % 3, seed=7)
+        self.assertEqual(first, second)
+
+
+class TestSequentialEvaluator(unittest.TestCase):
+    """测试序贯置信区间与提前停止"""
+
+    def test_wilson_interval(self):
+        """测试Wilson区间包含点估计"""
+        low, high = wilson_interval(70, 100, 0.05)
+        self.assertLess(low, 0.7)
+        self.assertGreater(high, 0.7)
+        self.assertEqual(wilson_interval(0, 0, 0.05), (0.0, 1.0))
+
+    def test_stop_when_better_than_baseline(self):
+        """测试准确率明显高于基线时提前停止"""
+        evaluator = SequentialEvaluator(target_width=0.001, baseline=0.5)
+        for _ in range(1000):
+            if evaluator.update(True):
+                break
+        self.assertTrue(evaluator.stopped)
+        self.assertEqual(evaluator.reason, 'better_than_baseline')
+        summary = evaluator.summary(1000)
+        self.assertEqual(summary['samples_saved'], 1000 - evaluator.n)
+        self.assertGreater(summary['samples_saved'], 0)
+
+    def test_stop_when_worse_than_baseline(self):
+        """测试准确率明显低于基线时提前停止"""
+        evaluator = SequentialEvaluator(target_width=0.001, baseline=0.9)
+        for i in range(1000):
+            if evaluator.update(i % 2 == 0):
+                break
+        self.assertEqual(evaluator.reason, 'worse_than_baseline')
+
+    def test_exhausted(self):
+        """测试样本耗尽时未提前停止"""
+        evaluator = SequentialEvaluator(target_width=0.01)
+        for i in range(50):
+            evaluator.update(i % 3 == 0)
+        summary = evaluator.summary(50)
+        self.assertFalse(summary['stopped_early'])
+        self.assertEqual(summary['reason'], 'exhausted')
+        self.assertEqual(summary['samples_saved'], 0)
+        self.assertLess(summary['ci_low'], summary['accuracy'])
+
+    def test_load_baseline_accuracy(self):
+        """测试从结果文件读取百分数形式的基线准确率，1%以下的基线不被误当作比例"""
+        cases = [({'accuracy': 71.75}, 0.7175), ({'accuracy': 0.5}, 0.005), ({'accuracy': 1.0}, 0.01),
+                 ({'accuracy': 0.3, 'correct': 3, 'total': 1000}, 0.003)]
+        for summary, expected in cases:
+            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
+                json.dump({'summary': summary}, f)
+                temp_file = f.name
+            try:
+                self.assertAlmostEqual(load_baseline_accuracy(temp_file), expected)
+            finally:
+                os.unlink(temp_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共享内存数据集模块
+"""
+
+import os
+import tempfile
+import unittest
+from java_complexity_analyzer import analyze_java_complexity, ANALYZER_VERSION
+from parse_registry import ParseFailureRegistry
+from shared_dataset import SharedSourceArena, analyze_in_workers, build_tasks, task_ipc_bytes
+
+LINEAR = 'class A { void f(int n) { for (int i = 0; i < n; i++) { } } }'
+QUADRATIC = ('class B { void g(int n) { for (int i = 0; i < n; i++) { for (int j = 0; j < n; j++) { } } } '
+             '// 注释：平方\n}')
+BROKEN = 'class C { void h( { }'
+
+
+class TestSharedSourceArena(unittest.TestCase):
+    """测试共享内存区的写入、读取与传输字节数"""
+
+    def test_round_trip(self):
+        """测试多字节字符和空字符串按偏移原样读回"""
+        sources = [LINEAR, QUADRATIC, '', '"é中"']
+        with SharedSourceArena(sources) as arena:
+            self.assertEqual(len(arena), 4)
+            self.assertEqual([arena.source(i) for i in range(4)], sources)
+            self.assertEqual(arena.nbytes, sum(len(s.encode('utf-8')) for s in sources))
+        with SharedSourceArena([]) as arena:
+            self.assertEqual(len(arena), 0)
+
+    def test_ipc_bytes(self):
+        """测试共享内存任务的传输字节数与源代码长度无关"""
+        sources = [QUADRATIC * 20 + f'// {i}' for i in range(50)]
+        with SharedSourceArena(sources) as arena:
+            shared = task_ipc_bytes(build_tasks(sources, arena), chunksize=10)
+        pickled = task_ipc_bytes(build_tasks(sources, None), chunksize=10)
+        self.assertLess(shared * 100, pickled)
+
+
+class TestAnalyzeInWorkers(unittest.TestCase):
+    """测试多进程分析结果与单进程一致"""
+
+    def test_matches_serial(self):
+        """测试两种传输方式都按输入顺序返回与单进程相同的结果"""
+        sources = [LINEAR, QUADRATIC, BROKEN] * 4
+        expected = [analyze_java_complexity(source) for source in sources[:2]] * 4
+        for transport in ('shared', 'pickle'):
+            results = list(analyze_in_workers(sources, workers=2, transport=transport, chunksize=2))
+            self.assertEqual([index for index, *_ in results], list(range(len(sources))))
+            outputs = [output for _, output, _, _ in results]
+            self.assertEqual([output for i, output in enumerate(outputs) if i % 3 != 2], expected)
+            self.assertTrue(all(output == 'error' for output in outputs[2::3]))
+        with self.assertRaises(ValueError):
+            list(analyze_in_workers(sources, workers=2, transport='queue'))
+
+    def test_registry_events(self):
+        """测试工作进程中的解析失败写回主进程的登记表，再次运行时被跳过"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'registry.jsonl')
+            registry = ParseFailureRegistry(path, ANALYZER_VERSION)
+            list(analyze_in_workers([BROKEN, LINEAR], workers=2, registry=registry))
+            self.assertEqual(registry.summary()['new_failures'], 1)
+            registry.close()
+
+            registry = ParseFailureRegistry(path, ANALYZER_VERSION)
+            results = list(analyze_in_workers([BROKEN, LINEAR, BROKEN], workers=2, registry=registry))
+            self.assertEqual(registry.summary()['skipped'], 2)
+            self.assertEqual(registry.summary()['new_failures'], 0)
+            self.assertEqual([output for _, output, _, _ in results][:2], ['error', 'linear'])
+            registry.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
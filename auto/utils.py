@@ -21,6 +21,10 @@ class AnalysisError(Exception):
     """分析过程中的异常类"""
     pass
 
+class ParseError(AnalysisError):
+    """解析器无法解析源代码时的异常类"""
+    pass
+
 class DataFormatError(Exception):
     """数据格式错误异常类"""
     pass
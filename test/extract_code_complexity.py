@@ -1,6 +1,14 @@
 import json
 import os
-def get_source_and_complexity(file_path, max_lines=float('inf'), filter_complexity=None):
+import sys
+
+# 复用auto目录下的抽样模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'auto'))
+from sampling import sample_jsonl
+
+
+def get_source_and_complexity(file_path, max_lines=float('inf'), filter_complexity=None,
+                              sample_size=None, stratify_by=None, seed=None):
     """
     从JSONL文件中提取每一行的源代码和复杂度信息
     
@@ -8,6 +16,9 @@ def get_source_and_complexity(file_path, max_lines=float('inf'), filter_complexi
     file_path (str): JSONL文件路径
     max_lines (int): 最大处理行数，默认为处理所有行
     filter_complexity (str, optional): 按复杂度筛选，如 'linear', 'quadratic' 等，默认不筛选
+    sample_size (int, optional): 抽样规模，指定时单次流式遍历抽取样本子集，而不是取前N行
+    stratify_by (list, optional): 抽样分层字段，如['complexity']或['complexity', 'from']，默认均匀抽样
+    seed (int, optional): 抽样随机种子
     
     返回:
     list: 包含字典的列表，每个字典包含'src', 'complexity'和其他相关字段
@@ -15,6 +26,21 @@ def get_source_and_complexity(file_path, max_lines=float('inf'), filter_complexi
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"文件 {file_path} 不存在")
     
+    if sample_size:
+        sampled = sample_jsonl(
+            file_path, sample_size, stratify_by=stratify_by, seed=seed,
+            max_lines=None if max_lines == float('inf') else int(max_lines),
+            filter_fn=(lambda data: data.get('complexity', 'unknown') == filter_complexity) if filter_complexity else None,
+            skip_invalid=True
+        )
+        return [{
+            'src': data.get('src', ''),
+            'complexity': data.get('complexity', 'unknown'),
+            'problem': data.get('problem', ''),
+            'from': data.get('from', ''),
+            'line_number': line_number
+        } for line_number, data in sampled]
+    
     results = []
     line_number = 0
     
@@ -158,5 +184,6 @@ if __name__ == "__main__":
     print("1. 获取所有代码和复杂度: get_source_and_complexity(file_path)")
     print("2. 获取前100条: get_source_and_complexity(file_path, max_lines=100)")
     print("3. 筛选特定复杂度: get_source_and_complexity(file_path, filter_complexity='linear')")
+    print("   分层抽样200条: get_source_and_complexity(file_path, sample_size=200, stratify_by=['complexity'], seed=0)")
     print("4. 显示结果: display_results(results, preview_lines=5)")
     print("5. 统计复杂度分布: count_complexity_types(results)")
\ No newline at end of file